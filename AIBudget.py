@@ -0,0 +1,190 @@
+"""
+AIBudget.py
+Daily AI call budget, reserved per event by impact.
+
+MAX_DAILY_AI_CALLS used to be one counter shared by every call: once minor
+releases and their retries had used it up, all later events that day were
+skipped, NFP included. The day's calls are now split up front (and again when
+the calendar changes):
+
+- Reservations: today's events from calendar_statement.csv (_Currencies_) are
+  ordered by calendar Impact, then News.get_impact_level(categorize_event())
+  (Monetary first, Sentiment last), then release time. Each reserves
+  AI_BUDGET_CALLS[Impact] calls until MAX_DAILY_AI_CALLS - AI_BUDGET_POOL is
+  reserved, so a lower-priority event only gets what the higher ones left.
+- Charging: calls made for an event (fetch, retries, validation, signals) come
+  out of its reservation first, then out of the shared pool. Calls for no
+  event use the pool only. An event that is done or given up hands what it
+  did not use back to the pool.
+
+_AIBudget_ is kept by the state store, so a restart does not hand the day's
+calls out again; metrics() (GET /ai/budget) reports the usage.
+
+Usage:
+    if AIBudget.can_spend(event_key):
+        AIBudget.charge(event_key)
+    token = AIBudget.set_event(event_key)   # query_chatgpt() calls now charge the event
+    AIBudget.reset_event(token)
+"""
+
+import contextvars
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import Globals
+
+
+# Calendar Impact → priority (lower first); anything else comes last
+IMPACT_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+# Event the AI calls of the current thread are charged to (None = pool)
+_event: contextvars.ContextVar = contextvars.ContextVar("ai_budget_event", default=None)
+
+_LOCK = threading.RLock()
+
+
+def set_event(event_key: Optional[str]):
+    """Charge the AI calls this thread makes from now on to an event; returns a token for reset_event()."""
+    return _event.set(event_key)
+
+
+def reset_event(token) -> None:
+    _event.reset(token)
+
+
+def current_event() -> Optional[str]:
+    """Event the current thread's AI calls are charged to (None = pool)."""
+    return _event.get()
+
+
+def _now() -> datetime:
+    import News
+
+    return News._clock()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ALLOCATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def priority(event) -> tuple:
+    """Sort key: calendar Impact, category impact level, release time."""
+    from News import categorize_event, get_impact_level
+
+    return (IMPACT_RANK.get(event.get('impact') or "", len(IMPACT_RANK)),
+            get_impact_level(categorize_event(event.get('event') or "")),
+            event.get('event_time'))
+
+
+def _todays_events(day) -> Dict[str, object]:
+    return {key: event for key, event in Globals._Currencies_.items()
+            if event.get('event_time') is not None and event.get('event_time').date() == day}
+
+
+def _allocate(budget: dict, events: Dict[str, object]) -> None:
+    """Reserve calls for today's events in priority order; usage already charged is kept."""
+    reservable = max(0, Globals.MAX_DAILY_AI_CALLS - Globals.AI_BUDGET_POOL)
+    default = min(Globals.AI_BUDGET_CALLS.values(), default=1)
+    previous = budget["events"]
+    allocated = {}
+    for key, event in sorted(events.items(), key=lambda item: priority(item[1])):
+        reserved = min(Globals.AI_BUDGET_CALLS.get(event.get('impact') or "", default), reservable)
+        reservable -= reserved
+        allocated[key] = {"reserved": reserved, "used": previous.get(key, {}).get("used", 0)}
+    # Events gone from the calendar keep what they spent (charged to the pool)
+    for key, entry in previous.items():
+        if key not in allocated:
+            allocated[key] = {"reserved": 0, "used": entry["used"]}
+    budget["events"] = allocated
+    budget["calendar"] = sorted(events)
+
+
+def _state(now: datetime) -> dict:
+    """Today's budget, started over on a new day and re-allocated when the calendar changed."""
+    budget = Globals._AIBudget_
+    day = now.date()
+    if budget.get("day") != day.isoformat():
+        budget.clear()
+        budget.update({"day": day.isoformat(), "used": 0, "pool_used": 0, "denied": 0,
+                       "events": {}, "calendar": []})
+    events = _todays_events(day)
+    if sorted(events) != budget["calendar"]:
+        _allocate(budget, events)
+    Globals.ai_calls_today = budget["used"]   # also after a restart restored _AIBudget_
+    return budget
+
+
+def _pending(key: str) -> bool:
+    """Still holds its reservation: not fetched and not given up."""
+    event = Globals._Currencies_.get(key)
+    if event is None or event.get('actual') is not None:
+        return False
+    return not event.get('retry_count') or event.get('retry_after') is not None
+
+
+def _pool_free(budget: dict) -> int:
+    held = overspent = 0
+    for key, entry in budget["events"].items():
+        reserved, used = entry["reserved"], entry["used"]
+        held += reserved if _pending(key) else min(used, reserved)
+        overspent += max(0, used - reserved)
+    return Globals.MAX_DAILY_AI_CALLS - held - overspent - budget["pool_used"]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SPENDING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def can_spend(event_key: Optional[str] = None, calls: int = 1) -> bool:
+    """
+    Whether `calls` more AI calls fit: the event's unused reservation plus the shared pool.
+
+    Args:
+        event_key: Event the calls are for (default: the thread's set_event(), None = pool only)
+        calls: Number of calls
+    """
+    event_key = event_key if event_key is not None else _event.get()
+    with _LOCK:
+        budget = _state(_now())
+        entry = budget["events"].get(event_key)
+        own = max(0, entry["reserved"] - entry["used"]) if entry is not None else 0
+        return own + _pool_free(budget) >= calls
+
+
+def charge(event_key: Optional[str] = None, calls: int = 1) -> None:
+    """Count AI calls against the event's reservation (or the pool) and Globals.ai_calls_today."""
+    event_key = event_key if event_key is not None else _event.get()
+    with _LOCK:
+        now = _now()
+        budget = _state(now)
+        entry = budget["events"].get(event_key)
+        if entry is not None:
+            entry["used"] += calls
+        else:
+            budget["pool_used"] += calls
+        budget["used"] += calls
+        Globals.ai_calls_today = budget["used"]
+        Globals.ai_calls_reset_date = now.date()
+
+
+def deny() -> None:
+    """Count a call that was not made for lack of budget (metrics)."""
+    with _LOCK:
+        _state(_now())["denied"] += 1
+
+
+def metrics() -> dict:
+    """Today's budget: totals, shared pool, and reserved/used per event."""
+    with _LOCK:
+        budget = _state(_now())
+        return {
+            "day": budget["day"],
+            "limit": Globals.MAX_DAILY_AI_CALLS,
+            "used": budget["used"],
+            "remaining": max(0, Globals.MAX_DAILY_AI_CALLS - budget["used"]),
+            "pool_free": max(0, _pool_free(budget)),
+            "pool_used": budget["pool_used"],
+            "denied": budget["denied"],
+            "events": {key: dict(entry, pending=_pending(key)) for key, entry in budget["events"].items()},
+        }
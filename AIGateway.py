@@ -0,0 +1,423 @@
+"""
+AIGateway.py
+Async AI client layer: hard deadlines, cancellation and hedged requests.
+
+The OpenAI SDK calls in AI_Perplexity / AI_ChatGPT were synchronous with no
+timeout, so one hung provider held the event pipeline - and every event queued
+behind it - indefinitely. Provider calls now run as asyncio tasks on a single
+background event loop thread; the calling thread waits on the result with a
+deadline:
+
+- Deadline: every call has one. News sets it to the end of the event's trading
+  window (AI_EVENT_WINDOW after release) with set_deadline(); calls made
+  without one get AI_CALL_TIMEOUT. When it passes, the request task is
+  cancelled (the HTTP request is closed) and the caller gets DeadlineExceeded.
+- Hedging: if the model has not answered within the AI_HEDGE_PERCENTILE of its
+  recent latencies (AI_HEDGE_AFTER until AI_HEDGE_MIN_SAMPLES are known), the
+  same request also goes to its AI_HEDGE_MODELS entry. The first answer wins
+  and the other request is cancelled. The hedge is a second paid call: it is
+  charged to the caller's AIBudget event when it launches, and not sent at all
+  when the budget has no call left.
+- Racing: race() sends one query to several backends at once ("provider:model"
+  or "adapter:<name>" for a local function registered with register_adapter()).
+  The first answer the caller accepts wins, the others are cancelled, and
+  race_stats() reports each backend's win rate and latency (GET /ai/race also
+  prints it with print_race_report()).
+- Latency: answers are timed per "provider:model"; these samples set the hedge
+  threshold. An attempt cancelled because another won only tells that it
+  would have taken longer than it ran, so its elapsed time is kept apart as a
+  censored sample: the race report shows both, the hedge threshold only uses
+  answers.
+
+Usage:
+    token = AIGateway.set_deadline(time.time() + 120)
+    try:
+        text = AIGateway.complete("perplexity", "sonar-pro", messages)
+    finally:
+        AIGateway.reset_deadline(token)
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import Globals
+import AIBudget
+import LatencyTrace
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed before any provider answered; the requests were cancelled."""
+
+
+class NoCleanAnswer(ValueError):
+    """Every race backend failed or was rejected; `answers` holds the rejected answers."""
+
+    def __init__(self, answers: List[str]):
+        super().__init__(f"no clean answer ({len(answers)} rejected)")
+        self.answers = answers
+
+
+# (name, seconds after the start before it is launched, coroutine factory)
+Attempt = Tuple[str, float, Callable[[], Awaitable[Any]]]
+
+# Provider → (Globals API key attribute, base URL)
+PROVIDERS = {
+    "chatgpt": ("API_KEY_GPT", None),
+    "perplexity": ("API_KEY_PPXT", "https://api.perplexity.ai"),
+}
+
+# Race backends "adapter:<name>" → fetch(event_name, currency, date, request_type) -> str
+_adapters: Dict[str, Callable[..., Any]] = {}
+
+# Races entered and won per backend: name → {"races": n, "wins": n}
+_race_counts: Dict[str, Dict[str, int]] = {}
+
+# Latency samples kept per provider/model for the hedge threshold
+LATENCY_SAMPLES = 50
+
+# Absolute deadline (time.time()) of the AI calls made by the current thread
+_deadline: contextvars.ContextVar = contextvars.ContextVar("ai_deadline", default=None)
+
+# Successful call latencies: "provider:model" → recent seconds
+_latencies: Dict[str, Deque[float]] = {}
+# Cancelled attempts (censored: the answer would have taken longer): name → recent seconds ran
+_censored: Dict[str, Deque[float]] = {}
+_stats_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], Any] = {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DEADLINES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def set_deadline(deadline: Optional[float]):
+    """
+    Bound the AI calls this thread makes from now on.
+
+    Args:
+        deadline: Absolute time.time() by which the calls must have answered (None = AI_CALL_TIMEOUT per call)
+
+    Returns:
+        Token for reset_deadline()
+    """
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token) -> None:
+    _deadline.reset(token)
+
+
+def current_deadline() -> float:
+    """The thread's deadline, or AI_CALL_TIMEOUT from now."""
+    deadline = _deadline.get()
+    if deadline is None:
+        deadline = time.time() + Globals.AI_CALL_TIMEOUT
+    return deadline
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LATENCY STATS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def record_latency(name: str, seconds: float) -> None:
+    with _stats_lock:
+        _latencies.setdefault(name, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+
+def record_censored(name: str, seconds: float) -> None:
+    """An attempt cancelled after `seconds` without answering (a lower bound on its latency)."""
+    with _stats_lock:
+        _censored.setdefault(name, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+
+def latency_percentile(name: str, percentile: float) -> Optional[float]:
+    """Recent latency percentile of a provider/model, None until AI_HEDGE_MIN_SAMPLES are known."""
+    with _stats_lock:
+        samples = list(_latencies.get(name, ()))
+    if len(samples) < max(1, Globals.AI_HEDGE_MIN_SAMPLES):
+        return None
+    return LatencyTrace.percentile(samples, percentile)
+
+
+def hedge_after(name: str) -> float:
+    """Seconds to wait on `name` before hedging."""
+    threshold = latency_percentile(name, Globals.AI_HEDGE_PERCENTILE)
+    return Globals.AI_HEDGE_AFTER if threshold is None else threshold
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EVENT LOOP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """The background loop all AI calls run on (started on first use)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="AIGateway", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def run(factory: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the gateway loop and wait for it until the deadline.
+
+    Args:
+        factory: Returns the coroutine to run
+        deadline: Absolute time.time() (default: current_deadline())
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        DeadlineExceeded: The deadline passed first; the coroutine was cancelled
+    """
+    remaining = (deadline if deadline is not None else current_deadline()) - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded("AI call deadline already passed")
+
+    future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(factory(), remaining), _get_loop())
+    try:
+        return future.result()
+    except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+        raise DeadlineExceeded(f"no AI answer within {remaining:.1f}s") from None
+    except BaseException:
+        future.cancel()
+        raise
+
+
+async def first_of(attempts: List[Attempt], accept: Optional[Callable[[Any], bool]] = None) -> Tuple[str, Any]:
+    """
+    Launch attempts at their start delays; the first accepted result wins.
+
+    An attempt is launched early when everything running has already failed.
+    The attempts still running when a winner is found are cancelled.
+
+    Args:
+        attempts: (name, start delay in seconds, coroutine factory)
+        accept: Optional check on a result (False = treat as failed)
+
+    Returns:
+        (name, result) of the winning attempt
+
+    Raises:
+        The last failure when no attempt succeeds
+    """
+    queue = sorted(attempts, key=lambda attempt: attempt[1])
+    pending: Dict[asyncio.Task, str] = {}
+    started = time.monotonic()
+    error: Optional[BaseException] = None
+
+    async def timed(name: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        begin = time.monotonic()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            record_censored(name, time.monotonic() - begin)
+            raise
+        record_latency(name, time.monotonic() - begin)
+        return result
+
+    try:
+        while queue or pending:
+            elapsed = time.monotonic() - started
+            while queue and (queue[0][1] <= elapsed or not pending):
+                name, _, factory = queue.pop(0)
+                pending[asyncio.ensure_future(timed(name, factory))] = name
+            timeout = max(0.0, queue[0][1] - elapsed) if queue else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if accept is None or accept(result):
+                    return name, result
+                error = ValueError(f"{name}: answer rejected")
+        raise error if error is not None else ValueError("no AI attempts")
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def race_stats() -> Dict[str, dict]:
+    """
+    Per race backend: races, wins, win rate, p50/p90 latency of its answers and,
+    for the races it lost by being cancelled, how long it had run (p50 seconds).
+    The answer percentiles leave the cancelled attempts out, so a backend that
+    mostly loses looks faster than it is: read them together with "cancelled".
+    """
+    with _stats_lock:
+        counts = {name: dict(count) for name, count in _race_counts.items()}
+        latencies = {name: list(_latencies.get(name, ())) for name in counts}
+        censored = {name: list(_censored.get(name, ())) for name in counts}
+    return {
+        name: {
+            "races": count["races"],
+            "wins": count["wins"],
+            "win_rate": count["wins"] / count["races"] if count["races"] else 0.0,
+            "p50": LatencyTrace.percentile(latencies[name], 50),
+            "p90": LatencyTrace.percentile(latencies[name], 90),
+            "cancelled": len(censored[name]),
+            "cancelled_p50": LatencyTrace.percentile(censored[name], 50),
+        }
+        for name, count in counts.items()
+    }
+
+
+def print_race_report(stats: Optional[Dict[str, dict]] = None) -> None:
+    """Print race_stats(): which backend answers first on release."""
+    stats = race_stats() if stats is None else stats
+    print("=" * 94)
+    print("ACTUAL-VALUE RACE (p50/p90: answers only; cancelled: attempts stopped after > N s)")
+    print("=" * 94)
+    print(f"{'Backend':<36} {'Races':>6} {'Wins':>6} {'Win %':>7} {'p50 (s)':>8} {'p90 (s)':>8} "
+          f"{'Cancel':>7} {'> p50 (s)':>10}")
+    print("-" * 94)
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]["win_rate"]):
+        print(f"{name:<36} {s['races']:>6} {s['wins']:>6} {s['win_rate'] * 100:>7.1f} {s['p50']:>8.2f} {s['p90']:>8.2f} "
+              f"{s['cancelled']:>7} {s['cancelled_p50']:>10.2f}")
+    print("=" * 94)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROVIDERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _client(provider: str):
+    """AsyncOpenAI client per provider and key (created on the gateway loop)."""
+    from openai import AsyncOpenAI
+
+    key_name, base_url = PROVIDERS[provider]
+    api_key = getattr(Globals, key_name)
+    client = _clients.get((provider, api_key))
+    if client is None:
+        # Retries are the caller's decision (fetch_actual_value reschedules); the gateway only races
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        _clients[(provider, api_key)] = client
+    return client
+
+
+async def request(provider: str, model: str, messages: List[dict]) -> str:
+    """One chat completion; cancelling the task closes the HTTP request."""
+    response = await _client(provider).chat.completions.create(model=model, messages=messages)
+    return response.choices[0].message.content.strip()
+
+
+def complete(provider: str, model: str, messages: List[dict]) -> str:
+    """
+    Chat completion with the thread's deadline, hedged with AI_HEDGE_MODELS[model].
+
+    Args:
+        provider: "perplexity" or "chatgpt"
+        model: Model asked first
+        messages: Chat messages
+
+    Returns:
+        str: The first answer
+
+    Raises:
+        DeadlineExceeded: No model answered before the deadline
+    """
+    name = f"{provider}:{model}"
+    attempts: List[Attempt] = [(name, 0.0, lambda: request(provider, model, messages))]
+    hedge_model = Globals.AI_HEDGE_MODELS.get(model)
+    delay = hedge_after(name)
+    # The attempts run on the gateway loop: charge the hedge to this thread's event
+    event_key = AIBudget.current_event()
+    if hedge_model and AIBudget.can_spend(event_key):
+        async def hedge() -> str:
+            AIBudget.charge(event_key)   # only once it is actually sent
+            return await request(provider, hedge_model, messages)
+
+        attempts.append((f"{provider}:{hedge_model}", delay, hedge))
+
+    winner, text = run(lambda: first_of(attempts))
+    if winner != name:
+        print(f"[AI GATEWAY] {name} gave no answer within {delay:.1f}s - answered by {winner}")
+    return text
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RACING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def register_adapter(name: str, fetch: Callable[..., Any]) -> None:
+    """
+    Make a local source available as race backend "adapter:<name>".
+
+    Args:
+        name: Adapter name
+        fetch: fetch(event_name, currency, date, request_type) -> str in the AI answer
+               format ("Forecast : X, Actual : Y"); a coroutine function or a plain
+               function (run in a thread)
+    """
+    _adapters[name] = fetch
+
+
+async def _race_backend(backend: str, messages: List[dict], event_args: tuple) -> str:
+    provider, _, model = backend.partition(":")
+    if provider == "adapter":
+        fetch = _adapters[model]
+        if asyncio.iscoroutinefunction(fetch):
+            return await fetch(*event_args)
+        return await asyncio.to_thread(fetch, *event_args)
+    return await request(provider, model, messages)
+
+
+def race(backends: List[str], messages: List[dict], event_args: tuple, accept: Callable[[str], bool]) -> str:
+    """
+    Send one query to every backend at once; the first accepted answer wins.
+
+    Args:
+        backends: "provider:model" or "adapter:<name>" entries
+        messages: Chat messages for the AI backends
+        event_args: (event_name, currency, date, request_type) for adapters
+        accept: Whether an answer parsed cleanly (rejected answers lose)
+
+    Returns:
+        str: The winning answer
+
+    Raises:
+        DeadlineExceeded: No backend answered before the thread's deadline
+        NoCleanAnswer: Every backend failed or was rejected
+    """
+    rejected: List[str] = []
+
+    def check(text: str) -> bool:
+        if accept(text):
+            return True
+        rejected.append(text)
+        return False
+
+    attempts: List[Attempt] = [(backend, 0.0, lambda backend=backend: _race_backend(backend, messages, event_args))
+                               for backend in backends]
+    winner = None
+    try:
+        winner, text = run(lambda: first_of(attempts, check))
+        print(f"[AI RACE] {winner} answered first")
+        return text
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        if rejected:
+            raise NoCleanAnswer(rejected) from e
+        raise
+    finally:
+        with _stats_lock:
+            for backend in backends:
+                count = _race_counts.setdefault(backend, {"races": 0, "wins": 0})
+                count["races"] += 1
+                count["wins"] += backend == winner
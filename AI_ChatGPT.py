@@ -7,8 +7,39 @@ NOTE: These functions are EXAMPLES/TEMPLATES.
       Use these patterns when building the real News.py implementation.
 """
 
+import os
+
+import AIBudget
+import AIGateway
 import Globals
-from openai import OpenAI
+
+
+# Instruction files read once and re-read only when they change on disk
+# Format: filename → (mtime, text)
+_INSTRUCTIONS = {}
+
+# Relative instruction file names resolve next to this module, not the working directory
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_instructions(filename):
+    """
+    Read an instruction set (News_Rules.txt, News_Research.txt), cached by mtime.
+    
+    Args:
+        filename (str): Instruction file name
+        
+    Returns:
+        str: File contents
+    """
+    filename = os.path.join(_SCRIPT_DIR, filename)
+    mtime = os.path.getmtime(filename)
+    cached = _INSTRUCTIONS.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(filename, "r", encoding="utf-8") as f:
+            cached = (mtime, f.read())
+        _INSTRUCTIONS[filename] = cached
+    return cached[1]
 
 
 def query_chatgpt(prompt, system_instructions=None):
@@ -22,23 +53,17 @@ def query_chatgpt(prompt, system_instructions=None):
         
     Returns:
         str: ChatGPT's response
+        
+    Raises:
+        AIGateway.DeadlineExceeded: No answer before the caller's deadline (AIGateway.set_deadline)
     """
     import time
     
     # Add delay before API call to avoid rate limiting
     time.sleep(Globals.AI_REQUEST_DELAY)
     
-    # Track AI usage
-    from datetime import date
-    today = date.today()
-    
-    if Globals.ai_calls_reset_date != today:
-        Globals.ai_calls_today = 0
-        Globals.ai_calls_reset_date = today
-    
-    Globals.ai_calls_today += 1
-    
-    client = OpenAI(api_key=Globals.API_KEY_GPT)
+    # Track AI usage (charged to the event being processed, else the shared pool)
+    AIBudget.charge()
     
     # If system instructions provided, use them; otherwise just send user message
     if system_instructions:
@@ -49,12 +74,7 @@ def query_chatgpt(prompt, system_instructions=None):
     else:
         messages = [{"role": "user", "content": prompt}]
     
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages
-    )
-    
-    return response.choices[0].message.content.strip()
+    return AIGateway.complete("chatgpt", "gpt-4", messages)
 
 
 def validate_news_data(perplexity_response):
@@ -68,8 +88,7 @@ def validate_news_data(perplexity_response):
         str: ChatGPT's validated/corrected response
     """
     # Load News_Research instructions
-    with open("News_Research.txt", "r", encoding="utf-8") as f:
-        research_instructions = f.read()
+    research_instructions = load_instructions("News_Research.txt")
     
     validation_prompt = f"""
 Validate and correct this response if needed:
@@ -96,8 +115,7 @@ def generate_trading_signals(currency, event_name, forecast, actual):
         str: Trading signals in format "PAIR : ACTION, PAIR : ACTION" or "NEUTRAL"
     """
     # Load News_Rules instructions
-    with open("News_Rules.txt", "r", encoding="utf-8") as f:
-        rules_instructions = f.read()
+    rules_instructions = load_instructions("News_Rules.txt")
     
     # Get available trading pairs from Globals._Symbols_
     available_pairs = list(Globals._Symbols_.keys())
@@ -128,8 +146,7 @@ def generate_trading_signals_multiple(currency, events):
         str: Trading signals in format "PAIR : ACTION, PAIR : ACTION" or "NEUTRAL"
     """
     # Load News_Rules instructions
-    with open("News_Rules.txt", "r", encoding="utf-8") as f:
-        rules_instructions = f.read()
+    rules_instructions = load_instructions("News_Rules.txt")
     
     # Build events description
     events_desc = "\n".join([
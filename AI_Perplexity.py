@@ -7,8 +7,12 @@ NOTE: These functions are EXAMPLES/TEMPLATES.
       Use these patterns when building the real News.py implementation.
 """
 
+import re
+
 import Globals
-from openai import OpenAI
+import AIBudget
+import AIGateway
+from AI_ChatGPT import load_instructions
 
 
 def query_perplexity(prompt, system_instructions=None):
@@ -21,9 +25,10 @@ def query_perplexity(prompt, system_instructions=None):
         
     Returns:
         str: Perplexity's response
+        
+    Raises:
+        AIGateway.DeadlineExceeded: No answer before the caller's deadline (AIGateway.set_deadline)
     """
-    client = OpenAI(api_key=Globals.API_KEY_PPXT, base_url="https://api.perplexity.ai")
-    
     # Default system message if none provided
     if system_instructions is None:
         system_instructions = (
@@ -42,12 +47,8 @@ def query_perplexity(prompt, system_instructions=None):
         }
     ]
     
-    response = client.chat.completions.create(
-        model="sonar-pro",
-        messages=messages
-    )
-    
-    return response.choices[0].message.content.strip()
+    # Hedged with a second model when slow, cancelled at the deadline
+    return AIGateway.complete("perplexity", "sonar-pro", messages)
 
 
 def get_news_data(event_name, currency, date, request_type="both"):
@@ -66,9 +67,13 @@ def get_news_data(event_name, currency, date, request_type="both"):
         str: Perplexity's response in format "Forecast : X" or "Actual : Y" or both
     """
     # Load News_Research instructions
-    with open("News_Research.txt", "r", encoding="utf-8") as f:
-        research_instructions = f.read()
+    research_instructions = load_instructions("News_Research.txt")
     
+    return query_perplexity(_news_query(event_name, currency, date, request_type), research_instructions)
+
+
+def _news_query(event_name, currency, date, request_type):
+    """MyFxBook query for get_news_data() / race_news_data()."""
     # Build the query based on request type
     if request_type == "forecast":
         query = f"Find the Forecast value for: {currency} {event_name} on {date}. Check MyFxBook Economic Calendar (https://www.myfxbook.com/forex-economic-calendar). Return ONLY in format: Forecast : [number]"
@@ -77,7 +82,82 @@ def get_news_data(event_name, currency, date, request_type="both"):
     else:  # both
         query = f"Find the Forecast and Actual values for: {currency} {event_name} on {date}. Check MyFxBook Economic Calendar (https://www.myfxbook.com/forex-economic-calendar). Return ONLY in format: Forecast : [number], Actual : [number]. If Actual is not released yet, return: Forecast : [number], Actual : FALSE"
     
-    return query_perplexity(query, research_instructions)
+    return query
+
+
+def race_news_data(event_name, currency, date, request_type="both", forecast=None):
+    """
+    get_news_data() raced across Globals.AI_RACE_BACKENDS.
+    The same query goes to every backend at once; the first answer that parses
+    cleanly (and whose Actual is within AI_RACE_TOLERANCE of the forecast) wins
+    and the slower requests are cancelled. AIGateway.race_stats() shows which
+    backend wins and how fast.
+    
+    Args:
+        event_name (str): Name of the news event
+        currency (str): Currency code
+        date (str): Event date
+        request_type (str): "forecast", "actual", or "both"
+        forecast (float): Known forecast, if already fetched
+        
+    Returns:
+        str: The winning response, same format as get_news_data()
+        
+    Raises:
+        AIGateway.NoCleanAnswer: No backend gave a usable answer (misreads only)
+    """
+    research_instructions = load_instructions("News_Research.txt")
+    messages = [
+        {"role": "system", "content": research_instructions},
+        {"role": "user", "content": _news_query(event_name, currency, date, request_type)}
+    ]
+    backends = list(Globals.AI_RACE_BACKENDS)
+    
+    # Each AI backend is a paid call (the caller counted the first one)
+    ai_backends = [b for b in backends if not b.startswith("adapter:")]
+    if len(ai_backends) > 1:
+        AIBudget.charge(calls=len(ai_backends) - 1)
+    
+    try:
+        return AIGateway.race(backends, messages, (event_name, currency, date, request_type),
+                              lambda text: _clean_answer(text, request_type, forecast))
+    except AIGateway.NoCleanAnswer as e:
+        # Not released anywhere yet: hand back the FALSE answer so the fetch is retried
+        not_released = [answer for answer in e.answers if "FALSE" in answer.upper()]
+        if not_released:
+            return not_released[0]
+        raise
+
+
+def _number(pattern, text):
+    match = re.search(pattern, text, re.IGNORECASE)
+    if not match:
+        return None
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return None
+
+
+def _clean_answer(text, request_type, forecast=None):
+    """
+    Whether a race answer carries the requested values. An Actual further than
+    AI_RACE_TOLERANCE x max(|forecast|, 1) from the forecast is taken as a misread
+    (wrong event or unit) and loses the race.
+    """
+    answer_forecast = _number(r"Forecast\s*:\s*(-?[\d\.]+)", text)
+    if request_type == "forecast":
+        return answer_forecast is not None
+    
+    actual = _number(r"Actual\s*:\s*(-?[\d\.]+)", text)
+    if actual is None:
+        return False
+    
+    forecast = forecast if forecast is not None else answer_forecast
+    tolerance = Globals.AI_RACE_TOLERANCE
+    if forecast is None or not tolerance:
+        return True
+    return abs(actual - forecast) <= tolerance * max(abs(forecast), 1.0)
 
 
 # Test function
@@ -0,0 +1,209 @@
+"""
+Accounts.py
+Per-client account state for running several MT5 accounts on one server.
+
+Balance, equity, weekly targets, lot multiplier, open symbols, reported
+strategy and currency exposure used to be single Globals values overwritten by
+whichever EA posted last. Each client id now gets an AccountContext holding
+its own copy, plus a lock: requests for one account are serialized, requests
+for different accounts run side by side (ThreadingHTTPServer).
+
+The old Globals names (systemBalance, systemEquity, lot_multiplier,
+symbolsCurrentlyOpen, systemEquityTarget, ...) mirror the primary account -
+MAIN_MT5_ACCOUNT, or the first account that reported when it is not set - so
+single-account setups, Weekly.py and TestingMode.py see what they saw before.
+Only the primary account's strategy changes the strategy preset.
+
+Globals._Accounts_ is kept by the state store, so exposure and weekly targets
+survive a restart.
+
+Usage:
+    account = Accounts.get(client_id)
+    with account.lock:
+        account.balance = 50_000.0
+        Functions.set_targets(account)
+    if Accounts.is_primary(account): ...
+"""
+
+import copy
+import threading
+from typing import Dict, List, Optional
+
+
+class AccountContext:
+    """
+    State of one MT5 account. `exposure` is the account's own _CurrencyCount_
+    (open positions per currency), `positions` its own _CurrencyPositions_
+    (S3: news position per currency) and `trades` the TIDs created for it.
+    """
+
+    __slots__ = ("client_id", "lock", "balance", "equity", "base_balance",
+                 "start_of_week_balance", "equity_target", "weekly_goal_reached",
+                 "lot_multiplier", "symbols_open", "strategy", "exposure", "positions", "trades")
+
+    # Persisted fields (everything but the lock)
+    FIELDS = __slots__[2:]
+
+    def __init__(self, client_id: str):
+        self.client_id = str(client_id)
+        self.lock = threading.RLock()
+        self.balance = 0.0                  # Balance sent from EA (Packet B)
+        self.equity = 0.0                   # Equity sent from EA (Packet B)
+        self.base_balance = 0.0             # Prop firm tier (5k ... 200k), see set_targets()
+        self.start_of_week_balance = 0.0    # Set once when == 0
+        self.equity_target = 0.0            # start_of_week_balance + weekly goal
+        self.weekly_goal_reached = False
+        self.lot_multiplier = 1.0           # base_balance / 100k
+        self.symbols_open: List[str] = []
+        self.strategy: Optional[int] = None  # Last strategy the EA reported
+        self.exposure: Dict[str, int] = {}
+        self.positions: Dict[str, dict] = {}
+        self.trades: List[str] = []
+
+    @classmethod
+    def from_dict(cls, client_id: str, data: dict) -> "AccountContext":
+        account = cls(client_id)
+        for name in cls.FIELDS:
+            if name in data:
+                setattr(account, name, data[name])
+        return account
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __deepcopy__(self, memo) -> "AccountContext":
+        # Same state, new lock
+        return AccountContext.from_dict(self.client_id, copy.deepcopy(self.to_dict(), memo))
+
+    def fingerprint(self) -> tuple:
+        """Field values as a tuple (state store change detection)."""
+        return (self.balance, self.equity, self.base_balance, self.start_of_week_balance,
+                self.equity_target, self.weekly_goal_reached, self.lot_multiplier,
+                tuple(self.symbols_open), self.strategy, tuple(self.exposure.items()),
+                tuple((currency, position.get("action"), position.get("TID"), position.get("ticket"))
+                      for currency, position in self.positions.items()),
+                len(self.trades))
+
+    def __repr__(self) -> str:
+        return f"AccountContext({self.client_id!r}, balance={self.balance}, lot_multiplier={self.lot_multiplier})"
+
+
+class AccountTable(dict):
+    """_Accounts_: client id → AccountContext. Plain dicts assigned to it are converted."""
+
+    def __setitem__(self, client_id: str, value) -> None:
+        if not isinstance(value, AccountContext):
+            existing = self.get(client_id)
+            if existing is not None:
+                # Restored over a live account: keep its lock
+                for name in AccountContext.FIELDS:
+                    if name in value:
+                        setattr(existing, name, value[name])
+                return
+            value = AccountContext.from_dict(client_id, value)
+        super().__setitem__(client_id, value)
+
+    def update(self, *args, **kwargs) -> None:
+        for client_id, value in dict(*args, **kwargs).items():
+            self[client_id] = value
+
+
+_REGISTRY_LOCK = threading.Lock()
+
+# Exposure is booked by other accounts' requests too (step 7 fans verdicts out to
+# every account while holding News._STATE_LOCK), so it has its own lock instead of
+# account.lock; nothing else is acquired while it is held
+_EXPOSURE_LOCK = threading.Lock()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def get(client_id) -> AccountContext:
+    """The account for a client id (created on first use)."""
+    import Globals
+
+    client_id = str(client_id)
+    account = Globals._Accounts_.get(client_id)
+    if account is not None:
+        return account
+    with _REGISTRY_LOCK:
+        account = Globals._Accounts_.get(client_id)
+        if account is None:
+            account = AccountContext(client_id)
+            # Sized like before accounts existed until its first Packet B
+            account.lot_multiplier = Globals.lot_multiplier
+            # Trades created before the account was known (older state files)
+            account.trades = [tid for tid, trade in Globals._Trades_.items()
+                              if str(trade.get("client_id")) == client_id]
+            Globals._Accounts_[client_id] = account
+        return account
+
+
+def find(client_id) -> Optional[AccountContext]:
+    """The account for a client id, or None if it never reported."""
+    import Globals
+
+    return Globals._Accounts_.get(str(client_id))
+
+
+def all_accounts() -> List[AccountContext]:
+    import Globals
+
+    return list(Globals._Accounts_.values())
+
+
+def primary() -> Optional[AccountContext]:
+    """MAIN_MT5_ACCOUNT if set and known, else the first account that reported."""
+    import Globals
+
+    main_id = str(getattr(Globals, "MAIN_MT5_ACCOUNT", "") or "")
+    if main_id:
+        return Globals._Accounts_.get(main_id)
+    return next(iter(Globals._Accounts_.values()), None)
+
+
+def is_primary(account: Optional[AccountContext]) -> bool:
+    return account is not None and account is primary()
+
+
+def mirror(account: AccountContext) -> None:
+    """Copy the primary account into the single-account Globals names."""
+    import Globals
+
+    if not is_primary(account):
+        return
+    Globals.systemBalance = account.balance
+    Globals.systemEquity = account.equity
+    Globals.systemBaseBalance = account.base_balance
+    Globals.systemStartOfWeekBalance = account.start_of_week_balance
+    Globals.systemEquityTarget = account.equity_target
+    Globals.systemWeeklyGoalReached = account.weekly_goal_reached
+    Globals.lot_multiplier = account.lot_multiplier
+    Globals.symbolsCurrentlyOpen = account.symbols_open
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EXPOSURE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def add_exposure(account: AccountContext, currencies, operation: str) -> Dict[str, int]:
+    """
+    Count a position opening ("add") or closing ("remove") on the account.
+
+    Returns:
+        dict: The account's counts for these currencies after the change
+    """
+    with _EXPOSURE_LOCK:
+        for currency in currencies:
+            count = account.exposure.get(currency, 0)
+            account.exposure[currency] = count + 1 if operation == "add" else max(0, count - 1)
+        return {currency: account.exposure[currency] for currency in currencies}
+
+
+def reset_exposure() -> None:
+    """Weekend reset: every account starts the week flat."""
+    with _EXPOSURE_LOCK:
+        for account in all_accounts():
+            account.exposure = {currency: 0 for currency in account.exposure}
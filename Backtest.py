@@ -0,0 +1,737 @@
+"""
+Backtest.py
+Offline backtesting engine for the News strategies S0-S6.
+
+Replays a historical calendar (calendar_statement.csv plus recorded Forecast and
+Actual columns) against a recorded price series. The real News.py pipeline is
+driven event by event - calculate_affect(), generate_trading_decisions() (with
+aggregate_simultaneous_events() for same-time releases), update_affected_symbols()
+and execute_news_trades() - so the S3 reversal, S4 weekly lock, S5 confirmation
+and scaling and the currency/pair filters behave exactly as they do live.
+
+What is simulated:
+- Clock: News._clock is swapped for a simulated clock, so the weekend block,
+  check_market_hours() and the S3/S5 close timeouts run on historical time
+- Broker: queued commands are drained with get_next_command()/ack_command() and
+  filled at the recorded bid/ask; open positions are fed back through
+  record_client_snapshot() the way Packet A does. Close ACKs advance the S3/S5
+  close-then-act actions, so a reversal opens in the same drain
+- AI: ChatGPT signals are replaced by the News_Rules.txt rules (base/quote
+  direction for every pair that contains the released currency)
+
+TP/SL exits are evaluated with numpy over the whole remaining price path when a
+position opens (first tick through TP or SL wins), so a run costs one vectorized
+scan per trade instead of a loop over ticks.
+
+Input formats:
+    calendar: Date,Event,Impact,Currency,Forecast,Actual
+              "2025, November 17, 08:30",(Canada) CPI YoY,High,CAD,2.1,2.4
+    prices:   time,symbol,bid[,ask]
+              2025-11-17 08:30:00,USDCAD,1.40512,1.40527
+Times in both files must use the same timezone.
+
+Usage:
+    python Backtest.py --calendar history.csv --prices prices.csv              # All presets
+    python Backtest.py --calendar history.csv --prices prices.csv --strategy 3
+    python Backtest.py --calendar history.csv --prices prices.csv --out bt.json
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import Accounts
+import Calendar
+import Functions
+import Globals
+import GlobalsSnapshot
+import News
+import PendingCloses
+import StrategyPresets
+import WarmUp
+
+
+BACKTEST_CLIENT_ID = "BT"
+
+# Lots in _Symbols_ are sized for 0.25% risk on a 100k account
+BASE_RISK = 0.0025
+BASE_BALANCE = 100000.0
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _pip(symbol: str) -> float:
+    """Pip size as computed by the EA (point*10 for 3/5 digit symbols)."""
+    if "JPY" in symbol:
+        return 0.01
+    if symbol.startswith("XAU") or symbol == "BITCOIN":
+        return 0.01
+    return 0.0001
+
+
+def _to_epoch(dt: datetime) -> float:
+    return (dt - _EPOCH).total_seconds()
+
+
+def _parse_value(text: str) -> Optional[float]:
+    """Parse a recorded Forecast/Actual cell the way News.py parses AI replies ("2.4%" -> 2.4, "N/A" -> None)."""
+    match = re.match(r"\s*(-?[\d\.]+)", text or "")
+    if not match:
+        return None
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return None
+
+
+def _parse_time(text: str) -> datetime:
+    text = text.strip()
+    try:
+        return datetime.strptime(text, "%Y, %B %d, %H:%M")
+    except ValueError:
+        pass
+    try:
+        return _EPOCH + timedelta(seconds=float(text))
+    except ValueError:
+        return datetime.fromisoformat(text.replace("Z", "")).replace(tzinfo=None)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INPUT LOADING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def load_calendar(path: str) -> List[dict]:
+    """
+    Load a historical calendar with recorded values.
+
+    Args:
+        path: CSV with Date, Event, Impact, Currency, Forecast and Actual columns
+
+    Returns:
+        list: Events sorted by time, each {event_key, currency, date, event, impact,
+              event_time, forecast, actual}
+    """
+    events = []
+    parsed_dates = {}  # Many releases share a timestamp
+
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            date_str = (row.get("Date") or "").strip()
+            event_name = (row.get("Event") or "").strip()
+            currency = (row.get("Currency") or "").strip()
+            if not all([date_str, event_name, currency]):
+                continue
+
+            event_time = parsed_dates.get(date_str)
+            if event_time is None:
+                try:
+                    event_time = _parse_time(date_str)
+                except ValueError:
+                    continue
+                parsed_dates[date_str] = event_time
+
+            # Same key format as initialize_news_forecasts()
+            event_hash = hashlib.md5(event_name.encode()).hexdigest()
+            events.append({
+                "event_key": f"{currency}_{event_time.strftime('%Y-%m-%d_%H:%M')}_{event_hash}",
+                "currency": currency,
+                "date": date_str,
+                "event": event_name,
+                "impact": (row.get("Impact") or "").strip(),
+                "event_time": event_time,
+                "forecast": _parse_value(row.get("Forecast", "")),
+                "actual": _parse_value(row.get("Actual", "")),
+            })
+
+    events.sort(key=lambda e: e["event_time"])
+    return events
+
+
+class PriceSeries:
+    """Recorded bid/ask path for one symbol (times are epoch seconds, ascending)."""
+
+    __slots__ = ("symbol", "times", "bid", "ask")
+
+    def __init__(self, symbol: str, times, bid, ask):
+        order = np.argsort(times, kind="stable")
+        self.symbol = symbol
+        self.times = np.asarray(times, dtype=np.float64)[order]
+        self.bid = np.asarray(bid, dtype=np.float64)[order]
+        self.ask = np.asarray(ask, dtype=np.float64)[order]
+
+    def index_at(self, ts: float) -> int:
+        """Index of the last tick at or before ts (-1 if none)."""
+        return int(np.searchsorted(self.times, ts, side="right")) - 1
+
+    def first_hit(self, start: int, action: str, tp_price: float, sl_price: float):
+        """
+        Find the first tick after start that reaches TP or SL.
+        BUY exits on the bid, SELL exits on the ask. If one tick crosses both
+        levels (a gap) the stop is assumed to fill first.
+
+        Returns:
+            tuple: (index, "TP"/"SL") or (None, None) if neither level is touched
+        """
+        if action == "BUY":
+            path = self.bid[start + 1:]
+            tp_mask = path >= tp_price
+            sl_mask = path <= sl_price
+        else:
+            path = self.ask[start + 1:]
+            tp_mask = path <= tp_price
+            sl_mask = path >= sl_price
+
+        hit = tp_mask | sl_mask
+        if not hit.any():
+            return None, None
+        i = int(hit.argmax())
+        return start + 1 + i, ("SL" if sl_mask[i] else "TP")
+
+
+def load_prices(path: str, cache: bool = True) -> Dict[str, PriceSeries]:
+    """
+    Load a recorded price series.
+    Parsed columns are cached next to the CSV as <path>.npz and reused while the
+    CSV is unchanged, so repeated runs skip the text parsing.
+
+    Args:
+        path: CSV with time, symbol, bid and optional ask columns
+        cache: Read/write the .npz column cache
+
+    Returns:
+        dict: symbol → PriceSeries
+    """
+    cache_path = path + ".npz"
+    if cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        with np.load(cache_path) as data:
+            symbols = [name[:-len("__times")] for name in data.files if name.endswith("__times")]
+            return {symbol: PriceSeries(symbol, data[f"{symbol}__times"], data[f"{symbol}__bid"],
+                                        data[f"{symbol}__ask"])
+                    for symbol in symbols}
+
+    columns = {}  # symbol → ([times], [bids], [asks])
+    parsed_times = {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip()
+            time_str = (row.get("time") or "").strip()
+            if not symbol or not time_str:
+                continue
+            try:
+                bid = float(row["bid"])
+                ask = float(row.get("ask") or bid)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            ts = parsed_times.get(time_str)
+            if ts is None:
+                ts = _to_epoch(_parse_time(time_str))
+                parsed_times[time_str] = ts
+
+            times, bids, asks = columns.setdefault(symbol, ([], [], []))
+            times.append(ts)
+            bids.append(bid)
+            asks.append(ask)
+
+    prices = {symbol: PriceSeries(symbol, *cols) for symbol, cols in columns.items()}
+    if cache:
+        arrays = {}
+        for symbol, series in prices.items():
+            arrays[f"{symbol}__times"] = series.times
+            arrays[f"{symbol}__bid"] = series.bid
+            arrays[f"{symbol}__ask"] = series.ask
+        try:
+            with open(cache_path, "wb") as f:
+                np.savez(f, **arrays)
+        except OSError as exc:
+            print(f"[WARN] Could not write price cache {cache_path}: {exc}")
+    return prices
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SIMULATED CLOCK, BROKER AND SIGNALS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class SimClock:
+    """Historical clock installed as News._clock."""
+
+    def __init__(self, start: datetime):
+        self.current = start
+
+    def now(self, tz=None) -> datetime:
+        return self.current if tz is None else self.current.replace(tzinfo=tz)
+
+
+class SimBroker:
+    """
+    Stands in for the EA: fills queued commands at recorded prices, tracks open
+    positions and closes them on TP/SL, reporting back the way packets A and E do.
+    """
+
+    def __init__(self, client_id: str, prices: Dict[str, PriceSeries], balance: float,
+                 release_counts: bool = True):
+        self.client_id = client_id
+        self.prices = prices
+        self.balance = balance
+        self.peak = balance
+        self.max_drawdown = 0.0
+        self.release_counts = release_counts
+        self.positions = {}  # ticket → position dict
+        self.closed = []
+        self.rejected = 0
+        self.peak_exposure = 0
+        self._next_ticket = 1
+
+    # ---------------------- time ----------------------
+
+    def step(self, now: datetime) -> None:
+        """Close positions whose TP/SL was hit up to now, then execute pending commands."""
+        self.resolve(now)
+        self.drain(now)
+
+    def resolve(self, now: datetime) -> None:
+        ts = _to_epoch(now)
+        due = [p for p in self.positions.values() if p["exit_ts"] is not None and p["exit_ts"] <= ts]
+        for pos in sorted(due, key=lambda p: p["exit_ts"]):
+            self._close(pos, pos["exit_price"], pos["exit_ts"], pos["exit_reason"])
+
+    def drain(self, now: datetime) -> None:
+        while True:
+            msg = Functions.get_next_command(self.client_id)
+            state = msg.get("state", 0)
+            if state == 0:
+                return
+            if state in (1, 2):
+                success, details = self._open(msg, now)
+            elif state == 3:
+                success, details = self._close_by_command(msg, now)
+            else:
+                success, details = False, {"error": "unsupported_state"}
+            Functions.ack_command(self.client_id, msg["cmdId"], success, details)
+
+    # ---------------------- commands ----------------------
+
+    def _open(self, msg: dict, now: datetime):
+        symbol = msg.get("symbol")
+        series = self.prices.get(symbol)
+        start = series.index_at(_to_epoch(now)) if series is not None else -1
+        if start < 0:
+            self.rejected += 1
+            tid = self._tid_for(symbol)
+            if tid:
+                Globals._Trades_[tid].update({"ticket": 0, "status": "rejected"})
+            self._release(symbol, tid)
+            return False, {"retcode": 10021, "symbol": symbol, "comment": "no price"}  # TRADE_RETCODE_PRICE_OFF
+
+        action = "BUY" if msg["state"] == 1 else "SELL"
+        pip = _pip(symbol)
+        tp_pips = float(msg.get("tpPips") or 0)
+        sl_pips = float(msg.get("slPips") or 0)
+        direction = 1.0 if action == "BUY" else -1.0
+        entry = float(series.ask[start] if action == "BUY" else series.bid[start])
+        tp_price = entry + direction * tp_pips * pip
+        sl_price = entry - direction * sl_pips * pip
+
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        tid = self._tid_for(symbol)
+        pos = {
+            "ticket": ticket,
+            "tid": tid,
+            "symbol": symbol,
+            "action": action,
+            "volume": float(msg.get("volume") or 0),
+            "entry": entry,
+            "entry_ts": _to_epoch(now),
+            "exit_ts": None,
+            "exit_price": None,
+            "exit_reason": None,
+        }
+        if tp_pips > 0 and sl_pips > 0:
+            index, reason = series.first_hit(start, action, tp_price, sl_price)
+            if index is not None:
+                pos["exit_ts"] = float(series.times[index])
+                pos["exit_price"] = tp_price if reason == "TP" else sl_price
+                pos["exit_reason"] = reason
+
+        self.positions[ticket] = pos
+        if tid:
+            Functions.update_trade_ticket(tid, ticket)
+            for tracked in Globals._CurrencyPositions_.values():
+                if tracked.get("TID") == tid:
+                    tracked["ticket"] = ticket
+                    tracked["entry_time"] = now.isoformat(timespec="seconds")
+        self._publish()
+
+        exposure = max(Globals._CurrencyCount_.values()) if Globals._CurrencyCount_ else 0
+        self.peak_exposure = max(self.peak_exposure, exposure)
+        return True, {"retcode": 10009, "ticket": ticket, "symbol": symbol, "type": action,
+                      "volume": pos["volume"], "paid": entry}
+
+    def _close_by_command(self, msg: dict, now: datetime):
+        pos = self.positions.get(msg.get("ticket") or 0)
+        if pos is None:
+            # Unconfirmed ticket (0) - close the oldest position on the symbol
+            matches = [p for p in self.positions.values() if p["symbol"] == msg.get("symbol")]
+            pos = min(matches, key=lambda p: p["ticket"]) if matches else None
+        if pos is None:
+            return False, {"retcode": 10013, "comment": "position not found"}  # TRADE_RETCODE_INVALID
+
+        series = self.prices[pos["symbol"]]
+        index = max(series.index_at(_to_epoch(now)), 0)
+        price = series.bid[index] if pos["action"] == "BUY" else series.ask[index]
+        self._close(pos, float(price), _to_epoch(now), "CLOSE")
+        return True, {"retcode": 10009, "ticket": pos["ticket"], "symbol": pos["symbol"]}
+
+    # ---------------------- bookkeeping ----------------------
+
+    def _tid_for(self, symbol: str) -> Optional[str]:
+        """Oldest queued TID for the symbol (what ack_command() marks executed)."""
+        for tid, trade in Globals._Trades_.items():
+            if trade.get("symbol") == symbol and trade.get("ticket") is None:
+                return tid
+        return None
+
+    def _close(self, pos: dict, price: float, ts: float, reason: str) -> None:
+        del self.positions[pos["ticket"]]
+        direction = 1.0 if pos["action"] == "BUY" else -1.0
+        pips = (price - pos["entry"]) * direction / _pip(pos["symbol"])
+        point_value = Globals._Symbols_.get(pos["symbol"], {}).get("point_value", 10.0)
+        profit = pips * point_value * pos["volume"]
+
+        self.balance += profit
+        self.peak = max(self.peak, self.balance)
+        if self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak - self.balance) / self.peak)
+
+        self.closed.append({**pos, "exit_price": price, "exit_ts": ts, "exit_reason": reason,
+                            "pips": pips, "profit": profit})
+
+        if reason in ("TP", "SL"):
+            Functions.update_trade_outcome_by_ticket(pos["ticket"], reason)
+        self._release(pos["symbol"], pos["tid"])
+        self._publish()
+
+    def _release(self, symbol: str, tid: Optional[str]) -> None:
+        """Undo the exposure execute_news_trades() booked for a position that is gone (or never filled)."""
+        if self.release_counts:
+            Functions.update_currency_count(symbol, "remove", client_id=self.client_id)
+            if Globals._PairCount_.get(symbol, 0) > 0:
+                Globals._PairCount_[symbol] -= 1
+        for currency, tracked in list(Globals._CurrencyPositions_.items()):
+            if tid and tracked.get("TID") == tid:
+                del Globals._CurrencyPositions_[currency]
+
+    def _publish(self) -> None:
+        """Mirror Packet A: replace the client's open-position snapshot."""
+        open_list = [{"ticket": p["ticket"], "symbol": p["symbol"], "type": p["action"],
+                      "volume": p["volume"], "openPrice": p["entry"]}
+                     for p in self.positions.values()]
+        Functions.record_client_snapshot(self.client_id, open_list, [])
+
+    def close_all(self) -> None:
+        """Mark positions that never reached TP/SL to market at the last recorded tick."""
+        for pos in sorted(self.positions.values(), key=lambda p: p["ticket"]):
+            series = self.prices[pos["symbol"]]
+            price = series.bid[-1] if pos["action"] == "BUY" else series.ask[-1]
+            self._close(pos, float(price), float(series.times[-1]), "END")
+
+
+class RuleSignals:
+    """News_Rules.txt STEP 3 as code: replaces the ChatGPT signal calls during a backtest."""
+
+    def _direction(self, event_name, forecast, actual):
+        if forecast is None or actual is None or actual == forecast:
+            return 0
+        upper = event_name.upper()
+        inverse = "UNEMPLOYMENT" in upper or "JOBLESS" in upper or "CLAIMS" in upper
+        stronger = actual > forecast
+        return -1 if stronger == inverse else 1
+
+    def _signals(self, currency, direction):
+        if direction == 0:
+            return "NEUTRAL"
+        signals = []
+        for pair in Globals._Symbols_:
+            if currency not in Functions.extract_currencies(pair):
+                continue
+            is_base = pair.startswith(currency)
+            action = "BUY" if (direction > 0) == is_base else "SELL"
+            signals.append(f"{pair} : {action}")
+        return ", ".join(signals) if signals else "NEUTRAL"
+
+    def generate_trading_signals(self, currency, event_name, forecast, actual):
+        return self._signals(currency, self._direction(event_name, forecast, actual))
+
+    def generate_trading_signals_multiple(self, currency, events):
+        # STEP 2: agreement wins, otherwise the highest-impact release decides
+        scored = []
+        for e in events:
+            direction = self._direction(e["event"], e["forecast"], e["actual"])
+            if direction:
+                impact = News.get_impact_level(News.categorize_event(e["event"]))
+                scored.append((impact, direction))
+        if not scored:
+            return "NEUTRAL"
+        best = min(impact for impact, _ in scored)
+        top = {direction for impact, direction in scored if impact == best}
+        return self._signals(currency, top.pop() if len(top) == 1 else 0)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BACKTEST RUN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Globals settings and tables as this module found them. _reset_state() puts them back
+# in place, so modules holding a table (or Globals.STATE_LOCK) keep seeing the live one.
+_GLOBALS = {name: value for name, value in vars(Globals).items() if not name.startswith("__")}
+_DEFAULTS = GlobalsSnapshot.Preserve(
+    *[name for name, value in _GLOBALS.items() if isinstance(value, (bool, int, float, str, tuple, list, set, type(None)))],
+    tables=[name for name, value in _GLOBALS.items() if isinstance(value, dict) and name not in ("_Accounts_", "_Currencies_")],
+).save()
+
+
+def _reset_state(client_id: str) -> None:
+    """Default Globals and empty per-client stores, as after a server restart."""
+    _DEFAULTS.restore()
+    Globals._Accounts_.clear()
+    Globals._Currencies_.clear()
+    Globals.TRACE_ENABLED = False
+    for store in (Functions._CLIENT_OPEN, Functions._CLIENT_CLOSED_ONLINE, Functions._CLIENT_COMMANDS,
+                  Functions._CLIENT_STATS, Functions._CLIENT_MODE, Functions._CLIENT_LAST_SEEN,
+                  Functions._CLIENT_CLOSING):
+        store.pop(client_id, None)
+    News._initialization_complete = True
+    News._current_client_id = client_id
+
+
+def _market_boundaries(start: datetime, end: datetime) -> List[datetime]:
+    """Friday close and Sunday open times between start and end (check_market_hours() transitions)."""
+    times = []
+    day = datetime(start.year, start.month, start.day)
+    while day <= end:
+        if day.weekday() == 4:
+            times.append(day.replace(hour=Globals.market_close_hour))
+        elif day.weekday() == 6:
+            times.append(day.replace(hour=Globals.market_open_hour))
+        day += timedelta(days=1)
+    return [t for t in times if start <= t <= end]
+
+
+def run_backtest(events: List[dict], prices: Dict[str, PriceSeries], strategy: int,
+                 balance: float = BASE_BALANCE, overrides: Optional[dict] = None,
+                 tp_sl: Optional[tuple] = None, release_counts: bool = True) -> dict:
+    """
+    Run one strategy over a historical calendar.
+
+    Args:
+        events: Output of load_calendar()
+        prices: Output of load_prices()
+        strategy: Preset id 0-6 (applied with StrategyPresets.apply_strategy_preset)
+        balance: Starting balance; lots scale from the 100k defaults in _Symbols_
+        overrides: Globals attributes to set after the preset (e.g. {"news_filter_maxTradePerCurrency": 2})
+        tp_sl: Optional (TP, SL) in pips applied to every symbol instead of _Symbols_ values
+        release_counts: Decrement _CurrencyCount_/_PairCount_ when positions close
+                        (False reproduces the live server, which only resets them on Friday close)
+
+    Returns:
+        dict: Trades, win rate, net profit, return %, max drawdown % and per-symbol stats
+    """
+    client_id = BACKTEST_CLIENT_ID
+    started = time.perf_counter()
+
+    _reset_state(client_id)
+    StrategyPresets.apply_strategy_preset(strategy, verbose=False)
+    for name, value in (overrides or {}).items():
+        setattr(Globals, name, value)
+
+    # Live code iterates symbolsToTrade as a set (order depends on the hash seed);
+    # pin a sorted order so the alternative-pair search is reproducible
+    Globals.symbolsToTrade = dict.fromkeys(sorted(Globals.symbolsToTrade))
+
+    # execute_news_trades() multiplies _Symbols_ lots by lot_multiplier; fold the
+    # preset's risk percentage in so strategy_risk and sweeps change position size
+    Globals.lot_multiplier = (balance / BASE_BALANCE) * (Globals.lot_size_percentage / BASE_RISK)
+    Accounts.get(client_id).lot_multiplier = Globals.lot_multiplier
+    if tp_sl:
+        for config in Globals._Symbols_.values():
+            config["TP"], config["SL"] = tp_sl
+    for symbol in Globals._Symbols_:
+        Globals._PairCount_[symbol] = 0
+
+    if not events:
+        return _summarize(strategy, SimBroker(client_id, prices, balance), balance, 0, time.perf_counter() - started)
+
+    clock = SimClock(events[0]["event_time"])
+    broker = SimBroker(client_id, prices, balance, release_counts)
+    signals = RuleSignals()
+
+    # Heartbeats: every release time plus the weekend open/close transitions
+    slots = {}
+    for event in events:
+        slots.setdefault(event["event_time"], []).append(event)
+    for boundary in _market_boundaries(events[0]["event_time"], events[-1]["event_time"]):
+        slots.setdefault(boundary, [])
+
+    hooks = {
+        "_clock": clock.now,
+        "generate_trading_signals": signals.generate_trading_signals,
+        "generate_trading_signals_multiple": signals.generate_trading_signals_multiple,
+    }
+    saved = {name: getattr(News, name) for name in hooks}
+    processed = 0
+
+    try:
+        for name, hook in hooks.items():
+            setattr(News, name, hook)
+
+        with contextlib.redirect_stdout(io.StringIO()) as sink:
+            for slot_time in sorted(slots):
+                clock.current = slot_time
+                broker.step(slot_time)
+                PendingCloses.expire(slot_time)
+
+                if not News.check_market_hours(client_id):
+                    broker.drain(clock.current)
+                    continue
+
+                # Same flow as handle_news(): events grouped by currency, then one execute pass
+                for event in slots[slot_time]:
+                    key = event["event_key"]
+                    Globals._Currencies_[key] = Calendar.new_record(dict(event, event_time=slot_time))
+
+                # Warm-up ran WARMUP_LEAD_SECONDS earlier in a live run; prepare the slot now
+                if slots[slot_time]:
+                    WarmUp.prepare_slot(slot_time, [event["currency"] for event in slots[slot_time]])
+
+                currency_events = {}
+                for event in slots[slot_time]:
+                    currency_events.setdefault(event["currency"], []).append(event)
+
+                for currency_group in currency_events.values():
+                    for event in currency_group:
+                        if event["actual"] is None:
+                            continue  # fetch_actual_value() would give up on this one
+                        key = event["event_key"]
+                        Globals._Currencies_[key]['forecast'] = event["forecast"]
+                        Globals._Currencies_[key]['actual'] = event["actual"]
+                        News.calculate_affect(key)
+                        trading_signals = News.generate_trading_decisions(key)
+                        News.update_affected_symbols(key, trading_signals)
+                        processed += 1
+
+                News.execute_news_trades(client_id)
+                broker.drain(clock.current)
+
+                # Keep the captured pipeline output from growing over a long run
+                sink.seek(0)
+                sink.truncate()
+
+            broker.resolve(datetime.max)
+            broker.close_all()
+    finally:
+        for name, value in saved.items():
+            setattr(News, name, value)
+        # The simulated EA is not a live account: keep it out of later verdict fan-outs
+        Functions._CLIENT_LAST_SEEN.pop(client_id, None)
+
+    return _summarize(strategy, broker, balance, processed, time.perf_counter() - started)
+
+
+def _summarize(strategy: int, broker: SimBroker, balance: float, processed: int, elapsed: float) -> dict:
+    profits = np.array([t["profit"] for t in broker.closed], dtype=np.float64)
+    wins = int((profits > 0).sum())
+    reasons = {}
+    by_symbol = {}
+    for trade in broker.closed:
+        reasons[trade["exit_reason"]] = reasons.get(trade["exit_reason"], 0) + 1
+        stats = by_symbol.setdefault(trade["symbol"], {"trades": 0, "profit": 0.0})
+        stats["trades"] += 1
+        stats["profit"] += trade["profit"]
+
+    net = float(profits.sum()) if len(profits) else 0.0
+    return {
+        "strategy": strategy,
+        "events": processed,
+        "trades": len(broker.closed),
+        "rejected": broker.rejected,
+        "wins": wins,
+        "win_rate": wins / len(profits) if len(profits) else 0.0,
+        "net_profit": net,
+        "return_pct": net / balance * 100 if balance else 0.0,
+        "max_drawdown_pct": broker.max_drawdown * 100,
+        "peak_currency_exposure": broker.peak_exposure,
+        "lot_size_percentage": Globals.lot_size_percentage,
+        "exit_reasons": reasons,
+        "by_symbol": by_symbol,
+        "elapsed_s": elapsed,
+    }
+
+
+def print_results(results: List[dict]) -> None:
+    print("=" * 94)
+    print("NEWS BACKTEST")
+    print("=" * 94)
+    print(f"{'Strategy':<10}{'Events':>8}{'Trades':>8}{'Win %':>8}{'Net $':>12}{'Return %':>10}"
+          f"{'Max DD %':>10}{'Peak/cur':>10}{'Exits (TP/SL/other)':>20}{'Time s':>8}")
+    print("-" * 94)
+    for r in results:
+        reasons = r["exit_reasons"]
+        other = r["trades"] - reasons.get("TP", 0) - reasons.get("SL", 0)
+        exits = f"{reasons.get('TP', 0)}/{reasons.get('SL', 0)}/{other}"
+        print(f"{'S' + str(r['strategy']):<10}{r['events']:>8}{r['trades']:>8}{r['win_rate'] * 100:>8.1f}"
+              f"{r['net_profit']:>12,.2f}{r['return_pct']:>10.2f}{r['max_drawdown_pct']:>10.2f}"
+              f"{r['peak_currency_exposure']:>10}{exits:>20}{r['elapsed_s']:>8.2f}")
+        if r["rejected"]:
+            print(f"  ⚠️  {r['rejected']} open(s) rejected - no recorded price at release time")
+    print("=" * 94)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest the News strategies over a historical calendar")
+    parser.add_argument("--calendar", required=True, help="Calendar CSV with Forecast/Actual columns")
+    parser.add_argument("--prices", required=True, help="Price CSV (time,symbol,bid[,ask])")
+    parser.add_argument("--strategy", default="all", help="Preset id 0-6 or 'all' (default: all)")
+    parser.add_argument("--balance", type=float, default=BASE_BALANCE, help="Starting balance (default: 100000)")
+    parser.add_argument("--tp", type=float, help="Override TP pips for every symbol")
+    parser.add_argument("--sl", type=float, help="Override SL pips for every symbol")
+    parser.add_argument("--live-counts", action="store_true",
+                        help="Do not release currency/pair counts on close (live server behavior)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the <prices>.npz cache")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    strategies = list(range(7)) if args.strategy == "all" else [int(args.strategy)]
+    tp_sl = (args.tp, args.sl) if args.tp and args.sl else None
+
+    load_start = time.perf_counter()
+    events = load_calendar(args.calendar)
+    prices = load_prices(args.prices, cache=not args.no_cache)
+    print(f"Loaded {len(events)} events and {len(prices)} symbols in {time.perf_counter() - load_start:.2f}s")
+
+    results = [run_backtest(events, prices, s, balance=args.balance, tp_sl=tp_sl,
+                            release_counts=not args.live_counts)
+               for s in strategies]
+    print_results(results)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
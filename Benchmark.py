@@ -0,0 +1,920 @@
+"""
+Benchmark.py
+EA load simulator and end-to-end throughput benchmark for Server.py.
+
+Simulates N MT5 clients that speak the exact packet A-E JSON built by Json.mqh:
+- Packet A (trade state) and B (account info) every timer interval
+- Packet C (symbol data) every 30 seconds
+- Packet D (position analytics) every 5 seconds while positions are open
+- Packet E (close details) immediately when a position closes
+Each client polls /command/<id>?batch=1 on the timer and on ticks, executes
+BUY/SELL/CLOSE commands (single or state-4 batches) against a simulated price
+feed and ACKs them like Server.mqh does.
+
+The server runs in a child process with the AI providers replaced by a local stub
+(configurable latency) and synthetic calendar events injected every few seconds,
+so the full News pipeline runs without network access or API tokens.
+
+Usage:
+    python Benchmark.py --clients 10 --duration 60
+    python Benchmark.py --clients 50 --interval 1 --ai-latency 0.5 --out bench.json
+    python Benchmark.py --clients 50 --baseline bench.json     # Compare to a saved run
+    python Benchmark.py --url http://127.0.0.1:5000            # Load an already running server
+    python Benchmark.py --interval 0 --workers 0,1,2,4         # POST / scaling with worker processes
+
+Reports throughput, per-endpoint latency percentiles (p50/p90/p99/max) and
+server CPU/memory (psutil if installed, otherwise OS rusage after shutdown).
+--workers runs the server in multi-process mode (see Broker.py); with several
+counts the runs are repeated per count and POST / throughput is compared.
+--interval 0 makes every simulated EA send as fast as the server answers.
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import LatencyTrace
+
+
+# The 29 symbols sent in Packet C (same order as BuildPacket_C_SymbolData)
+PACKET_C_SYMBOLS = [
+    "AUDCAD", "AUDJPY", "AUDUSD", "AUDCHF", "AUDNZD", "CADJPY", "CADCHF",
+    "EURAUD", "EURCAD", "EURCHF", "EURGBP", "EURJPY", "EURNZD", "EURUSD",
+    "GBPAUD", "GBPCAD", "GBPCHF", "GBPJPY", "GBPNZD", "GBPUSD", "NZDCAD",
+    "NZDCHF", "NZDJPY", "NZDUSD", "USDCAD", "USDCHF", "USDJPY", "CHFJPY",
+    "BITCOIN",
+]
+
+# Endpoint names of the POST / packets (LatencyRecorder keys)
+PACKET_ENDPOINTS = ("A", "B", "C", "D", "E")
+
+# Currencies used for synthetic calendar events
+EVENT_CURRENCIES = ["USD", "EUR", "GBP", "JPY", "AUD", "CAD", "NZD", "CHF"]
+
+
+def _digits(symbol: str) -> int:
+    """MT5 digits for a symbol (3 for JPY crosses, 2 for metals/crypto, 5 otherwise)."""
+    if "JPY" in symbol:
+        return 3
+    if symbol.startswith("XAU") or symbol == "BITCOIN":
+        return 2
+    return 5
+
+
+def _pip(symbol: str) -> float:
+    """Pip size as computed by the EA (point*10 for 3/5 digit symbols)."""
+    digits = _digits(symbol)
+    point = 10 ** -digits
+    return point * 10.0 if digits in (3, 5) else point
+
+
+def _start_price(symbol: str) -> float:
+    if symbol == "BITCOIN":
+        return 95000.0
+    if symbol.startswith("XAU"):
+        return 2650.0
+    if "JPY" in symbol:
+        return 150.0
+    return 1.1
+
+
+def _iso(ts: float) -> str:
+    """FormatISO8601 equivalent (no timezone suffix)."""
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LATENCY RECORDING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency samples (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            result = {}
+            for endpoint, values in sorted(self.samples.items()):
+                result[endpoint] = {
+                    "count": len(values),
+                    "errors": self.errors.get(endpoint, 0),
+                    "p50_ms": LatencyTrace.percentile(values, 50) * 1000.0,
+                    "p90_ms": LatencyTrace.percentile(values, 90) * 1000.0,
+                    "p99_ms": LatencyTrace.percentile(values, 99) * 1000.0,
+                    "max_ms": max(values) * 1000.0 if values else 0.0,
+                }
+            return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SIMULATED EA CLIENT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class SimulatedEA:
+    """
+    One simulated MT5 terminal running News_Analyzer.mq5 in Sender mode.
+
+    Args:
+        client_id: EA input ID
+        host, port: Server address
+        recorder: Shared LatencyRecorder
+        interval: Timer interval in seconds (PrintInterval)
+        tick_polls: Extra /command polls per timer interval (OnTick polling)
+        strategy_id: StrategyID input sent in Packet A/E
+        balance: Starting account balance
+    """
+
+    def __init__(self, client_id: int, host: str, port: int, recorder: LatencyRecorder,
+                 interval: float = 5.0, tick_polls: int = 2, strategy_id: int = 3,
+                 balance: float = 100000.0):
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.interval = interval
+        self.tick_polls = tick_polls
+        self.strategy_id = strategy_id
+        self.balance = balance
+        self.rng = random.Random(client_id)
+
+        self.prices = {s: _start_price(s) for s in PACKET_C_SYMBOLS}
+        self.open: List[dict] = []
+        self.closed_online: List[dict] = []
+        self.next_ticket = client_id * 1_000_000 + 1
+        self.next_deal = client_id * 1_000_000 + 1
+
+        self.last_c = 0.0
+        self.last_d = 0.0
+        self.commands = 0
+        self.acks = 0
+        self.opened = 0
+        self.closed: List[dict] = []
+
+    # ---------------------- HTTP ----------------------
+
+    def _request(self, endpoint: str, method: str, path: str, body: Optional[str] = None) -> Optional[dict]:
+        """Send one request with Connection: close (as WebRequest does) and time it."""
+        start = time.perf_counter()
+        ok = False
+        result = None
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            headers = {"Connection": "close", "Accept": "application/json"}
+            data = None
+            if body is not None:
+                data = body.encode("utf-8")
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            conn.close()
+            ok = resp.status == 200
+            if raw:
+                result = json.loads(raw.decode("utf-8"))
+        except Exception:
+            ok = False
+        self.recorder.add(endpoint, time.perf_counter() - start, ok)
+        return result
+
+    def _post(self, endpoint: str, payload: str, path: str = "/") -> Optional[dict]:
+        return self._request(endpoint, "POST", path, payload)
+
+    # ---------------------- Prices ----------------------
+
+    def _tick_prices(self) -> None:
+        for symbol, price in self.prices.items():
+            step = _pip(symbol) * self.rng.gauss(0.0, 3.0)
+            self.prices[symbol] = max(_pip(symbol), price + step)
+
+    def _bid_ask(self, symbol: str):
+        bid = self.prices.get(symbol, _start_price(symbol))
+        return bid, bid + _pip(symbol) * 1.2
+
+    # ---------------------- Packets (Json.mqh) ----------------------
+
+    def build_packet_a(self) -> str:
+        open_items = []
+        for p in self.open:
+            digits = _digits(p["symbol"])
+            bid, ask = self._bid_ask(p["symbol"])
+            price = bid if p["type"] == 0 else ask
+            open_items.append({
+                "ticket": p["ticket"],
+                "symbol": p["symbol"],
+                "type": p["type"],
+                "volume": round(p["volume"], 2),
+                "openPrice": round(p["openPrice"], digits),
+                "price": round(price, digits),
+                "sl": round(p["sl"], digits),
+                "tp": round(p["tp"], digits),
+                "openTime": _iso(p["openTime"]),
+                "magic": 0,
+                "comment": p["comment"],
+            })
+        symbols_open = []
+        for p in self.open:
+            if p["symbol"] not in symbols_open:
+                symbols_open.append(p["symbol"])
+        return json.dumps({
+            "id": self.client_id,
+            "mode": "Sender",
+            "timestamp": _iso(time.time()),
+            "open": open_items,
+            "symbolsCurrentlyOpen": symbols_open,
+            "closed_offline": [],
+            "closed_online": self.closed_online[-50:],
+            "strategy": f"S{self.strategy_id}",
+        })
+
+    def build_packet_b(self) -> str:
+        equity = self.balance + sum(self._unrealized(p) for p in self.open)
+        return json.dumps({
+            "packetType": "B",
+            "id": self.client_id,
+            "timestamp": _iso(time.time()),
+            "balance": round(self.balance, 2),
+            "equity": round(equity, 2),
+        })
+
+    def build_packet_c(self) -> str:
+        symbols = []
+        for symbol in PACKET_C_SYMBOLS:
+            digits = _digits(symbol)
+            bid, ask = self._bid_ask(symbol)
+            symbols.append({
+                "symbol": symbol,
+                "atr": round(self.rng.uniform(5.0, 40.0), 1),
+                "spread": round((ask - bid) / _pip(symbol), 1),
+                "bid": round(bid, digits),
+                "ask": round(ask, digits),
+            })
+        return json.dumps({
+            "packetType": "C",
+            "id": self.client_id,
+            "timestamp": _iso(time.time()),
+            "symbols": symbols,
+        })
+
+    def build_packet_d(self) -> str:
+        now = time.time()
+        positions = []
+        for p in self.open:
+            digits = _digits(p["symbol"])
+            bid, ask = self._bid_ask(p["symbol"])
+            current = bid if p["type"] == 0 else ask
+            pips = self._pips(p, current)
+            p["mae"] = min(p["mae"], pips)
+            p["mfe"] = max(p["mfe"], pips)
+            positions.append({
+                "ticket": p["ticket"],
+                "symbol": p["symbol"],
+                "currentPrice": round(current, digits),
+                "unrealizedPnL": round(pips * p["volume"] * 10.0, 2),
+                "mae": round(p["mae"], 1),
+                "mfe": round(p["mfe"], 1),
+                "secondsOpen": int(now - p["openTime"]),
+            })
+        return json.dumps({
+            "packetType": "D",
+            "id": self.client_id,
+            "timestamp": _iso(now),
+            "positions": positions,
+        })
+
+    def build_packet_e(self, p: dict, close_price: float, close_reason: str) -> str:
+        now = time.time()
+        digits = _digits(p["symbol"])
+        pip_gain = self._pips(p, close_price)
+        return json.dumps({
+            "packetType": "E",
+            "id": self.client_id,
+            "timestamp": _iso(now),
+            "trade": {
+                "ticket": p["ticket"],
+                "symbol": p["symbol"],
+                "type": p["type"],
+                "volume": round(p["volume"], 2),
+                "openPrice": round(p["openPrice"], digits),
+                "closePrice": round(close_price, digits),
+                "openTime": _iso(p["openTime"]),
+                "closeTime": _iso(now),
+                "profit": round(pip_gain * p["volume"] * 10.0, 2),
+                "swap": 0.0,
+                "commission": 0.0,
+                "mae": round(p["mae"], 1),
+                "mfe": round(p["mfe"], 1),
+                "pipGain": round(pip_gain, 1),
+                "duration": int(now - p["openTime"]),
+                "close_reason": close_reason,
+                "strategy": f"S{self.strategy_id}",
+            },
+        })
+
+    def _pips(self, p: dict, price: float) -> float:
+        diff = price - p["openPrice"] if p["type"] == 0 else p["openPrice"] - price
+        return diff / _pip(p["symbol"])
+
+    def _unrealized(self, p: dict) -> float:
+        bid, ask = self._bid_ask(p["symbol"])
+        return self._pips(p, bid if p["type"] == 0 else ask) * p["volume"] * 10.0
+
+    # ---------------------- Trading ----------------------
+
+    def _close(self, p: dict, reason: str) -> None:
+        bid, ask = self._bid_ask(p["symbol"])
+        close_price = bid if p["type"] == 0 else ask
+        self.open.remove(p)
+        profit = self._pips(p, close_price) * p["volume"] * 10.0
+        self.balance += profit
+        self.closed_online.append({
+            "deal": self.next_deal,
+            "symbol": p["symbol"],
+            "type": p["type"],
+            "volume": round(p["volume"], 2),
+            "openPrice": p["openPrice"],
+            "closePrice": close_price,
+            "profit": round(profit, 2),
+            "swap": 0.0,
+            "commission": 0.0,
+            "closeTime": int(time.time()),
+        })
+        self.next_deal += 1
+        self.closed.append({"ticket": p["ticket"], "symbol": p["symbol"], "reason": reason, "profit": profit})
+        self._post("E", self.build_packet_e(p, close_price, reason))
+
+    def _check_tp_sl(self) -> None:
+        for p in list(self.open):
+            bid, ask = self._bid_ask(p["symbol"])
+            price = bid if p["type"] == 0 else ask
+            if p["type"] == 0:
+                if p["tp"] and price >= p["tp"]:
+                    self._close(p, "TP")
+                elif p["sl"] and price <= p["sl"]:
+                    self._close(p, "SL")
+            else:
+                if p["tp"] and price <= p["tp"]:
+                    self._close(p, "TP")
+                elif p["sl"] and price >= p["sl"]:
+                    self._close(p, "SL")
+
+    def execute(self, msg: dict) -> None:
+        """Execute a command like ProcessServerCommand() and ACK it."""
+        state = int(msg.get("state", 0))
+        if state == 4:
+            # Batch: every order in one pass, one ACK post with an entry per order
+            acks = []
+            for order in msg.get("orders", []):
+                success, details = self._run(order)
+                if order.get("cmdId"):
+                    acks.append({"cmdId": order["cmdId"], "success": success, "details": details})
+            if acks:
+                self.acks += len(acks)
+                self._post("ack", json.dumps({"acks": acks}), path=f"/ack/{self.client_id}")
+            return
+
+        cmd_id = msg.get("cmdId", "")
+        if state == 0 or not cmd_id:
+            return
+
+        success, details = self._run(msg)
+        self.acks += 1
+        self._post("ack", json.dumps({"cmdId": cmd_id, "success": success, "details": details}),
+                   path=f"/ack/{self.client_id}")
+
+    def _run(self, msg: dict):
+        """Execute one BUY/SELL/CLOSE order; returns (success, ACK details)."""
+        state = int(msg.get("state", 0))
+        self.commands += 1
+        success = False
+        details: dict = {"message": "unknown_state"}
+
+        if state in (1, 2):
+            symbol = msg.get("symbol") or "EURUSD"
+            bid, ask = self._bid_ask(symbol)
+            pip = _pip(symbol)
+            price = ask if state == 1 else bid
+            sl_pips = abs(float(msg.get("slPips") or 0))
+            tp_pips = abs(float(msg.get("tpPips") or 0))
+            sign = 1.0 if state == 1 else -1.0
+            sl = price - sign * sl_pips * pip if sl_pips else 0.0
+            tp = price + sign * tp_pips * pip if tp_pips else 0.0
+            position = {
+                "ticket": self.next_ticket,
+                "symbol": symbol,
+                "type": 0 if state == 1 else 1,
+                "volume": float(msg.get("volume") or 0.01),
+                "openPrice": price,
+                "sl": sl,
+                "tp": tp,
+                "openTime": time.time(),
+                "comment": msg.get("comment", ""),
+                "mae": 0.0,
+                "mfe": 0.0,
+            }
+            self.next_ticket += 1
+            self.open.append(position)
+            self.opened += 1
+            success = True
+            details = {
+                "retcode": 10009,
+                "message": "done",
+                "symbol": symbol,
+                "type": "BUY" if state == 1 else "SELL",
+                "volume": round(position["volume"], 2),
+                "paid": price,
+                "sl": sl,
+                "tp": tp,
+            }
+        elif state == 3:
+            ticket = msg.get("ticket")
+            symbol = msg.get("symbol")
+            target = None
+            for p in self.open:
+                if (ticket and p["ticket"] == ticket) or (not ticket and symbol and p["symbol"] == symbol):
+                    target = p
+                    break
+            if target is not None:
+                self._close(target, "Server")
+                success = True
+            details = {"message": "closed" if success else "close_failed"}
+
+        return success, details
+
+    def poll(self) -> None:
+        msg = self._request("command", "GET", f"/command/{self.client_id}?batch=1")
+        if msg:
+            self.execute(msg)
+
+    def on_timer(self) -> None:
+        """OnTimer(): A, B, C (30s), D (5s with positions), then poll."""
+        now = time.time()
+        self._post("A", self.build_packet_a())
+        self._post("B", self.build_packet_b())
+        if now - self.last_c >= 30:
+            self._post("C", self.build_packet_c())
+            self.last_c = now
+        if self.open and now - self.last_d >= 5:
+            self._post("D", self.build_packet_d())
+            self.last_d = now
+        self.poll()
+
+    def run(self, stop_at: float) -> None:
+        """Timer + tick loop until stop_at (epoch seconds)."""
+        # Stagger clients so they don't all fire on the same millisecond
+        time.sleep(self.rng.uniform(0, self.interval))
+        tick_gap = self.interval / (self.tick_polls + 1)
+        while time.time() < stop_at:
+            self._tick_prices()
+            self._check_tp_sl()
+            self.on_timer()
+            for _ in range(self.tick_polls):
+                if time.time() >= stop_at:
+                    break
+                time.sleep(tick_gap)
+                self._tick_prices()
+                self._check_tp_sl()
+                self.poll()
+            time.sleep(tick_gap)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STUB SERVER (child process)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class StubAI:
+    """Local stand-in for Perplexity/ChatGPT with fixed latency per call."""
+
+    def __init__(self, latency: float, seed: int = 7):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _wait(self) -> None:
+        self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def get_news_data(self, event_name, currency, date, request_type="both"):
+        self._wait()
+        forecast = round(self.rng.uniform(-2, 5), 1)
+        actual = round(forecast + self.rng.choice([-0.3, -0.1, 0.1, 0.3]), 1)
+        if request_type == "forecast":
+            return f"Forecast : {forecast}\nSource : Stub"
+        if request_type == "actual":
+            return f"Actual : {actual}\nSource : Stub"
+        return f"Forecast : {forecast}\nActual : {actual}\nSource : Stub"
+
+    def validate_news_data(self, perplexity_response):
+        self._wait()
+        return perplexity_response
+
+    def _signals(self, currency, bullish):
+        import Globals
+        signals = []
+        for pair in sorted(Globals.symbolsToTrade):
+            if currency not in pair:
+                continue
+            is_base = pair.startswith(currency)
+            action = "BUY" if bullish == is_base else "SELL"
+            signals.append(f"{pair} : {action}")
+        return ", ".join(signals[:3]) if signals else "NEUTRAL"
+
+    def generate_trading_signals(self, currency, event_name, forecast, actual):
+        self._wait()
+        return self._signals(currency, actual > forecast)
+
+    def generate_trading_signals_multiple(self, currency, events):
+        self._wait()
+        bullish = sum(1 if e["actual"] > e["forecast"] else -1 for e in events) >= 0
+        return self._signals(currency, bullish)
+
+
+def _inject_events(count: int, start_in: float, spacing: float) -> None:
+    """Register synthetic calendar events in _Currencies_ as initialize_news_forecasts() would."""
+    import Globals
+    import News
+    from Events import EventRecord
+
+    base = datetime.now().replace(microsecond=0) + timedelta(seconds=start_in)
+    for i in range(count):
+        currency = EVENT_CURRENCIES[i % len(EVENT_CURRENCIES)]
+        event_time = base + timedelta(seconds=i * spacing)
+        event_name = f"(Bench) Synthetic Indicator #{i + 1}"
+        event_hash = hashlib.md5(event_name.encode()).hexdigest()
+        event_key = f"{currency}_{event_time.strftime('%Y-%m-%d_%H:%M:%S')}_{event_hash}"
+        Globals._Currencies_[event_key] = EventRecord(currency, event_name, event_time, key=event_key)
+
+    for symbol in Globals._Symbols_.keys():
+        Globals._PairCount_.setdefault(symbol, 0)
+    News._initialization_complete = True
+
+
+def serve_stub(host: str, port: int, ai_latency: float, events: int,
+               event_start: float, event_spacing: float, strategy: int, workers: int = 0) -> None:
+    """Run Server.py's request handler with stubbed AI providers and synthetic events."""
+    from http.server import HTTPServer
+
+    import Broker
+    import Functions
+    import Globals
+    import News
+    import Server
+    import StrategyPresets
+
+    stub = StubAI(ai_latency)
+    News.get_news_data = stub.get_news_data
+    News.validate_news_data = stub.validate_news_data
+    News.generate_trading_signals = stub.generate_trading_signals
+    News.generate_trading_signals_multiple = stub.generate_trading_signals_multiple
+    # Benchmark measures the server, not the market calendar
+    News.check_market_hours = lambda client_id: True
+
+    Globals.ModeSelect = "News"
+    Globals.AI_REQUEST_DELAY = 0
+    Globals.EVENT_TRIGGER_DELAY = 0
+    Globals.MAX_DAILY_AI_CALLS = 1_000_000
+    # Redraws and CSV snapshots on every packet would be measured instead of the server
+    Globals.IDLE_SCREEN_INTERVAL = 1.0
+    Globals.DICTIONARY_SAVE_INTERVAL = 1.0
+    StrategyPresets.apply_strategy_preset(strategy, verbose=False)
+    _inject_events(events, event_start, event_spacing)
+
+    if workers > 0:
+        # This process owns the state; the workers only do HTTP (see Broker.py)
+        print(f"[BENCH-SERVER] Listening on http://{host}:{port} with {workers} worker(s)", flush=True)
+        try:
+            Broker.serve(host, port, workers, Server.route_request, prepare=Functions.prepare_request)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = HTTPServer((host, port), Server.NewsAnalyzerRequestHandler)
+    print(f"[BENCH-SERVER] Listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RESOURCE SAMPLING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ResourceSampler:
+    """Samples CPU% and RSS of the server process (requires psutil)."""
+
+    def __init__(self, pid: int, period: float = 0.5):
+        self.pid = pid
+        self.period = period
+        self.cpu: List[float] = []
+        self.rss: List[int] = []
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            import psutil
+            self._proc = psutil.Process(pid)
+        except Exception:
+            self._proc = None
+
+    @property
+    def available(self) -> bool:
+        return self._proc is not None
+
+    def start(self) -> None:
+        if not self.available:
+            return
+        self._proc.cpu_percent(None)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.period):
+            try:
+                self.cpu.append(self._proc.cpu_percent(None))
+                self.rss.append(self._proc.memory_info().rss)
+            except Exception:
+                break
+
+    def stop(self) -> dict:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if not self.cpu:
+            return {}
+        return {
+            "cpu_avg_pct": sum(self.cpu) / len(self.cpu),
+            "cpu_peak_pct": max(self.cpu),
+            "rss_peak_mb": max(self.rss) / (1024 * 1024),
+        }
+
+
+def _wait_for_server(host: str, port: int, timeout: float = 30.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RUNNER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def run_benchmark(args) -> dict:
+    """Run one benchmark and return the result dictionary."""
+    proc = None
+    workdir = None
+    rusage_before = None
+
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname or "127.0.0.1", parsed.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        # Isolated working dir: received_log.jsonl, _dictionaries/ and trace log go here
+        workdir = tempfile.mkdtemp(prefix="news_bench_")
+        cmd = [
+            sys.executable, os.path.abspath(__file__), "--serve",
+            "--port", str(port),
+            "--ai-latency", str(args.ai_latency),
+            "--events", str(args.events),
+            "--event-start", str(args.event_start),
+            "--event-spacing", str(args.event_spacing),
+            "--strategy", str(args.strategy),
+            "--workers", str(args.workers),
+        ]
+        if os.name != "nt":
+            import resource
+            rusage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not _wait_for_server(host, port):
+            proc.kill()
+            raise RuntimeError("Benchmark server did not start")
+
+    sampler = ResourceSampler(proc.pid) if proc else None
+    if sampler:
+        sampler.start()
+
+    recorder = LatencyRecorder()
+    clients = [
+        SimulatedEA(1000 + i, host, port, recorder, interval=args.interval,
+                    tick_polls=args.tick_polls, strategy_id=args.strategy)
+        for i in range(args.clients)
+    ]
+
+    print(f"[BENCH] {args.clients} client(s) → http://{host}:{port} for {args.duration}s "
+          f"(timer {args.interval}s, {args.tick_polls} tick poll(s), AI latency {args.ai_latency}s, "
+          f"{args.workers} worker(s))")
+
+    started = time.time()
+    stop_at = started + args.duration
+    threads = [threading.Thread(target=c.run, args=(stop_at,), daemon=True) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - started
+
+    resources = sampler.stop() if sampler else {}
+
+    if proc:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        if not resources and rusage_before is not None:
+            import resource
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu_seconds = (after.ru_utime - rusage_before.ru_utime) + (after.ru_stime - rusage_before.ru_stime)
+            # ru_maxrss is KiB on Linux
+            resources = {
+                "cpu_avg_pct": 100.0 * cpu_seconds / elapsed if elapsed else 0.0,
+                "rss_peak_mb": after.ru_maxrss / 1024.0,
+            }
+
+    endpoints = recorder.summary()
+    total_requests = sum(e["count"] for e in endpoints.values())
+    total_errors = sum(e["errors"] for e in endpoints.values())
+    # Packets A-E are the POST / ingest requests
+    post_requests = sum(e["count"] for name, e in endpoints.items() if name in PACKET_ENDPOINTS)
+
+    return {
+        "clients": args.clients,
+        "workers": args.workers,
+        "duration_s": elapsed,
+        "requests": total_requests,
+        "errors": total_errors,
+        "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+        "post_rps": post_requests / elapsed if elapsed else 0.0,
+        "endpoints": endpoints,
+        "commands": sum(c.commands for c in clients),
+        "acks": sum(c.acks for c in clients),
+        "opened": sum(c.opened for c in clients),
+        "closed": sum(len(c.closed) for c in clients),
+        "closed_by_reason": _count_reasons(clients),
+        "server": resources,
+        "workdir": workdir,
+    }
+
+
+def _count_reasons(clients: List[SimulatedEA]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for c in clients:
+        for trade in c.closed:
+            counts[trade["reason"]] = counts.get(trade["reason"], 0) + 1
+    return counts
+
+
+def print_results(result: dict, baseline: Optional[dict] = None) -> None:
+    """Print a benchmark result, optionally with deltas against a baseline run."""
+
+    def _delta(key_path, value, lower_is_better=True):
+        if baseline is None:
+            return ""
+        ref = baseline
+        for k in key_path:
+            ref = ref.get(k, {}) if isinstance(ref, dict) else {}
+        if not isinstance(ref, (int, float)) or ref == 0:
+            return ""
+        change = (value - ref) / ref * 100.0
+        better = change < 0 if lower_is_better else change > 0
+        return f"  ({'+' if change >= 0 else ''}{change:.1f}% {'✅' if better else '⚠️'})"
+
+    print("\n" + "=" * 78)
+    print("NEWS ANALYZER SERVER BENCHMARK")
+    print("=" * 78)
+    print(f"Clients: {result['clients']} | Duration: {result['duration_s']:.1f}s | "
+          f"Requests: {result['requests']} | Errors: {result['errors']}")
+    print(f"Throughput: {result['throughput_rps']:.1f} req/s"
+          f"{_delta(['throughput_rps'], result['throughput_rps'], lower_is_better=False)}"
+          f" | POST /: {result.get('post_rps', 0.0):.1f} req/s | Workers: {result.get('workers', 0)}")
+    print("-" * 78)
+    print(f"{'Endpoint':<10} {'Count':>7} {'Errors':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 78)
+    for name, e in result["endpoints"].items():
+        print(f"{name:<10} {e['count']:>7} {e['errors']:>7} {e['p50_ms']:>9.2f} {e['p90_ms']:>9.2f} "
+              f"{e['p99_ms']:>9.2f} {e['max_ms']:>9.2f}{_delta(['endpoints', name, 'p99_ms'], e['p99_ms'])}")
+    print("-" * 78)
+    print(f"Commands: {result['commands']} | ACKs: {result['acks']} | "
+          f"Opened: {result['opened']} | Closed: {result['closed']} {result['closed_by_reason']}")
+    server = result.get("server") or {}
+    if server:
+        line = f"Server CPU avg: {server.get('cpu_avg_pct', 0):.1f}%"
+        if "cpu_peak_pct" in server:
+            line += f" | CPU peak: {server['cpu_peak_pct']:.1f}%"
+        line += f" | RSS peak: {server.get('rss_peak_mb', 0):.1f} MB"
+        line += _delta(["server", "cpu_avg_pct"], server.get("cpu_avg_pct", 0))
+        print(line)
+    else:
+        print("Server CPU/memory: not available (external server or psutil missing)")
+    print("=" * 78)
+
+
+def print_scaling(results: List[dict]) -> None:
+    """POST / throughput per worker count, relative to the first run."""
+    base = results[0].get("post_rps", 0.0)
+    print("\n" + "=" * 78)
+    print("POST / SCALING")
+    print("=" * 78)
+    print(f"{'Workers':>8} {'POST req/s':>12} {'Speedup':>9} {'All req/s':>11} {'Errors':>8} {'CPU avg %':>10}")
+    print("-" * 78)
+    for result in results:
+        speedup = result["post_rps"] / base if base else 0.0
+        cpu = (result.get("server") or {}).get("cpu_avg_pct")
+        print(f"{result['workers']:>8} {result['post_rps']:>12.1f} {speedup:>8.2f}x "
+              f"{result['throughput_rps']:>11.1f} {result['errors']:>8} "
+              f"{'-' if cpu is None else f'{cpu:.1f}':>10}")
+    print("=" * 78)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EA load simulator and throughput benchmark")
+    parser.add_argument("--clients", type=int, default=10, help="Number of simulated EAs (default: 10)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Run time in seconds (default: 60)")
+    parser.add_argument("--interval", type=float, default=5.0, help="EA timer interval, PrintInterval (default: 5)")
+    parser.add_argument("--tick-polls", type=int, default=2, help="Extra /command polls per interval from OnTick (default: 2)")
+    parser.add_argument("--strategy", type=int, default=3, help="StrategyID sent by the EAs (default: 3)")
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="Stub AI latency per call in seconds (default: 0.5)")
+    parser.add_argument("--events", type=int, default=8, help="Synthetic calendar events to inject (default: 8)")
+    parser.add_argument("--event-start", type=float, default=10.0, help="Seconds until the first event (default: 10)")
+    parser.add_argument("--event-spacing", type=float, default=15.0, help="Seconds between events (default: 15)")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the spawned stub server (default: 5055)")
+    parser.add_argument("--url", default=None, help="Benchmark an already running server instead of spawning one")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous --out JSON file")
+    parser.add_argument("--workers", default="0",
+                        help="Server worker processes, or a comma list to compare (e.g. 0,1,2,4; default: 0)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+
+    if args.serve:
+        serve_stub("127.0.0.1", args.port, args.ai_latency, args.events,
+                   args.event_start, args.event_spacing, args.strategy, int(args.workers))
+        return
+
+    worker_counts = [int(n) for n in str(args.workers).split(",") if n.strip()]
+    if len(worker_counts) > 1:
+        results = []
+        for count in worker_counts:
+            args.workers = count
+            results.append(run_benchmark(args))
+            print_results(results[-1])
+        print_scaling(results)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"runs": results}, f, indent=2)
+            print(f"Results written to {args.out}")
+        return
+
+    args.workers = worker_counts[0] if worker_counts else 0
+    result = run_benchmark(args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(result, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
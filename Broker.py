@@ -0,0 +1,237 @@
+"""
+Broker.py
+Multi-process server mode: HTTP worker processes in front of one state owner.
+
+A single Server.py process parses JSON, talks HTTP and encodes replies under the
+same GIL as ingest, command delivery and the News pipeline. With --workers N
+(Globals.SERVER_WORKERS) the listening socket is shared by N worker processes
+and the OS hands each accepted connection to one of them. A worker reads and
+parses the request, forwards (method, path, payload) to the state owner over a
+local authenticated socket (multiprocessing.connection) and writes the reply.
+The optional prepare hook (Functions.prepare_request) also runs in the worker:
+for POST / it encodes the received_log.jsonl line and parses Packet C, so
+that work leaves the owner as well.
+
+The state owner is the process that started the workers. It is the only one
+holding the trading dictionaries, accounts and command queues: each forwarded
+request runs there through Server.route_request() under the existing locks
+(one thread per worker connection), so no state is copied between processes
+and the state store / journal keep a single writer.
+
+Limit: everything that touches state still runs in the owner under one GIL -
+strategy checks, per-client snapshots, MarketData/_Symbols_ updates, pending
+close confirmations, Packet E CSV rows, printing and the dictionary saves.
+Workers take HTTP, JSON decoding and the log encoding off the owner (measured
+in-process on a Packet A/B/C mix: 0.09 ms of owner time per packet without
+preparation, 0.05 ms with it), but POST / throughput stays bounded by that
+owner share plus the IPC round trip and does not scale linearly with N. On a
+single-core host workers only add IPC and run slower than single-process mode.
+Measure with `python Benchmark.py --interval 0 --workers 0,1,2,4`.
+
+Usage:
+    python Server.py --workers 4
+    Broker.serve(host, port, workers=4, route=Server.route_request, prepare=Functions.prepare_request)
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Client, Listener
+from typing import Callable, List, Optional, Tuple
+
+
+# route(method, path, data) -> (status code, reply), e.g. Server.route_request
+Route = Callable[[str, str, Optional[dict]], Tuple[int, dict]]
+
+# prepare(path, data) -> data, run in the worker before forwarding (e.g. Functions.prepare_request)
+Prepare = Callable[[str, Optional[dict]], Optional[dict]]
+
+# Seconds between checks that the workers are alive (a dead worker is restarted)
+SUPERVISE_INTERVAL = 1.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STATE OWNER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _serve_connection(conn, route: Route) -> None:
+    """Run the requests of one worker connection until the worker disconnects."""
+    try:
+        while True:
+            try:
+                method, path, data = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = route(method, path, data)
+            except Exception as e:
+                print(f"[BROKER] ❌ {method} {path} failed: {e}")
+                reply = (500, {"status": "error", "error": "internal_error"})
+            conn.send(reply)
+    except (EOFError, OSError):
+        return
+    finally:
+        conn.close()
+
+
+def _accept(listener: Listener, route: Route) -> None:
+    while True:
+        try:
+            conn = listener.accept()
+        except (EOFError, OSError):
+            return  # Listener closed
+        except Exception as e:
+            # Failed handshake (wrong authkey): keep accepting
+            print(f"[BROKER] ⚠️  Rejected connection: {e}")
+            continue
+        threading.Thread(target=_serve_connection, args=(conn, route), daemon=True).start()
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(host: str, port: int, workers: int, route: Route, prepare: Optional[Prepare] = None) -> None:
+    """
+    Serve HTTP on host:port with `workers` processes; returns on Ctrl+C.
+
+    Args:
+        host, port: Address the EAs post to
+        workers: Number of HTTP worker processes
+        route: Runs one request in this process (Server.route_request)
+        prepare: State-free pre-processing run in the workers (module-level function)
+    """
+    # A service stop (or Benchmark's terminate()) shuts the workers down as Ctrl+C does
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    authkey = os.urandom(16)
+    listener = Listener(("127.0.0.1", 0), backlog=128, authkey=authkey)
+    threading.Thread(target=_accept, args=(listener, route), daemon=True).start()
+
+    # Bound here, accepted by the workers only
+    sock = socket.create_server((host, port), backlog=128)
+    ctx = multiprocessing.get_context("spawn")
+
+    def start_worker(number: int):
+        proc = ctx.Process(target=run_worker, args=(sock, listener.address, authkey, prepare),
+                           name=f"NewsAnalyzerWorker-{number}", daemon=True)
+        proc.start()
+        return proc
+
+    procs: List = [start_worker(i + 1) for i in range(workers)]
+    print(f"[BROKER] {workers} worker process(es) on http://{host}:{port}, state owner pid {os.getpid()}")
+    try:
+        while True:
+            time.sleep(SUPERVISE_INTERVAL)
+            for i, proc in enumerate(procs):
+                if not proc.is_alive():
+                    print(f"[BROKER] ⚠️  {proc.name} exited (code {proc.exitcode}) - restarting")
+                    procs[i] = start_worker(i + 1)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join(timeout=5)
+        sock.close()
+        listener.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WORKER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class OwnerClient:
+    """Connections from one worker to the state owner (one per request in flight)."""
+
+    def __init__(self, address, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def request(self, method: str, path: str, data: Optional[dict] = None) -> Tuple[int, dict]:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send((method, path, data))
+            reply = conn.recv()
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self._idle.append(conn)
+        return reply
+
+
+class WorkerRequestHandler(BaseHTTPRequestHandler):
+    """HTTP side of Server.NewsAnalyzerRequestHandler; the request itself runs in the state owner."""
+
+    server_version = "NewsAnalyzerHTTP/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+    def _send_json(self, code: int, payload: dict) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode("utf-8"))
+
+    def _forward(self, method: str, data: Optional[dict] = None) -> None:
+        prepare = self.server.prepare
+        if prepare is not None:
+            try:
+                data = prepare(self.path, data)
+            except Exception as e:
+                # The owner prepares unprepared payloads itself
+                print(f"[BROKER] ⚠️  Prepare failed for {self.path}: {e}")
+        try:
+            code, payload = self.server.owner.request(method, self.path, data)
+        except Exception:
+            code, payload = 503, {"status": "error", "error": "state_owner_unavailable"}
+        self._send_json(code, payload)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._forward("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except Exception:  # malformed JSON
+            self._send_json(400, {"status": "error", "error": "invalid_json"})
+            return
+
+        self._forward("POST", data)
+
+
+def _exit_with_owner(server: ThreadingHTTPServer) -> None:
+    """Stop accepting once the state owner process is gone."""
+    multiprocessing.parent_process().join()
+    server.shutdown()
+
+
+def run_worker(sock: socket.socket, address, authkey: bytes, prepare: Optional[Prepare] = None) -> None:
+    """Worker process: accept on the shared socket, forward to the state owner."""
+    server = ThreadingHTTPServer(sock.getsockname()[:2], WorkerRequestHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.daemon_threads = True
+    server.owner = OwnerClient(address, authkey)
+    server.prepare = prepare
+    threading.Thread(target=_exit_with_owner, args=(server,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
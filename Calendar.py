@@ -0,0 +1,212 @@
+"""
+Calendar.py
+Incremental loader for calendar_statement.csv.
+
+The CSV is watched by (mtime, size); refresh() is a single stat() while the
+file is unchanged. When it changes, the file is streamed row by row (dates
+parsed through a cache, event-name hashes memoized), filtered the way
+initialize_news_forecasts() always did (PAST / FUTURE-in-test-mode, csv_count)
+and diffed against the events it loaded before:
+
+    added      events new in the CSV → new _Currencies_ records (Events.EventRecord)
+    removed    events gone from the CSV that have not started yet
+    kept       events gone from the CSV that are in flight (NID assigned,
+               actual fetched or a retry pending) - never disturbed
+
+Events put into _Currencies_ by other code (Backtest, Benchmark, tests) are not
+touched. No chdir: the CSV path is resolved next to this module.
+
+Usage:
+    changes = Calendar.refresh()     # every heartbeat
+    if changes:
+        print(changes["added"], changes["removed"])
+"""
+
+import csv
+import hashlib
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+import Globals
+from Events import EventRecord, DATE_FORMAT
+
+
+CALENDAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendar_statement.csv")
+
+# Watch state: file signature and the event keys this loader put into _Currencies_
+_state = {"path": None, "signature": None, "keys": set()}
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str: str) -> datetime:
+    """Parse a calendar date (cached: every event of a slot shares the same string)."""
+    return datetime.strptime(date_str, DATE_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def _name_hash(event_name: str) -> str:
+    return hashlib.md5(event_name.encode()).hexdigest()
+
+
+def event_key(currency: str, event_time: datetime, event_name: str) -> str:
+    """
+    Unique event key: currency + event time + full MD5 of the event name
+    (several events can share a currency and time).
+    Format: EUR_2025-11-03_04:10_<32 hex chars>
+    """
+    return f"{currency}_{event_time.strftime('%Y-%m-%d_%H:%M')}_{_name_hash(event_name)}"
+
+
+def new_record(event: dict) -> EventRecord:
+    """_Currencies_ record for a calendar event (forecast/actual fetched later)."""
+    record = EventRecord(event['currency'], event['event'], event['event_time'],
+                         impact=event.get('impact'), key=event.get('key'))
+    record.date = event['date']   # dropped unless it differs from event_time
+    return record
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def read_events(path: str) -> Iterator[dict]:
+    """Stream the calendar rows as events (rows without date/event/currency are skipped)."""
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            date_str = (row.get('Date') or '').strip()
+            event_name = (row.get('Event') or '').strip()
+            currency = (row.get('Currency') or '').strip()
+            if not all([date_str, event_name, currency]):
+                continue
+            try:
+                event_time = parse_date(date_str)
+            except ValueError as e:
+                print(f"Error parsing date '{date_str}': {e}")
+                continue
+            yield {
+                'key': event_key(currency, event_time, event_name),
+                'date': date_str,
+                'event': event_name,
+                'currency': currency,
+                'impact': (row.get('Impact') or '').strip(),
+                'event_time': event_time,
+            }
+
+
+def select_events(events, now: datetime) -> Dict[str, object]:
+    """
+    Split calendar events into the ones to schedule and the ones skipped.
+
+    Test mode (news_test_mode) schedules only past events; normal mode skips
+    past events unless news_process_past_events is set. Outside live mode at
+    most csv_count events are scheduled.
+
+    Returns:
+        dict: {"present": set of every key in the file, "selected": [events],
+               "skipped": int, "reason": "PAST" | "FUTURE (test mode)"}
+    """
+    test_mode = getattr(Globals, 'news_test_mode', False)
+    process_past_events = getattr(Globals, 'news_process_past_events', False)
+
+    present = set()
+    selected = []
+    skipped = 0
+    for event in events:
+        present.add(event['key'])
+        is_past = event['event_time'] <= now
+        if (test_mode and not is_past) or (not test_mode and is_past and not process_past_events):
+            skipped += 1
+            continue
+        selected.append(event)
+
+    if not Globals.liveMode:
+        limit = getattr(Globals, 'csv_count', 4)
+        if len(selected) > limit:
+            selected = selected[:limit]
+            print(f"Limited to {limit} events (csv_count) for testing")
+
+    return {
+        "present": present,
+        "selected": selected,
+        "skipped": skipped,
+        "reason": "FUTURE (test mode)" if test_mode else "PAST",
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WATCH AND DIFF
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _signature(path: str):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def in_flight(record: EventRecord) -> bool:
+    """True once processing has started (NID assigned, actual fetched or a retry pending)."""
+    return record.NID is not None or record.actual is not None or record.retry_count > 0
+
+
+def refresh(path: Optional[str] = None, now: Optional[datetime] = None,
+            force: bool = False) -> Optional[dict]:
+    """
+    Reload the calendar if the file changed and apply the difference.
+
+    Args:
+        path: CSV path (default: calendar_statement.csv next to this module)
+        now: Current time for the PAST/FUTURE filter (default: datetime.now())
+        force: Reload even if the file signature is unchanged
+
+    Returns:
+        dict: {"added": [keys], "removed": [keys], "kept": [keys], "skipped": int,
+               "reason": str}, or None if the file is unchanged or missing
+    """
+    path = path or CALENDAR_FILE
+    try:
+        signature = _signature(path)
+    except OSError:
+        if force or _state["signature"] is not None:
+            print(f"ERROR: {path} not found!")
+        _state["signature"] = None
+        return None
+    if not force and _state["path"] == path and _state["signature"] == signature:
+        return None
+
+    selection = select_events(read_events(path), now or datetime.now())
+    present = selection["present"]
+    loaded = _state["keys"] if _state["path"] == path else set()
+
+    removed, kept = [], []
+    for key in sorted(loaded - present):
+        record = Globals._Currencies_.get(key)
+        if record is not None and in_flight(record):
+            kept.append(key)
+            continue
+        Globals._Currencies_.pop(key, None)
+        removed.append(key)
+        loaded.discard(key)
+
+    added = []
+    for event in selection["selected"]:
+        key = event['key']
+        if key in Globals._Currencies_:
+            continue
+        Globals._Currencies_[key] = new_record(event)
+        loaded.add(key)
+        added.append(key)
+
+    _state.update(path=path, signature=signature, keys=loaded)
+    return {
+        "added": added,
+        "removed": removed,
+        "kept": kept,
+        "skipped": selection["skipped"],
+        "reason": selection["reason"],
+    }
+
+
+def reset() -> None:
+    """Forget the watch state (next refresh() reloads the file)."""
+    _state.update(path=None, signature=None, keys=set())
@@ -0,0 +1,242 @@
+"""
+CurrencyExposure.py
+Precomputed symbol × currency incidence matrix for risk checks.
+
+Built once from Globals._Symbols_ (and rebuilt if that dictionary is replaced),
+the matrix holds +1 where a currency is the base of a symbol, -1 where it is the
+quote and 0 otherwise. Risk questions become array operations instead of string
+scans over every symbol:
+
+    index = CurrencyExposure.get_index()
+    counts = index.exposure(["EURUSD", "GBPUSD"])           # per-currency open count (one mat-vec product)
+    net = index.net_exposure(open_positions)                # signed long/short exposure per currency
+    mask = index.can_open_mask(Globals._CurrencyCount_, 4)  # which symbols pass maxTradePerCurrency
+    eur = mask & index.pairs_for("EUR")                     # openable EUR pairs
+
+Functions.extract_currencies() resolves through the same cache.
+
+PairPriorityIndex adds a priority-ordered currency → pair index for
+find_available_pair_for_currency() (symbolsToTrade first, then tightest spread).
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import Globals
+
+
+# Column order (same as _CurrencyCount_)
+CURRENCIES = ("XAU", "EUR", "USD", "JPY", "CHF", "NZD", "CAD", "GBP", "AUD", "BTC")
+CURRENCY_COLUMN = {currency: i for i, currency in enumerate(CURRENCIES)}
+
+_CRYPTO_NAMES = ("BITCOIN", "ETHEREUM", "LITECOIN", "DOGECOIN")
+
+# symbol → list of currency codes (parsed once per symbol)
+_SYMBOL_CURRENCIES: Dict[str, List[str]] = {}
+
+
+def currencies_of(symbol: str) -> List[str]:
+    """
+    Currency codes in a symbol, in CURRENCIES order (cached).
+
+    Crypto symbols (BITCOIN, ETHEREUM, ...) map to ["BTC"]; other symbols list
+    every known code that appears in the name.
+    """
+    cached = _SYMBOL_CURRENCIES.get(symbol)
+    if cached is not None:
+        return cached
+
+    upper = symbol.upper()
+    if any(name in upper for name in _CRYPTO_NAMES):
+        currencies = ["BTC"]
+    else:
+        currencies = [currency for currency in CURRENCIES if currency in upper]
+    _SYMBOL_CURRENCIES[symbol] = currencies
+    return currencies
+
+
+class ExposureIndex:
+    """Signed symbol × currency incidence matrix over a fixed symbol list."""
+
+    def __init__(self, symbols):
+        self.symbols: List[str] = list(symbols)
+        self.row: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        self.signed = np.zeros((len(self.symbols), len(CURRENCIES)), dtype=np.int8)
+        for i, symbol in enumerate(self.symbols):
+            upper = symbol.upper()
+            for currency in currencies_of(symbol):
+                # Base currency leads the name; crypto symbols count as base
+                is_base = currency == "BTC" or upper.startswith(currency)
+                self.signed[i, CURRENCY_COLUMN[currency]] = 1 if is_base else -1
+        self.member = (self.signed != 0).astype(np.int32)
+
+    # ---------------------- exposure ----------------------
+
+    def _rows(self, symbols) -> np.ndarray:
+        return np.fromiter((self.row[s] for s in symbols if s in self.row), dtype=np.intp)
+
+    def exposure(self, open_symbols) -> np.ndarray:
+        """Open position count per currency (CURRENCIES order) for a list of open symbols."""
+        positions = np.bincount(self._rows(open_symbols), minlength=len(self.symbols))
+        return positions @ self.member
+
+    def net_exposure(self, open_positions: List[dict]) -> np.ndarray:
+        """
+        Signed exposure per currency: +1 per position long the currency, -1 per position short.
+
+        Args:
+            open_positions: Packet A style dicts with "symbol" and "type" (BUY/SELL or 0/1)
+        """
+        weights = np.zeros(len(self.symbols), dtype=np.int32)
+        for pos in open_positions:
+            row = self.row.get(pos.get("symbol", ""))
+            if row is None:
+                continue
+            side = pos.get("type")
+            weights[row] += -1 if side in ("SELL", 1, "1") else 1
+        return weights @ self.signed.astype(np.int32)
+
+    def counts_vector(self, counts: Dict[str, int]) -> np.ndarray:
+        """_CurrencyCount_ dictionary as a vector in CURRENCIES order."""
+        return np.array([counts.get(currency, 0) for currency in CURRENCIES], dtype=np.int32)
+
+    # ---------------------- masks ----------------------
+
+    def pairs_for(self, currency: str) -> np.ndarray:
+        """Boolean mask of symbols that contain a currency."""
+        column = CURRENCY_COLUMN.get(currency)
+        if column is None:
+            return np.zeros(len(self.symbols), dtype=bool)
+        return self.member[:, column].astype(bool)
+
+    def can_open_mask(self, counts, max_per_currency: int) -> np.ndarray:
+        """
+        Symbols that pass the news_filter_maxTradePerCurrency check.
+
+        Args:
+            counts: _CurrencyCount_ dictionary or vector in CURRENCIES order
+            max_per_currency: Limit per currency (0 = no limit)
+        """
+        if max_per_currency <= 0:
+            return np.ones(len(self.symbols), dtype=bool)
+        if isinstance(counts, dict):
+            counts = self.counts_vector(counts)
+        blocked = (np.asarray(counts) >= max_per_currency).astype(np.int32)
+        return (self.member @ blocked) == 0
+
+
+class PairPriorityIndex:
+    """
+    Currency → candidate pairs in priority order, for alternative-pair selection.
+
+    Candidates containing a currency are split into symbolsToTrade (primary) and
+    the rest of _Symbols_ (secondary); each tier is ordered by the latest Packet C
+    spread (tightest first, unknown spreads last in their original order).
+    A pair is available when none of its currencies is at the per-currency limit,
+    so the answer only depends on which currencies are blocked - a 10-bit mask.
+    Picks are memoized per (currency, blocked mask), making repeat lookups O(1).
+    """
+
+    def __init__(self, exposure: ExposureIndex, symbols_to_trade, spreads: Optional[np.ndarray] = None):
+        self.exposure = exposure
+        if spreads is None:
+            spreads = np.full(len(exposure.symbols), np.nan)
+
+        # Currency bitmask per row (bit i = CURRENCIES[i])
+        weights = 1 << np.arange(len(CURRENCIES), dtype=np.int64)
+        self.row_bits = (exposure.member.astype(np.int64) @ weights).tolist()
+
+        self.primary: Dict[str, List[int]] = {}
+        self.secondary: Dict[str, List[int]] = {}
+        for currency in CURRENCIES:
+            rows = np.flatnonzero(exposure.pairs_for(currency))
+            # Stable sort: spread ascending, NaN last, original order otherwise
+            rows = rows[np.argsort(np.nan_to_num(spreads[rows], nan=np.inf), kind="stable")]
+            self.primary[currency] = [int(r) for r in rows if exposure.symbols[r] in symbols_to_trade]
+            self.secondary[currency] = [int(r) for r in rows if exposure.symbols[r] not in symbols_to_trade]
+
+        self._memo: Dict[tuple, tuple] = {}
+
+    def first_available(self, currency: str, blocked_bits: int, include_secondary: bool):
+        """
+        First candidate whose currencies are all below the limit.
+
+        Args:
+            currency: Currency code to find a pair for
+            blocked_bits: Bitmask of currencies at the limit (see blocked_mask())
+            include_secondary: Also search _Symbols_ outside symbolsToTrade
+
+        Returns:
+            tuple: (symbol, "symbolsToTrade" or "_Symbols_") or (None, None)
+        """
+        key = (currency, blocked_bits, include_secondary)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        result = (None, None)
+        tiers = [("symbolsToTrade", self.primary.get(currency, []))]
+        if include_secondary:
+            tiers.append(("_Symbols_", self.secondary.get(currency, [])))
+        for tier, rows in tiers:
+            row = next((r for r in rows if not self.row_bits[r] & blocked_bits), None)
+            if row is not None:
+                result = (self.exposure.symbols[row], tier)
+                break
+
+        self._memo[key] = result
+        return result
+
+
+def blocked_mask(counts: Dict[str, int], max_per_currency: int) -> int:
+    """Bitmask of currencies whose count has reached max_per_currency (0 = no limit)."""
+    if max_per_currency <= 0:
+        return 0
+    bits = 0
+    for i, currency in enumerate(CURRENCIES):
+        if counts.get(currency, 0) >= max_per_currency:
+            bits |= 1 << i
+    return bits
+
+
+# Module-level indexes (rebuilt when their inputs change, also in place)
+_INDEX: Optional[ExposureIndex] = None
+_INDEX_KEY = None
+_PRIORITY: Optional[PairPriorityIndex] = None
+_PRIORITY_KEY = None
+
+
+def get_index() -> ExposureIndex:
+    """Return the incidence index for the current Globals._Symbols_."""
+    global _INDEX, _INDEX_KEY
+    key = tuple(Globals._Symbols_)
+    if _INDEX is None or key != _INDEX_KEY:
+        _INDEX = ExposureIndex(Globals._Symbols_.keys())
+        _INDEX_KEY = key
+    return _INDEX
+
+
+def get_priority_index() -> PairPriorityIndex:
+    """
+    Return the currency → pair priority index.
+    Rebuilt when _Symbols_ or symbolsToTrade changes (replaced or edited in place),
+    or a new Packet C arrives.
+    """
+    global _PRIORITY, _PRIORITY_KEY
+    import MarketData
+
+    exposure = get_index()
+    symbols_to_trade = getattr(Globals, "symbolsToTrade", set())
+    store = MarketData.get_store()
+    key = (id(exposure), frozenset(symbols_to_trade), store.version)
+    if _PRIORITY is None or key != _PRIORITY_KEY:
+        spreads = None
+        if store.version:
+            latest = store.latest("spread")
+            spreads = np.array([latest[store.index[s]] if s in store.index else np.nan
+                                for s in exposure.symbols])
+        _PRIORITY = PairPriorityIndex(exposure, key[1], spreads)
+        _PRIORITY_KEY = key
+    return _PRIORITY
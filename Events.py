@@ -0,0 +1,248 @@
+"""
+Events.py
+Compact news event records for Globals._Currencies_.
+
+Each calendar event used to be a 17-key dict carrying its release time three
+times (datetime, CSV date string, AI date string). EventRecord keeps one
+datetime and derives the strings on demand, interns the currency code and
+event name, and stores everything in __slots__ - months of calendar data fit
+in a fraction of the memory and the monitor loop reads plain attributes.
+
+Dict-style access is kept for the existing code paths:
+
+    record["actual"], record.get("NID"), record["NID_TP"] += 1, record.update(...)
+
+and assigning a plain dict to _Currencies_ (EventTable) converts it into a
+record, so code that builds entries as dicts keeps working. Every record gets
+an integer event id; the old string keys ("EUR_2025-11-03_04:10_<md5>") stay
+the table keys, and EventTable.by_id() maps an event id back to its record.
+
+Usage:
+    record = Globals._Currencies_[event_key]
+    if record.actual is None and record.event_time <= now: ...
+    same = Globals._Currencies_.by_id(record.eid)
+"""
+
+import sys
+import weakref
+from datetime import datetime
+from itertools import count
+from typing import Any, Dict, Iterator, Optional
+
+
+# "2025, November 11, 08:15" (calendar_statement.csv)
+DATE_FORMAT = "%Y, %B %d, %H:%M"
+
+# "November 11, 2025" (AI queries)
+AI_DATE_FORMAT = "%B %d, %Y"
+
+_next_eid = count(1)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class EventRecord:
+    """
+    One news event. Attribute names match the old dict keys; `date` and
+    `ai_date` are derived from event_time unless set to something else.
+    Keys outside the known fields go to a small overflow dict.
+    """
+
+    __slots__ = ("eid", "key", "currency", "event", "impact", "event_time",
+                 "forecast", "actual", "affect", "retry_count", "retry_after",
+                 "forecast_retry_attempted", "NID", "NID_Affect", "NID_Affect_Executed",
+                 "NID_TP", "NID_SL", "_extra", "__weakref__")
+
+    # Dict view order (same as the old Calendar record)
+    FIELDS = ("currency", "date", "ai_date", "event", "impact", "forecast", "actual",
+              "affect", "retry_count", "retry_after", "forecast_retry_attempted",
+              "event_time", "NID", "NID_Affect", "NID_Affect_Executed", "NID_TP", "NID_SL")
+    _FIELD_SET = frozenset(FIELDS)
+    _STORED = tuple(name for name in FIELDS if name not in ("date", "ai_date"))
+    _INIT = frozenset(("currency", "event", "impact", "event_time"))
+    _PLAIN = frozenset(_STORED) - _INIT
+
+    def __init__(self, currency: Optional[str] = None, event: Optional[str] = None,
+                 event_time: Optional[datetime] = None, impact: Optional[str] = None,
+                 key: Optional[str] = None):
+        self.eid = next(_next_eid)
+        self.key = key
+        self.currency = _intern(currency)
+        self.event = _intern(event)
+        self.impact = _intern(impact)
+        self.event_time = event_time
+        self.forecast = None
+        self.actual = None
+        self.affect = None
+        self.retry_count = 0
+        self.retry_after = None                 # Timestamp when retry is allowed (non-blocking)
+        self.forecast_retry_attempted = False   # Flag to prevent multiple forecast retries
+        self.NID = None                         # Assigned when event is processed
+        self.NID_Affect = 0                     # Count of pairs affected
+        self.NID_Affect_Executed = 0            # Count of pairs executed
+        self.NID_TP = 0                         # Count of pairs that hit TP
+        self.NID_SL = 0                         # Count of pairs that hit SL
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], key: Optional[str] = None) -> "EventRecord":
+        """Record from an old-style _Currencies_ dict (unknown keys are kept)."""
+        record = cls(data.get('currency'), data.get('event'), data.get('event_time'),
+                     data.get('impact'), key)
+        plain = cls._PLAIN
+        for name, value in data.items():
+            if name in plain:
+                setattr(record, name, value)
+            elif name not in cls._INIT:
+                record[name] = value
+        return record
+
+    # ── derived date strings ────────────────────────────────────────────────
+
+    def _derived(self, name: str, fmt: str):
+        extra = self._extra
+        if extra and name in extra:
+            return extra[name]
+        if self.event_time is None:
+            return None
+        return self.event_time.strftime(fmt)
+
+    def _set_derived(self, name: str, fmt: str, value) -> None:
+        # Only kept when it differs from what event_time gives
+        if self.event_time is not None and value == self.event_time.strftime(fmt):
+            if self._extra:
+                self._extra.pop(name, None)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[name] = value
+
+    @property
+    def date(self):
+        return self._derived('date', DATE_FORMAT)
+
+    @date.setter
+    def date(self, value):
+        self._set_derived('date', DATE_FORMAT, value)
+
+    @property
+    def ai_date(self):
+        return self._derived('ai_date', AI_DATE_FORMAT)
+
+    @ai_date.setter
+    def ai_date(self, value):
+        self._set_derived('ai_date', AI_DATE_FORMAT, value)
+
+    # ── dict-style access ───────────────────────────────────────────────────
+
+    def __getitem__(self, name: str):
+        if name in self._FIELD_SET:
+            return getattr(self, name)
+        extra = self._extra
+        if extra and name in extra:
+            return extra[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value) -> None:
+        if name in self._FIELD_SET:
+            if name in ('currency', 'event', 'impact'):
+                value = _intern(value)
+            setattr(self, name, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[name] = value
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._FIELD_SET or bool(self._extra and name in self._extra)
+
+    def keys(self):
+        names = list(self.FIELDS)
+        if self._extra:
+            names.extend(k for k in self._extra if k not in self._FIELD_SET)
+        return names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def values(self):
+        return [self[name] for name in self.keys()]
+
+    def update(self, other=(), **kwargs) -> None:
+        for name, value in dict(other, **kwargs).items():
+            self[name] = value
+
+    def fingerprint(self) -> tuple:
+        """Stored values as a tuple (cheap change detection, no date formatting)."""
+        extra = self._extra
+        return (self.currency, self.event, self.impact, self.event_time, self.forecast,
+                self.actual, self.affect, self.retry_count, self.retry_after,
+                self.forecast_retry_attempted, self.NID, self.NID_Affect,
+                self.NID_Affect_Executed, self.NID_TP, self.NID_SL,
+                tuple(extra.items()) if extra else None)
+
+    def to_dict(self, derived: bool = True) -> Dict[str, Any]:
+        """
+        Plain dict copy (old _Currencies_ entry format).
+        derived=False leaves out date/ai_date unless they differ from event_time.
+        """
+        if derived:
+            return dict(self.items())
+        data = {name: getattr(self, name) for name in self._STORED}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"EventRecord(eid={self.eid}, {self.to_dict()!r})"
+
+
+class EventTable(dict):
+    """
+    _Currencies_: old event key → EventRecord.
+    Plain dicts assigned to it are converted; by_id() finds a record by event id.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._by_id = weakref.WeakValueDictionary()
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __setitem__(self, key: str, value) -> None:
+        if not isinstance(value, EventRecord):
+            value = EventRecord.from_dict(value, key=key)
+        elif value.key is None:
+            value.key = key
+        super().__setitem__(key, value)
+        self._by_id[value.eid] = value
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default if default is not None else {}
+        return self[key]
+
+    def by_id(self, eid: int) -> Optional[EventRecord]:
+        """Record with this event id, if it is still in the table."""
+        record = self._by_id.get(eid)
+        if record is None or self.get(record.key) is not record:
+            return None
+        return record
@@ -0,0 +1,194 @@
+"""
+ForecastPrefetch.py
+Forecasts fetched in the quiet hours before each release.
+
+The forecast is known long before the release, yet it used to be fetched on
+the critical path: with user_process_forecast_first=False the release query
+asked for Forecast and Actual together (and made a second "forecast" call when
+only the Actual came back); with True every forecast was fetched one after the
+other at startup. Now, on every heartbeat:
+
+- Events releasing within FORECAST_PREFETCH_LEAD (any upcoming event in
+  forecast-first mode) without a forecast are queued, earliest first.
+- Nothing starts within FORECAST_PREFETCH_QUIET of a release, before or after,
+  and each call is cancelled (AIGateway deadline) before the next quiet window.
+- At most FORECAST_PREFETCH_WORKERS fetches run at once, in the background.
+- Calls come out of the AIBudget shared pool, never out of a release's
+  reservation. A failed fetch is tried again FORECAST_PREFETCH_RETRY seconds
+  later, up to FORECAST_PREFETCH_ATTEMPTS times.
+
+The forecast is stored on the event record (kept by the state store), so a
+restart does not fetch it again. fetch_actual_value() then asks for the Actual
+only; if the pre-fetch found nothing it still asks for both, and the forecast
+retry inside the trading window only runs for events the pre-fetch never
+attempted (attempted()).
+
+Usage:
+    ForecastPrefetch.tick(now)              # every heartbeat (News._run_event_pipeline)
+    if ForecastPrefetch.settled(event_key): # forecast known (or N/A): ask for the Actual only
+        ...
+    if ForecastPrefetch.attempted(event_key): # asked before release: no forecast retry at release
+        ...
+    ForecastPrefetch.wait()                 # let running fetches finish (tests)
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as _wait_futures
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import Globals
+import AIBudget
+import AIGateway
+
+
+_FORECAST = re.compile(r"Forecast\s*:\s*([\d\.\-]+|N/A)", re.IGNORECASE)
+
+# event_key → {"attempts", "next_at", "running", "settled"}
+_jobs: Dict[str, dict] = {}
+_futures = set()
+_executor: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return Globals.FORECAST_PREFETCH_ENABLED or getattr(Globals, 'user_process_forecast_first', False)
+
+
+def attempted(event_key: str) -> bool:
+    """The pre-fetch has asked for this event's forecast at least once."""
+    return _jobs.get(event_key, {}).get("attempts", 0) > 0
+
+
+def settled(event_key: str) -> bool:
+    """The forecast is known, or the pre-fetch found it is not published (N/A)."""
+    event = Globals._Currencies_.get(event_key)
+    if event is not None and event.get('forecast') is not None:
+        return True
+    return _jobs.get(event_key, {}).get("settled", False)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SCHEDULING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _quiet(now: datetime) -> bool:
+    """Within FORECAST_PREFETCH_QUIET of a release: the AI calls are left to the release."""
+    quiet = timedelta(seconds=Globals.FORECAST_PREFETCH_QUIET)
+    return any(event.event_time is not None and abs(event.event_time - now) <= quiet
+               for event in Globals._Currencies_.values())
+
+
+def _next_quiet_window(now: datetime) -> Optional[datetime]:
+    """Start of the next quiet window, where running pre-fetches are cancelled."""
+    upcoming = [event.event_time for event in Globals._Currencies_.values()
+                if event.event_time is not None and event.event_time > now]
+    if not upcoming:
+        return None
+    return min(upcoming) - timedelta(seconds=Globals.FORECAST_PREFETCH_QUIET)
+
+
+def due(now: datetime) -> List[str]:
+    """Events whose forecast should be fetched now, earliest release first."""
+    horizon = None
+    if not getattr(Globals, 'user_process_forecast_first', False):
+        horizon = now + timedelta(seconds=Globals.FORECAST_PREFETCH_LEAD)
+    ready = []
+    for event_key, event in Globals._Currencies_.items():
+        event_time = event.event_time
+        if event_time is None or event_time <= now or event.actual is not None or event.forecast is not None:
+            continue
+        if horizon is not None and event_time > horizon:
+            continue
+        job = _jobs.get(event_key)
+        if job is not None and (job["running"] or job["settled"]
+                                or job["attempts"] >= Globals.FORECAST_PREFETCH_ATTEMPTS or now < job["next_at"]):
+            continue
+        ready.append((event_time, event_key))
+    return [event_key for _, event_key in sorted(ready)]
+
+
+def tick(now: datetime) -> int:
+    """
+    Start pre-fetches for the due events while outside the quiet windows.
+
+    Returns:
+        int: Number of fetches started by this call
+    """
+    global _executor
+    if not enabled() or _quiet(now):
+        return 0
+
+    # Forget events no longer in the calendar
+    for event_key in [key for key in _jobs if key not in Globals._Currencies_]:
+        del _jobs[event_key]
+
+    window = _next_quiet_window(now)
+    deadline = time.time() + (window - now).total_seconds() if window is not None else None
+    started = 0
+    with _LOCK:
+        running = sum(1 for job in _jobs.values() if job["running"])
+        for event_key in due(now)[:max(0, Globals.FORECAST_PREFETCH_WORKERS - running)]:
+            if not AIBudget.can_spend(None):
+                break   # the shared pool is used up; the release fetch asks for both
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=Globals.FORECAST_PREFETCH_WORKERS,
+                                               thread_name_prefix="ForecastPrefetch")
+            job = _jobs.setdefault(event_key, {"attempts": 0, "next_at": now, "running": False, "settled": False})
+            job["running"] = True
+            job["attempts"] += 1
+            AIBudget.charge(None)
+            future = _executor.submit(_prefetch, event_key, now, deadline)
+            _futures.add(future)
+            future.add_done_callback(_futures.discard)
+            started += 1
+    return started
+
+
+def wait(timeout: Optional[float] = None) -> None:
+    """Block until the running pre-fetches are done."""
+    _wait_futures(list(_futures), timeout=timeout)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FETCH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _prefetch(event_key: str, now: datetime, deadline: Optional[float]) -> None:
+    """Fetch one forecast (worker thread); a miss is tried again FORECAST_PREFETCH_RETRY later."""
+    import News
+
+    event = Globals._Currencies_.get(event_key)
+    job = _jobs[event_key]
+    token = AIGateway.set_deadline(deadline)
+    outcome = None
+    try:
+        if event is None:
+            return
+        response = News.get_news_data(event['event'], event['currency'], event.get('ai_date', event['date']),
+                                      "forecast")
+        match = _FORECAST.search(response or "")
+        if match and match.group(1) != "N/A":
+            try:
+                event['forecast'] = float(match.group(1))
+                outcome = f"Forecast: {event['forecast']}"
+            except ValueError:
+                pass
+        elif match:
+            outcome = "Forecast: N/A"
+    except Exception as e:
+        print(f"[PRE-FETCH] {event_key}: {e}")
+    finally:
+        AIGateway.reset_deadline(token)
+        with _LOCK:
+            job["running"] = False
+            job["settled"] = outcome is not None
+            job["next_at"] = now + timedelta(seconds=Globals.FORECAST_PREFETCH_RETRY)
+
+    if outcome is not None:
+        print(f"[PRE-FETCH] {event['currency']} {event['event']}: {outcome}")
+    elif event is not None:
+        print(f"[PRE-FETCH] {event['currency']} {event['event']}: no forecast "
+              f"(attempt {job['attempts']}/{Globals.FORECAST_PREFETCH_ATTEMPTS})")
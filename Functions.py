@@ -16,6 +16,12 @@ import pytz
 import csv
 import os
 import StrategyPresets
+import LatencyTrace
+import MarketData
+import CurrencyExposure
+import PendingCloses
+import Journal
+import Accounts
 
 LOG_FILE = "received_log.jsonl"
 
@@ -34,9 +40,13 @@ def now_iso() -> str:
 
 
 def append_log(entry: dict) -> None:
+    _write_log_line(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _write_log_line(line: str) -> None:
     try:
         with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.write(line)
     except Exception as exc:
         print(f"[WARN {now_iso()}] Failed to write log: {exc}")
 
@@ -129,13 +139,17 @@ def record_client_snapshot(client_id: str, open_list: List[dict], closed_online:
     _CLIENT_LAST_SEEN[client_id] = _time.time()
 
 
-def check_and_apply_strategy(strategy_str: str) -> None:
+def check_and_apply_strategy(strategy_str: str, account: Optional[Accounts.AccountContext] = None) -> None:
     """
     Check if incoming strategy differs from current Globals.news_strategy.
     If different, apply the new strategy preset.
     
+    With several accounts only the primary account changes the preset; the
+    strategy the others report is kept on their AccountContext.
+    
     Args:
         strategy_str: Strategy string like "S0", "S1", "S2", "S3", "S4", "S5"
+        account: Account that reported it (None = apply unconditionally)
     """
     import Globals
     
@@ -157,6 +171,14 @@ def check_and_apply_strategy(strategy_str: str) -> None:
         print(f"[WARN] Invalid strategy ID: {strategy_id} (must be 0-5)")
         return
     
+    if account is not None:
+        reported, account.strategy = account.strategy, strategy_id
+        if not Accounts.is_primary(account):
+            if strategy_id != Globals.news_strategy and reported != strategy_id:
+                print(f"[WARN] Client [{account.client_id}] runs S{strategy_id}; preset stays "
+                      f"S{Globals.news_strategy} (set by the primary account)")
+            return
+    
     # Check if strategy changed
     current_strategy = Globals.news_strategy
     if strategy_id != current_strategy:
@@ -174,14 +196,49 @@ def check_and_apply_strategy(strategy_str: str) -> None:
             print(f"{'='*60}\n")
 
 
+# Payload key under which a Broker worker forwards prepare_payload()'s result
+PREPARED_KEY = "_prepared"
+
+
+def prepare_payload(data: dict) -> dict:
+    """
+    State-free part of ingest: the received_log.jsonl line and the parsed Packet C rows.
+    Needs no lock or trading state, so Broker workers run it (prepare_request) and the
+    state owner only applies the mutations.
+    Returns: {"log_line": str, "market_rows": [...] (Packet C only)}
+    """
+    prepared = {"log_line": json.dumps({"ts": now_iso(), **data}, ensure_ascii=False) + "\n"}
+    if data.get("packetType", "A") == "C":
+        prepared["market_rows"] = MarketData.parse_packet_c(data.get("symbols", []))
+    return prepared
+
+
+def prepare_request(path: str, data: Optional[dict]) -> Optional[dict]:
+    """Broker worker hook: attach prepare_payload() to POST / payloads before forwarding."""
+    if path == "/" and isinstance(data, dict):
+        data[PREPARED_KEY] = prepare_payload(data)
+    return data
+
+
 def ingest_payload(data: dict) -> Tuple[dict, dict]:
     """
     Process an incoming EA payload: update per-client stores and build a small echo summary.
+    Payloads of one account are processed one at a time (account lock); different
+    accounts are processed concurrently.
     Returns: (summary_dict, identity_dict)
     """
+    # Prepared by a Broker worker, or here when running single-process
+    prepared = data.pop(PREPARED_KEY, None) or prepare_payload(data)
+    client_id = str(data.get("id")) if data.get("id") is not None else "unknown"
+    account = Accounts.get(client_id)
+    with account.lock:
+        return _ingest_locked(data, client_id, account, prepared)
+
+
+def _ingest_locked(data: dict, client_id: str, account: Accounts.AccountContext,
+                   prepared: dict) -> Tuple[dict, dict]:
     import Globals
     
-    client_id = str(data.get("id")) if data.get("id") is not None else "unknown"
     mode = data.get("mode")
     packet_type = data.get("packetType", "A")  # Default to A if not specified
     open_list = data.get("open", [])
@@ -192,7 +249,7 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
     # Check and apply strategy from main payload (applies to all packet types)
     strategy_str = data.get("strategy", "Unknown")
     if strategy_str and strategy_str != "Unknown":
-        check_and_apply_strategy(strategy_str)
+        check_and_apply_strategy(strategy_str, account)
     
     # Print packet reception confirmation with FULL DATA (only if not in live mode)
     if not Globals.liveMode:
@@ -200,6 +257,8 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
     
     # Show complete packet-specific data
     if packet_type == "A":
+        PendingCloses.on_positions(client_id, open_list)
+        forget_closed_tickets(client_id, open_list=open_list)
         if not Globals.liveMode:
             print(f"  Trade State: {len(open_list)} open, {len(closed_offline)} closed offline, {len(closed_online)} closed online")
             if open_list:
@@ -212,14 +271,15 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
         if not Globals.liveMode:
             print(f"  Account Info: Balance=${balance:.2f}, Equity=${equity:.2f}")
         
-        # Update system balance and equity
-        Globals.systemBalance = balance
-        Globals.systemEquity = equity
+        # Update the account's balance and equity
+        account.balance = balance
+        account.equity = equity
         
         # Calculate and set weekly targets
-        set_targets()
+        set_targets(account)
     elif packet_type == "C":
         symbols = data.get("symbols", [])
+        MarketData.ingest_packet_c(symbols, prepared.get("market_rows"))
         if not Globals.liveMode:
             print(f"  Symbol Data: {len(symbols)} pairs received")
             print("  ============================================")
@@ -257,6 +317,9 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
         # Log trade to CSV for structured analysis
         ticket = trade.get('ticket')
         if ticket:
+            PendingCloses.on_closed(client_id, ticket)
+            forget_closed_tickets(client_id, ticket=ticket)
+            
             # Try to find TID from Globals._Trades_
             trade_record = get_trade_by_ticket(ticket)
             tid = trade_record.get('TID', '') if trade_record else ''
@@ -273,7 +336,7 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
             strategy = trade.get('strategy', 'Unknown')
             
             # Check if strategy changed and apply new preset if needed
-            check_and_apply_strategy(strategy)
+            check_and_apply_strategy(strategy, account)
             
             # Prepare trade data for CSV (including MAE/MFE)
             csv_trade_data = {
@@ -296,7 +359,7 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
             write_trade_to_csv(csv_trade_data)
 
     # Persist full payload to JSONL with server timestamp
-    append_log({"ts": now_iso(), **data})
+    _write_log_line(prepared["log_line"])
 
     # Update in-memory per-client snapshots
     record_client_snapshot(client_id, open_list, closed_online)
@@ -304,8 +367,9 @@ def ingest_payload(data: dict) -> Tuple[dict, dict]:
     with _LOCK:
         _CLIENT_MODE[client_id] = str(mode) if mode is not None else ""
     
-    # Update global symbolsCurrentlyOpen in Globals
-    Globals.symbolsCurrentlyOpen = symbols_currently_open
+    # Update the account's open symbols (Globals.symbolsCurrentlyOpen mirrors the primary account)
+    account.symbols_open = symbols_currently_open
+    Accounts.mirror(account)
 
     summary = {
         "open": len(open_list),
@@ -340,85 +404,279 @@ def get_client_mode(client_id: str) -> str:
 
 # ---------------------- Command queue (server -> EA) ----------------------
 
-def enqueue_command(client_id: str, state: int, payload: Optional[dict] = None) -> dict:
-    """Add a command for a specific client id. Returns the stored command."""
+# Delivery priority: queued closes go out before queued opens (lower first)
+PRIORITY_CLOSE = 0
+PRIORITY_OPEN = 1
+
+# Close commands in flight per client: { id: { ticket: cmd } }
+# A ticket stays here until its close fails or Packet A/E shows it gone, so
+# callers that re-issue the same close every heartbeat get the first command back
+_CLIENT_CLOSING: Dict[str, Dict[int, dict]] = {}
+
+
+def enqueue_command(client_id: str, state: int, payload: Optional[dict] = None,
+                    priority: Optional[int] = None, deadline: Optional[float] = None) -> dict:
+    """Add a command for a specific client id. Returns the stored command.
+
+    Closes (state 3) are delivered before any queued open. Opens expire unsent
+    once their deadline (epoch seconds, default now + COMMAND_OPEN_TTL) passes.
+    A close for a ticket that is already being closed is not queued again; the
+    existing command is returned instead.
+    """
+    import Globals
+
+    state = int(state)
+    payload = payload or {}
+    if priority is None:
+        priority = PRIORITY_CLOSE if state == 3 else PRIORITY_OPEN
+    if deadline is None and state in (1, 2):
+        ttl = getattr(Globals, "COMMAND_OPEN_TTL", 0)
+        deadline = _time.time() + ttl if ttl else None
     cmd = {
         "cmdId": str(uuid.uuid4()),
         "id": str(client_id),
-        "state": int(state),  # 0..3 per contract
-        "payload": payload or {},
-        "status": "queued",  # queued|sent|ack
+        "state": state,  # 0..3 per contract
+        "payload": payload,
+        "status": "queued",  # queued|sent|ack|expired
+        "priority": int(priority),
+        "deadline": deadline,
         "createdAt": now_iso(),
         "updatedAt": now_iso(),
     }
+    ticket = payload.get("ticket") if state == 3 else None
     with _LOCK:
-        _CLIENT_COMMANDS.setdefault(str(client_id), []).append(cmd)
+        if ticket:
+            closing = _CLIENT_CLOSING.setdefault(str(client_id), {})
+            if ticket in closing:
+                return closing[ticket]
+            closing[ticket] = cmd
+        _insert_command(_CLIENT_COMMANDS.setdefault(str(client_id), []), cmd)
+    Journal.record("enqueue", cmd=cmd)
+    if payload.get("tid"):
+        LatencyTrace.mark("enqueue", tid=payload["tid"], cmd_id=cmd["cmdId"])
     return cmd
 
 
-def get_next_command(client_id: str) -> dict:
+def _insert_command(queue: List[dict], cmd: dict) -> None:
+    """Insert ahead of queued commands of lower priority; delivered ones keep their place.
+    Caller holds _LOCK.
+    """
+    i = len(queue)
+    while i > 0 and queue[i - 1]["status"] == "queued" and queue[i - 1]["priority"] > cmd["priority"]:
+        i -= 1
+    queue.insert(i, cmd)
+
+
+def pending_commands() -> List[dict]:
+    """Every command not acknowledged yet, all clients (journal snapshots)."""
+    with _LOCK:
+        return [deepcopy(cmd) for queue in _CLIENT_COMMANDS.values() for cmd in queue
+                if cmd["status"] in ("queued", "sent")]
+
+
+def restore_commands(commands) -> int:
+    """Put unacknowledged commands recovered from the journal back in their queues.
+    They are delivered again; opens past their deadline expire as usual.
+    """
+    restored = 0
+    with _LOCK:
+        for cmd in commands:
+            client_id = str(cmd["id"])
+            queue = _CLIENT_COMMANDS.setdefault(client_id, [])
+            if any(queued["cmdId"] == cmd["cmdId"] for queued in queue):
+                continue
+            cmd = dict(cmd, status="queued")
+            ticket = cmd["payload"].get("ticket") if cmd["state"] == 3 else None
+            if ticket:
+                _CLIENT_CLOSING.setdefault(client_id, {})[ticket] = cmd
+            _insert_command(queue, cmd)
+            restored += 1
+    return restored
+
+
+def forget_closed_tickets(client_id: str, open_list: Optional[List[dict]] = None,
+                          ticket: Optional[int] = None) -> None:
+    """Let closes be queued again for tickets that are gone (Packet A list or Packet E ticket)."""
+    with _LOCK:
+        closing = _CLIENT_CLOSING.get(str(client_id))
+        if not closing:
+            return
+        if ticket:
+            closing.pop(ticket, None)
+        if open_list is not None:
+            still_open = {pos.get("ticket") for pos in open_list}
+            for t in [t for t in closing if t not in still_open]:
+                del closing[t]
+
+
+def release_expired_open(cmd: dict) -> None:
+    """Undo the bookkeeping News.py did when it queued an open that was never sent.
+    Changes the shared counts: News.py runs it under its state lock (ON_OPEN_EXPIRED).
+    """
+    import Globals
+
+    payload = cmd.get("payload") or {}
+    symbol = payload.get("symbol")
+    tid = payload.get("tid")
+    print(f"[COMMAND] ⏱️  Open {symbol} expired before delivery (TID={tid or '-'})")
+    if not tid:
+        return
+    trade = get_trade_by_tid(tid)
+    if trade:
+        trade["status"] = "expired"
+        trade["updatedAt"] = now_iso()
+    if symbol:
+        update_currency_count(symbol, "remove", client_id=cmd.get("id"))
+        if Globals._PairCount_.get(symbol, 0) > 0:
+            Globals._PairCount_[symbol] -= 1
+    for currency, position in list(Globals._CurrencyPositions_.items()):
+        if position.get("TID") == tid:
+            del Globals._CurrencyPositions_[currency]
+    account = Accounts.find(cmd.get("id"))
+    if account is not None:
+        for currency, position in list(account.positions.items()):
+            if position.get("TID") == tid:
+                del account.positions[currency]
+
+
+# Called for each open that expired in get_next_command(), after _LOCK is released.
+# News.py replaces it with a wrapper taking News._STATE_LOCK: the poll thread of one
+# account must not change _CurrencyCount_/_PairCount_/_CurrencyPositions_ while
+# another account's thread queues news orders
+ON_OPEN_EXPIRED = release_expired_open
+
+
+# Batch command (state 4): every pending open/close order in one reply.
+# Sent only to clients that poll with ?batch=1 (Server.mqh), one ACK per order.
+STATE_BATCH = 4
+
+
+def _command_message(client_id: str, cmd: dict) -> dict:
+    """Mark a command as delivered and build the message the EA expects for it.
+    Caller holds _LOCK.
+    """
+    # mark as sent (first delivery)
+    if cmd.get("status") == "queued":
+        cmd["status"] = "sent"
+        cmd["updatedAt"] = now_iso()
+        if cmd["payload"].get("tid"):
+            LatencyTrace.mark("deliver", tid=cmd["payload"]["tid"], cmd_id=cmd["cmdId"])
+    # Build the precise message for EA
+    state = int(cmd.get("state", 0))
+    msg = {"id": str(client_id), "state": state, "cmdId": cmd["cmdId"]}
+    payload = cmd.get("payload") or {}
+    # shape by state
+    if state == 1:  # Open BUY
+        # expected: symbol, volume, optional comment and SL/TP (absolute or pip distances)
+        msg.update({
+            "symbol": payload.get("symbol"),
+            "volume": payload.get("volume"),
+            "comment": payload.get("comment", ""),
+        })
+        # propagate optional SL/TP fields
+        if "sl" in payload: msg["sl"] = payload.get("sl")
+        if "tp" in payload: msg["tp"] = payload.get("tp")
+        if "slPips" in payload: msg["slPips"] = payload.get("slPips")
+        if "tpPips" in payload: msg["tpPips"] = payload.get("tpPips")
+    elif state == 2:  # Open SELL
+        msg.update({
+            "symbol": payload.get("symbol"),
+            "volume": payload.get("volume"),
+            "comment": payload.get("comment", ""),
+        })
+        # propagate optional SL/TP fields
+        if "sl" in payload: msg["sl"] = payload.get("sl")
+        if "tp" in payload: msg["tp"] = payload.get("tp")
+        if "slPips" in payload: msg["slPips"] = payload.get("slPips")
+        if "tpPips" in payload: msg["tpPips"] = payload.get("tpPips")
+    elif state == 3:  # Close trade
+        # expected: ticket or symbol/volume
+        msg.update({
+            "ticket": payload.get("ticket"),
+            "symbol": payload.get("symbol"),
+            "volume": payload.get("volume"),
+            "type": payload.get("type"),  # optional: 0 buy, 1 sell
+        })
+    # state 0: do nothing
+    return msg
+
+
+def get_next_command(client_id: str, batch: bool = False) -> dict:
     """Return the next pending command for the client without losing it until acked.
     If none pending, return a no-op state=0.
+    
+    With batch=True (client supports state 4) and more than one command pending,
+    return them all (up to COMMAND_BATCH_MAX) as one state-4 message:
+        {"id": ..., "state": 4, "count": n, "orders": [<command message>, ...]}
+    Each order keeps its own cmdId and is acknowledged on its own.
     """
+    import Globals
+    
+    batch = batch and getattr(Globals, "COMMAND_BATCHING", True)
+    limit = max(1, int(getattr(Globals, "COMMAND_BATCH_MAX", 32)))
+    now = _time.time()
+    expired = []
+    msg = None
     with _LOCK:
         queue = _CLIENT_COMMANDS.get(str(client_id), [])
+        pending = []
         for cmd in queue:
-            if cmd.get("status") != "ack":
-                # mark as sent (first delivery)
-                if cmd.get("status") == "queued":
-                    cmd["status"] = "sent"
-                    cmd["updatedAt"] = now_iso()
-                # Build the precise message for EA
-                state = int(cmd.get("state", 0))
-                msg = {"id": str(client_id), "state": state, "cmdId": cmd["cmdId"]}
-                payload = cmd.get("payload") or {}
-                # shape by state
-                if state == 1:  # Open BUY
-                    # expected: symbol, volume, optional comment and SL/TP (absolute or pip distances)
-                    msg.update({
-                        "symbol": payload.get("symbol"),
-                        "volume": payload.get("volume"),
-                        "comment": payload.get("comment", ""),
-                    })
-                    # propagate optional SL/TP fields
-                    if "sl" in payload: msg["sl"] = payload.get("sl")
-                    if "tp" in payload: msg["tp"] = payload.get("tp")
-                    if "slPips" in payload: msg["slPips"] = payload.get("slPips")
-                    if "tpPips" in payload: msg["tpPips"] = payload.get("tpPips")
-                elif state == 2:  # Open SELL
-                    msg.update({
-                        "symbol": payload.get("symbol"),
-                        "volume": payload.get("volume"),
-                        "comment": payload.get("comment", ""),
-                    })
-                    # propagate optional SL/TP fields
-                    if "sl" in payload: msg["sl"] = payload.get("sl")
-                    if "tp" in payload: msg["tp"] = payload.get("tp")
-                    if "slPips" in payload: msg["slPips"] = payload.get("slPips")
-                    if "tpPips" in payload: msg["tpPips"] = payload.get("tpPips")
-                elif state == 3:  # Close trade
-                    # expected: ticket or symbol/volume
-                    msg.update({
-                        "ticket": payload.get("ticket"),
-                        "symbol": payload.get("symbol"),
-                        "volume": payload.get("volume"),
-                        "type": payload.get("type"),  # optional: 0 buy, 1 sell
-                    })
-                # state 0: do nothing
-                return msg
-    # No pending command
-    return {"id": str(client_id), "state": 0}
+            if cmd["status"] == "queued" and cmd.get("deadline") and now > cmd["deadline"]:
+                cmd["status"] = "expired"
+                cmd["updatedAt"] = now_iso()
+                expired.append(cmd)
+                continue
+            if cmd["status"] != "ack":
+                pending.append(cmd)
+                if not batch or len(pending) >= limit:
+                    break
+        if expired:
+            queue[:] = [cmd for cmd in queue if cmd["status"] != "expired"]
+        if len(pending) == 1:
+            msg = _command_message(client_id, pending[0])
+        elif pending:
+            orders = [_command_message(client_id, cmd) for cmd in pending]
+            msg = {"id": str(client_id), "state": STATE_BATCH, "count": len(orders), "orders": orders}
+    for cmd in expired:
+        Journal.record("expire", client=str(client_id), cmd_id=cmd["cmdId"])
+        ON_OPEN_EXPIRED(cmd)
+    # No pending command → no-op
+    return msg or {"id": str(client_id), "state": 0}
 
 
 def ack_command(client_id: str, cmd_id: str, success: bool, details: Optional[dict] = None) -> dict:
     """Mark a command as acknowledged and store result details."""
+    result = _ack_command(client_id, cmd_id, success, details)
+    if result["ok"]:
+        # Advance any S3/S5 action waiting on this close
+        PendingCloses.on_ack(client_id, cmd_id, success)
+    return result
+
+
+def _ack_command(client_id: str, cmd_id: str, success: bool, details: Optional[dict] = None) -> dict:
+    result = _ack_locked(client_id, cmd_id, success, details)
+    if result["ok"]:
+        Journal.record("ack", client=str(client_id), cmd_id=cmd_id, ok=bool(success))
+    return result
+
+
+def _ack_locked(client_id: str, cmd_id: str, success: bool, details: Optional[dict] = None) -> dict:
     with _LOCK:
         queue = _CLIENT_COMMANDS.get(str(client_id), [])
-        for cmd in queue:
+        for i, cmd in enumerate(queue):
             if cmd.get("cmdId") == cmd_id:
                 cmd["status"] = "ack"
                 cmd["updatedAt"] = now_iso()
                 cmd["result"] = {"success": bool(success), **(details or {})}
+                # Acked commands leave the queue
+                del queue[i]
+                ticket = cmd["payload"].get("ticket") if cmd["state"] == 3 else None
+                if ticket and not success:
+                    # Failed close: allow it to be queued again
+                    _CLIENT_CLOSING.get(str(client_id), {}).pop(ticket, None)
+                
+                if cmd.get("payload", {}).get("tid"):
+                    LatencyTrace.mark("ack", tid=cmd["payload"]["tid"], cmd_id=cmd_id)
                 
                 # Update Globals._Trades_ status to "executed" if successful
                 if success:
@@ -561,6 +819,23 @@ def process_ack_response(client_id: str, cmd_id: str, success: bool, details: Op
     }
 
 
+def process_batch_ack(client_id: str, acks: List[dict]) -> List[dict]:
+    """
+    Process the per-order ACKs of a state-4 batch (one POST /ack/<id> for the batch).
+    
+    Args:
+        client_id: The MT5 client ID
+        acks: [{cmdId, success, details}, ...] in execution order
+        
+    Returns:
+        list: process_ack_response() result for each order
+    """
+    return [
+        process_ack_response(client_id, ack.get("cmdId"), bool(ack.get("success", False)), ack.get("details") or {})
+        for ack in acks or []
+    ]
+
+
 def checkTime() -> bool:
     """
     Check if current time is within trading hours based on Globals settings.
@@ -608,40 +883,49 @@ def checkTime() -> bool:
     return in_range
 
 
-def set_targets() -> None:
+def set_targets(account: Optional[Accounts.AccountContext] = None) -> None:
     """
     Calculate and set weekly goal system targets based on current balance and settings.
     
-    Sets the following Globals:
-        - systemBaseBalance: Prop firm account tier (5k, 10k, 25k, 50k, 100k, 200k)
+    Sets the following on the account (mirrored to the Globals system* names
+    and lot_multiplier when it is the primary account):
+        - base_balance: Prop firm account tier (5k, 10k, 25k, 50k, 100k, 200k)
         - lot_multiplier: Lot size scaling factor (5k→0.05x, 10k→0.1x, 25k→0.25x, 50k→0.5x, 100k→1.0x, 200k→2.0x)
-        - systemStartOfWeekBalance: Starting balance (only if currently 0)
-        - systemEquityTarget: Target equity (starting balance + weekly goal based on base tier)
+        - start_of_week_balance: Starting balance (only if currently 0)
+        - equity_target: Target equity (starting balance + weekly goal based on base tier)
         
     This function should be called when:
         1. Balance/Equity data is received from EA (Packet B)
         2. Weekly reset occurs
         
+    Args:
+        account: Account to update (default: the primary account)
+        
     Example:
-        If systemBalance = 56,843 then systemBaseBalance = 50,000 (within 25% deviation)
+        If balance = 56,843 then base_balance = 50,000 (within 25% deviation)
         lot_multiplier = 50,000 / 100,000 = 0.5x
         If EURUSD base lot = 0.50, actual lot sent = 0.50 × 0.5 = 0.25 lots
         
-        If systemBalance = 104,462 then systemBaseBalance = 100,000
+        If balance = 104,462 then base_balance = 100,000
         lot_multiplier = 100,000 / 100,000 = 1.0x (no change)
         
-        If systemBalance = 204,000 then systemBaseBalance = 200,000
+        If balance = 204,000 then base_balance = 200,000
         lot_multiplier = 200,000 / 100,000 = 2.0x
         If EURUSD base lot = 0.50, actual lot sent = 0.50 × 2.0 = 1.00 lots
     """
     import Globals
     
+    account = account or Accounts.primary()
+    if account is None:
+        return
+    label = f"[SET_TARGETS] Client [{account.client_id}]"
+    
     # Track if this is the first time setting up targets
-    first_time_setup = Globals.systemStartOfWeekBalance == 0.0 and Globals.systemBalance > 0.0
+    first_time_setup = account.start_of_week_balance == 0.0 and account.balance > 0.0
     
     # Determine base balance tier based on current balance with 25% deviation tolerance
     # Example: 104,462 → 100,000 | 56,843 → 50,000
-    if Globals.systemBalance > 0.0:
+    if account.balance > 0.0:
         predefined_tiers = [5000, 10000, 25000, 50000, 100000, 200000]
         
         for tier in predefined_tiers:
@@ -649,63 +933,65 @@ def set_targets() -> None:
             lower_bound = tier * 0.75  # 25% below
             upper_bound = tier * 1.25  # 25% above
             
-            if lower_bound <= Globals.systemBalance <= upper_bound:
-                Globals.systemBaseBalance = tier
+            if lower_bound <= account.balance <= upper_bound:
+                account.base_balance = tier
                 break
         else:
             # If no tier matches, use the actual balance as base
-            Globals.systemBaseBalance = Globals.systemBalance
+            account.base_balance = account.balance
         
         # Calculate lot multiplier based on base balance tier
         # Default lot sizes in _Symbols_ are calibrated for 100k accounts
         # 5k → 0.05x, 10k → 0.1x, 25k → 0.25x, 50k → 0.5x, 100k → 1.0x, 200k → 2.0x
         reference_balance = 100000.0
-        if Globals.systemBaseBalance > 0:
-            Globals.lot_multiplier = Globals.systemBaseBalance / reference_balance
+        if account.base_balance > 0:
+            account.lot_multiplier = account.base_balance / reference_balance
         else:
-            Globals.lot_multiplier = 1.0
+            account.lot_multiplier = 1.0
     
     # Set starting balance only once (when it's 0)
     if first_time_setup:
-        Globals.systemStartOfWeekBalance = Globals.systemBalance
+        account.start_of_week_balance = account.balance
     
     # Calculate target equity: starting balance + weekly goal (based on base tier)
     # Example: Starting balance 104,462 with base tier 100,000 and 1.0% goal
     #          Target = 104,462 + (100,000 × 1.0 / 100) = 105,462 (fixed $1,000 goal)
-    if Globals.systemStartOfWeekBalance > 0.0 and Globals.systemBaseBalance > 0.0:
-        weekly_goal_amount = Globals.systemBaseBalance * (Globals.UserWeeklyGoalPercentage / 100)
-        Globals.systemEquityTarget = Globals.systemStartOfWeekBalance + weekly_goal_amount
+    if account.start_of_week_balance > 0.0 and account.base_balance > 0.0:
+        weekly_goal_amount = account.base_balance * (Globals.UserWeeklyGoalPercentage / 100)
+        account.equity_target = account.start_of_week_balance + weekly_goal_amount
         
         # Print all variables once during first setup
         if first_time_setup:
             print("=" * 60)
-            print("[SET_TARGETS] WEEKLY GOAL SYSTEM INITIALIZED")
+            print(f"{label} WEEKLY GOAL SYSTEM INITIALIZED")
             print("=" * 60)
-            print(f"systemBalance:             ${Globals.systemBalance:,.2f}")
-            print(f"systemEquity:              ${Globals.systemEquity:,.2f}")
-            print(f"systemBaseBalance:         ${Globals.systemBaseBalance:,.2f}")
-            print(f"lot_multiplier:            {Globals.lot_multiplier:.2f}x (calibrated for 100k = 1.0x)")
-            print(f"systemStartOfWeekBalance:  ${Globals.systemStartOfWeekBalance:,.2f}")
+            print(f"balance:                   ${account.balance:,.2f}")
+            print(f"equity:                    ${account.equity:,.2f}")
+            print(f"base_balance:              ${account.base_balance:,.2f}")
+            print(f"lot_multiplier:            {account.lot_multiplier:.2f}x (calibrated for 100k = 1.0x)")
+            print(f"start_of_week_balance:     ${account.start_of_week_balance:,.2f}")
             print(f"UserWeeklyGoalPercentage:  {Globals.UserWeeklyGoalPercentage}%")
             print(f"Weekly Goal Amount:        ${weekly_goal_amount:,.2f}")
-            print(f"systemEquityTarget:        ${Globals.systemEquityTarget:,.2f}")
-            print(f"systemWeeklyGoalReached:   {Globals.systemWeeklyGoalReached}")
+            print(f"equity_target:             ${account.equity_target:,.2f}")
+            print(f"weekly_goal_reached:       {account.weekly_goal_reached}")
             print("=" * 60)
         
         # Check if goal is already reached
-        if Globals.systemEquity >= Globals.systemEquityTarget and not Globals.systemWeeklyGoalReached:
-            Globals.systemWeeklyGoalReached = True
+        if account.equity >= account.equity_target and not account.weekly_goal_reached:
+            account.weekly_goal_reached = True
             print(f"\n{'=' * 60}")
-            print(f"[SET_TARGETS] ✓ WEEKLY GOAL REACHED!")
+            print(f"{label} ✓ WEEKLY GOAL REACHED!")
             print(f"{'=' * 60}")
-            print(f"Current Equity:   ${Globals.systemEquity:,.2f}")
-            print(f"Target Equity:    ${Globals.systemEquityTarget:,.2f}")
-            print(f"Profit Made:      ${Globals.systemEquity - Globals.systemStartOfWeekBalance:,.2f}")
+            print(f"Current Equity:   ${account.equity:,.2f}")
+            print(f"Target Equity:    ${account.equity_target:,.2f}")
+            print(f"Profit Made:      ${account.equity - account.start_of_week_balance:,.2f}")
             print(f"{'=' * 60}\n")
-        elif Globals.systemEquity < Globals.systemEquityTarget and Globals.systemWeeklyGoalReached:
+        elif account.equity < account.equity_target and account.weekly_goal_reached:
             # Reset if equity drops below target
-            Globals.systemWeeklyGoalReached = False
-            print(f"[SET_TARGETS] Goal status reset - Equity dropped below target")
+            account.weekly_goal_reached = False
+            print(f"{label} Goal status reset - Equity dropped below target")
+    
+    Accounts.mirror(account)
 
 
 def generate_tid(nid: int) -> str:
@@ -771,6 +1057,8 @@ def create_trade(client_id: str, symbol: str, action: str, volume: float,
     }
     
     Globals._Trades_[tid] = trade
+    Accounts.get(client_id).trades.append(tid)
+    Journal.record("trade", trade=trade)
     print(f"[Trade] Created {tid} for {symbol} {action} {volume} lots (NID: {nid})")
     
     return trade
@@ -795,6 +1083,7 @@ def update_trade_ticket(tid: str, ticket: int) -> bool:
     Globals._Trades_[tid]["ticket"] = ticket
     Globals._Trades_[tid]["status"] = "executed"
     Globals._Trades_[tid]["updatedAt"] = now_iso()
+    Journal.record("ticket", tid=tid, ticket=ticket)
     
     print(f"[Trade] {tid} executed with ticket {ticket}")
     return True
@@ -884,6 +1173,14 @@ def update_trade_outcome_by_ticket(ticket: int, outcome: str) -> dict:
     """
     import Globals
     
+    # Request thread of the reporting account; NID counters are shared with the news orders
+    with Globals.STATE_LOCK:
+        return _update_trade_outcome(ticket, outcome)
+
+
+def _update_trade_outcome(ticket: int, outcome: str) -> dict:
+    import Globals
+    
     trade = get_trade_by_ticket(ticket)
     if not trade:
         return {"ok": False, "error": "trade_not_found", "ticket": ticket}
@@ -929,37 +1226,21 @@ def extract_currencies(symbol: str) -> List[str]:
         extract_currencies("EURUSD") → ["EUR", "USD"]
         extract_currencies("BITCOIN") → ["BTC"]
     """
-    import Globals
-    
-    currencies = []
-    known_currencies = ["XAU", "EUR", "USD", "JPY", "CHF", "NZD", "CAD", "GBP", "AUD", "BTC"]
-    
-    # Special handling for single-currency symbols
-    if "BITCOIN" in symbol.upper():
-        return ["BTC"]
-    if "ETHEREUM" in symbol.upper():
-        return ["BTC"]  # Treat crypto similarly
-    if "LITECOIN" in symbol.upper():
-        return ["BTC"]
-    if "DOGECOIN" in symbol.upper():
-        return ["BTC"]
-    
-    # Extract currencies by checking if known currency codes appear in symbol
-    for currency in known_currencies:
-        if currency in symbol.upper():
-            currencies.append(currency)
-    
-    return currencies
+    # Parsed once per symbol and cached (see CurrencyExposure.py)
+    return CurrencyExposure.currencies_of(symbol)
 
 
-def update_currency_count(symbol: str, operation: str) -> None:
+def update_currency_count(symbol: str, operation: str, client_id: Optional[str] = None) -> None:
     """
     Update the _CurrencyCount_ dictionary when opening or closing a trade.
     Also updates S5 positions_opened counter in _CurrencySentiment_.
+    _CurrencyCount_ is the total over all accounts; with a client_id the
+    account's own exposure (used by can_open_trade(symbol, client_id)) is updated too.
     
     Args:
         symbol: Trading pair symbol (e.g., "GBPJPY")
         operation: "add" to increment counts, "remove" to decrement counts
+        client_id: Account the position belongs to
         
     Examples:
         update_currency_count("GBPJPY", "add")    # GBP +1, JPY +1
@@ -988,9 +1269,18 @@ def update_currency_count(symbol: str, operation: str) -> None:
                         if Globals._CurrencySentiment_[currency]['positions_opened'] == 0:
                             # Keep direction and count, just reset positions
                             pass  # Allow re-scaling if more signals arrive
+    
+    tracked = [c for c in currencies if c in Globals._CurrencyCount_]
+    exposure = None
+    if client_id is not None:
+        exposure = Accounts.add_exposure(Accounts.get(client_id), tracked, operation)
+    Journal.record("count", counts={c: Globals._CurrencyCount_[c] for c in tracked},
+                   client=client_id, exposure=exposure)
+    if operation == "remove" and Globals.news_filter_allowScaling:
+        Journal.sync_sentiment()
 
 
-def can_open_trade(symbol: str) -> bool:
+def can_open_trade(symbol: str, client_id: Optional[str] = None) -> bool:
     """
     Check if a trade can be opened based on risk management filters.
     
@@ -999,8 +1289,12 @@ def can_open_trade(symbol: str) -> bool:
     1. news_filter_maxTrades: Maximum total open trades (0 = no limit)
     2. news_filter_maxTradePerCurrency: Maximum trades per currency (0 = no limit)
     
+    With a client_id the limits apply to that account's trades and exposure;
+    without one, to the totals over all accounts.
+    
     Args:
         symbol: Trading pair symbol (e.g., "GBPJPY")
+        client_id: Account that would open the trade
         
     Returns:
         bool: True if trade can be opened, False if rejected by filters
@@ -1013,9 +1307,11 @@ def can_open_trade(symbol: str) -> bool:
     """
     import Globals
     
+    trades, counts = _account_book(client_id)
+    
     # Check 1: Maximum total trades
     if Globals.news_filter_maxTrades > 0:
-        current_total_trades = len(Globals._Trades_)
+        current_total_trades = len(trades)
         if current_total_trades >= Globals.news_filter_maxTrades:
             # Removed verbose logging - rejection shown in calling function
             return False
@@ -1025,7 +1321,7 @@ def can_open_trade(symbol: str) -> bool:
         currencies = extract_currencies(symbol)
         
         for currency in currencies:
-            current_count = Globals._CurrencyCount_.get(currency, 0)
+            current_count = counts.get(currency, 0)
             
             # If opening this trade would exceed the limit for any currency, reject
             if current_count >= Globals.news_filter_maxTradePerCurrency:
@@ -1036,7 +1332,17 @@ def can_open_trade(symbol: str) -> bool:
     return True
 
 
-def find_available_pair_for_currency(currency: str) -> Optional[str]:
+def _account_book(client_id: Optional[str]) -> Tuple[Any, Dict[str, int]]:
+    """Trades and currency counts the risk filters look at: one account's, or all accounts'."""
+    import Globals
+    
+    if client_id is None:
+        return Globals._Trades_, Globals._CurrencyCount_
+    account = Accounts.get(client_id)
+    return account.trades, account.exposure
+
+
+def find_available_pair_for_currency(currency: str, client_id: Optional[str] = None) -> Optional[str]:
     """
     Find an available trading pair containing the specified currency
     that won't be rejected by risk management filters.
@@ -1049,9 +1355,11 @@ def find_available_pair_for_currency(currency: str) -> Optional[str]:
     Search hierarchy:
     1. First searches symbolsToTrade for available pairs
     2. If news_filter_findAllPairs = True and no pair found, expands to all _Symbols_
+    Within each step, pairs with the tightest Packet C spread are tried first.
     
     Args:
         currency: Currency code (e.g., "EUR", "USD", "GBP")
+        client_id: Account the pair is for (see can_open_trade)
         
     Returns:
         str: Symbol name if valid pair found, None otherwise
@@ -1068,54 +1376,37 @@ def find_available_pair_for_currency(currency: str) -> Optional[str]:
     """
     import Globals
     
-    symbols_config = getattr(Globals, "_Symbols_", {})
-    symbols_to_trade = getattr(Globals, "symbolsToTrade", set())
     find_all_pairs = getattr(Globals, "news_filter_findAllPairs", False)
     
     print(f"[FIND PAIR] Searching for alternative pair containing {currency}...")
     
-    # STEP 1: Search in symbolsToTrade first (priority)
-    print(f"[FIND PAIR] Step 1: Searching in symbolsToTrade ({len(symbols_to_trade)} symbols)...")
+    trades, counts = _account_book(client_id)
     
-    for symbol in symbols_to_trade:
-        if symbol in symbols_config:
-            # Check if this symbol contains the target currency
-            currencies = extract_currencies(symbol)
-            
-            if currency in currencies:
-                # Test if we can open this pair
-                if can_open_trade(symbol):
-                    print(f"[FIND PAIR] ✅ Found in symbolsToTrade: {symbol}")
-                    return symbol
-                else:
-                    print(f"[FIND PAIR] ❌ {symbol} (symbolsToTrade) rejected by filters")
-    
-    # STEP 2: If not found and news_filter_findAllPairs enabled, search all _Symbols_
-    if find_all_pairs:
-        print(f"[FIND PAIR] Step 2: Expanding search to all _Symbols_ ({len(symbols_config)} symbols)...")
-        
-        for symbol, config in symbols_config.items():
-            # Skip symbols already checked in symbolsToTrade
-            if symbol in symbols_to_trade:
-                continue
-            
-            # Check if this symbol contains the target currency
-            currencies = extract_currencies(symbol)
-            
-            if currency in currencies:
-                # Test if we can open this pair
-                if can_open_trade(symbol):
-                    print(f"[FIND PAIR] ✅ Found in _Symbols_: {symbol}")
-                    return symbol
-                else:
-                    print(f"[FIND PAIR] ❌ {symbol} (_Symbols_) rejected by filters")
-    else:
+    # Check 1 of can_open_trade() is not per pair - if it fails, no pair can open
+    if Globals.news_filter_maxTrades > 0 and len(trades) >= Globals.news_filter_maxTrades:
+        print(f"[FIND PAIR] ⚠️  news_filter_maxTrades reached - no alternative for {currency}")
+        return None
+    
+    # Priority index: symbolsToTrade first, then (if enabled) the rest of _Symbols_,
+    # each tier ordered by spread. The pick is memoized per set of blocked currencies.
+    blocked = CurrencyExposure.blocked_mask(counts, Globals.news_filter_maxTradePerCurrency)
+    symbol, tier = CurrencyExposure.get_priority_index().first_available(currency, blocked, find_all_pairs)
+    
+    if symbol:
+        print(f"[FIND PAIR] ✅ Found in {tier}: {symbol}")
+        return symbol
+    
+    if not find_all_pairs:
         print(f"[FIND PAIR] Step 2: Skipped (news_filter_findAllPairs = False)")
     
     print(f"[FIND PAIR] ⚠️  No available pair found for {currency}")
     return None
 
 
+# time.monotonic() of the last idle screen redraw (Globals.IDLE_SCREEN_INTERVAL)
+_IDLE_SCREEN_DRAWN = 0.0
+
+
 def display_idle_screen(client_id: str, open_count: int, closed_count: int):
     """
     Display clean idle screen with next event countdown and position status.
@@ -1138,6 +1429,14 @@ def display_idle_screen(client_id: str, open_count: int, closed_count: int):
     if not Globals.liveMode:
         return
     
+    # Redraw at most every IDLE_SCREEN_INTERVAL seconds
+    global _IDLE_SCREEN_DRAWN
+    interval = getattr(Globals, "IDLE_SCREEN_INTERVAL", 0)
+    now_ts = _time.monotonic()
+    if interval and now_ts - _IDLE_SCREEN_DRAWN < interval:
+        return
+    _IDLE_SCREEN_DRAWN = now_ts
+    
     # Clear terminal (Windows: cls, Unix: clear)
     os.system('cls' if os.name == 'nt' else 'clear')
     
@@ -1220,8 +1519,9 @@ def display_idle_screen(client_id: str, open_count: int, closed_count: int):
     print(f"   Open: {open_count}")
     print(f"   Closed: {closed_count}")
     
-    # Get symbols currently open
-    symbols_open = getattr(Globals, "symbolsCurrentlyOpen", [])
+    # Get symbols currently open on this account
+    account = Accounts.find(client_id)
+    symbols_open = account.symbols_open if account else getattr(Globals, "symbolsCurrentlyOpen", [])
     if symbols_open:
         symbols_str = ", ".join(symbols_open)
         print(f"   Symbols: {symbols_str}")
@@ -7,6 +7,9 @@ test_message = "HELLO"
 # Server configuration
 SERVER_HOST = "127.0.0.1"  # Bind address (default: 127.0.0.1 for local only, use 0.0.0.0 for all interfaces)
 SERVER_PORT = 5000          # Port to listen on (default: 5000)
+SERVER_WORKERS = 0          # HTTP worker processes in front of this one (0 = single process, see Broker.py)
+IDLE_SCREEN_INTERVAL = 0    # Min seconds between idle screen redraws (0 = every heartbeat)
+DICTIONARY_SAVE_INTERVAL = 0  # Min seconds between _dictionaries CSV snapshots (0 = every packet)
 
 # API Keys - imported from config.py (not committed to git)
 try:
@@ -30,9 +33,30 @@ EVENT_TRIGGER_DELAY = 5  # 5 seconds delay on first attempt to let MyFxBook publ
 
 # Daily AI call limits (prevent runaway token usage)
 MAX_DAILY_AI_CALLS = 100  # Maximum AI API calls per day
-ai_calls_today = 0  # Counter for today's calls
+ai_calls_today = 0  # Counter for today's calls (kept by AIBudget)
 ai_calls_reset_date = None  # Track which day the counter is for
 
+# AI call budget (AIBudget.py): the day's calls are reserved per event, highest impact first
+AI_BUDGET_CALLS = {"High": 8, "Medium": 4, "Low": 2}  # Calls reserved per event by calendar Impact
+AI_BUDGET_POOL = 10  # Calls never reserved: forecast pre-fetch and events past their reservation
+
+# Today's usage: {"day", "used", "pool_used", "denied", "calendar", "events": {event_key: {"reserved", "used"}}}
+_AIBudget_ = {}
+
+# AI gateway (AIGateway.py): every AI call has a hard deadline and is cancelled when it passes
+AI_CALL_TIMEOUT = 60  # Deadline per AI call when the caller sets none (seconds)
+AI_EVENT_WINDOW = 900  # Seconds after release an event is still worth trading; its AI calls stop there (0 = no window)
+AI_HEDGE_MODELS = {"sonar-pro": "sonar"}  # Model → model also asked when the first is slow ({} = no hedging)
+AI_HEDGE_PERCENTILE = 90  # Hedge once a call takes longer than this percentile of the model's recent latencies
+AI_HEDGE_AFTER = 8.0  # Hedge delay (seconds) until AI_HEDGE_MIN_SAMPLES latencies are known
+AI_HEDGE_MIN_SAMPLES = 5
+
+# Actual-value racing: the fetch goes to every backend at once, the first clean answer wins
+# Backends: "perplexity:<model>", "chatgpt:<model>" or "adapter:<name>" (AIGateway.register_adapter)
+AI_RACE_ENABLED = False  # False = Perplexity sonar-pro only (each AI backend is a paid call)
+AI_RACE_BACKENDS = ["perplexity:sonar-pro", "chatgpt:gpt-4o-search-preview"]
+AI_RACE_TOLERANCE = 10.0  # Actual further than this x max(|forecast|, 1) from the forecast loses (0 = no check)
+
 # Live mode flag - controls behavior for testing vs live trading
 # When True, bypasses:
 #   - Time restrictions (timeToTrade always True)
@@ -55,9 +79,10 @@ news_process_past_events = False
 news_test_mode = False
 
 # Forecast pre-fetch control - determines when to fetch forecast values
-# When True: Pre-fetch all forecasts during initialization (STEP 1) - uses more tokens upfront
-# When False: Fetch forecast AND actual together at event time (STEP 3) - saves tokens
-# Default: False (more efficient - fetch both values at once)
+# When True: Pre-fetch all forecasts in the background from startup (ForecastPrefetch.py) - uses more tokens upfront
+# When False: Forecasts are pre-fetched FORECAST_PREFETCH_LEAD before release (or fetched
+# together with the actual at event time when FORECAST_PREFETCH_ENABLED is off)
+# Default: False (only the day's upcoming events are pre-fetched)
 user_process_forecast_first = False
 
 # Time configuration
@@ -98,6 +123,21 @@ UserWeeklyGoalPercentage = 1.0  # Weekly goal as percentage (1.0 = 1%)
 systemEquityTarget = 0.0  # Target equity including starting balance (e.g., 100,000 + 1,000 = 101,000)
 systemWeeklyGoalReached = False  # Set to True when systemEquity >= systemEquityTarget
 
+# Per-account copies of the values above, one per MT5 client id (see Accounts.py):
+# balance, targets, lot_multiplier, open symbols, strategy, currency exposure, TIDs.
+# systemBalance ... systemWeeklyGoalReached, lot_multiplier and symbolsCurrentlyOpen
+# mirror the primary account; only the primary account changes the strategy preset
+from Accounts import AccountTable
+_Accounts_ = AccountTable()
+MAIN_MT5_ACCOUNT = ""  # Primary account id ("" = the first account that reports)
+
+# Verdict fan-out: each news verdict becomes one order per attached account, sized
+# with that account's lot_multiplier and filtered on its own exposure (News.py step 7).
+# Accounts other than the heartbeat draining the verdicts take part while their EA
+# polled within FANOUT_ONLINE_SECONDS
+FANOUT_ENABLED = True  # False: only the account whose heartbeat drains the verdicts trades them
+FANOUT_ONLINE_SECONDS = 60
+
 # Dynamic lot size percentage of account balance
 lot_size_percentage = 0.0025  # 0.25% of account balance (0.0025)
 
@@ -111,10 +151,12 @@ weekly_cumulative_return = 0.0  # Running profit/loss for current week
 weekly_target_reached = False  # Set to True when weekly_cumulative_return >= weekly_profit_target
 
 # News event tracking - stores currency news results
-# Format: event_key → {currency, date, event, forecast, actual, affect, retry_count, NID, NID_Affect, NID_Affect_Executed, NID_TP, NID_SL}
-# Example: "EUR_2025-11-03_04:10" → {
-#   "currency": "EUR", 
-#   "date": "2025, November 03, 04:10", 
+# Format: event_key → EventRecord (Events.py: __slots__ record with dict-style access)
+# Fields: currency, event, impact, event_time, forecast, actual, affect, retry_count, retry_after,
+#         NID, NID_Affect, NID_Affect_Executed, NID_TP, NID_SL (+ date/ai_date derived from event_time)
+# Example: "EUR_2025-11-03_04:10_<md5>" → EventRecord(eid=7, {
+#   "currency": "EUR",           ← Interned
+#   "date": "2025, November 03, 04:10",
 #   "event": "Unemployment Rate", 
 #   "forecast": 4.5, 
 #   "actual": 4.2, 
@@ -125,15 +167,22 @@ weekly_target_reached = False  # Set to True when weekly_cumulative_return >= we
 #   "NID_Affect_Executed": 2,    ← How many pairs were actually executed
 #   "NID_TP": 0,                 ← How many hit TP (updated by MT5)
 #   "NID_SL": 0                  ← How many hit SL (updated by MT5)
-# }
+# })
 # Note: During initialization, actual=None, affect=None, NID assigned when event processed
-_Currencies_ = {}
+# Plain dicts assigned here are converted; _Currencies_.by_id(eid) looks a record up by event id
+from Events import EventTable
+_Currencies_ = EventTable()
 
 # News-affected pairs tracking - stores trading decisions per pair
 # Format: pair → {date, event, position, NID}
 # Example: "XAUUSD" → {"date": "2025, November 11, 08:15", "event": "(United States) ADP Employment...", "position": "BUY", "NID": 5}
 _Affected_ = {}
 
+# Pending verdicts - written by update_affected_symbols(), drained by execute_news_trades()
+# Format: pair → {pair, verdict, NID, currency, event, date, event_key}
+# Idle heartbeats only check whether this is empty (no _Symbols_ scan)
+_PendingVerdicts_ = {}
+
 # Queued trades tracking - stores all trades to be executed
 # Format: TID → {TID, client_id, symbol, action, volume, tp, sl, comment, status, createdAt, updatedAt, NID, ticket, ...analytics}
 # Example: "TID_5_1" → {
@@ -276,6 +325,15 @@ _CurrencyCount_ = {
 # Updated when trades open/close. Tracks individual pair exposure for per-pair limits.
 _PairCount_ = {}
 
+# ========== SHARED STATE LOCK ==========
+
+# Requests of different accounts run on their own server threads. Changes to the
+# trading dictionaries (exposure counts, S3/S5 tracking, _PendingCloses_, trade
+# outcomes) and the _dictionaries snapshot are serialized with this lock
+# (News._STATE_LOCK). Reentrant: the S3/S5 handlers queue orders while it is held.
+import threading
+STATE_LOCK = threading.RLock()
+
 # ========== S3 (ROLLING MODE) TRACKING ==========
 
 # Currency-level position tracking for S3 rolling logic
@@ -363,6 +421,65 @@ news_filter_confirmationThreshold = 2     # Number of agreeing signals needed (d
 # Tracks signal count per currency: {'EUR': {'direction': 'BUY', 'count': 1}, ...}
 _CurrencySentiment_ = {}
 
+# ========== CLOSE-THEN-ACT (S3/S5) ==========
+
+# Actions waiting for the EA to confirm closes (see PendingCloses.py)
+# S3 reversal: "awaiting close of ticket X, then open Y"
+# S5 conflict: "awaiting close of all <currency> positions, then reset positions_opened"
+# Format: key → {kind, key, client_id, closes: {cmdId: ticket}, failed, created, then}
+# Advanced by /ack (ack_command), Packet A (ticket gone) and Packet E (ticket closed)
+_PendingCloses_ = {}
+
+# Seconds to wait for confirmation before resolving an action as unconfirmed
+PENDING_CLOSE_TIMEOUT = 10
+
+# ========== PRE-EVENT WARM-UP ==========
+
+# Slots from calendar_statement.csv are prepared this many seconds before release
+# (see WarmUp.py): BULL/BEAR/NEUTRAL signal branches per currency and sized orders
+WARMUP_ENABLED = True
+WARMUP_LEAD_SECONDS = 60
+
+# True: pick the prepared branch (News_Rules.txt STEP 3 as code) instead of asking
+# ChatGPT for the pair signals after a release. False: ChatGPT still picks the pairs,
+# the prepared orders only save the sizing
+WARMUP_RULE_SIGNALS = False
+
+# Format: currency → {"BULL": {pair: action}, "BEAR": {pair: action}, "NEUTRAL": {}}
+_PreparedBranches_ = {}
+
+# Format: "PAIR:VERDICT" → {pair, symbol, verdict, state, lot, tp, sl, lot_multiplier}
+_PreparedOrders_ = {}
+
+# Format: slot datetime → {currency: {branch: [orders passing can_open_trade()]}}
+_WarmSlots_ = {}
+
+# ========== FORECAST PRE-FETCH ==========
+
+# Forecasts are fetched in the background hours before release (see ForecastPrefetch.py),
+# so the release query asks for the Actual only. False: forecast and actual together at release
+FORECAST_PREFETCH_ENABLED = True
+FORECAST_PREFETCH_LEAD = 6 * 3600    # Seconds before release the pre-fetch starts
+FORECAST_PREFETCH_QUIET = 600        # No pre-fetch within this many seconds of any release
+FORECAST_PREFETCH_WORKERS = 2        # Pre-fetches running at once
+FORECAST_PREFETCH_ATTEMPTS = 3       # Attempts per event before leaving it to the release query
+FORECAST_PREFETCH_RETRY = 1800       # Seconds between attempts for one event
+
+# ========== FETCH RETRIES ==========
+
+# Actual not released yet: when to ask again (see RetryPolicy.py)
+RETRY_MAX_ATTEMPTS = 8  # Fetch attempts per event, the first one included
+RETRY_INITIAL_DELAY = 5  # Seconds before the first retry
+RETRY_BACKOFF = 1.6  # Each further retry waits this much longer
+RETRY_MAX_DELAY = 60  # Longest wait between two attempts (seconds)
+RETRY_TARGET_PERCENTILES = (50, 75, 90)  # Learned release-to-availability points retries aim at
+RETRY_MIN_SAMPLES = 5  # Samples a category needs before its learned points are used
+RETRY_HISTORY = 50  # Samples kept per category
+
+# Seconds from release to a successful fetch, per event category (News.categorize_event)
+# Format: {"Inflation": [12.4, 8.1, ...], "Jobs": [...]}
+_AvailabilityStats_ = {}
+
 # ========== DATA CAPTURE VARIABLES ==========
 
 # CSV logging enable flag
@@ -431,6 +548,57 @@ last_mt5_heartbeat = None  # datetime object, updated on every MT5 data package
 # MT5 connection status
 mt5_connected = False  # Set to True when heartbeat received within last 60 seconds
 
+# ========== COMMAND DELIVERY ==========
+
+# Batch delivery (state 4) for EAs that poll /command/<id>?batch=1
+# All pending open/close orders for a client go out in one reply so a whole
+# news slot fills within one poll; the EA ACKs each order (see Server.mqh)
+COMMAND_BATCHING = True  # Set to False to always deliver one command per poll
+COMMAND_BATCH_MAX = 32   # Maximum orders per batch
+
+# Queued closes are delivered before queued opens, and a close already queued
+# for a ticket is not queued again. An open that is still undelivered this many
+# seconds after it was queued expires (the news move is over); 0 = never expire
+COMMAND_OPEN_TTL = 30
+
+# ========== LATENCY TRACING ==========
+
+# Release-to-order latency tracing (see LatencyTrace.py)
+# Stamps each event: event_time → monitor → fetch → affect → decide → execute → enqueue → deliver → ack
+# Report: python LatencyTrace.py [trace_log.jsonl]
+TRACE_ENABLED = False  # Set to True to record trace marks
+TRACE_LOG_FILE = "trace_log.jsonl"  # Compact JSONL trace log (one line per mark)
+TRACE_FLUSH_INTERVAL = 0.5  # Seconds between writes of the buffered marks (background thread)
+TRACE_LINK_LIMIT = 10000  # NID/TID links and once-only marks kept for resolving later marks (oldest dropped)
+
+# ========== STATE PERSISTENCE ==========
+
+# SQLite store for the trading dictionaries (see StateStore.py)
+# _Trades_, _Currencies_, exposure, S4 locks, S5 sentiment and the NID/TID counters
+# are restored on startup; a background thread writes changes (WAL, write-behind)
+STATE_STORE_ENABLED = True  # Set to False to start from empty state every run
+STATE_DB_FILE = "_dictionaries/state.db"
+STATE_FLUSH_INTERVAL = 0.5  # Seconds between write-behind flushes (max state lost on a crash)
+
+# ========== STATE JOURNAL ==========
+
+# Append-only journal of state mutations (see Journal.py)
+# Trades, tickets, currency counts, NID assignments, S5 sentiment and command
+# enqueue/ack/expiry as length-prefixed records, plus a periodic snapshot
+# Recovery: latest snapshot (or the state store) + replay of the newer records
+# Audit: python Journal.py [--op trade] [_dictionaries/journal]
+JOURNAL_ENABLED = True  # Set to False to disable the journal
+JOURNAL_DIR = "_dictionaries/journal"
+JOURNAL_SNAPSHOT_EVERY = 5000  # Records between snapshots (a new segment file starts after each)
+_Journal_Seq_ = 0  # Sequence number of the last journal record written
+
+# ========== MARKET DATA ==========
+
+# Packet C market-data store (see MarketData.py)
+# Latest bid/ask/spread/ATR per symbol in NumPy arrays, plus a ring buffer of recent samples
+# Packet C arrives every 30 seconds, so 720 samples = 6 hours of history per field
+MARKET_DATA_HISTORY = 720
+
 # ========== TESTING MODE TRACKING ==========
 # Format: ticket → {symbol, action, volume, tp, sl, comment, status, opened_at}
 # This allows multiple positions on the same symbol to be tracked independently
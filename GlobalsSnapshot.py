@@ -0,0 +1,92 @@
+"""
+GlobalsSnapshot.py
+Save and restore the shared state a test changes.
+
+The tests drive the real modules, which keep their state in Globals (settings
+and trading dictionaries), in module attributes (News._clock, patched AI
+calls) and in the per-account stores of Functions/Accounts. A test lists what
+it changes once; everything listed is put back afterwards, whatever the test
+did in between.
+
+- names: Globals attributes, restored as they were (settings, counters)
+- tables: Globals dictionaries, deep-copied and restored in place, so modules
+  holding a reference to the table see the restored contents
+- modules: {module: attribute names} outside Globals (News._clock, ...)
+- stores: module-level dictionaries outside Globals (AIGateway._latencies, ...),
+  restored in place like tables
+- clients: test account ids, removed from Globals._Accounts_ and from every
+  Functions._CLIENT_* store
+
+Restoring copies the saved contents again, so one snapshot can be restored any
+number of times (Backtest puts Globals back before every run this way).
+
+Usage:
+    STATE = GlobalsSnapshot.Preserve("TRACE_ENABLED", tables=("_Currencies_",),
+                                     modules={News: ("_clock",)}, clients=(CLIENT,))
+
+    def test_something():
+        saved = STATE.save()
+        try:
+            ...
+        finally:
+            saved.restore()
+"""
+
+import copy
+from typing import Dict, Iterable, Optional
+
+import Globals
+
+
+class Preserve:
+    """What a test file changes; save() takes a snapshot of it."""
+
+    def __init__(self, *names: str, tables: Iterable[str] = (), modules: Optional[Dict[object, Iterable[str]]] = None,
+                 stores: Iterable[dict] = (), clients: Iterable[str] = ()):
+        self.names = tuple(names)
+        self.tables = tuple(tables)
+        self.modules = {module: tuple(attrs) for module, attrs in (modules or {}).items()}
+        self.stores = tuple(stores)
+        self.clients = tuple(clients)
+
+    def save(self) -> "Snapshot":
+        return Snapshot(self)
+
+
+class Snapshot:
+    """The listed state as it was at Preserve.save()."""
+
+    def __init__(self, spec: Preserve):
+        self.spec = spec
+        self.values = {name: getattr(Globals, name) for name in spec.names}
+        self.tables = {name: (getattr(Globals, name), copy.deepcopy(dict(getattr(Globals, name))))
+                       for name in spec.tables}
+        self.attrs = {module: {attr: getattr(module, attr) for attr in attrs} for module, attrs in spec.modules.items()}
+        self.stores = [(store, copy.deepcopy(dict(store))) for store in spec.stores]
+
+    def restore(self) -> None:
+        for name, value in self.values.items():
+            setattr(Globals, name, copy.copy(value) if isinstance(value, (list, set)) else value)
+        for name, (table, contents) in self.tables.items():
+            table.clear()
+            table.update(copy.deepcopy(contents))
+            setattr(Globals, name, table)
+        for module, attrs in self.attrs.items():
+            for attr, value in attrs.items():
+                setattr(module, attr, value)
+        for store, contents in self.stores:
+            store.clear()
+            store.update(copy.deepcopy(contents))
+        if self.spec.clients:
+            forget_clients(self.spec.clients)
+
+
+def forget_clients(client_ids: Iterable[str]) -> None:
+    """Drop test accounts from Globals._Accounts_ and the Functions._CLIENT_* stores."""
+    import Functions
+
+    stores = [value for name, value in vars(Functions).items() if name.startswith("_CLIENT_") and isinstance(value, dict)]
+    for client_id in client_ids:
+        Globals._Accounts_.pop(client_id, None)
+        for store in stores:
+            store.pop(client_id, None)
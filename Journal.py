@@ -0,0 +1,353 @@
+"""
+Journal.py
+Append-only journal of trading state mutations, with periodic snapshots.
+
+Every mutation of the trading state is appended as one record:
+
+    trade      create_trade()            {"trade": {...}}
+    ticket     update_trade_ticket()     {"tid", "ticket"}
+    count      update_currency_count()   {"counts": {currency: n}, "client", "exposure"} (values after
+                                         the change; exposure = the client account's counts)
+    nid        calculate_affect()        {"key", "event": {...}} (NID, affect, forecast, actual)
+    sentiment  S5 sentiment changes      {"cur", "state": {...} or None}
+    enqueue    enqueue_command()         {"cmd": {...}}
+    ack        ack of a command          {"client", "cmd_id", "ok"}
+    expire     open expired unsent       {"client", "cmd_id"}
+
+Records are length-prefixed (4-byte little-endian length, then compact JSON
+{"q": seq, "t": epoch, "o": op, ...}) and written without fsync - a process
+crash loses nothing that reached the OS, and a torn last record is ignored
+on read. Records carry the resulting values, so replaying one twice is
+harmless.
+
+Every JOURNAL_SNAPSHOT_EVERY records the whole state (StateStore.TRACKED plus
+the unacknowledged commands) is written to snapshot.json and a new segment
+file starts. Recovery loads the snapshot and replays the newer records; when
+the SQLite state store restored state first, only records newer than the
+store's _Journal_Seq_ are replayed. Old segments are kept for audits.
+
+Usage:
+    Journal.start(applied_seq)                      # Server.main(): recover + open for appending
+    Journal.record("ticket", tid="TID_5_1", ticket=12345)
+    Journal.tick()                                  # every heartbeat: snapshot when due
+    python Journal.py [--op trade] [--after SEQ] [folder]   # audit dump, one JSON line per record
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import Globals
+import StateStore
+import Accounts
+
+
+SNAPSHOT_FILE = "snapshot.json"
+_SEGMENT_PREFIX = "journal_"
+_SEGMENT_SUFFIX = ".bin"
+_HEADER = struct.Struct("<I")
+
+# Ops replayed into Globals (the command ops rebuild the command queues)
+STATE_OPS = ("trade", "ticket", "count", "nid", "sentiment")
+COMMAND_OPS = ("enqueue", "ack", "expire")
+
+_LOCK = threading.Lock()
+_journal = {"folder": None, "file": None, "since_snapshot": 0}
+
+# Last journaled S5 sentiment per currency (JSON text)
+_seen_sentiment: Dict[str, str] = {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WRITING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def is_open() -> bool:
+    return _journal["file"] is not None
+
+
+def record(op: str, **fields) -> Optional[int]:
+    """
+    Append one record (no-op while the journal is not open).
+
+    Returns:
+        int: Sequence number of the record, or None if not journaled
+    """
+    if _journal["file"] is None:
+        return None
+    with _LOCK:
+        journal_file = _journal["file"]
+        if journal_file is None:
+            return None
+        seq = Globals._Journal_Seq_ + 1
+        body = StateStore.dumps({"q": seq, "t": round(time.time(), 3), "o": op, **fields}).encode("utf-8")
+        journal_file.write(_HEADER.pack(len(body)) + body)
+        journal_file.flush()
+        Globals._Journal_Seq_ = seq
+        _journal["since_snapshot"] += 1
+        return seq
+
+
+def sync_sentiment() -> int:
+    """
+    Journal the S5 sentiment entries that changed since the last call.
+    _CurrencySentiment_ is updated in many places; callers run this after them.
+
+    Returns:
+        int: Number of sentiment records written
+    """
+    if _journal["file"] is None:
+        return 0
+    current = getattr(Globals, "_CurrencySentiment_", {})
+    written = 0
+    for currency in sorted(set(current) | set(_seen_sentiment)):
+        state = current.get(currency)
+        text = StateStore.dumps(state) if state is not None else None
+        if _seen_sentiment.get(currency) == text:
+            continue
+        record("sentiment", cur=currency, state=state)
+        if text is None:
+            _seen_sentiment.pop(currency, None)
+        else:
+            _seen_sentiment[currency] = text
+        written += 1
+    return written
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _segment_seq(path: str) -> int:
+    return int(os.path.basename(path)[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+
+
+def segments(folder: Optional[str] = None) -> List[str]:
+    """Segment files in order (each is named after its first sequence number)."""
+    folder = folder or Globals.JOURNAL_DIR
+    if not os.path.isdir(folder):
+        return []
+    names = [name for name in os.listdir(folder)
+             if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)]
+    return sorted((os.path.join(folder, name) for name in names), key=_segment_seq)
+
+
+def read(folder: Optional[str] = None, after: int = 0) -> Iterator[dict]:
+    """
+    Stream the records with a sequence number above `after`.
+    A torn record at the end of a segment (crash mid-write) ends that segment.
+    """
+    paths = segments(folder)
+    for i, path in enumerate(paths):
+        if i + 1 < len(paths) and _segment_seq(paths[i + 1]) <= after + 1:
+            continue   # every record of this segment is older
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                (length,) = _HEADER.unpack(header)
+                body = f.read(length)
+                if len(body) < length:
+                    break
+                entry = StateStore.loads(body.decode("utf-8"))
+                if entry["q"] > after:
+                    yield entry
+
+
+def load_snapshot(folder: Optional[str] = None) -> Optional[dict]:
+    """Latest snapshot: {"seq", "time", "state", "commands"}, or None."""
+    path = os.path.join(folder or Globals.JOURNAL_DIR, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        snapshot = StateStore.loads(f.read())
+    state = snapshot["state"]
+    for name in StateStore.TRACKED:
+        state[name] = dict(state.get(name, []))
+    return snapshot
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SNAPSHOT AND RECOVERY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _open_segment(folder: str, first_seq: int) -> None:
+    path = os.path.join(folder, f"{_SEGMENT_PREFIX}{first_seq:012d}{_SEGMENT_SUFFIX}")
+    _journal["file"] = open(path, "ab")
+
+
+def snapshot() -> Optional[int]:
+    """
+    Write the whole state to snapshot.json (atomically) and start a new segment.
+
+    Returns:
+        int: Sequence number the snapshot covers, or None if the journal is not open
+    """
+    import Functions
+
+    with _LOCK:
+        if _journal["file"] is None:
+            return None
+        folder = _journal["folder"]
+        seq = Globals._Journal_Seq_
+        # Functions journals outside its own lock, so taking it here cannot deadlock
+        commands = Functions.pending_commands()
+        state = {name: list(dict(getattr(Globals, name)).items()) for name in StateStore.TRACKED}
+        state["_News_ID_Counter_"] = Globals._News_ID_Counter_
+        state["news_strategy"] = Globals.news_strategy
+        text = StateStore.dumps({"seq": seq, "time": time.time(), "state": state, "commands": commands})
+
+        path = os.path.join(folder, SNAPSHOT_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+        _journal["file"].close()
+        _open_segment(folder, seq + 1)
+        _journal["since_snapshot"] = 0
+    return seq
+
+
+def tick() -> Optional[int]:
+    """Snapshot once JOURNAL_SNAPSHOT_EVERY records were written since the last one."""
+    if _journal["file"] is None:
+        return None
+    if _journal["since_snapshot"] < getattr(Globals, "JOURNAL_SNAPSHOT_EVERY", 5000):
+        return None
+    return snapshot()
+
+
+def _apply(entry: dict, commands: Dict[str, dict]) -> None:
+    op = entry["o"]
+    if op == "trade":
+        trade = entry["trade"]
+        Globals._Trades_.setdefault(trade["TID"], trade)   # the store may know more (status, outcome)
+        account = Accounts.get(trade["client_id"])
+        if trade["TID"] not in account.trades:
+            account.trades.append(trade["TID"])
+    elif op == "ticket":
+        trade = Globals._Trades_.get(entry["tid"])
+        if trade is not None:
+            trade["ticket"] = entry["ticket"]
+            trade["status"] = "executed"
+    elif op == "count":
+        Globals._CurrencyCount_.update(entry["counts"])
+        if entry.get("reset"):
+            Accounts.reset_exposure()
+        if entry.get("client") is not None and entry.get("exposure"):
+            Accounts.get(entry["client"]).exposure.update(entry["exposure"])
+    elif op == "nid":
+        event = Globals._Currencies_.get(entry["key"])
+        if event is None:
+            Globals._Currencies_[entry["key"]] = entry["event"]
+        else:
+            for field in ("forecast", "actual", "affect", "NID"):
+                event[field] = entry["event"].get(field)
+    elif op == "sentiment":
+        if entry["state"] is None:
+            Globals._CurrencySentiment_.pop(entry["cur"], None)
+        else:
+            Globals._CurrencySentiment_[entry["cur"]] = entry["state"]
+    elif op == "enqueue":
+        commands[entry["cmd"]["cmdId"]] = entry["cmd"]
+    elif op in ("ack", "expire"):
+        commands.pop(entry["cmd_id"], None)
+
+
+def recover(folder: Optional[str] = None, applied_seq: int = 0) -> Dict[str, int]:
+    """
+    Rebuild state from the latest snapshot and the records after it.
+
+    Args:
+        folder: Journal folder (default: Globals.JOURNAL_DIR)
+        applied_seq: Journal sequence the state in Globals already reflects
+                     (StateStore restore); 0 = load the snapshot state
+
+    Returns:
+        dict: {"snapshot": seq, "replayed": n, "commands": n requeued, "seq": last seq}
+    """
+    import Functions
+
+    folder = folder or Globals.JOURNAL_DIR
+    snapshot_data = load_snapshot(folder)
+    snapshot_seq = snapshot_data["seq"] if snapshot_data else 0
+    commands = {cmd["cmdId"]: cmd for cmd in snapshot_data["commands"]} if snapshot_data else {}
+    if snapshot_data and snapshot_seq > applied_seq:
+        StateStore.apply(snapshot_data["state"])
+        applied_seq = snapshot_seq
+
+    last_seq = snapshot_seq
+    replayed = 0
+    for entry in read(folder, after=snapshot_seq):
+        last_seq = entry["q"]
+        if entry["o"] in COMMAND_OPS:
+            _apply(entry, commands)
+        elif entry["o"] in STATE_OPS and entry["q"] > applied_seq:
+            _apply(entry, commands)
+            replayed += 1
+
+    StateStore.repair_counters()
+    Functions.restore_commands(commands.values())
+    return {"snapshot": snapshot_seq, "replayed": replayed, "commands": len(commands), "seq": last_seq}
+
+
+def start(applied_seq: int = 0, folder: Optional[str] = None) -> Dict[str, int]:
+    """
+    Recover from the journal, then open a new segment for appending.
+
+    Args:
+        applied_seq: Journal sequence already reflected in Globals (from StateStore), 0 if none
+        folder: Journal folder (default: Globals.JOURNAL_DIR)
+
+    Returns:
+        dict: recover() summary
+    """
+    stop()
+    folder = folder or Globals.JOURNAL_DIR
+    os.makedirs(folder, exist_ok=True)
+    summary = recover(folder, applied_seq)
+
+    with _LOCK:
+        Globals._Journal_Seq_ = max(Globals._Journal_Seq_, summary["seq"])
+        _journal.update(folder=folder, since_snapshot=0)
+        _open_segment(folder, Globals._Journal_Seq_ + 1)
+    _seen_sentiment.clear()
+    _seen_sentiment.update({currency: StateStore.dumps(state)
+                            for currency, state in Globals._CurrencySentiment_.items()})
+
+    print(f"[JOURNAL] {folder}: snapshot #{summary['snapshot']}, replayed {summary['replayed']} "
+          f"record(s), {summary['commands']} command(s) requeued, next #{Globals._Journal_Seq_ + 1}")
+    return summary
+
+
+def stop() -> None:
+    """Close the current segment (records are no-ops until start())."""
+    with _LOCK:
+        if _journal["file"] is not None:
+            _journal["file"].close()
+        _journal.update(folder=None, file=None, since_snapshot=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump the state journal (one JSON line per record)")
+    parser.add_argument("folder", nargs="?", default=Globals.JOURNAL_DIR)
+    parser.add_argument("--op", action="append", help="Only these ops (repeatable)")
+    parser.add_argument("--after", type=int, default=0, help="Only records after this sequence number")
+    args = parser.parse_args()
+
+    if not segments(args.folder):
+        print(f"No journal segments in {args.folder}")
+        sys.exit(1)
+    totals: Dict[str, int] = {}
+    for entry in read(args.folder, after=args.after):
+        if args.op and entry["o"] not in args.op:
+            continue
+        totals[entry["o"]] = totals.get(entry["o"], 0) + 1
+        print(StateStore.dumps(entry))
+    print(json.dumps({"records": sum(totals.values()), "by_op": totals}), file=sys.stderr)
@@ -0,0 +1,333 @@
+"""
+LatencyTrace.py
+Release-to-order latency tracing for the News pipeline.
+
+Each calendar event is stamped as it moves through the pipeline:
+
+    event    → scheduled release time (event_time from calendar_statement.csv)
+    monitor  → monitor_news_events() first reports the event as ready
+    fetch    → fetch_actual_value() obtained the actual value
+    affect   → calculate_affect() finished (NID assigned)
+    decide   → generate_trading_decisions() returned signals
+    execute  → execute_news_trades() created the trade (TID assigned)
+    enqueue  → enqueue_command() stored the order
+    deliver  → get_next_command() handed the order to the EA (first delivery)
+    ack      → EA acknowledged the order via /ack
+
+Marks are written to a compact JSONL trace log (one short line per mark).
+Event-level stages are keyed by event_key; order-level stages are keyed by TID
+and linked back to their event through the NID. mark() only buffers the line;
+a background thread appends the buffer every TRACE_FLUSH_INTERVAL seconds, so
+the request and enqueue/ack paths never wait on the file. The NID/TID links
+and the mark_once() set are bounded LRUs (Globals.TRACE_LINK_LIMIT entries), so
+a long-running server does not keep every event it ever traced.
+
+Usage:
+    python LatencyTrace.py                    # Report on Globals.TRACE_LOG_FILE
+    python LatencyTrace.py trace_log.jsonl    # Report on a specific trace log
+"""
+
+import atexit
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import Globals
+
+
+# Pipeline stages in order (event-level first, then order-level)
+EVENT_STAGES = ("event", "monitor", "fetch", "affect", "decide")
+ORDER_STAGES = ("execute", "enqueue", "deliver", "ack")
+STAGES = EVENT_STAGES + ORDER_STAGES
+
+_LOCK = threading.Lock()
+
+# Links used to resolve order-level marks back to their event (least recently used first)
+# Format: NID → event_key, TID → event_key
+_NID_TO_KEY: "OrderedDict[int, str]" = OrderedDict()
+_TID_TO_KEY: "OrderedDict[str, str]" = OrderedDict()
+
+# (stage, trace id) pairs already written by mark_once() → None
+_MARKED: "OrderedDict[tuple, None]" = OrderedDict()
+
+# (trace log path, line) waiting for the writer thread
+_BUFFER: List[tuple] = []
+_WAKE = threading.Event()
+_writer_thread: Optional[threading.Thread] = None
+
+
+def _enabled() -> bool:
+    return bool(getattr(Globals, "TRACE_ENABLED", False))
+
+
+def _remember(table: OrderedDict, key, value=None) -> None:
+    """Store key as most recently used and drop the oldest beyond TRACE_LINK_LIMIT (caller holds _LOCK)."""
+    table[key] = value
+    table.move_to_end(key)
+    limit = getattr(Globals, "TRACE_LINK_LIMIT", 10000)
+    while len(table) > limit:
+        table.popitem(last=False)
+
+
+def _recall(table: OrderedDict, key) -> Optional[str]:
+    """Linked value for key (refreshing its LRU position), or None (caller holds _LOCK)."""
+    if key not in table:
+        return None
+    table.move_to_end(key)
+    return table[key]
+
+
+def mark(stage: str, event_key: Optional[str] = None, nid: Optional[int] = None,
+         tid: Optional[str] = None, cmd_id: Optional[str] = None,
+         ts: Optional[float] = None) -> None:
+    """
+    Stamp a pipeline stage for an event or an order.
+
+    Args:
+        stage: One of STAGES
+        event_key: Event key in _Currencies_ (event-level stages)
+        nid: News ID (links the event to its trades)
+        tid: Trade ID (order-level stages)
+        cmd_id: Command ID from enqueue_command()
+        ts: Epoch seconds (defaults to now)
+    """
+    if not _enabled():
+        return
+
+    if ts is None:
+        ts = time.time()
+
+    with _LOCK:
+        # Learn links so later marks only need to carry their own id
+        if nid is not None and event_key is not None:
+            _remember(_NID_TO_KEY, nid, event_key)
+        if event_key is None and nid is not None:
+            event_key = _recall(_NID_TO_KEY, nid)
+        if tid is not None:
+            if event_key is not None:
+                _remember(_TID_TO_KEY, tid, event_key)
+            else:
+                event_key = _recall(_TID_TO_KEY, tid)
+
+        record = {"t": round(ts, 4), "s": stage}
+        if event_key is not None:
+            record["k"] = event_key
+        if nid is not None:
+            record["n"] = nid
+        if tid is not None:
+            record["d"] = tid
+        if cmd_id is not None:
+            record["c"] = cmd_id
+
+        _BUFFER.append((Globals.TRACE_LOG_FILE, json.dumps(record, separators=(",", ":")) + "\n"))
+        _start_writer()
+
+
+def mark_once(stage: str, event_key: str, ts: Optional[float] = None) -> None:
+    """
+    Stamp an event-level stage only the first time it is seen for an event.
+    Used by the monitor, which reports the same event again on retries.
+    """
+    if not _enabled():
+        return
+
+    with _LOCK:
+        if (stage, event_key) in _MARKED:
+            return
+        _remember(_MARKED, (stage, event_key))
+
+    mark(stage, event_key=event_key, ts=ts)
+
+
+def _start_writer() -> None:
+    """Start the writer thread on the first mark (caller holds _LOCK)."""
+    global _writer_thread
+    if _writer_thread is None or not _writer_thread.is_alive():
+        _writer_thread = threading.Thread(target=_writer, name="LatencyTrace", daemon=True)
+        _writer_thread.start()
+
+
+def _writer() -> None:
+    while True:
+        _WAKE.wait(getattr(Globals, "TRACE_FLUSH_INTERVAL", 0.5))
+        _WAKE.clear()
+        flush()
+
+
+def flush() -> int:
+    """
+    Append the buffered marks to their trace logs.
+
+    Returns:
+        int: Number of marks written
+    """
+    with _LOCK:
+        pending = _BUFFER[:]
+        del _BUFFER[:]
+    by_path: Dict[str, List[str]] = {}
+    for path, line in pending:
+        by_path.setdefault(path, []).append(line)
+    for path, lines in by_path.items():
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        except Exception as exc:
+            print(f"[TRACE] Failed to write {len(lines)} trace mark(s): {exc}")
+    return len(pending)
+
+
+atexit.register(flush)
+
+
+def reset() -> None:
+    """Forget all NID/TID links (used by tests and replays)."""
+    with _LOCK:
+        _NID_TO_KEY.clear()
+        _TID_TO_KEY.clear()
+        _MARKED.clear()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REPORTING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def load_marks(path: str) -> List[dict]:
+    """Read all marks from a trace log, skipping malformed lines."""
+    marks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                marks.append(json.loads(line))
+            except ValueError:
+                continue
+    return marks
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(marks: List[dict]) -> dict:
+    """
+    Build per-stage and end-to-end latency statistics from trace marks.
+
+    Per-stage latency is the time from the previous stage that was stamped for
+    the same event (or order). The event-level "fetch" uses its latest mark so
+    retries are included in the fetch stage; all other stages use their first mark.
+    End-to-end latency is event → ack for every acknowledged order.
+
+    Returns:
+        dict: {"stages": {stage: stats}, "end_to_end": stats, "events": int, "orders": int}
+              where stats = {count, p50, p90, p99, max} in seconds
+    """
+    events: Dict[str, Dict[str, float]] = {}
+    orders: Dict[str, Dict[str, float]] = {}
+    order_keys: Dict[str, str] = {}
+
+    for m in marks:
+        stage = m.get("s")
+        ts = m.get("t")
+        if stage not in STAGES or ts is None:
+            continue
+
+        if stage in EVENT_STAGES:
+            key = m.get("k")
+            if key is None:
+                continue
+            stamps = events.setdefault(key, {})
+            if stage == "fetch" or stage not in stamps:
+                stamps[stage] = ts
+        else:
+            tid = m.get("d")
+            if tid is None:
+                continue
+            stamps = orders.setdefault(tid, {})
+            if stage not in stamps:
+                stamps[stage] = ts
+            if m.get("k") is not None:
+                order_keys[tid] = m["k"]
+
+    deltas: Dict[str, List[float]] = {stage: [] for stage in STAGES[1:]}
+    end_to_end: List[float] = []
+
+    for stamps in events.values():
+        prev = None
+        for stage in EVENT_STAGES:
+            if stage in stamps:
+                if prev is not None:
+                    deltas[stage].append(stamps[stage] - prev)
+                prev = stamps[stage]
+
+    for tid, stamps in orders.items():
+        event_stamps = events.get(order_keys.get(tid, ""), {})
+
+        # Previous stage for "execute" is the last event-level stamp
+        prev = None
+        for stage in reversed(EVENT_STAGES):
+            if stage in event_stamps:
+                prev = event_stamps[stage]
+                break
+
+        for stage in ORDER_STAGES:
+            if stage in stamps:
+                if prev is not None:
+                    deltas[stage].append(stamps[stage] - prev)
+                prev = stamps[stage]
+
+        if "ack" in stamps and "event" in event_stamps:
+            end_to_end.append(stamps["ack"] - event_stamps["event"])
+
+    def _stats(values):
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values) if values else 0.0,
+        }
+
+    return {
+        "stages": {stage: _stats(values) for stage, values in deltas.items()},
+        "end_to_end": _stats(end_to_end),
+        "events": len(events),
+        "orders": len(orders),
+    }
+
+
+def print_report(summary: dict) -> None:
+    """Print a latency summary produced by summarize()."""
+    print("=" * 70)
+    print("RELEASE-TO-ORDER LATENCY REPORT")
+    print("=" * 70)
+    print(f"Events traced: {summary['events']} | Orders traced: {summary['orders']}")
+    print("-" * 70)
+    print(f"{'Stage':<10} {'Count':>7} {'p50 (s)':>11} {'p90 (s)':>11} {'p99 (s)':>11} {'max (s)':>11}")
+    print("-" * 70)
+    for stage in STAGES[1:]:
+        s = summary["stages"][stage]
+        print(f"{stage:<10} {s['count']:>7} {s['p50']:>11.3f} {s['p90']:>11.3f} {s['p99']:>11.3f} {s['max']:>11.3f}")
+    print("-" * 70)
+    e = summary["end_to_end"]
+    print(f"{'event→ack':<10} {e['count']:>7} {e['p50']:>11.3f} {e['p90']:>11.3f} {e['p99']:>11.3f} {e['max']:>11.3f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else Globals.TRACE_LOG_FILE
+    try:
+        print_report(summarize(load_marks(path)))
+    except FileNotFoundError:
+        print(f"Trace log not found: {path}")
+        sys.exit(1)
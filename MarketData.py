@@ -0,0 +1,240 @@
+"""
+MarketData.py
+Array-backed market data store fed by Packet C.
+
+Packet C carries bid, ask, spread (pips) and ATR (pips) for every symbol the EA
+watches. The store keeps them in preallocated NumPy arrays - one row per symbol,
+one column per field - with a symbol → row index, so strategy code can work on
+all pairs at once:
+
+    store = MarketData.get_store()
+    atr = store.latest("atr")                   # zero-copy view, one value per row
+    ok = store.spread_ok(max_spread=2.0)        # boolean mask over all symbols
+    tp, sl = store.atr_tp_sl(2.0, 1.0)          # ATR-based TP/SL in pips for every symbol
+    last_hour = store.history("spread", 120)    # (samples, symbols) zero-copy view
+
+Each field also keeps a fixed-length ring buffer of recent samples
+(Globals.MARKET_DATA_HISTORY). Every sample is written twice, at slot i and
+i + length, so the most recent N samples are always one contiguous slice and
+history() never copies.
+
+ingest_packet_c() is called by Functions.ingest_payload() and also refreshes the
+ATR, current_price and spread fields of Globals._Symbols_.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import Globals
+
+
+# Column order of the latest/history arrays
+FIELDS = ("bid", "ask", "spread", "atr")
+_COL = {name: i for i, name in enumerate(FIELDS)}
+
+# The 29 symbols sent in Packet C (same order as BuildPacket_C_SymbolData)
+PACKET_C_SYMBOLS = (
+    "AUDCAD", "AUDJPY", "AUDUSD", "AUDCHF", "AUDNZD", "CADJPY", "CADCHF",
+    "EURAUD", "EURCAD", "EURCHF", "EURGBP", "EURJPY", "EURNZD", "EURUSD",
+    "GBPAUD", "GBPCAD", "GBPCHF", "GBPJPY", "GBPNZD", "GBPUSD", "NZDCAD",
+    "NZDCHF", "NZDJPY", "NZDUSD", "USDCAD", "USDCHF", "USDJPY", "CHFJPY",
+    "BITCOIN",
+)
+
+# Spare rows for symbols that are not known at startup
+_SPARE_ROWS = 16
+
+
+class MarketDataStore:
+    """Latest values and recent history for every symbol, one row per symbol."""
+
+    def __init__(self, symbols: List[str], history_length: int = 720):
+        self.capacity = len(symbols) + _SPARE_ROWS
+        self.history_length = max(1, int(history_length))
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+
+        self._latest = np.full((self.capacity, len(FIELDS)), np.nan)
+        self._updated = np.zeros(self.capacity)              # server epoch of the last sample per row
+        self._ring = np.full((len(FIELDS), 2 * self.history_length, self.capacity), np.nan)
+        self._head = 0                                        # next ring slot
+        self._samples = 0                                     # samples written (capped at history_length)
+        self.version = 0                                      # bumped on every sample (cache invalidation)
+
+        for symbol in symbols:
+            self._add_row(symbol)
+
+    def _add_row(self, symbol: str) -> Optional[int]:
+        if symbol in self.index:
+            return self.index[symbol]
+        if len(self.symbols) >= self.capacity:
+            return None
+        row = len(self.symbols)
+        self.symbols.append(symbol)
+        self.index[symbol] = row
+        return row
+
+    # ---------------------- writes ----------------------
+
+    def update(self, entries: List[dict], received_at: Optional[float] = None) -> int:
+        """
+        Write one Packet C sample.
+
+        Args:
+            entries: Packet C "symbols" list ({symbol, bid, ask, spread, atr})
+            received_at: Server epoch of the sample (default: now)
+
+        Returns:
+            int: Number of symbols updated
+        """
+        return self.update_parsed(parse_packet_c(entries), received_at)
+
+    def update_parsed(self, parsed: List[Tuple[str, List[float]]], received_at: Optional[float] = None) -> int:
+        """Write one Packet C sample already split by parse_packet_c()."""
+        rows = []
+        values = []
+        for symbol, fields in parsed:
+            row = self._add_row(symbol)
+            if row is None:
+                continue
+            rows.append(row)
+            values.append(fields)
+        if not rows:
+            return 0
+
+        rows = np.asarray(rows, dtype=np.intp)
+        self._latest[rows] = np.asarray(values, dtype=np.float64)
+        self._updated[rows] = received_at if received_at is not None else time.time()
+
+        # Ring sample: full snapshot of latest, written at head and head + length
+        snapshot = self._latest.T                            # (fields, capacity)
+        self._ring[:, self._head, :] = snapshot
+        self._ring[:, self._head + self.history_length, :] = snapshot
+        self._head = (self._head + 1) % self.history_length
+        self._samples = min(self._samples + 1, self.history_length)
+        self.version += 1
+        return len(rows)
+
+    # ---------------------- zero-copy reads ----------------------
+
+    @property
+    def size(self) -> int:
+        return len(self.symbols)
+
+    def row(self, symbol: str) -> int:
+        """Row of a symbol (KeyError if it has never been seen)."""
+        return self.index[symbol]
+
+    def latest(self, field: str) -> np.ndarray:
+        """Latest value of a field for every symbol (view, rows in self.symbols order)."""
+        view = self._latest[:self.size, _COL[field]]
+        view.flags.writeable = False
+        return view
+
+    def latest_table(self) -> np.ndarray:
+        """(symbols, fields) view of the latest values."""
+        view = self._latest[:self.size]
+        view.flags.writeable = False
+        return view
+
+    def history(self, field: str, samples: Optional[int] = None) -> np.ndarray:
+        """
+        Most recent samples of a field, oldest first.
+
+        Args:
+            field: One of FIELDS
+            samples: Number of samples (default: all retained)
+
+        Returns:
+            np.ndarray: (samples, symbols) view into the ring buffer
+        """
+        count = self._samples if samples is None else min(int(samples), self._samples)
+        end = self._head + self.history_length
+        view = self._ring[_COL[field], end - count:end, :self.size]
+        view.flags.writeable = False
+        return view
+
+    def age(self) -> np.ndarray:
+        """Seconds since each symbol was last updated (inf if never)."""
+        updated = self._updated[:self.size]
+        return np.where(updated > 0, time.time() - updated, np.inf)
+
+    # ---------------------- vectorized helpers ----------------------
+
+    def spread_ok(self, max_spread: float) -> np.ndarray:
+        """True for symbols whose latest spread (pips) is known and within max_spread."""
+        spread = self.latest("spread")
+        return np.isfinite(spread) & (spread <= max_spread)
+
+    def atr_tp_sl(self, tp_multiple: float = 2.0, sl_multiple: float = 1.0):
+        """ATR-based TP/SL in pips (strategy_tp_sl 0 = 2×ATR TP, 1×ATR SL)."""
+        atr = self.latest("atr")
+        return atr * tp_multiple, atr * sl_multiple
+
+    def atr_lots(self, risk_amount: float, sl_multiple: float = 1.0) -> np.ndarray:
+        """
+        Lot size per symbol so that an ATR-based stop loses risk_amount.
+
+        Uses _Symbols_ point_value (dollars per pip per lot); symbols without a
+        point value or ATR get NaN.
+        """
+        point_value = np.array([Globals._Symbols_.get(s, {}).get("point_value", np.nan) for s in self.symbols],
+                               dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lots = risk_amount / (self.latest("atr") * sl_multiple * point_value)
+        return np.where(np.isfinite(lots), lots, np.nan)
+
+    def refresh_symbols(self) -> None:
+        """Copy latest ATR, price (bid) and spread into Globals._Symbols_ entries."""
+        symbols_config = Globals._Symbols_
+        latest = self._latest
+        for row, symbol in enumerate(self.symbols):
+            config = symbols_config.get(symbol)
+            if config is None or np.isnan(latest[row, _COL["bid"]]):
+                continue
+            config["ATR"] = float(latest[row, _COL["atr"]])
+            config["current_price"] = float(latest[row, _COL["bid"]])
+            config["spread"] = float(latest[row, _COL["spread"]])
+
+
+def parse_packet_c(entries: List[dict]) -> List[Tuple[str, List[float]]]:
+    """
+    Split Packet C entries into (symbol, [bid, ask, spread, atr]) pairs.
+
+    Needs no store, so Broker workers run it before forwarding the payload
+    (see Functions.prepare_payload()).
+    """
+    return [(entry.get("symbol", ""), [entry.get(field, np.nan) for field in FIELDS]) for entry in entries]
+
+
+# Module-level store (created on first use)
+_STORE: Optional[MarketDataStore] = None
+
+
+def get_store() -> MarketDataStore:
+    """Return the process-wide store, sized for Packet C and _Symbols_."""
+    global _STORE
+    if _STORE is None:
+        symbols = list(PACKET_C_SYMBOLS) + [s for s in Globals._Symbols_ if s not in PACKET_C_SYMBOLS]
+        _STORE = MarketDataStore(symbols, getattr(Globals, "MARKET_DATA_HISTORY", 720))
+    return _STORE
+
+
+def ingest_packet_c(entries: List[dict], parsed: Optional[List[Tuple[str, List[float]]]] = None) -> int:
+    """
+    Store one Packet C sample and refresh _Symbols_.
+
+    Args:
+        entries: Packet C "symbols" list
+        parsed: parse_packet_c(entries) if the caller already has it
+
+    Returns:
+        int: Number of symbols updated
+    """
+    store = get_store()
+    updated = store.update_parsed(parsed if parsed is not None else parse_packet_c(entries))
+    if updated:
+        store.refresh_symbols()
+    return updated
@@ -5,24 +5,54 @@ Opens trades based on news events and market conditions.
 """
 
 import Globals
-from Functions import enqueue_command, checkTime, can_open_trade, update_currency_count, find_available_pair_for_currency, create_trade, generate_tid, get_client_open
-import csv
+import Functions
+from Functions import enqueue_command, checkTime, can_open_trade, update_currency_count, find_available_pair_for_currency, create_trade, generate_tid, get_client_open, list_clients, is_client_online
 import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as _wait_futures
 from datetime import datetime, timedelta
-from AI_Perplexity import get_news_data
+from typing import Optional
+from AI_Perplexity import get_news_data, race_news_data
 from AI_ChatGPT import validate_news_data, generate_trading_signals, generate_trading_signals_multiple
+import LatencyTrace
+import CurrencyExposure
+import PendingCloses
+import WarmUp
+import Calendar
+import Journal
+import Accounts
+import AIGateway
+import RetryPolicy
+import AIBudget
+import ForecastPrefetch
 
 
 # Global flag to track if initialization has been completed
 _initialization_complete = False
 
-# Global dictionary to track event times (for monitoring)
-# Format: currency → datetime object
-_event_times = {}
-
 # Global client ID for S5 conflict handling
 _current_client_id = None
 
+# Several accounts call handle_news() at once (one server thread each):
+# _STATE_LOCK serializes changes to the shared trading dictionaries (verdicts,
+# exposure, S3/S5 tracking, pending closes) - it is Globals.STATE_LOCK, also taken
+# by PendingCloses and the server's ACK/outcome routes; _EVENTS_LOCK is held while
+# the event pipeline (calendar, AI fetch) runs, so heartbeats start one run at a time
+_STATE_LOCK = Globals.STATE_LOCK
+_EVENTS_LOCK = threading.Lock()
+
+# Steps 1-6 run on this background thread: a release's AI calls can take until the
+# end of AI_EVENT_WINDOW, and the heartbeat that kicks them (an EA poll holding its
+# account lock) must keep returning that account's commands meanwhile
+_events_executor: Optional[ThreadPoolExecutor] = None
+_events_futures = set()
+
+# Clock used by the trading pipeline (weekend block, market hours, S3/S5
+# close timeouts). Backtest.py swaps it for a simulated clock so a historical
+# run never depends on wall time.
+_clock = datetime.now
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # MULTIPLE EVENTS HANDLING (STEP 2 from News_Rules.txt)
@@ -224,256 +254,26 @@ def aggregate_simultaneous_events(event_keys):
 def initialize_news_forecasts():
     """
     STEP 1: INITIALIZATION
-    Reads calendar_statement.csv and pre-fetches all forecast values for upcoming events.
-    Stores them in Globals._Currencies_ with actual=None.
-    Only runs once at startup.
+    Loads calendar_statement.csv (see Calendar.py) and registers the upcoming
+    events in Globals._Currencies_ with actual=None. Forecasts are pre-fetched
+    in the background (ForecastPrefetch.tick, every heartbeat).
+    Only runs once at startup; reload_calendar() applies later edits of the CSV.
     """
     global _initialization_complete
     
     if _initialization_complete:
         return
     
-    # Get current time for filtering
-    current_time = datetime.now()
-    
-    # Get test mode setting
-    test_mode = getattr(Globals, 'news_test_mode', False)
-    process_past_events = getattr(Globals, 'news_process_past_events', False)
-    
-    # Read CSV file from script directory (not current working directory)
-    # This ensures it works regardless of where python.exe was launched from
-    import os
-    
-    # Get script directory and change to it
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    original_cwd = os.getcwd()
-    os.chdir(script_dir)  # Change to script directory
-    
-    # Debug: Print directory information
-    current_dir = os.getcwd()
-    csv_path = os.path.join(current_dir, "calendar_statement.csv")
-    csv_exists = os.path.exists(csv_path)
-    
-    print("\n" + "="*60)
-    print("[CSV DEBUG] File Path Resolution")
-    print("="*60)
-    print(f"Original Working Dir: {original_cwd}")
-    print(f"Script Location:      {script_dir}")
-    print(f"Changed to:           {current_dir}")
-    print(f"CSV Path:             {csv_path}")
-    print(f"CSV Exists:           {csv_exists}")
-    if not csv_exists:
-        # List files in current directory to help debug
-        try:
-            files_in_dir = os.listdir(current_dir)
-            csv_files = [f for f in files_in_dir if f.endswith('.csv')]
-            print(f"CSV files in script dir: {csv_files if csv_files else 'NONE'}")
-            print(f"Total files in dir: {len(files_in_dir)}")
-        except Exception as e:
-            print(f"Error listing directory: {e}")
-    print("="*60 + "\n")
-    
-    all_events = []
-    skipped_events = []
+    changes = Calendar.refresh(force=True)
+    if changes is None:
+        return  # CSV missing - try again on the next heartbeat
     
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Parse event time
-                date_str = row.get('Date', '').strip()
-                event_name = row.get('Event', '').strip()
-                impact = row.get('Impact', '').strip()
-                currency = row.get('Currency', '').strip()
-                
-                if not all([date_str, event_name, currency]):
-                    continue
-                
-                try:
-                    # Parse date format: "2025, November 11, 08:15"
-                    event_time = datetime.strptime(date_str, "%Y, %B %d, %H:%M")
-                    
-                    # Check if event is in the past
-                    is_past = event_time <= current_time
-                    
-                    # TEST MODE: Skip future events, only process past
-                    if test_mode:
-                        if not is_past:
-                            skipped_events.append({
-                                'date': date_str,
-                                'event': event_name,
-                                'currency': currency,
-                                'event_time': event_time,
-                                'reason': 'FUTURE'
-                            })
-                            continue
-                    # NORMAL MODE: Skip past events unless news_process_past_events is True
-                    else:
-                        if is_past and not process_past_events:
-                            skipped_events.append({
-                                'date': date_str,
-                                'event': event_name,
-                                'currency': currency,
-                                'event_time': event_time,
-                                'reason': 'PAST'
-                            })
-                            continue
-                    
-                    # Include event for processing
-                    all_events.append({
-                        'date': date_str,
-                        'event': event_name,
-                        'currency': currency,
-                        'impact': impact,
-                        'event_time': event_time,
-                        'is_past': is_past
-                    })
-                except Exception as e:
-                    print(f"Error parsing date '{date_str}': {e}")
-                    continue
-        
-        # Display skipped events
-        if skipped_events:
-            reason_text = "PAST" if not test_mode else "FUTURE (test mode)"
-            print(f"Skipped {len(skipped_events)} {reason_text} event(s)")
-        
-        print(f"Found {len(all_events)} event(s) to process")
-        
-        # Apply csv_count limit if not in live mode (only count events being processed)
-        events = all_events
-        if not Globals.liveMode:
-            limit = getattr(Globals, 'csv_count', 4)
-            if len(events) > limit:
-                events = events[:limit]
-                print(f"Limited to {limit} events (csv_count) for testing")
-        
-        # Check if we should pre-fetch forecasts or wait until event time
-        user_process_forecast_first = getattr(Globals, 'user_process_forecast_first', False)
-        
-        if user_process_forecast_first:
-            # OLD BEHAVIOR: Pre-fetch forecasts for all upcoming events (uses more tokens)
-            print("\n[FORECAST MODE] Pre-fetching forecasts for all events...")
-            for idx, event in enumerate(events, 1):
-                currency = event['currency']
-                date_str = event['date']
-                event_name = event['event']
-                
-                print(f"\n[{idx}/{len(events)}] Processing: {currency} - {event_name}")
-                print(f"  Date: {date_str}")
-                
-                # Call Perplexity to get forecast
-                print("  Fetching forecast from MyFxBook...")
-                perplexity_response = get_news_data(event_name, currency, date_str, "forecast")
-                
-                # Validate format with ChatGPT
-                print("  Validating format...")
-                validation_response = validate_news_data(perplexity_response)
-                
-                # Parse forecast value using regex
-                forecast = None
-                forecast_match = re.search(r"Forecast\s*:\s*([\d\.\-]+|N/A)", perplexity_response, re.IGNORECASE)
-                
-                if forecast_match:
-                    forecast_str = forecast_match.group(1)
-                    if forecast_str != "N/A":
-                        try:
-                            forecast = float(forecast_str)
-                            print(f"  [OK] Forecast: {forecast}")
-                        except ValueError:
-                            print(f"  [ERROR] Could not parse forecast: {forecast_str}")
-                    else:
-                        print(f"  [N/A] Forecast not available")
-                else:
-                    print(f"  [ERROR] No forecast found in response")
-                
-                # Create unique key: currency + event time + full event name hash (to handle multiple events at same time)
-                # Format: EUR_2025-11-03_04:10_abc123def456789012
-                # Using full MD5 hash (32 chars) to prevent collisions
-                import hashlib
-                event_hash = hashlib.md5(event_name.encode()).hexdigest()
-                event_key = f"{currency}_{event['event_time'].strftime('%Y-%m-%d_%H:%M')}_{event_hash}"
-                
-                # Convert date to simpler format for AI queries (MyFxBook compatibility)
-                # From: "2025, November 16, 18:50" -> To: "November 16, 2025"
-                ai_date = event['event_time'].strftime("%B %d, %Y")
-                
-                # Store in _Currencies_ dictionary with unique key
-                Globals._Currencies_[event_key] = {
-                    'currency': currency,
-                    'date': date_str,
-                    'ai_date': ai_date,  # Simplified date for AI queries
-                    'event': event_name,
-                    'forecast': forecast,
-                    'actual': None,
-                    'affect': None,
-                    'retry_count': 0,
-                    'retry_after': None,         # Timestamp when retry is allowed (non-blocking)
-                    'forecast_retry_attempted': False,  # Flag to prevent multiple forecast retries
-                    'event_time': event['event_time'],      # Store the datetime object
-                    'NID': None,                 # Assigned when event is processed
-                    'NID_Affect': 0,             # Count of pairs affected
-                    'NID_Affect_Executed': 0,    # Count of pairs executed
-                    'NID_TP': 0,                 # Count of pairs that hit TP
-                    'NID_SL': 0                  # Count of pairs that hit SL
-                }
-                
-                # Store event time for monitoring
-                _event_times[event_key] = event['event_time']
-                
-                print(f"  Stored in _Currencies_[{event_key}]")
-        else:
-            # NEW BEHAVIOR: Only store event metadata, fetch forecast+actual together at event time (saves tokens)
-            print("\n[EFFICIENT MODE] Storing event metadata only (will fetch forecast+actual together at event time)...")
-            for idx, event in enumerate(events, 1):
-                currency = event['currency']
-                date_str = event['date']
-                event_name = event['event']
-                
-                print(f"[{idx}/{len(events)}] Registered: {currency} - {event_name}")
-                print(f"  Date: {date_str}")
-                
-                # Create unique key: currency + event time + full event name hash (to handle multiple events at same time)
-                # Format: EUR_2025-11-03_04:10_abc123def456789012
-                # Using full MD5 hash (32 chars) to prevent collisions
-                import hashlib
-                event_hash = hashlib.md5(event_name.encode()).hexdigest()
-                event_key = f"{currency}_{event['event_time'].strftime('%Y-%m-%d_%H:%M')}_{event_hash}"
-                
-                # Convert date to simpler format for AI queries (MyFxBook compatibility)
-                # From: "2025, November 16, 18:50" -> To: "November 16, 2025"
-                ai_date = event['event_time'].strftime("%B %d, %Y")
-                
-                # Store in _Currencies_ dictionary WITHOUT forecast (will fetch both at event time)
-                Globals._Currencies_[event_key] = {
-                    'currency': currency,
-                    'date': date_str,
-                    'ai_date': ai_date,  # Simplified date for AI queries
-                    'event': event_name,
-                    'forecast': None,  # Will be fetched together with actual
-                    'actual': None,
-                    'affect': None,
-                    'retry_count': 0,
-                    'retry_after': None,         # Timestamp when retry is allowed (non-blocking)
-                    'forecast_retry_attempted': False,  # Flag to prevent multiple forecast retries
-                    'event_time': event['event_time'],      # Store the datetime object
-                    'NID': None,                 # Assigned when event is processed
-                    'NID_Affect': 0,             # Count of pairs affected
-                    'NID_Affect_Executed': 0,    # Count of pairs executed
-                    'NID_TP': 0,                 # Count of pairs that hit TP
-                    'NID_SL': 0                  # Count of pairs that hit SL
-                }
-                
-                # Store event time for monitoring
-                _event_times[event_key] = event['event_time']
-                
-                print(f"  Stored in _Currencies_[{event_key}]")
+    # Display skipped events
+    if changes["skipped"]:
+        print(f"Skipped {changes['skipped']} {changes['reason']} event(s)")
+    print(f"Found {len(changes['added'])} event(s) to process")
     
-    except FileNotFoundError:
-        print(f"ERROR: {csv_path} not found!")
-        return
-    except Exception as e:
-        print(f"ERROR during initialization: {e}")
-        return
+    _register_events(changes["added"])
     
     # Initialize _PairCount_ dictionary with all pairs from _Symbols_
     print("\nInitializing _PairCount_ with pairs from _Symbols_...")
@@ -483,10 +283,52 @@ def initialize_news_forecasts():
     
     _initialization_complete = True
     print(f"\n=== INITIALIZATION COMPLETE ===")
-    print(f"Pre-fetched forecasts for {len(Globals._Currencies_)} currencies")
+    print(f"Registered {len(Globals._Currencies_)} event(s)")
     print("Ready to monitor for event releases...\n")
 
 
+def reload_calendar():
+    """
+    Apply edits of calendar_statement.csv without a restart.
+    A stat() per heartbeat while the file is unchanged; events already in flight
+    (NID assigned, actual fetched, retry pending) are never removed.
+    
+    Returns:
+        dict or None: Calendar.refresh() changes, None if the file is unchanged
+    """
+    if not _initialization_complete:
+        return None
+    
+    changes = Calendar.refresh()
+    if changes and (changes["added"] or changes["removed"]):
+        kept = f", {len(changes['kept'])} in-flight kept" if changes["kept"] else ""
+        print(f"\n[CALENDAR] calendar_statement.csv changed: "
+              f"+{len(changes['added'])} / -{len(changes['removed'])} event(s){kept}")
+        _register_events(changes["added"])
+    return changes
+
+
+def _register_events(event_keys):
+    """Announce newly scheduled events; their forecasts are pre-fetched in the background."""
+    if not event_keys:
+        return
+    
+    if getattr(Globals, 'user_process_forecast_first', False):
+        print("\n[FORECAST MODE] Pre-fetching forecasts for all events in the background...")
+    elif ForecastPrefetch.enabled():
+        print(f"\n[PRE-FETCH MODE] Forecasts fetched up to {Globals.FORECAST_PREFETCH_LEAD / 3600:g}h before release, "
+              f"actual only at event time...")
+    else:
+        # Only store event metadata, fetch forecast+actual together at event time (saves tokens)
+        print("\n[EFFICIENT MODE] Storing event metadata only (will fetch forecast+actual together at event time)...")
+    
+    for idx, event_key in enumerate(event_keys, 1):
+        event = Globals._Currencies_[event_key]
+        print(f"[{idx}/{len(event_keys)}] Registered: {event['currency']} - {event['event']}")
+        print(f"  Date: {event['date']}")
+        print(f"  Stored in _Currencies_[{event_key}]")
+
+
 def monitor_news_events():
     """
     STEP 2: TIME MONITORING LOOP
@@ -494,9 +336,10 @@ def monitor_news_events():
     Returns ALL event keys that are ready at the SAME TIME for batch processing.
     
     An event is considered "ready" when:
-    - Current time >= event time (or retry_after time has passed)
+    - Current time >= event time + EVENT_TRIGGER_DELAY (first attempt)
+      or retry_after (retries, scheduled by RetryPolicy)
     - Actual value hasn't been fetched yet (actual is None)
-    - Retry count hasn't exceeded max (2)
+    - It was not given up (a retry without retry_after)
     
     Returns:
         list: List of event keys ready to process (all at same time), empty list if none ready
@@ -504,49 +347,40 @@ def monitor_news_events():
     if not _initialization_complete:
         return []
     
-    current_time = datetime.now()
+    current_time = _clock()
     ready_events = []
     earliest_time = None
     
-    # Find the earliest event time that's ready
-    for event_key, event_time in _event_times.items():
-        if event_key not in Globals._Currencies_:
-            continue
-        
-        event_data = Globals._Currencies_[event_key]
-        retry_count = event_data.get('retry_count', 0)
-        retry_after = event_data.get('retry_after', None)
+    # Single pass over the event records: keep the ready events at the earliest time
+    for event_key, event in Globals._Currencies_.items():
+        event_time = event.event_time
         
         # Check if event is ready:
-        # 1. Event time has passed (or retry_after time has passed)
+        # 1. Event time has passed
         # 2. No actual value yet
-        # 3. Retry count hasn't exceeded max (2)
-        is_past_event_time = current_time >= event_time
-        is_past_retry_time = retry_after is None or current_time >= retry_after
-        
-        if is_past_event_time and is_past_retry_time and event_data['actual'] is None and retry_count <= 1:
-            if earliest_time is None or event_time < earliest_time:
-                earliest_time = event_time
-    
-    # If no earliest time found, no events ready
-    if earliest_time is None:
-        return []
-    
-    # Collect ALL events at the earliest time
-    for event_key, event_time in _event_times.items():
-        if event_key not in Globals._Currencies_:
+        # 3. First attempt after EVENT_TRIGGER_DELAY, retries at retry_after (none = gave up)
+        if event_time is None or event_time > current_time or event.actual is not None:
+            continue
+        if event.retry_count:
+            due = event.retry_after
+            if due is None:
+                continue
+        else:
+            due = RetryPolicy.first_attempt_at(event)
+        if current_time < due:
             continue
         
-        event_data = Globals._Currencies_[event_key]
-        retry_count = event_data.get('retry_count', 0)
-        retry_after = event_data.get('retry_after', None)
-        
-        # Match exact time and ready conditions
-        is_past_retry_time = retry_after is None or current_time >= retry_after
-        
-        if event_time == earliest_time and is_past_retry_time and event_data['actual'] is None and retry_count <= 1:
+        if earliest_time is None or event_time < earliest_time:
+            earliest_time = event_time
+            ready_events = [event_key]
+        elif event_time == earliest_time:
             ready_events.append(event_key)
     
+    # Trace: scheduled release time and first detection by the monitor
+    for event_key in ready_events:
+        LatencyTrace.mark_once("event", event_key, ts=earliest_time.timestamp())
+        LatencyTrace.mark_once("monitor", event_key)
+    
     return ready_events
 
 
@@ -567,7 +401,7 @@ def check_market_hours(client_id):
     """
     from datetime import datetime, timezone
     
-    now = datetime.now(timezone.utc)
+    now = _clock(timezone.utc)
     weekday = now.weekday()  # 0=Monday, 4=Friday, 6=Sunday
     hour = now.hour
     
@@ -578,17 +412,21 @@ def check_market_hours(client_id):
             print("[MARKET CLOSE] Friday 3:00 PM EST - Market closing for weekend")
             print("="*70)
             
-            # Close all open positions
-            open_positions = get_client_open(client_id)
-            if open_positions and len(open_positions) > 0:
-                print(f"  Closing {len(open_positions)} open position(s)...")
+            # Close all open positions, on every account (the first account to
+            # see the close does it for all of them)
+            for account_id in sorted(set(list_clients()) | {str(client_id)}):
+                open_positions = get_client_open(account_id)
+                if not open_positions:
+                    print(f"  No open positions to close on [{account_id}]")
+                    continue
+                print(f"  Closing {len(open_positions)} open position(s) on [{account_id}]...")
                 
                 for pos in open_positions:
                     symbol = pos.get('symbol', 'Unknown')
                     ticket = pos.get('ticket', 0)
                     
                     enqueue_command(
-                        client_id=client_id,
+                        client_id=account_id,
                         state=3,  # CLOSE command
                         payload={
                             "symbol": symbol,
@@ -597,8 +435,6 @@ def check_market_hours(client_id):
                         }
                     )
                     print(f"    ✅ Queued close for ticket {ticket} ({symbol})")
-            else:
-                print(f"  No open positions to close")
             
             # Reset all tracking dictionaries
             reset_weekend_tracking()
@@ -651,14 +487,21 @@ def reset_weekend_tracking():
     Globals._Affected_.clear()
     print(f"  ✅ Cleared _Affected_ ({cleared_affected} entries)")
     
-    for pair_name in Globals._Symbols_.keys():
-        if Globals._Symbols_[pair_name].get("verdict_GPT"):
-            Globals._Symbols_[pair_name]["verdict_GPT"] = ""
-    print(f"  ✅ Cleared verdict_GPT flags")
+    for pending in Globals._PendingVerdicts_.values():
+        Globals._Symbols_[pending["pair"]]["verdict_GPT"] = ""
+    Globals._PendingVerdicts_.clear()
+    print(f"  ✅ Cleared pending verdicts and verdict_GPT flags")
+    
+    # Drop S3/S5 actions still waiting on closes (all positions close for the weekend)
+    cleared_pending = len(Globals._PendingCloses_)
+    Globals._PendingCloses_.clear()
+    print(f"  ✅ Cleared pending close actions ({cleared_pending} entries)")
     
     # Clear S3 rolling position tracking
     cleared_positions = len(Globals._CurrencyPositions_)
     Globals._CurrencyPositions_.clear()
+    for account in Accounts.all_accounts():
+        account.positions.clear()
     print(f"  ✅ Cleared _CurrencyPositions_ (S3) ({cleared_positions} entries)")
     
     # Clear S5 sentiment tracking
@@ -671,7 +514,10 @@ def reset_weekend_tracking():
         Globals._CurrencyCount_[currency] = 0
     for pair in Globals._PairCount_.keys():
         Globals._PairCount_[pair] = 0
-    print(f"  ✅ Reset _CurrencyCount_ and _PairCount_ to 0")
+    Accounts.reset_exposure()
+    print(f"  ✅ Reset _CurrencyCount_, _PairCount_ and account exposure to 0")
+    Journal.record("count", counts=dict(Globals._CurrencyCount_), reset=True)
+    Journal.sync_sentiment()
     
     print("[WEEKEND RESET] Complete - Ready for Sunday market open\n")
 
@@ -690,7 +536,7 @@ def reset_weekly_tracking():
     
     # Update last reset timestamp
     from datetime import datetime, timezone
-    Globals.last_weekly_reset = datetime.now(timezone.utc)
+    Globals.last_weekly_reset = _clock(timezone.utc)
     print(f"  ✅ Updated last_weekly_reset timestamp")
     
     print("[WEEKLY RESET] Complete - All pairs available for S4 this week\n")
@@ -710,33 +556,26 @@ def get_next_event_info():
     next_time = None
     events_at_next_time = []
     
-    # Find the earliest upcoming event time
-    for event_key, event_time in _event_times.items():
-        if event_key not in Globals._Currencies_:
-            continue
-        
-        event_data = Globals._Currencies_[event_key]
+    # Find the earliest unprocessed event time and the events at that time
+    for event_key, event in Globals._Currencies_.items():
+        event_time = event.event_time
         
         # Skip if already processed (actual is not None)
-        if event_data['actual'] is not None:
+        if event_time is None or event.actual is not None:
             continue
         
-        # Check if this is the earliest event
         if next_time is None or event_time < next_time:
             next_time = event_time
+            events_at_next_time = [event]
+        elif event_time == next_time:
+            events_at_next_time.append(event)
     
-    # If we found a next time, gather all events at that time
     if next_time is not None:
-        for event_key, event_time in _event_times.items():
-            if event_time == next_time:
-                if event_key in Globals._Currencies_:
-                    event_data = Globals._Currencies_[event_key]
-                    if event_data['actual'] is None:  # Not yet processed
-                        events_at_next_time.append({
-                            'event_key': event_key,
-                            'currency': event_data.get('currency', event_key),
-                            'event': event_data['event']
-                        })
+        events_at_next_time = [{
+            'event_key': event.key,
+            'currency': event.currency or event.key,
+            'event': event.event
+        } for event in events_at_next_time]
         
         return {
             'events': events_at_next_time,
@@ -751,16 +590,17 @@ def fetch_actual_value(event_key):
     """
     STEP 3: FETCH ACTUAL WITH RETRY MECHANISM
     Attempts to fetch the actual value for a news event.
-    Implements 3-retry mechanism with 2-minute intervals.
+    A failed attempt schedules the next one through RetryPolicy (fast polling,
+    backoff, learned per-category timing, AI budget) via retry_after.
     
-    If user_process_forecast_first=False, fetches BOTH forecast and actual together.
-    If user_process_forecast_first=True, only fetches actual (forecast was pre-fetched).
+    Only fetches actual when the forecast was pre-fetched (ForecastPrefetch),
+    otherwise fetches BOTH forecast and actual together.
     
     Args:
         event_key: The event key to fetch actual for
         
     Returns:
-        bool: True if actual was successfully fetched, False if max retries reached
+        bool: True if actual was successfully fetched, False if not (yet)
     """
     if event_key not in Globals._Currencies_:
         print(f"ERROR: Event {event_key} not found in _Currencies_")
@@ -773,52 +613,51 @@ def fetch_actual_value(event_key):
     ai_date = event_data.get('ai_date', date_str)  # Use simplified date for AI, fallback to original
     retry_count = event_data.get('retry_count', 0)
     
-    # CHECK: Daily AI call limit (prevent runaway token usage)
-    from datetime import date
-    today = date.today()
-    
-    if Globals.ai_calls_reset_date != today:
-        # New day - reset counter
-        Globals.ai_calls_today = 0
-        Globals.ai_calls_reset_date = today
-    
-    if Globals.ai_calls_today >= Globals.MAX_DAILY_AI_CALLS:
-        print(f"  [LIMIT REACHED] Daily AI call limit ({Globals.MAX_DAILY_AI_CALLS}) exceeded")
-        print(f"  Skipping fetch to preserve API budget. Resets at midnight.")
+    # CHECK: AI call budget - this event's reservation, then the shared pool (AIBudget)
+    if not AIBudget.can_spend(event_key):
+        print(f"  [BUDGET] No AI calls left for {event_key} "
+              f"({Globals.ai_calls_today}/{Globals.MAX_DAILY_AI_CALLS} used today)")
+        AIBudget.deny()
+        _schedule_retry(event_key)
         return False
     
     # Check if we need to fetch forecast too
-    user_process_forecast_first = getattr(Globals, 'user_process_forecast_first', False)
-    forecast_already_fetched = event_data.get('forecast') is not None
-    
-    if user_process_forecast_first or forecast_already_fetched:
-        # OLD BEHAVIOR: Only fetch actual (forecast was pre-fetched)
+    if ForecastPrefetch.settled(event_key):
+        # Forecast was pre-fetched (or is not published): shorter query, faster answer
         request_type = "actual"
         print(f"\n[STEP 3] Fetching actual value for {currency}")
     else:
-        # NEW BEHAVIOR: Fetch both forecast and actual together (saves tokens)
+        # Pre-fetch off or found nothing: fetch both forecast and actual together
         request_type = "both"
         print(f"\n[STEP 3] Fetching forecast AND actual values for {currency}")
     
     print(f"  Event: {event_name}")
     print(f"  Date: {date_str}")
-    print(f"  Retry attempt: {retry_count + 1}/2")
+    print(f"  Attempt: {retry_count + 1}/{Globals.RETRY_MAX_ATTEMPTS}")
     print(f"  AI calls today: {Globals.ai_calls_today + 1}/{Globals.MAX_DAILY_AI_CALLS}")
     
-    # Wait for MyFxBook to publish the data (only on first attempt)
-    import time
-    if retry_count == 0:
-        print(f"  [EVENT DELAY] Waiting {Globals.EVENT_TRIGGER_DELAY}s for MyFxBook data publication...")
-        time.sleep(Globals.EVENT_TRIGGER_DELAY)
+    # AI calls for this event are cancelled once its trading window has passed
+    deadline = _fetch_deadline(event_data)
+    if deadline is not None and deadline <= time.time():
+        print(f"  [STALE] Trading window ({Globals.AI_EVENT_WINDOW}s after release) has passed - giving up")
+        _give_up_fetch(event_key)
+        return False
     
     # Call Perplexity to get data
     print(f"  Querying MyFxBook for {request_type} value(s)...")
     print(f"  Using AI date format: {ai_date}")
     time.sleep(Globals.AI_REQUEST_DELAY)  # Wait to avoid rate limiting
     
-    Globals.ai_calls_today += 1  # Increment counter
+    AIBudget.charge(event_key)
+    deadline_token = AIGateway.set_deadline(deadline)
+    budget_token = AIBudget.set_event(event_key)   # validation/signal calls charge this event too
     try:
-        perplexity_response = get_news_data(event_name, currency, ai_date, request_type)
+        if Globals.AI_RACE_ENABLED:
+            # Same query to every AI_RACE_BACKENDS entry; the first clean answer wins
+            perplexity_response = race_news_data(event_name, currency, ai_date, request_type,
+                                                  event_data.get('forecast'))
+        else:
+            perplexity_response = get_news_data(event_name, currency, ai_date, request_type)
         
         # Validate format with ChatGPT
         print("  Validating format with ChatGPT...")
@@ -827,28 +666,8 @@ def fetch_actual_value(event_key):
         # Check if data is not available yet (FALSE response)
         if "FALSE" in perplexity_response.upper():
             print("  [NOT READY] Actual value not released yet")
-            
-            # Increment retry count ONLY if below max
-            if retry_count < 2:
-                retry_count += 1
-                Globals._Currencies_[event_key]['retry_count'] = retry_count
-            
-            if retry_count >= 2:
-                print(f"  [MAX RETRIES] Reached maximum retry attempts (2)")
-                print(f"  Setting actual to None (data unavailable)")
-                Globals._Currencies_[event_key]['actual'] = None
-                Globals._Currencies_[event_key]['retry_after'] = None  # Clear retry time
-                return False
-            else:
-                # Store retry time instead of blocking with sleep
-                from datetime import timedelta
-                retry_wait_seconds = 120  # 2 minutes
-                retry_after_time = datetime.now() + timedelta(seconds=retry_wait_seconds)
-                Globals._Currencies_[event_key]['retry_after'] = retry_after_time
-                
-                print(f"  Will retry at {retry_after_time.strftime('%H:%M:%S')} ({retry_count}/2 attempts used)")
-                print(f"  [NON-BLOCKING] Continuing with other events...")
-                return False
+            _schedule_retry(event_key)
+            return False
         
         # Parse values using regex
         forecast = None
@@ -900,15 +719,18 @@ def fetch_actual_value(event_key):
             # Check if we've already tried fetching forecast separately
             forecast_retry_attempted = Globals._Currencies_[event_key].get('forecast_retry_attempted', False)
             
-            if not forecast_retry_attempted:
+            if ForecastPrefetch.attempted(event_key):
+                # The pre-fetch already tried before release: no extra call inside the trading window
+                print(f"  [SKIP RETRY] Forecast was not found by the pre-fetch either")
+            elif not forecast_retry_attempted:
                 print(f"  [PARTIAL DATA] Going back to query for Forecast because response only contained Actual: {actual}")
                 print(f"  Actual value is already saved, now fetching missing Forecast...")
                 
                 # Mark that we're attempting forecast retry BEFORE making the call
                 Globals._Currencies_[event_key]['forecast_retry_attempted'] = True
                 
-                # Increment AI call counter
-                Globals.ai_calls_today += 1
+                # Charge the extra call to this event's reservation
+                AIBudget.charge(event_key)
                 print(f"  AI calls today: {Globals.ai_calls_today}/{Globals.MAX_DAILY_AI_CALLS}")
                 
                 # Query specifically for forecast (no delay needed)
@@ -950,42 +772,80 @@ def fetch_actual_value(event_key):
         
         # Process if we have actual value (with or without forecast)
         if actual_found:
-            # STEP 4A: Calculate affect (pass event_key, function will extract currency)
-            calculate_affect(event_key)
-            
-            # STEP 5: Generate trading signals (pass event_key, function will extract currency)
-            trading_signals = generate_trading_decisions(event_key)
+            LatencyTrace.mark("fetch", event_key=event_key)
+            RetryPolicy.record_availability(event_data, _clock())
             
-            # STEP 6: Update _Affected_ and _Symbols_ (pass event_key so it can access the data)
-            update_affected_symbols(event_key, trading_signals)
+            # Steps 4A-6 change shared trading state (S5 sentiment, verdicts)
+            with _STATE_LOCK:
+                # STEP 4A: Calculate affect (pass event_key, function will extract currency)
+                calculate_affect(event_key)
+                
+                # STEP 5: Generate trading signals (pass event_key, function will extract currency)
+                trading_signals = generate_trading_decisions(event_key)
+                LatencyTrace.mark("decide", event_key=event_key, nid=Globals._Currencies_[event_key].get('NID'))
+                Journal.sync_sentiment()  # S5 confirmation/scaling state
+                
+                # STEP 6: Update _Affected_ and _Symbols_ (pass event_key so it can access the data)
+                update_affected_symbols(event_key, trading_signals)
             
             return True
         else:
             print(f"  [FAILED] No actual value retrieved")
             Globals._Currencies_[event_key]['actual'] = None
+            _schedule_retry(event_key)
             return False
             
     except Exception as e:
         print(f"  [ERROR] Exception during fetch: {e}")
         
-        # Increment retry count on exception to prevent infinite loops
-        if retry_count < 2:
-            retry_count += 1
-            Globals._Currencies_[event_key]['retry_count'] = retry_count
-            
-            # Store retry time instead of blocking
-            from datetime import timedelta
-            retry_wait_seconds = 120
-            retry_after_time = datetime.now() + timedelta(seconds=retry_wait_seconds)
-            Globals._Currencies_[event_key]['retry_after'] = retry_after_time
-            
-            print(f"  [RETRY] Will attempt again at {retry_after_time.strftime('%H:%M:%S')} (retry_count now {retry_count}/2)")
-        else:
-            print(f"  [MAX RETRIES] Reached maximum retry attempts after exception")
-            Globals._Currencies_[event_key]['actual'] = None
-            Globals._Currencies_[event_key]['retry_after'] = None
+        # Cancelled at the end of the trading window: a retry would be too late
+        if isinstance(e, AIGateway.DeadlineExceeded) and deadline is not None and deadline <= time.time():
+            print(f"  [STALE] Trading window has passed - giving up")
+            _give_up_fetch(event_key)
+            return False
         
+        # Counted as an attempt, so a failing provider cannot loop forever
+        _schedule_retry(event_key)
         return False
+    finally:
+        AIBudget.reset_event(budget_token)
+        AIGateway.reset_deadline(deadline_token)
+
+
+def _fetch_deadline(event_data):
+    """
+    End of the event's trading window as time.time(), or None without one.
+    AI calls still running for the event then are cancelled (AIGateway).
+    """
+    event_time = event_data.get('event_time')
+    if not Globals.AI_EVENT_WINDOW or event_time is None:
+        return None
+    window_end = event_time + timedelta(seconds=Globals.AI_EVENT_WINDOW)
+    return time.time() + (window_end - _clock()).total_seconds()
+
+
+def _schedule_retry(event_key):
+    """Count the failed attempt and set retry_after from RetryPolicy (or give up)."""
+    event = Globals._Currencies_[event_key]
+    event['retry_count'] = event.get('retry_count', 0) + 1
+    now = _clock()
+    retry_at, reason = RetryPolicy.next_attempt(event, now)
+    if retry_at is None:
+        print(f"  [MAX RETRIES] Giving up: {reason}")
+        _give_up_fetch(event_key)
+        return
+    event['retry_after'] = retry_at
+    print(f"  Will retry at {retry_at.strftime('%H:%M:%S')} (+{(retry_at - now).total_seconds():.0f}s, {reason}, "
+          f"{event['retry_count']}/{Globals.RETRY_MAX_ATTEMPTS} attempts used)")
+    print(f"  [NON-BLOCKING] Continuing with other events...")
+
+
+def _give_up_fetch(event_key):
+    """No more attempts for this event (monitor_news_events skips retries without retry_after)."""
+    event = Globals._Currencies_[event_key]
+    event['actual'] = None
+    event['retry_after'] = None
+    event['retry_count'] = max(event.get('retry_count', 0), 1)
 
 
 def calculate_affect(event_key):
@@ -1042,6 +902,9 @@ def calculate_affect(event_key):
         Globals._Currencies_[event_key]['NID'] = nid
         print(f"    Assigned NID: {nid}")
     
+    LatencyTrace.mark("affect", event_key=event_key, nid=Globals._Currencies_[event_key]['NID'])
+    Journal.record("nid", key=event_key, event=Globals._Currencies_[event_key])
+    
     print(f"    {comparison}: {forecast} → {actual} | Type: {'INVERSE' if is_inverse else 'NORMAL'} → Affect: {affect}")
 
 
@@ -1137,61 +1000,53 @@ def generate_trading_decisions(event_key):
             if positions_opened > 0 and Globals.news_filter_conflictHandling == "reverse":
                 print(f"   🔄 Closing {positions_opened} existing {old_direction} position(s)")
                 
-                # Find and close all positions for this currency
+                # Find and close all positions for this currency, on every account
+                # the verdicts fan out to (each gets its own pending action)
                 if _current_client_id is not None:
-                    open_positions = get_client_open(_current_client_id)
-                    closed_count = 0
-                    
-                    for pos in open_positions:
-                        symbol = pos.get('symbol', '')
-                        ticket = pos.get('ticket', 0)
+                    waiting = 0
+                    for account in _fan_out_accounts(_current_client_id):
+                        client_id = account.client_id
+                        closes = {}  # cmdId → ticket
                         
-                        # Check if this position's symbol contains the currency
-                        if currency in symbol:
-                            try:
-                                enqueue_command(
-                                    client_id=_current_client_id,
-                                    state=3,  # CLOSE command
-                                    payload={
-                                        "symbol": symbol,
-                                        "ticket": ticket,
-                                        "comment": f"S5_Conflict_{currency}"
-                                    }
-                                )
-                                print(f"   ✅ Queued close for ticket {ticket} ({symbol})")
-                                closed_count += 1
-                            except Exception as e:
-                                print(f"   ❌ Failed to queue close for ticket {ticket}: {e}")
+                        for pos in get_client_open(client_id):
+                            symbol = pos.get('symbol', '')
+                            ticket = pos.get('ticket', 0)
+                            
+                            # Check if this position's symbol contains the currency
+                            if currency in symbol:
+                                try:
+                                    cmd = enqueue_command(
+                                        client_id=client_id,
+                                        state=3,  # CLOSE command
+                                        payload={
+                                            "symbol": symbol,
+                                            "ticket": ticket,
+                                            "comment": f"S5_Conflict_{currency}"
+                                        }
+                                    )
+                                    print(f"   ✅ Queued close for ticket {ticket} ({symbol}, {client_id})")
+                                    closes[cmd["cmdId"]] = ticket
+                                except Exception as e:
+                                    print(f"   ❌ Failed to queue close for ticket {ticket}: {e}")
+                        
+                        if closes:
+                            PendingCloses.register(
+                                "S5", f"S5:{currency}:{client_id}", client_id, closes,
+                                then={"currency": currency, "direction": affect}, now=_clock()
+                            )
+                            waiting += len(closes)
                     
-                    # Wait briefly for positions to close
-                    if closed_count > 0:
-                        import time
-                        max_wait = 3  # seconds
-                        wait_start = time.time()
+                    # Don't wait here: keep positions_opened until the EA confirms the
+                    # closes (see _finish_s5_conflict), so no new trades open meanwhile
+                    if waiting:
+                        Globals._CurrencySentiment_[currency]['direction'] = affect
+                        Globals._CurrencySentiment_[currency]['count'] = 1
                         
-                        print(f"   ⏳ Waiting up to {max_wait}s for {closed_count} position(s) to close...")
+                        print(f"   ⏳ Waiting for {waiting} position(s) to close (positions_opened={positions_opened})")
                         
-                        while time.time() - wait_start < max_wait:
-                            # Check if currency count reached 0
-                            if Globals._CurrencyCount_.get(currency, 0) == 0:
-                                elapsed = time.time() - wait_start
-                                print(f"   ✅ All {currency} positions closed ({elapsed:.1f}s)")
-                                break
-                            time.sleep(0.3)
-                        else:
-                            # Timeout - positions may still be open
-                            current_count = Globals._CurrencyCount_.get(currency, 0)
-                            print(f"   ⚠️  WARNING: {currency} still has {current_count} position(s) after {max_wait}s")
-                            print(f"   ⚠️  Keeping positions_opened={positions_opened} until positions actually close")
-                            
-                            # Don't reset counter yet - keep tracking old positions
-                            Globals._CurrencySentiment_[currency]['direction'] = affect
-                            Globals._CurrencySentiment_[currency]['count'] = 1
-                            # Keep positions_opened as-is to prevent opening new trades
-                            
-                            threshold = Globals.news_filter_confirmationThreshold
-                            print(f"⏳ S5: {currency} {affect} signal 1/{threshold}, but waiting for old positions to close")
-                            return {}  # Skip trade until positions actually close
+                        threshold = Globals.news_filter_confirmationThreshold
+                        print(f"⏳ S5: {currency} {affect} signal 1/{threshold}, but waiting for old positions to close")
+                        return {}  # Skip trade until positions actually close
                 else:
                     print(f"   ⚠️  No client_id available for S5 conflict handling")
             
@@ -1218,6 +1073,11 @@ def generate_trading_decisions(event_key):
             print(f"    Aggregated result: NEUTRAL - No trading signals")
             return {}
         
+        prepared = WarmUp.branch(currency, aggregated_affect) if Globals.WARMUP_RULE_SIGNALS else None
+        if prepared is not None:
+            print(f"    Using warm-up {aggregated_affect} branch ({len(prepared)} pair(s))")
+            return dict(prepared)
+        
         # Build combined event description for AI
         events_desc = []
         for key in same_time_events:
@@ -1245,6 +1105,11 @@ def generate_trading_decisions(event_key):
             print(f"    Affect is {affect} - No trading signals")
             return {}
         
+        prepared = WarmUp.branch(currency, affect) if Globals.WARMUP_RULE_SIGNALS else None
+        if prepared is not None:
+            print(f"    Using warm-up {affect} branch ({len(prepared)} pair(s))")
+            return dict(prepared)
+        
         print(f"    Querying ChatGPT with News_Rules.txt...")
         response = generate_trading_signals(currency, event_name, forecast, actual)
     
@@ -1290,7 +1155,8 @@ def generate_trading_decisions(event_key):
 def update_affected_symbols(event_key, trading_signals):
     """
     STEP 6: UPDATE _Affected_ AND _Symbols_ DICTIONARIES
-    Stores trading signals in both dictionaries for trade execution.
+    Stores trading signals in both dictionaries and publishes each known pair
+    to _PendingVerdicts_ for execute_news_trades() to drain.
     
     Args:
         event_key: The event key (or currency code for backwards compatibility)
@@ -1343,6 +1209,15 @@ def update_affected_symbols(event_key, trading_signals):
         # Update _Symbols_ if pair exists
         if pair_name in Globals._Symbols_:
             Globals._Symbols_[pair_name]["verdict_GPT"] = action
+            Globals._PendingVerdicts_[pair_name] = {
+                "pair": pair_name,
+                "verdict": action,
+                "NID": nid,
+                "currency": event_data.get('currency'),
+                "event": event_name,
+                "date": event_date,
+                "event_key": event_key
+            }
             print(f"    _Symbols_[{pair_name}]['verdict_GPT'] = {action}")
         else:
             print(f"    [WARN] {pair_name} not found in _Symbols_ (stored in _Affected_ only)")
@@ -1353,20 +1228,58 @@ def update_affected_symbols(event_key, trading_signals):
 def execute_news_trades(client_id):
     """
     STEP 7: EXECUTE TRADES
-    Executes trades for all pairs with verdict_GPT set via enqueue_command.
+    Drains _PendingVerdicts_ and fans each verdict out to the attached accounts
+    (see _fan_out_accounts): one order per account, sized with the account's
+    lot_multiplier and checked against the account's own exposure, all queued in
+    this one pass. The verdicts come from one run of the event pipeline, so the
+    AI calls per event stay the same however many accounts are attached.
+    Heartbeats with nothing pending return immediately.
     Links each trade to its originating news event via NID.
     Implements alternative pair finder when primary pairs are rejected.
     
     Args:
-        client_id: The MT5 client ID to execute trades for
+        client_id: The MT5 client ID whose heartbeat drains the verdicts
+        
+    Returns:
+        int: Number of trades queued (all accounts)
+    """
+    # Nothing published since the last drain
+    if not Globals._PendingVerdicts_:
+        return 0
+    with _STATE_LOCK:
+        return _execute_locked(client_id)
+
+
+def _fan_out_accounts(client_id):
+    """
+    Accounts each verdict is materialized for, primary account first.
+    The caller always takes part; another account only while its EA is polling
+    (seen within FANOUT_ONLINE_SECONDS) and its weekly goal is not reached.
+    
+    Args:
+        client_id: The MT5 client ID draining the verdicts
         
     Returns:
-        int: Number of trades queued
+        list: AccountContext objects in execution order
     """
-    from datetime import datetime
+    caller = Accounts.get(client_id)
+    if not getattr(Globals, "FANOUT_ENABLED", True):
+        return [caller]
+    
+    online_seconds = getattr(Globals, "FANOUT_ONLINE_SECONDS", 60)
+    accounts = [account for account in Accounts.all_accounts()
+                if account is caller
+                or (not account.weekly_goal_reached and is_client_online(account.client_id, online_seconds))]
+    primary = Accounts.primary()
+    return sorted(accounts, key=lambda account: (account is not primary, account.client_id))
+
+
+def _execute_locked(client_id):
+    if not Globals._PendingVerdicts_:
+        return 0
     
     # Check if we're in weekend trading blackout (Friday 4pm - Sunday 6pm)
-    now = datetime.now()
+    now = _clock()
     weekday = now.weekday()  # Monday=0, Sunday=6
     hour = now.hour
     
@@ -1384,102 +1297,171 @@ def execute_news_trades(client_id):
     
     trades_queued = 0
     nid_executed_counts = {}  # Track executions per NID
+    nid_event_keys = {}       # NID → event key (for NID_Affect_Executed)
     
-    # Get filter settings
-    news_filter_findAvailablePair = getattr(Globals, "news_filter_findAvailablePair", False)
+    accounts = _fan_out_accounts(client_id)
+    if len(accounts) > 1:
+        print(f"\n[FAN-OUT] {len(accounts)} account(s): {', '.join(account.client_id for account in accounts)}")
+    
+    # Drain the pending verdicts and clear their verdict_GPT flags.
+    # Executed in _Symbols_ order, the order the per-symbol scan used to visit them.
+    symbol_rows = CurrencyExposure.get_index().row
+    pending = sorted(Globals._PendingVerdicts_.values(), key=lambda e: symbol_rows.get(e["pair"], len(symbol_rows)))
+    Globals._PendingVerdicts_.clear()
+    for entry in pending:
+        Globals._Symbols_[entry["pair"]]["verdict_GPT"] = ""
     
-    # Process each pair in _Symbols_ that has a verdict_GPT
-    for pair_name, pair_config in Globals._Symbols_.items():
-        verdict = pair_config.get("verdict_GPT", "")
+    for entry in pending:
+        pair_name = entry["pair"]
+        verdict = entry["verdict"]
         
-        if not verdict or verdict not in ["BUY", "SELL"]:
+        if verdict not in ["BUY", "SELL"]:
             continue  # Skip pairs without valid verdict
         
         # Only queue pairs that are in symbolsToTrade
         if pair_name not in Globals.symbolsToTrade:
             continue  # Skip pairs not in symbolsToTrade
         
-        # Get NID and currency from _Affected_ dictionary
-        nid = None
-        event_name = "Unknown"
-        currency = None
-        
-        if pair_name in Globals._Affected_:
-            nid = Globals._Affected_[pair_name].get("NID")
-            event_name = Globals._Affected_[pair_name].get("event", "Unknown")
+        # NID, event and currency travel with the verdict
+        nid = entry["NID"]
+        if nid is not None:
+            nid_event_keys[nid] = entry["event_key"]
+        
+        # The first account that gets an order takes the S3/S4 decision for the
+        # verdict (they track one position per currency / pair); the rest follow it.
+        # An S3 reversal closes each account's own position before its open.
+        decision = None
+        for account in accounts:
+            # Set system_news_event for alternative finder context
+            if entry["currency"]:
+                Globals.system_news_event = entry["currency"]
             
-            # Find the currency from the event
-            for event_key, event_data in Globals._Currencies_.items():
-                if event_data.get('NID') == nid:
-                    currency = event_data.get('currency')
-                    break
-        
-        # Set system_news_event for alternative finder context
-        if currency:
-            Globals.system_news_event = currency
-        
-        print(f"\n[News] Attempting {pair_name} ({verdict})...")
+            awaiting_close = None
+            order = _size_order(entry, account)
+            if order is not None:
+                if decision is None:
+                    decision = _strategy_decision(order)
+                    order["track"] = True
+                if decision["skip"]:
+                    order = None
+                elif decision["reverse"] is not None:
+                    awaiting_close = _close_for_reversal(order, account, decision["reverse"])
+                    if awaiting_close is False:
+                        order = None
+            if order is not None and awaiting_close is not None:
+                _await_reversal(order, account, awaiting_close)
+            elif order is not None and _queue_news_order(order):
+                trades_queued += 1
+                # Track NID execution count
+                if nid is not None:
+                    nid_executed_counts[nid] = nid_executed_counts.get(nid, 0) + 1
+            
+            # Reset system_news_event after processing this pair
+            Globals.system_news_event = False
+    
+    # Update NID_Affect_Executed counts in _Currencies_
+    for nid, count in nid_executed_counts.items():
+        event_key = nid_event_keys.get(nid)
+        if event_key in Globals._Currencies_:
+            Globals._Currencies_[event_key]['NID_Affect_Executed'] = count
+            print(f"\n  [NID_{nid}] Executed {count} trade(s)")
+    
+    # Clear _Affected_ dictionary after execution completes
+    Globals._Affected_.clear()
+    
+    if trades_queued > 0:
+        print(f"\n[STEP 7] ✅ Queued {trades_queued} trade(s)")
+    
+    return trades_queued
+
+
+def _size_order(entry, account):
+    """
+    Materialize one verdict for one account: risk filters on the account's
+    exposure (with the alternative pair finder), then lot/TP/SL sized with the
+    account's lot_multiplier.
+    
+    Args:
+        entry: _PendingVerdicts_ entry
+        account: AccountContext the order is for
         
-        # Check if this pair passes risk management filters
-        if not can_open_trade(pair_name):
-            print(f"[News] ❌ Position rejected by risk filters: {pair_name}")
-            print(f"  📊 Currency counts: {Globals._CurrencyCount_}")
-            print(f"  📊 Pair counts: {Globals._PairCount_}")
+    Returns:
+        dict: Order for _queue_news_order(), or None if the account skips the verdict
+    """
+    client_id = account.client_id
+    pair_name = entry["pair"]
+    pair_config = Globals._Symbols_[pair_name]
+    verdict = entry["verdict"]
+    nid = entry["NID"]
+    event_name = entry["event"] or "Unknown"
+    currency = entry["currency"]
+    
+    # Get filter settings
+    news_filter_findAvailablePair = getattr(Globals, "news_filter_findAvailablePair", False)
+    
+    print(f"\n[News] Attempting {pair_name} ({verdict})...")
+    
+    # Check if this pair passes risk management filters
+    if not can_open_trade(pair_name, client_id):
+        print(f"[News] ❌ Position rejected by risk filters: {pair_name}")
+        print(f"  📊 Currency counts: {account.exposure}")
+        print(f"  📊 Pair counts: {Globals._PairCount_}")
+        
+        # Try alternative finder if BOTH flags are enabled AND we have a currency
+        # Requires: news_filter_findAvailablePair=True AND system_news_event=(currency)
+        if news_filter_findAvailablePair and currency and Globals.system_news_event:
+            # OPTIMIZATION: Skip search if currency already at max limit
+            # If currency is at limit, all pairs with this currency will fail can_open_trade()
+            max_per_currency = getattr(Globals, "news_filter_maxTradePerCurrency", 0)
+            current_count = account.exposure.get(currency, 0)
             
-            # Try alternative finder if BOTH flags are enabled AND we have a currency
-            # Requires: news_filter_findAvailablePair=True AND system_news_event=(currency)
-            if news_filter_findAvailablePair and currency and Globals.system_news_event:
-                # OPTIMIZATION: Skip search if currency already at max limit
-                # If currency is at limit, all pairs with this currency will fail can_open_trade()
-                max_per_currency = getattr(Globals, "news_filter_maxTradePerCurrency", 0)
-                current_count = Globals._CurrencyCount_.get(currency, 0)
-                
-                if max_per_currency > 0 and current_count >= max_per_currency:
-                    print(f"  ⚠️  {currency} at max limit ({current_count}/{max_per_currency}) - skipping alternative search")
-                    Globals.system_news_event = False  # Reset
-                    continue
-                
-                print(f"  🔍 Searching for alternative {currency} pair...")
+            if max_per_currency > 0 and current_count >= max_per_currency:
+                print(f"  ⚠️  {currency} at max limit ({current_count}/{max_per_currency}) - skipping alternative search")
+                return None
+            
+            print(f"  🔍 Searching for alternative {currency} pair...")
+            
+            alternative = find_available_pair_for_currency(currency, client_id)
+            
+            if alternative:
+                print(f"  ✅ ALTERNATIVE FOUND: {alternative}")
                 
-                alternative = find_available_pair_for_currency(currency)
+                # Use the alternative pair instead
+                pair_name = alternative
                 
-                if alternative:
-                    print(f"  ✅ ALTERNATIVE FOUND: {alternative}")
-                    
-                    # Use the alternative pair instead
-                    pair_name = alternative
+                # Update verdict from alternative pair's config
+                if alternative in Globals._Symbols_:
+                    # Keep same verdict (BUY/SELL) as primary pair
+                    pair_config = Globals._Symbols_[alternative]
                     
-                    # Update verdict from alternative pair's config
-                    if alternative in Globals._Symbols_:
-                        # Keep same verdict (BUY/SELL) as primary pair
-                        pair_config = Globals._Symbols_[alternative]
-                        
-                        # Store in _Affected_ with same NID and verdict
-                        Globals._Affected_[alternative] = {
-                            "date": Globals._Affected_.get(pair_name, {}).get("date", ""),
-                            "event": event_name,
-                            "position": verdict,
-                            "NID": nid
-                        }
-                    else:
-                        print(f"  ⚠️  Alternative {alternative} not in _Symbols_ config - skipping")
-                        Globals.system_news_event = False  # Reset
-                        continue
+                    # Store in _Affected_ with same NID and verdict
+                    Globals._Affected_[alternative] = {
+                        "date": Globals._Affected_.get(pair_name, {}).get("date", ""),
+                        "event": event_name,
+                        "position": verdict,
+                        "NID": nid
+                    }
                 else:
-                    print(f"  ❌ No alternative found for {currency}")
-                    Globals.system_news_event = False  # Reset
-                    continue
+                    print(f"  ⚠️  Alternative {alternative} not in _Symbols_ config - skipping")
+                    return None
             else:
-                # Alternative finder disabled - log why
-                if not news_filter_findAvailablePair:
-                    pass  # Silent - this is expected when feature disabled
-                elif not Globals.system_news_event:
-                    pass  # Silent - system_news_event not set (expected)
-                elif not currency:
-                    print(f"  ⚠️  No currency identified for alternative search")
-                Globals.system_news_event = False  # Reset
-                continue
-        
+                print(f"  ❌ No alternative found for {currency}")
+                return None
+        else:
+            # Alternative finder disabled - log why
+            if not news_filter_findAvailablePair:
+                pass  # Silent - this is expected when feature disabled
+            elif not Globals.system_news_event:
+                pass  # Silent - system_news_event not set (expected)
+            elif not currency:
+                print(f"  ⚠️  No currency identified for alternative search")
+            return None
+    
+    # Sized order from the warm-up stage (see WarmUp.py), if the slot was prepared
+    prepared = WarmUp.order_for(pair_name, verdict, account.lot_multiplier)
+    if prepared:
+        symbol, lot, tp, sl = prepared["symbol"], prepared["lot"], prepared["tp"], prepared["sl"]
+    else:
         # Get pair configuration (updated if alternative was selected)
         symbol = pair_config.get("symbol")
         lot = pair_config.get("lot")
@@ -1490,182 +1472,334 @@ def execute_news_trades(client_id):
         # Default lots in _Symbols_ are for 100k accounts, scale for actual account size
         if lot:
             base_lot = lot  # Store original for debug output
-            lot = lot * Globals.lot_multiplier
+            lot = lot * account.lot_multiplier
             lot = round(lot, 2)  # Round to 2 decimals for MT5 compatibility
             
             # Debug output if multiplier is not 1.0
-            if Globals.lot_multiplier != 1.0:
-                print(f"  💰 Lot sizing: {base_lot} × {Globals.lot_multiplier:.2f}x = {lot} lots")
-        
-        # Validate required fields
-        if not all([symbol, lot, tp, sl]):
-            print(f"    ⚠️  Missing configuration for {pair_name} - skipping")
-            Globals.system_news_event = False  # Reset
-            continue
+            if account.lot_multiplier != 1.0:
+                print(f"  💰 Lot sizing: {base_lot} × {account.lot_multiplier:.2f}x = {lot} lots")
+    
+    # Validate required fields
+    if not all([symbol, lot, tp, sl]):
+        print(f"    ⚠️  Missing configuration for {pair_name} - skipping")
+        return None
+    
+    # Determine state based on verdict
+    state = 1 if verdict == "BUY" else 2  # OPEN_BUY / OPEN_SELL
+    
+    return {
+        "client_id": client_id,
+        "pair": pair_name,
+        "symbol": symbol,
+        "verdict": verdict,
+        "state": state,
+        "lot": lot,
+        "tp": tp,
+        "sl": sl,
+        # Build comment with NID
+        "comment": f"News:NID_{nid}_{event_name[:20]}" if nid else f"NEWS_{pair_name}",
+        "nid": nid,
+        "currency": currency,
+        "event_key": entry["event_key"],
+        "track": False  # Books _CurrencyPositions_ (the account taking the S3/S4 decision)
+    }
+
+
+def _strategy_decision(order):
+    """
+    S3 reversal and S4 weekly first-only checks for a verdict, taken once on the
+    first account's order.
+    
+    Args:
+        order: Order built by _size_order()
         
-        # ═══════════════════════════════════════════════════════════════
-        # S3 REVERSAL LOGIC
-        # Check if we should reverse an existing position (S3 only)
-        # ═══════════════════════════════════════════════════════════════
-        if Globals.news_filter_rollingMode and currency:
-            # Check if this currency already has a position
-            if currency in Globals._CurrencyPositions_:
-                existing = Globals._CurrencyPositions_[currency]
-                existing_direction = existing.get('action', '')
-                existing_ticket = existing.get('ticket', 0)
-                existing_symbol = existing.get('pair', '')
-                
-                # Check if new signal is opposite direction
-                if existing_direction and existing_direction != verdict:
-                    print(f"🔄 S3: Reversing {currency} from {existing_direction} to {verdict}")
-                    print(f"   Closing ticket {existing_ticket} on {existing_symbol}")
-                    
-                    # Close existing position via enqueue_command (state=3)
-                    try:
-                        enqueue_command(
-                            client_id,
-                            3,  # CLOSE state
-                            {
-                                "symbol": existing_symbol,
-                                "ticket": existing_ticket,
-                                "comment": f"S3_Reversal_{currency}"
-                            }
-                        )
-                        print(f"   ✅ Close command queued for ticket {existing_ticket}")
-                    except Exception as e:
-                        print(f"   ❌ Failed to queue close command: {e}")
-                        Globals.system_news_event = False
-                        continue
-                    
-                    # Remove from tracking (will be re-added when new position opens)
-                    del Globals._CurrencyPositions_[currency]
-                    
-                    # Wait briefly for EA to process close
-                    import time
-                    time.sleep(0.5)
-                    
-                    print(f"   → Proceeding to open {verdict} position")
-                    # Continue to create_trade() below
-                    
+    Returns:
+        dict: {"skip": bool, "reverse": None or the reversed _CurrencyPositions_ entry
+              (S3: every account closes its own position first, see _close_for_reversal)}
+    """
+    decision = {"skip": False, "reverse": None}
+    pair_name = order["pair"]
+    verdict = order["verdict"]
+    currency = order["currency"]
+    
+    # ═══════════════════════════════════════════════════════════════
+    # S3 REVERSAL LOGIC
+    # Check if we should reverse an existing position (S3 only)
+    # ═══════════════════════════════════════════════════════════════
+    if Globals.news_filter_rollingMode and currency:
+        # Check if this currency already has a position
+        if currency in Globals._CurrencyPositions_:
+            existing = Globals._CurrencyPositions_[currency]
+            existing_direction = existing.get('action', '')
+            existing_ticket = existing.get('ticket', 0)
+            
+            # Check if new signal is opposite direction
+            if existing_direction and existing_direction != verdict:
+                if not existing.get('TID') and PendingCloses.get(f"S3:{currency}"):
+                    # Earlier reversal still waiting for its close - retarget its open
+                    print(f"🔄 S3: Retargeting pending {currency} reversal from {existing_direction} to {verdict}")
                 else:
-                    # Same direction - skip trade (S3 doesn't stack)
-                    print(f"⏭️  S3: {currency} already has {verdict} position (ticket {existing_ticket}), skipping")
-                    Globals.system_news_event = False
-                    continue
-        
-        # ═══════════════════════════════════════════════════════════════
-        # S4 WEEKLY FIRST-ONLY LOGIC
-        # Check if this pair was already traded this week (S4 only)
-        # ═══════════════════════════════════════════════════════════════
-        if Globals.news_filter_weeklyFirstOnly:
-            # Check if this pair was already traded this week
-            if Globals._PairsTraded_ThisWeek_.get(pair_name, False):
-                print(f"🔒 S4: {pair_name} already traded this week - skipping (weekly first-only)")
-                Globals.system_news_event = False
-                continue
+                    print(f"🔄 S3: Reversing {currency} from {existing_direction} to {verdict}")
+                decision["reverse"] = existing
+                
+                # Remove from tracking (will be re-added when new position opens)
+                del Globals._CurrencyPositions_[currency]
+                
             else:
-                # Mark this pair as traded for this week
-                Globals._PairsTraded_ThisWeek_[pair_name] = True
-                print(f"✅ S4: {pair_name} first trade this week - proceeding")
-        
-        # Determine state based on verdict
-        if verdict == "BUY":
-            state = 1  # OPEN_BUY
-        elif verdict == "SELL":
-            state = 2  # OPEN_SELL
+                # Same direction - skip trade (S3 doesn't stack)
+                print(f"⏭️  S3: {currency} already has {verdict} position (ticket {existing_ticket}), skipping")
+                decision["skip"] = True
+                return decision
+    
+    # ═══════════════════════════════════════════════════════════════
+    # S4 WEEKLY FIRST-ONLY LOGIC
+    # Check if this pair was already traded this week (S4 only)
+    # ═══════════════════════════════════════════════════════════════
+    if Globals.news_filter_weeklyFirstOnly:
+        # Check if this pair was already traded this week
+        if Globals._PairsTraded_ThisWeek_.get(pair_name, False):
+            print(f"🔒 S4: {pair_name} already traded this week - skipping (weekly first-only)")
+            decision["skip"] = True
         else:
-            Globals.system_news_event = False  # Reset
-            continue  # Skip invalid verdicts
-        
-        # Build comment with NID
-        comment = f"News:NID_{nid}_{event_name[:20]}" if nid else f"NEWS_{pair_name}"
+            # Mark this pair as traded for this week
+            Globals._PairsTraded_ThisWeek_[pair_name] = True
+            print(f"✅ S4: {pair_name} first trade this week - proceeding")
+    
+    return decision
+
+
+def _s3_key(order):
+    """PendingCloses key of an S3 reversal: one per currency, and per account for the followers."""
+    if order["track"]:
+        return f"S3:{order['currency']}"
+    return f"S3:{order['currency']}:{order['client_id']}"
+
+
+def _close_for_reversal(order, account, reversed_position):
+    """
+    S3: queue the close of the account's own position on the currency.
+    
+    Args:
+        order: Order built by _size_order()
+        account: AccountContext the order is for
+        reversed_position: _CurrencyPositions_ entry the decision reversed
         
-        # Create trade record using TID system
-        # Type assertion: we validated these exist above
-        trade_record = create_trade(
-            client_id=str(client_id),
-            symbol=str(symbol),
-            action=verdict,
-            volume=float(lot),
-            tp=float(tp),
-            sl=float(sl),
-            comment=comment,
-            nid=nid if nid else 0
+    Returns:
+        dict: {cmdId: ticket} to open after ({} retargets a pending reversal),
+              None to open now (no position on the currency), False to skip
+    """
+    client_id = account.client_id
+    currency = order["currency"]
+    verdict = order["verdict"]
+    held = account.positions.get(currency)
+    if order["track"] and reversed_position.get('client_id', client_id) == client_id:
+        held = reversed_position   # also covers entries restored from before accounts kept positions
+    if held is None:
+        return None
+    
+    if held.get('action') == verdict:
+        print(f"⏭️  S3: {client_id} already has {verdict} {currency} (ticket {held.get('ticket', 0)}), skipping")
+        return False
+    if not held.get('TID') and PendingCloses.get(_s3_key(order)):
+        return {}   # retarget the open still waiting for its close
+    
+    ticket = held.get('ticket', 0)
+    print(f"   Closing ticket {ticket} on {held.get('pair', '')} ({client_id})")
+    try:
+        close_cmd = enqueue_command(
+            client_id,
+            3,  # CLOSE state
+            {
+                "symbol": held.get('pair', ''),
+                "ticket": ticket,
+                "comment": f"S3_Reversal_{currency}"
+            }
         )
+        print(f"   ✅ Close command queued for ticket {ticket}")
+    except Exception as e:
+        print(f"   ❌ Failed to queue close command: {e}")
+        return False
+    account.positions.pop(currency, None)
+    return {close_cmd["cmdId"]: ticket}
+
+
+def _await_reversal(order, account, awaiting_close):
+    """S3: open once the EA confirms the close (_finish_s3_reversal), no waiting here."""
+    currency = order["currency"]
+    key = _s3_key(order)
+    PendingCloses.register("S3", key, order["client_id"], awaiting_close, then=order, now=_clock())
+    if PendingCloses.get(key):
+        # Placeholder so later signals this pass see the pending direction
+        placeholder = {
+            'pair': order["symbol"],
+            'action': order["verdict"],
+            'ticket': 0,
+            'TID': '',  # Assigned when the open is queued
+            'NID': order["nid"] if order["nid"] else 0,
+            'entry_time': '',
+            'client_id': order["client_id"]
+        }
+        account.positions[currency] = placeholder
+        if order["track"]:
+            Globals._CurrencyPositions_[currency] = placeholder
+        print(f"   ⏳ {order['verdict']} {order['pair']} opens once the close is confirmed")
+
+
+def _queue_news_order(order):
+    """
+    Create the trade record and enqueue the open command for one news order.
+    Books currency/pair counts and the S3 _CurrencyPositions_ entry.
+    
+    Args:
+        order: Order dict built by _size_order()
         
-        # Get the TID from the created trade
-        tid = trade_record.get("TID", "UNKNOWN")
-        
-        # Track NID execution count
-        if nid is not None:
-            nid_executed_counts[nid] = nid_executed_counts.get(nid, 0) + 1
-        
-        # Enqueue command for MT5 execution
-        try:
-            enqueue_command(
-                client_id,
-                state,
-                {
-                    "symbol": symbol,
-                    "volume": lot,
-                    "comment": comment,
-                    "tpPips": tp,
-                    "slPips": sl
-                }
-            )
-            
-            # Update currency count and pair count after successful enqueue
-            if symbol:
-                update_currency_count(symbol, "add")
-                # Increment pair count
-                if symbol in Globals._PairCount_:
-                    Globals._PairCount_[symbol] += 1
-            
-            # Track position in _CurrencyPositions_ for S3/S4 strategies
-            if currency:
-                # Store position info for reversal/locking logic
-                Globals._CurrencyPositions_[currency] = {
-                    'pair': symbol,
-                    'action': verdict,
-                    'ticket': 0,  # Will be updated when MT5 confirms (Packet C)
-                    'TID': tid,
-                    'NID': nid if nid else 0,
-                    'entry_time': ''  # Will be updated when MT5 confirms
-                }
-            
-            print(f"[News] ✅ Queued {verdict} for {pair_name} (TID={tid}, NID={nid})")
-            print(f"  ✓ {pair_name}: {lot} lots (TP={tp}, SL={sl})")
-            print(f"  📊 Currency counts: {Globals._CurrencyCount_}")
-            print(f"  📊 Pair counts: {Globals._PairCount_}")
-            trades_queued += 1
-            
-        except Exception as e:
-            print(f"[News] ❌ Failed to queue {pair_name}: {e}")
-        
-        # Reset system_news_event after processing this pair
-        Globals.system_news_event = False
+    Returns:
+        bool: True if the command was queued
+    """
+    client_id = order["client_id"]
+    pair_name = order["pair"]
+    symbol = order["symbol"]
+    verdict = order["verdict"]
+    lot, tp, sl = order["lot"], order["tp"], order["sl"]
+    nid = order["nid"]
+    currency = order["currency"]
+    
+    # Create trade record using TID system
+    # Type assertion: execute_news_trades() validated these exist
+    trade_record = create_trade(
+        client_id=str(client_id),
+        symbol=str(symbol),
+        action=verdict,
+        volume=float(lot),
+        tp=float(tp),
+        sl=float(sl),
+        comment=order["comment"],
+        nid=nid if nid else 0
+    )
     
-    # Update NID_Affect_Executed counts in _Currencies_
-    for nid, count in nid_executed_counts.items():
-        # Find the event with this NID
-        for event_key, event_data in Globals._Currencies_.items():
-            if event_data.get('NID') == nid:
-                Globals._Currencies_[event_key]['NID_Affect_Executed'] = count
-                print(f"\n  [NID_{nid}] Executed {count} trade(s)")
-                break
-    
-    # Clear verdict_GPT and _Affected_ to prevent infinite loop on subsequent heartbeats
-    for pair_name in Globals._Symbols_.keys():
-        if Globals._Symbols_[pair_name].get("verdict_GPT"):
-            Globals._Symbols_[pair_name]["verdict_GPT"] = ""
+    # Get the TID from the created trade
+    tid = trade_record.get("TID", "UNKNOWN")
+    LatencyTrace.mark("execute", nid=nid, tid=tid)
     
-    # Clear _Affected_ dictionary after execution completes
-    Globals._Affected_.clear()
+    # Enqueue command for MT5 execution
+    try:
+        enqueue_command(
+            client_id,
+            order["state"],
+            {
+                "symbol": symbol,
+                "volume": lot,
+                "comment": order["comment"],
+                "tpPips": tp,
+                "slPips": sl,
+                "tid": tid
+            }
+        )
+    except Exception as e:
+        print(f"[News] ❌ Failed to queue {pair_name}: {e}")
+        return False
     
-    if trades_queued > 0:
-        print(f"\n[STEP 7] ✅ Queued {trades_queued} trade(s)")
+    # Update currency count and pair count after successful enqueue
+    if symbol:
+        update_currency_count(symbol, "add", client_id=str(client_id))
+        # Increment pair count
+        if symbol in Globals._PairCount_:
+            Globals._PairCount_[symbol] += 1
+    
+    # Track position in _CurrencyPositions_ for S3/S4 strategies
+    # (one account per verdict tracks it, see _execute_locked) and in the
+    # account's own positions (closed by that account's S3 reversals)
+    if currency:
+        # Store position info for reversal/locking logic
+        position = {
+            'pair': symbol,
+            'action': verdict,
+            'ticket': 0,  # Will be updated when MT5 confirms (Packet C)
+            'TID': tid,
+            'NID': nid if nid else 0,
+            'entry_time': '',  # Will be updated when MT5 confirms
+            'client_id': str(client_id)
+        }
+        Accounts.get(client_id).positions[currency] = position
+        if order.get("track", True):
+            Globals._CurrencyPositions_[currency] = position
+    
+    print(f"[News] ✅ Queued {verdict} for {pair_name} (TID={tid}, NID={nid})")
+    print(f"  ✓ {pair_name}: {lot} lots (TP={tp}, SL={sl})")
+    print(f"  📊 Currency counts: {Globals._CurrencyCount_}")
+    print(f"  📊 Pair counts: {Globals._PairCount_}")
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CLOSE-THEN-ACT HANDLERS (S3 reversal, S5 conflict)
+# Run by PendingCloses when the EA confirms the closes (or they time out)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _finish_s3_reversal(action, confirmed):
+    """S3: the old position is closed - open the reversed one."""
+    order = action["then"]
+    if not order:
+        return
+    currency = order["currency"]
     
-    return trades_queued
+    if confirmed:
+        print(f"🔄 S3: {currency} close confirmed → opening {order['verdict']} {order['pair']}")
+    else:
+        # Same as before the state machine: the reversal proceeds regardless
+        print(f"⚠️  S3: {currency} close not confirmed → opening {order['verdict']} {order['pair']} anyway")
+    
+    if _queue_news_order(order):
+        event_key = order.get("event_key")
+        if order["nid"] is not None and event_key in Globals._Currencies_:
+            Globals._Currencies_[event_key]['NID_Affect_Executed'] += 1
+
+
+def _finish_s5_conflict(action, confirmed):
+    """S5: old positions are closed on every account - allow new positions for the currency."""
+    currency = action["then"].get("currency")
+    # The same conflict's actions for the other accounts, still waiting on their closes
+    others = [other for other in Globals._PendingCloses_.values()
+              if other is not action and other["kind"] == "S5" and other["then"].get("currency") == currency]
+    sentiment = Globals._CurrencySentiment_.get(currency)
+    if sentiment is None:
+        return
+    
+    if not confirmed or action["then"].get("unconfirmed"):
+        for other in others:
+            other["then"]["unconfirmed"] = True
+        print(f"   ⚠️  WARNING: {currency} closes not confirmed ({action['client_id']})")
+        print(f"   ⚠️  Keeping positions_opened={sentiment.get('positions_opened', 0)} until positions actually close")
+        return
+    if others:
+        print(f"   ✅ {currency} positions closed on {action['client_id']}, {len(others)} account(s) still closing")
+        return
+    
+    print(f"   ✅ All {currency} positions closed")
+    if sentiment.get('direction') == action["then"].get("direction"):
+        sentiment['positions_opened'] = 0
+        Journal.sync_sentiment()
+
+
+def _with_state_lock(handler):
+    """PendingCloses runs handlers from ACK request threads as well as from handle_news()."""
+    def run(action, confirmed):
+        with _STATE_LOCK:
+            handler(action, confirmed)
+    return run
+
+
+PendingCloses.HANDLERS["S3"] = _with_state_lock(_finish_s3_reversal)
+PendingCloses.HANDLERS["S5"] = _with_state_lock(_finish_s5_conflict)
+
+
+def _release_expired_open(cmd):
+    """Expired-open rollback from an account's poll thread, serialized with the news orders."""
+    with _STATE_LOCK:
+        Functions.release_expired_open(cmd)
+
+
+Functions.ON_OPEN_EXPIRED = _release_expired_open
 
 
 def handle_news(client_id, stats):
@@ -1673,6 +1807,13 @@ def handle_news(client_id, stats):
     Handle news trading mode logic for a client.
     Integrates all 7 steps of the News algorithm.
     
+    Heartbeats of one account run one at a time (account lock). Different
+    accounts run side by side. A heartbeat only kicks the event pipeline
+    (steps 1-6), which runs on a background thread, one run at a time - no
+    poll waits on its AI calls - and step 7 fans the pending verdicts out to
+    every attached account, at the end of the run or on whichever heartbeat
+    drains them first.
+    
     Args:
         client_id: The MT5 client ID
         stats: Dictionary containing client statistics including 'replies' count
@@ -1680,14 +1821,23 @@ def handle_news(client_id, stats):
     Returns:
         bool: True if a command was injected, False otherwise
     """
-    # Store client_id globally for S5 conflict handling
-    global _current_client_id
-    _current_client_id = client_id
-    
-    # ========== MARKET HOURS CHECK ==========
-    # Check if market is open (Sunday 6pm - Friday 3pm EST)
-    # Auto-closes positions on Friday 3pm, resets tracking on Sunday 6pm
-    market_open = check_market_hours(client_id)
+    account = Accounts.get(client_id)
+    with account.lock:
+        return _handle_news_locked(client_id, account, stats)
+
+
+def _handle_news_locked(client_id, account, stats):
+    with _STATE_LOCK:
+        # Resolve S3/S5 close-then-act actions the EA never confirmed
+        PendingCloses.expire(_clock())
+        
+        # Snapshot the state journal every JOURNAL_SNAPSHOT_EVERY records
+        Journal.tick()
+        
+        # ========== MARKET HOURS CHECK ==========
+        # Check if market is open (Sunday 6pm - Friday 3pm EST)
+        # Auto-closes positions on Friday 3pm, resets tracking on Sunday 6pm
+        market_open = check_market_hours(client_id)
     
     if not market_open:
         # Market is closed - skip all trading logic
@@ -1695,8 +1845,8 @@ def handle_news(client_id, stats):
             print(f"\n[MARKET CLOSED] Waiting for market to open (Sunday 6pm EST)")
         return False
     
-    # Check if weekly goal has been reached
-    if Globals.systemWeeklyGoalReached:
+    # Check if this account's weekly goal has been reached
+    if account.weekly_goal_reached:
         # Check if there are open positions that need to be closed
         open_positions = get_client_open(client_id)
         
@@ -1704,14 +1854,14 @@ def handle_news(client_id, stats):
             # Close all open positions
             if stats.get('replies', 0) % 10 == 0:  # Print every 10th request
                 print(f"\n[WEEKLY GOAL REACHED] Closing {len(open_positions)} open position(s)")
-                print(f"Target: ${Globals.systemEquityTarget:,.2f} | Current: ${Globals.systemEquity:,.2f}")
+                print(f"Target: ${account.equity_target:,.2f} | Current: ${account.equity:,.2f}")
             
             # Send close command for each open position
             for pos in open_positions:
                 symbol = pos.get('symbol', 'Unknown')
                 ticket = pos.get('ticket', 0)
                 
-                # Enqueue close command (state=3)
+                # Enqueue close command (state=3); repeats for the same ticket are dropped
                 enqueue_command(
                     client_id=client_id,
                     state=3,  # CLOSE command
@@ -1726,11 +1876,76 @@ def handle_news(client_id, stats):
         else:
             # No positions to close, just wait
             if stats.get('replies', 0) % 30 == 0:  # Print every 30th request to avoid spam
-                print(f"\n[WEEKLY GOAL REACHED] Trading stopped - Target: ${Globals.systemEquityTarget:,.2f} | Current: ${Globals.systemEquity:,.2f}")
+                print(f"\n[WEEKLY GOAL REACHED] Trading stopped - Target: ${account.equity_target:,.2f} | Current: ${account.equity:,.2f}")
             return False
     
-    # STEP 1: Initialize forecasts on first run
+    # STEPS 1-6 run in the background, one run at a time; the heartbeat goes straight to step 7
+    _kick_event_pipeline(client_id, stats)
+    
+    # STEP 7: Execute trades for all pairs with verdicts
+    # This happens every time handle_news is called (not just when event is ready)
+    # so that trades are executed even if multiple events update different pairs
+    trades_queued = execute_news_trades(client_id)
+    
+    # Return True if we queued any trades
+    return trades_queued > 0
+
+
+def _kick_event_pipeline(client_id, stats):
+    """
+    Start steps 1-6 on the background thread unless a run is still going.
+    Never waits for the run: the caller is an EA poll.
+    
+    Returns:
+        bool: True if a run was started
+    """
+    global _events_executor
+    if not _EVENTS_LOCK.acquire(blocking=False):
+        return False
+    try:
+        if _events_executor is None:
+            _events_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="NewsEvents")
+        future = _events_executor.submit(_run_events_in_background, client_id, dict(stats))
+    except BaseException:
+        _EVENTS_LOCK.release()
+        raise
+    _events_futures.add(future)
+    future.add_done_callback(_events_futures.discard)
+    return True
+
+
+def _run_events_in_background(client_id, stats):
+    """One pipeline run (background thread); its verdicts are queued right away."""
+    try:
+        _run_event_pipeline(client_id, stats)
+        if Globals._PendingVerdicts_:
+            execute_news_trades(client_id)
+    except Exception as e:
+        print(f"[EVENTS] ❌ Event pipeline failed: {e}")
+    finally:
+        _EVENTS_LOCK.release()
+
+
+def wait_events(timeout=None):
+    """Block until the running event pipeline is done (tests, shutdown)."""
+    _wait_futures(list(_events_futures), timeout=timeout)
+
+
+def _run_event_pipeline(client_id, stats):
+    """Steps 1-6: calendar, warm-up, ready events, fetch/affect/signals. Runs in the background, holding _EVENTS_LOCK."""
+    # Store client_id globally for S5 conflict handling
+    global _current_client_id
+    _current_client_id = client_id
+    
+    # STEP 1: Initialize forecasts on first run, then pick up calendar edits
     initialize_news_forecasts()
+    reload_calendar()
+    
+    # Prepare sized orders for slots releasing within WARMUP_LEAD_SECONDS
+    WarmUp.tick(_clock())
+    
+    # Fetch upcoming forecasts in the background, away from the releases
+    ForecastPrefetch.tick(_clock())
     
     # STEP 2: Monitor for events ready to process (returns list of all events at same time)
     events_to_process = monitor_news_events()
@@ -1787,12 +2002,3 @@ def handle_news(client_id, stats):
                     currency = event['currency']
                     event_name = event['event']
                     print(f"  - {currency}: {event_name}")
-    
-    # STEP 7: Execute trades for all pairs with verdicts
-    # This happens every time handle_news is called (not just when event is ready)
-    # so that trades are executed even if multiple events update different pairs
-    trades_queued = execute_news_trades(client_id)
-    
-    # Return True if we queued any trades
-    return trades_queued > 0
-
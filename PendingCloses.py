@@ -0,0 +1,166 @@
+"""
+PendingCloses.py
+Close-then-act state machines for S3 reversals and S5 conflict closes.
+
+Instead of sleeping in the request path until the EA has closed a position,
+the strategy queues the close command(s) and records what should happen next:
+
+    S3: "awaiting close of ticket X, then open Y"
+    S5: "awaiting close of all EUR positions, then reset positions_opened"
+
+An action advances as soon as every close it waits on is confirmed by one of:
+
+    /ack       → ack_command() for the close command (success or failure)
+    Packet A   → the ticket is no longer in the open list
+    Packet E   → the EA reports the ticket as closed
+
+Actions that see no confirmation within Globals.PENDING_CLOSE_TIMEOUT are
+resolved as unconfirmed by expire(), which News.handle_news() calls on every
+heartbeat. What "then" means is up to the strategy: News.py registers one
+handler per kind in HANDLERS.
+
+Confirmations arrive on the request threads of any account (/ack, Packet A/E)
+while News registers and expires actions on others: every entry point holds
+Globals.STATE_LOCK from reading an action to running its handler, and an
+action's handler runs once, by whichever thread removes it from the table.
+
+Usage:
+    PendingCloses.register("S3", "S3:EUR", client_id, {cmd["cmdId"]: ticket}, then={...})
+    PendingCloses.on_ack(client_id, cmd_id, success)     # from ack_command()
+    PendingCloses.expire(now)                             # every heartbeat
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import Globals
+
+
+# kind → handler(action, confirmed); confirmed is False after a timeout or a failed close
+HANDLERS: Dict[str, Callable[[dict, bool], None]] = {}
+
+
+def get(key: str) -> Optional[dict]:
+    """Pending action for a key, or None."""
+    return Globals._PendingCloses_.get(key)
+
+
+def register(kind: str, key: str, client_id: str, closes: Dict[str, int],
+             then: Optional[dict] = None, now: Optional[datetime] = None) -> dict:
+    """
+    Record an action that runs once the given closes are confirmed.
+
+    Registering an existing key adds the new closes to the ones it already
+    waits on and replaces its follow-up (e.g. a second S3 reversal of the same
+    currency before the first close came back).
+
+    Args:
+        kind: Handler name ("S3", "S5")
+        key: Action key, one pending action per key (e.g. "S3:EUR")
+        client_id: MT5 client the closes were queued for
+        closes: Close command id → ticket (0 if the ticket is not known yet)
+        then: Follow-up details passed to the handler
+        now: Registration time (default: datetime.now())
+
+    Returns:
+        dict: The pending action
+    """
+    with Globals.STATE_LOCK:
+        action = Globals._PendingCloses_.get(key)
+        if action is None:
+            action = {
+                "kind": kind,
+                "key": key,
+                "client_id": str(client_id),
+                "closes": {},
+                "failed": 0,
+                "created": now or datetime.now(),
+                "then": {},
+            }
+            Globals._PendingCloses_[key] = action
+        action["closes"].update(closes)
+        action["then"] = then or {}
+
+        if not action["closes"]:
+            _complete(action, True)
+        return action
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIRMATIONS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _confirm(client_id: str, match: Callable[[str, int], bool], success: bool = True) -> None:
+    client_id = str(client_id)
+    for action in list(Globals._PendingCloses_.values()):
+        # Skip actions a handler earlier in this loop completed or replaced
+        if action["client_id"] != client_id or Globals._PendingCloses_.get(action["key"]) is not action:
+            continue
+        done = [cmd_id for cmd_id, ticket in action["closes"].items() if match(cmd_id, ticket)]
+        if not done:
+            continue
+        for cmd_id in done:
+            del action["closes"][cmd_id]
+        if not success:
+            action["failed"] += len(done)
+        if not action["closes"]:
+            _complete(action, action["failed"] == 0)
+
+
+def on_ack(client_id: str, cmd_id: str, success: bool) -> None:
+    """/ack for a close command (called by Functions.ack_command)."""
+    with Globals.STATE_LOCK:
+        if Globals._PendingCloses_:
+            _confirm(client_id, lambda c, t: c == cmd_id, success)
+
+
+def on_positions(client_id: str, open_list: List[dict]) -> None:
+    """Packet A open list: closes whose ticket is no longer open are confirmed."""
+    open_tickets = {pos.get("ticket") for pos in open_list or []}
+    with Globals.STATE_LOCK:
+        if Globals._PendingCloses_:
+            _confirm(client_id, lambda c, t: bool(t) and t not in open_tickets)
+
+
+def on_closed(client_id: str, ticket: int) -> None:
+    """Packet E close report for a ticket."""
+    if not ticket:
+        return
+    with Globals.STATE_LOCK:
+        if Globals._PendingCloses_:
+            _confirm(client_id, lambda c, t: t == ticket)
+
+
+def expire(now: Optional[datetime] = None) -> int:
+    """
+    Resolve actions that have waited longer than PENDING_CLOSE_TIMEOUT.
+
+    Returns:
+        int: Number of actions resolved as unconfirmed
+    """
+    now = now or datetime.now()
+    timeout = getattr(Globals, "PENDING_CLOSE_TIMEOUT", 10)
+    resolved = 0
+    with Globals.STATE_LOCK:
+        expired = [a for a in Globals._PendingCloses_.values()
+                   if (now - a["created"]).total_seconds() >= timeout]
+        for action in expired:
+            if Globals._PendingCloses_.get(action["key"]) is not action:
+                continue   # completed by an earlier handler in this loop
+            print(f"[PENDING CLOSE] ⚠️  {action['key']}: {len(action['closes'])} close(s) unconfirmed after {timeout}s")
+            resolved += _complete(action, False)
+    return resolved
+
+
+def _complete(action: dict, confirmed: bool) -> bool:
+    """Run the action's handler, unless another confirmation already did (caller holds STATE_LOCK)."""
+    # Remove first so a handler can register a new action under the same key
+    if Globals._PendingCloses_.get(action["key"]) is not action:
+        return False
+    del Globals._PendingCloses_[action["key"]]
+    handler = HANDLERS.get(action["kind"])
+    if handler is None:
+        print(f"[PENDING CLOSE] ⚠️  No handler for {action['kind']} ({action['key']})")
+        return True
+    handler(action, confirmed)
+    return True
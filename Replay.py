@@ -0,0 +1,363 @@
+"""
+Replay.py
+Replay engine for received_log.jsonl.
+
+Streams every logged EA packet (and rotated segments such as received_log.jsonl.1,
+received_log.jsonl.2.gz) back into the server, either:
+- in-process: straight into Functions.ingest_payload() (+ save_news_dictionaries()
+  like Server.py does after every POST), or
+- over HTTP: POST / against a running Server.py.
+
+Pacing follows the server timestamps ("ts") recorded by append_log():
+real time (--speed 1), N× faster (--speed N) or flat out (--speed 0).
+
+After the run it reports per-packet timing and can check the resulting
+_dictionaries/ CSVs against an expected snapshot (timestamp column ignored).
+
+Usage:
+    python Replay.py received_log.jsonl --speed 0
+    python Replay.py received_log.jsonl --speed 10 --url http://127.0.0.1:5000
+    python Replay.py received_log.jsonl --save-expected golden/       # Record a baseline
+    python Replay.py received_log.jsonl --expect golden/              # Regression check
+    python Replay.py received_log.jsonl --profile                     # cProfile the hot path
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import gzip
+import http.client
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import LatencyTrace
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOG READING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def find_segments(path: str) -> List[str]:
+    """
+    Return the log file and its rotated segments, oldest first.
+
+    Rotated segments use numeric suffixes where a higher number is older
+    (received_log.jsonl.2 → .1 → received_log.jsonl). Gzipped segments are supported.
+    """
+    rotated = []
+    for candidate in glob.glob(glob.escape(path) + ".*"):
+        match = re.search(r"\.(\d+)(\.gz)?$", candidate)
+        if match:
+            rotated.append((int(match.group(1)), candidate))
+    segments = [p for _, p in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        segments.append(path)
+    return segments
+
+
+def _open_segment(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_entries(segments: List[str]) -> Iterator[Tuple[Optional[float], dict]]:
+    """
+    Stream (server_epoch, payload) pairs from the given segments.
+    The "ts" field added by append_log() is stripped from the payload.
+    Malformed lines are skipped.
+    """
+    for segment in segments:
+        with _open_segment(segment) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                ts = entry.pop("ts", None)
+                epoch = None
+                if ts:
+                    try:
+                        epoch = datetime.fromisoformat(ts).timestamp()
+                    except ValueError:
+                        epoch = None
+                yield epoch, entry
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SINKS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class InProcessSink:
+    """Feeds packets into ingest_payload() in this process, as Server.do_POST would."""
+
+    def __init__(self, workdir: str, save_dictionaries: bool = True):
+        import Functions
+        from save_news_dictionaries import save_news_dictionaries
+
+        self.workdir = workdir
+        self.save_dictionaries = save_dictionaries
+        self._ingest = Functions.ingest_payload
+        self._save = save_news_dictionaries
+
+        # Never append replayed packets to the log being replayed
+        Functions.LOG_FILE = os.path.join(workdir, "replayed_log.jsonl")
+
+    def send(self, payload: dict) -> bool:
+        self._ingest(payload)
+        if self.save_dictionaries:
+            self._save()
+        return True
+
+
+class HttpSink:
+    """POSTs packets to a running Server.py."""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+
+    def send(self, payload: dict) -> bool:
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            conn.request("POST", "/", body=json.dumps(payload).encode("utf-8"),
+                         headers={"Content-Type": "application/json", "Connection": "close"})
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            return resp.status == 200
+        except Exception:
+            return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# REPLAY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def replay(segments: List[str], sink, speed: float = 0.0, limit: int = 0) -> dict:
+    """
+    Replay logged packets into a sink.
+
+    Args:
+        segments: Log files oldest first (see find_segments)
+        sink: InProcessSink or HttpSink
+        speed: 1.0 = real time, N = N× faster, 0 = as fast as possible
+        limit: Stop after this many packets (0 = all)
+
+    Returns:
+        dict: Timing summary (per packet type and overall)
+    """
+    samples: Dict[str, List[float]] = {}
+    errors = 0
+    count = 0
+    max_lag = 0.0
+
+    first_ts = None
+    wall_start = time.perf_counter()
+
+    for ts, payload in iter_entries(segments):
+        if limit and count >= limit:
+            break
+
+        # Pace by recorded server time
+        if speed > 0 and ts is not None:
+            if first_ts is None:
+                first_ts = ts
+            target = wall_start + (ts - first_ts) / speed
+            now = time.perf_counter()
+            if target > now:
+                time.sleep(target - now)
+            else:
+                max_lag = max(max_lag, now - target)
+
+        packet_type = payload.get("packetType", "A")
+        start = time.perf_counter()
+        try:
+            ok = sink.send(payload)
+        except Exception:
+            ok = False
+        samples.setdefault(packet_type, []).append(time.perf_counter() - start)
+        if not ok:
+            errors += 1
+        count += 1
+
+    elapsed = time.perf_counter() - wall_start
+    all_samples = [v for values in samples.values() for v in values]
+
+    def _stats(values):
+        return {
+            "count": len(values),
+            "p50_ms": LatencyTrace.percentile(values, 50) * 1000.0,
+            "p90_ms": LatencyTrace.percentile(values, 90) * 1000.0,
+            "p99_ms": LatencyTrace.percentile(values, 99) * 1000.0,
+            "max_ms": max(values) * 1000.0 if values else 0.0,
+        }
+
+    return {
+        "packets": count,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "packets_per_s": count / elapsed if elapsed else 0.0,
+        "max_lag_s": max_lag,
+        "overall": _stats(all_samples),
+        "by_type": {t: _stats(v) for t, v in sorted(samples.items())},
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# _dictionaries/ CHECK
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Columns that legitimately differ between runs
+IGNORED_COLUMNS = {"timestamp"}
+
+
+def _read_csv_rows(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [{k: v for k, v in row.items() if k not in IGNORED_COLUMNS} for row in csv.DictReader(f)]
+
+
+def compare_dictionaries(actual_dir: str, expected_dir: str) -> List[str]:
+    """
+    Compare the CSV files of two _dictionaries/ folders.
+
+    Returns:
+        list: Human-readable differences (empty when the states match)
+    """
+    differences = []
+    expected_files = sorted(f for f in os.listdir(expected_dir) if f.endswith(".csv"))
+    for name in expected_files:
+        actual_path = os.path.join(actual_dir, name)
+        if not os.path.exists(actual_path):
+            differences.append(f"{name}: missing")
+            continue
+        expected_rows = _read_csv_rows(os.path.join(expected_dir, name))
+        actual_rows = _read_csv_rows(actual_path)
+        if len(expected_rows) != len(actual_rows):
+            differences.append(f"{name}: {len(actual_rows)} row(s), expected {len(expected_rows)}")
+            continue
+        for idx, (a, e) in enumerate(zip(actual_rows, expected_rows), 1):
+            if a != e:
+                changed = sorted(k for k in set(a) | set(e) if a.get(k) != e.get(k))
+                differences.append(f"{name}: row {idx} differs in {', '.join(changed)}")
+                break
+    return differences
+
+
+def print_report(result: dict, segments: List[str]) -> None:
+    print("=" * 70)
+    print("RECEIVED LOG REPLAY")
+    print("=" * 70)
+    print(f"Segments: {len(segments)} | Packets: {result['packets']} | Errors: {result['errors']}")
+    print(f"Elapsed: {result['elapsed_s']:.2f}s | Rate: {result['packets_per_s']:.1f} packets/s | "
+          f"Max lag behind schedule: {result['max_lag_s']:.3f}s")
+    print("-" * 70)
+    print(f"{'Packet':<8} {'Count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 70)
+    rows = list(result["by_type"].items()) + [("ALL", result["overall"])]
+    for name, s in rows:
+        print(f"{name:<8} {s['count']:>7} {s['p50_ms']:>9.3f} {s['p90_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+    print("=" * 70)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay received_log.jsonl into the server")
+    parser.add_argument("log", nargs="?", default="received_log.jsonl", help="Log file (rotated segments are picked up automatically)")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, N = N× faster, 0 = flat out (default: 0)")
+    parser.add_argument("--url", default=None, help="Replay over HTTP against a running Server.py")
+    parser.add_argument("--workdir", default=None, help="In-process output folder (default: temp dir)")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after N packets (default: all)")
+    parser.add_argument("--no-save", action="store_true", help="In-process: skip save_news_dictionaries() per packet")
+    parser.add_argument("--verbose", action="store_true", help="In-process: show server output")
+    parser.add_argument("--strategy", type=int, default=None, help="Apply a strategy preset before replaying")
+    parser.add_argument("--actual", default=None, help="HTTP mode: server's _dictionaries/ folder to check")
+    parser.add_argument("--expect", default=None, help="Expected _dictionaries/ snapshot to compare against")
+    parser.add_argument("--save-expected", default=None, help="Copy the resulting _dictionaries/ here as a baseline")
+    parser.add_argument("--profile", action="store_true", help="In-process: print a cProfile of the replay")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    log_path = os.path.abspath(args.log)
+    segments = find_segments(log_path)
+    if not segments:
+        print(f"No log segments found for {log_path}")
+        return 1
+
+    profiler = None
+    previous_cwd = os.getcwd()
+
+    if args.url:
+        sink = HttpSink(args.url)
+        dictionaries_dir = os.path.abspath(args.actual) if args.actual else None
+    else:
+        workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="news_replay_"))
+        os.makedirs(workdir, exist_ok=True)
+        # save_news_dictionaries() and write_trade_to_csv() write relative to the cwd
+        os.chdir(workdir)
+        dictionaries_dir = os.path.join(workdir, "_dictionaries")
+        if args.strategy is not None:
+            import StrategyPresets
+            StrategyPresets.apply_strategy_preset(args.strategy, verbose=False)
+        sink = InProcessSink(workdir, save_dictionaries=not args.no_save)
+        if args.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+
+    try:
+        output = contextlib.nullcontext() if (args.url or args.verbose) else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            if profiler:
+                profiler.enable()
+            result = replay(segments, sink, speed=args.speed, limit=args.limit)
+            if profiler:
+                profiler.disable()
+    finally:
+        os.chdir(previous_cwd)
+
+    print_report(result, segments)
+
+    if profiler:
+        import pstats
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+    status = 0
+    if dictionaries_dir:
+        print(f"Resulting state: {dictionaries_dir}")
+        if args.save_expected:
+            shutil.copytree(dictionaries_dir, args.save_expected, dirs_exist_ok=True)
+            print(f"Saved baseline to {args.save_expected}")
+        if args.expect:
+            differences = compare_dictionaries(dictionaries_dir, args.expect)
+            if differences:
+                print(f"❌ _dictionaries/ differs from {args.expect}:")
+                for diff in differences:
+                    print(f"  - {diff}")
+                status = 1
+            else:
+                print(f"✅ _dictionaries/ matches {args.expect}")
+    elif args.expect:
+        print("⚠️  Pass --actual <server _dictionaries/> to check state in HTTP mode")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+RetryPolicy.py
+When to ask again for an actual value that is not released yet.
+
+fetch_actual_value() used to wait a fixed 120 s after a FALSE answer and stop
+after 2 attempts, while MyFxBook usually publishes 5-30 s after release: the
+retry came after the move, or not at all. Retries are now scheduled as:
+
+- Fast polling first: RETRY_INITIAL_DELAY, growing by RETRY_BACKOFF up to
+  RETRY_MAX_DELAY, for at most RETRY_MAX_ATTEMPTS attempts and never past the
+  event's trading window (AI_EVENT_WINDOW after release).
+- Learned per event category (News.categorize_event): the seconds from release
+  to a successful fetch are kept in _AvailabilityStats_ (state store). Once a
+  category has RETRY_MIN_SAMPLES, the next retry aims at the next of its
+  RETRY_TARGET_PERCENTILES instead of polling blindly.
+- Budget: no retry once the event's AI call reservation and the shared pool
+  are used up (AIBudget).
+
+A retry is only a retry_after on the event record; monitor_news_events()
+picks it up when it is due, so a pending retry never holds up other events.
+
+Usage:
+    retry_at, reason = RetryPolicy.next_attempt(event, now)   # retry_at None = give up
+    RetryPolicy.record_availability(event, now)                # after a successful fetch
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import AIBudget
+import Globals
+import LatencyTrace
+
+
+def _category(event) -> str:
+    from News import categorize_event
+
+    return categorize_event(event.get('event') or "")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LEARNED AVAILABILITY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def record_availability(event, now: datetime) -> None:
+    """Remember how long after release this event's data could be fetched."""
+    event_time = event.get('event_time')
+    if event_time is None or now < event_time:
+        return
+    samples = Globals._AvailabilityStats_.setdefault(_category(event), [])
+    samples.append(round((now - event_time).total_seconds(), 1))
+    del samples[:-Globals.RETRY_HISTORY]
+
+
+def learned_targets(category: str) -> List[float]:
+    """Seconds after release worth retrying at for a category (empty until RETRY_MIN_SAMPLES)."""
+    samples = Globals._AvailabilityStats_.get(category, [])
+    if len(samples) < Globals.RETRY_MIN_SAMPLES:
+        return []
+    return sorted(LatencyTrace.percentile(samples, pct) for pct in Globals.RETRY_TARGET_PERCENTILES)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SCHEDULE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def first_attempt_at(event) -> datetime:
+    """The first fetch waits EVENT_TRIGGER_DELAY after release for MyFxBook to publish."""
+    return event.get('event_time') + timedelta(seconds=Globals.EVENT_TRIGGER_DELAY)
+
+
+def next_attempt(event, now: datetime) -> Tuple[Optional[datetime], str]:
+    """
+    When to fetch again after a failed attempt (retry_count already counts it).
+
+    Args:
+        event: The event record
+        now: Current time (News._clock())
+
+    Returns:
+        (retry time or None to give up, reason)
+    """
+    attempts = event.get('retry_count', 0)
+    if attempts >= Globals.RETRY_MAX_ATTEMPTS:
+        return None, f"{attempts}/{Globals.RETRY_MAX_ATTEMPTS} attempts used"
+
+    if not AIBudget.can_spend(event.get('key')):
+        return None, "AI call budget for this event used up"
+
+    delay = min(Globals.RETRY_MAX_DELAY, Globals.RETRY_INITIAL_DELAY * Globals.RETRY_BACKOFF ** (attempts - 1))
+    retry_at, reason = now + timedelta(seconds=delay), "backoff"
+
+    # Aim at the next point this category's data has usually been available by
+    event_time = event.get('event_time')
+    if event_time is not None:
+        elapsed = (now - event_time).total_seconds()
+        category = _category(event)
+        for target in learned_targets(category):
+            if target > elapsed:
+                wait = min(max(target - elapsed, Globals.RETRY_INITIAL_DELAY), Globals.RETRY_MAX_DELAY)
+                retry_at, reason = now + timedelta(seconds=wait), f"learned {category} {target:.0f}s"
+                break
+
+        if Globals.AI_EVENT_WINDOW and retry_at > event_time + timedelta(seconds=Globals.AI_EVENT_WINDOW):
+            return None, f"trading window ({Globals.AI_EVENT_WINDOW}s after release) ends first"
+
+    return retry_at, reason
@@ -13,8 +13,10 @@ In MetaTrader 5, add this URL to:
 """
 
 # Check and install required packages before importing anything else
+# (not again in --workers processes, which re-import this module as __mp_main__)
 import check_packages
-check_packages.check_and_install_packages()
+if __name__ != "__mp_main__":
+    check_packages.check_and_install_packages()
 
 import argparse
 import os
@@ -22,8 +24,10 @@ import json
 import sys
 import importlib
 import re
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Tuple
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from typing import Optional, Tuple
 from datetime import datetime
 import Globals
 import Functions
@@ -38,12 +42,20 @@ from Functions import (
     enqueue_command,
     ack_command,
     process_ack_response,
+    process_batch_ack,
+    STATE_BATCH,
     get_client_mode,
     get_client_stats,
     is_client_online,
     display_idle_screen,
 )
 from save_news_dictionaries import save_news_dictionaries
+import StateStore
+import Journal
+import Accounts
+import Broker
+import AIGateway
+import AIBudget
 import subprocess
 
 
@@ -57,6 +69,7 @@ class TeeOutput:
     """
     def __init__(self, outputs_dir):
         self.terminal = sys.stdout
+        self.lock = threading.RLock()  # one request thread writes (and rotates) at a time
         self.outputs_dir = outputs_dir
         self.log = None
         self.current_20min_slot = None
@@ -191,22 +204,24 @@ class TeeOutput:
         self.log.flush()
     
     def write(self, message):
-        # Check if 20-minute slot has changed
-        now = datetime.now()
-        current_slot = self._get_20min_slot(now)
-        
-        if current_slot != self.current_20min_slot or now.hour != self.current_hour_slot:
-            self._rotate_log()
-        
-        self.terminal.write(message)
-        if self.log:
-            self.log.write(message)
-            self.log.flush()  # Ensure immediate write to file
+        with self.lock:
+            # Check if 20-minute slot has changed
+            now = datetime.now()
+            current_slot = self._get_20min_slot(now)
+            
+            if current_slot != self.current_20min_slot or now.hour != self.current_hour_slot:
+                self._rotate_log()
+            
+            self.terminal.write(message)
+            if self.log:
+                self.log.write(message)
+                self.log.flush()  # Ensure immediate write to file
     
     def flush(self):
-        self.terminal.flush()
-        if self.log:
-            self.log.flush()
+        with self.lock:
+            self.terminal.flush()
+            if self.log:
+                self.log.flush()
     
     def close(self):
         if hasattr(self, 'log') and self.log:
@@ -224,6 +239,316 @@ def camel_to_snake(name: str) -> str:
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
 
 
+def serve_command(client_id: str, batch: bool) -> dict:
+    """Reply to one /command/<id> poll (caller holds the account lock)."""
+    msg = get_next_command(client_id, batch=batch)
+    # Record delivery stats based on current planned state
+    int_state = 0
+    if "state" in msg:
+        try:
+            int_state = int(msg.get("state", 0))
+        except Exception:
+            int_state = 0
+    stats = record_command_delivery(client_id, int_state)
+
+    # Dynamic Algorithm Routing: Load and execute selected mode
+    try:
+        selected_mode = getattr(Globals, "ModeSelect", None)
+        modes_list = getattr(Globals, "ModesList", [])
+
+        if selected_mode and selected_mode in modes_list:
+            # Dynamically import the selected algorithm module
+            algorithm_module = importlib.import_module(selected_mode)
+
+            # Call the algorithm's handler function
+            # Convention: handle_<snake_case_name> e.g., TestingMode -> handle_testing_mode
+            handler_name = f"handle_{camel_to_snake(selected_mode)}"
+            if hasattr(algorithm_module, handler_name):
+                handler_func = getattr(algorithm_module, handler_name)
+                injected = handler_func(client_id, stats)
+                if injected:
+                    print(f"Server: INJECTED command for Client: [{client_id}] ({selected_mode})")
+                    # Save dictionaries after algorithm execution
+                    save_news_dictionaries()
+                    # Refresh command if one was injected and current state is 0
+                    if int(msg.get("state", 0)) == 0:
+                        msg = get_next_command(client_id, batch=batch)
+            else:
+                print(f"Warning: Algorithm '{selected_mode}' does not have '{handler_name}' function")
+        elif selected_mode and selected_mode not in modes_list:
+            print(f"Warning: Selected mode '{selected_mode}' not in ModesList")
+    except Exception as e:
+        print(f"Error loading algorithm: {e}")
+        pass
+
+    # Build a list of MetaTrader clients and print status
+    eff_state = 0
+    try:
+        eff_state = int(msg.get("state", 0))
+    except Exception:
+        eff_state = 0
+    try:
+        # Include the currently polling client even if it hasn't posted a snapshot yet
+        all_ids = sorted(set(list_clients()) | {str(client_id)})
+        for cid in all_ids:
+            # Determine platform prefix
+            mode_label = get_client_mode(cid)
+            prefix = "Metatrader -"
+            # Open count
+            try:
+                oc = len(get_client_open(cid))
+            except Exception:
+                oc = 0
+            # Last action for that client
+            try:
+                la = int(get_client_stats(cid).get("last_action", 0))
+            except Exception:
+                la = 0
+            # State logic: MetaTrader always Online
+            state_str = "Online"
+            # Colorize State text: green for Online
+            color = "\x1b[32m"
+            reset = "\x1b[0m"
+            try:
+                show = bool(getattr(Globals, "PRINT_STATUS_LINES", False))
+            except Exception:
+                show = False
+            if show:
+                sys.stdout.write(f"{prefix} {color}State {state_str}{reset} ID={cid} Open={oc} LastAction={la} Replies={stats['replies']}\n")
+    except Exception:
+        pass
+    # New concise view: main MT5 account
+    try:
+        main_id = str(getattr(Globals, "MAIN_MT5_ACCOUNT", ""))
+    except Exception:
+        main_id = ""
+    try:
+        if main_id:
+            main_open = get_client_open(main_id)
+            sys.stdout.write(f"Trades on main account : {len(main_open)}\n")
+            for p in main_open:
+                try:
+                    side = "BUY" if int(p.get("type", 0)) == 0 else "SELL"
+                except Exception:
+                    side = str(p.get("type"))
+                entry = p.get("openPrice", None)
+                if entry is None:
+                    entry = p.get("price")
+                vol = p.get("volume")
+                tpv = p.get("tp")
+                slv = p.get("sl")
+                sys.stdout.write(f"  Type\n    {side}\n")
+                sys.stdout.write(f"  Entry\n    {entry}\n")
+                sys.stdout.write(f"  Volume\n    {vol}\n")
+                if vol is not None:
+                    try:
+                        sys.stdout.write(f"  size\n    {int(vol)}\n")
+                    except Exception:
+                        pass
+                sys.stdout.write(f"  TP\n    {tpv}\n")
+                sys.stdout.write(f"  SL\n    {slv}\n")
+    except Exception:
+        pass
+    # Optional: print each open trade's entry, TP, and SL (diagnostic)
+    try:
+        def _truthy(v):
+            return str(v).strip().lower() in ("1", "true", "yes", "on")
+        dbg_env = os.environ.get("NEWS_ANALYZER_PRINT_OPEN_DETAILS", "")
+        dbg_glob = getattr(Globals, "PRINT_OPEN_DETAILS", "")
+        if _truthy(dbg_env) or _truthy(dbg_glob):
+            # MT5 client open details
+            opens = get_client_open(client_id)
+            for pos in opens:
+                sym = pos.get("symbol")
+                tkt = pos.get("ticket")
+                entry = pos.get("openPrice", None)
+                if entry is None:
+                    entry = pos.get("price")
+                tpv = pos.get("tp")
+                slv = pos.get("sl")
+                sys.stdout.write(f"[{now_iso()}] OPEN {sym} ticket={tkt} entry={entry} TP={tpv} SL={slv}\n")
+    except Exception:
+        pass
+    # If this is an open order command, also print a single summary line
+    if eff_state in (1,2):
+        side = "BUY" if eff_state==1 else "SELL"
+        sym = msg.get("symbol")
+        vol = msg.get("volume")
+        tp = msg.get("tp") if "tp" in msg else msg.get("tpPips")
+        sl = msg.get("sl") if "sl" in msg else msg.get("slPips")
+        print(f"Server: Sending {side} command to Client: [{client_id}] - {sym} Vol={vol} TP={tp} SL={sl}")
+    elif eff_state == 3:
+        print(f"Server: Sending CLOSE command to Client: [{client_id}]")
+    elif eff_state == STATE_BATCH:
+        symbols = ", ".join(str(o.get("symbol")) for o in msg.get("orders", []))
+        print(f"Server: Sending BATCH of {msg.get('count', 0)} orders to Client: [{client_id}] - {symbols}")
+    return msg
+
+
+def route_get(path: str) -> Tuple[int, dict]:
+    """Status code and JSON reply for a GET request."""
+    # Simple health check
+    if path in ("/", "/health", "/status"):
+        return 200, {"status": "ok", "ts": now_iso()}
+
+    # Back-compat message
+    if path == "/message":
+        return 200, {"message": getattr(Globals, "test_message", "")}
+
+    # EA polls next command: /command/<id>[?batch=1]
+    if path.startswith("/command/"):
+        url = urlsplit(path)
+        parts = [p for p in url.path.split("/") if p]
+        # batch=1: the EA executes state-4 batches (all pending orders in one reply)
+        batch = parse_qs(url.query).get("batch", ["0"])[0] == "1"
+        if len(parts) == 2:
+            client_id = parts[1]
+            # One poll per account at a time; other accounts are served concurrently
+            with Accounts.get(client_id).lock:
+                return 200, serve_command(client_id, batch)
+        return 400, {"error": "bad_path"}
+
+    # Client views
+    if path.startswith("/clients"):
+        parts = [p for p in path.split("/") if p]
+        if len(parts) == 1:  # /clients
+            return 200, {"clients": list_clients()}
+        if len(parts) >= 2:
+            client_id = parts[1]
+            if len(parts) == 3 and parts[2] == "open":
+                return 200, {"id": client_id, "open": get_client_open(client_id)}
+            if len(parts) == 3 and parts[2] == "closed_online":
+                return 200, {"id": client_id, "closed_online": get_client_closed_online(client_id)}
+            # default: client summary
+            return 200, {
+                "id": client_id,
+                "open_count": len(get_client_open(client_id)),
+                "closed_online_count": len(get_client_closed_online(client_id)),
+            }
+
+    # Actual-value race: win rate and latency per backend
+    if path == "/ai/race":
+        stats = AIGateway.race_stats()
+        AIGateway.print_race_report(stats)
+        return 200, {"backends": stats}
+
+    # AI call budget: today's usage, shared pool, reservations per event
+    if path == "/ai/budget":
+        return 200, AIBudget.metrics()
+
+    # Not found
+    return 404, {"status": "not_found"}
+
+
+def route_post(path: str, data: dict) -> Tuple[int, dict]:
+    """Status code and JSON reply for a POST request (body already parsed)."""
+    # Routes: payload ingest or command enqueue/ack
+    if path == "/":
+        # Process and store per-client snapshots
+        summary, identity = ingest_payload(data)
+
+        # Get symbols currently open on this account
+        symbols_open = Accounts.get(identity.get("id")).symbols_open
+        symbols_str = ", ".join(symbols_open) if symbols_open else "None"
+
+        # Display idle screen in live mode, or print details in debug mode
+        if Globals.liveMode:
+            display_idle_screen(
+                client_id=str(identity.get('id')),
+                open_count=summary.get('open', 0),
+                closed_count=summary.get('closed_online', 0)
+            )
+        else:
+            # Print incoming communication from MT5 (debug mode only)
+            print(f"Client: [{identity.get('id')}] - Sent snapshot with {summary.get('open')} open, {summary.get('closed_online')} closed online")
+            print(f"  Symbols Currently Open: [{symbols_str}]")
+
+        # Save news dictionaries snapshot to file (overwrites previous)
+        save_news_dictionaries()
+
+        return 200, {"status": "ok", "received": summary, **identity}
+
+    if path.startswith("/command/"):
+        # Enqueue a command to a client: POST /command/<id>
+        parts = [p for p in path.split("/") if p]
+        if len(parts) == 2:
+            client_id = parts[1]
+            # Expect { state: 0|1|2|3, payload?: {...} }
+            state = int(data.get("state", 0))
+            payload = data.get("payload") or {}
+            cmd = enqueue_command(client_id, state, payload)
+            return 200, {"status": "queued", "command": cmd}
+        return 400, {"error": "bad_path"}
+
+    if path.startswith("/ack/"):
+        # EA acknowledges a command: POST /ack/<id>
+        parts = [p for p in path.split("/") if p]
+        if len(parts) == 2:
+            client_id = parts[1]
+
+            # Batch ACK: {"acks": [{cmdId, success, details}, ...]} - one entry per order
+            if "acks" in data:
+                results = process_batch_ack(client_id, data.get("acks"))
+                for ack_result in results:
+                    trade_info = ack_result.get("trade_info", {})
+                    print(f"Client: [{trade_info['client_id']}] - ACK cmdId={trade_info['cmd_id']} success={trade_info['success']} "
+                          f"Symbol={trade_info['symbol']} Type={trade_info['type']} Vol={trade_info['volume']} "
+                          f"Price={trade_info['price']} TP={trade_info['tp']} SL={trade_info['sl']}")
+                return 200, {"ok": True, "results": [r["result"] for r in results]}
+
+            cmd_id = data.get("cmdId")
+            success = bool(data.get("success", False))
+            details = data.get("details") or {}
+
+            # Process ACK through Functions.py
+            ack_result = process_ack_response(client_id, cmd_id, success, details)
+
+            # Log trade info
+            trade_info = ack_result.get("trade_info", {})
+            print(f"Client: [{trade_info['client_id']}] - ACK cmdId={cmd_id} success={trade_info['success']} "
+                  f"Symbol={trade_info['symbol']} Type={trade_info['type']} Vol={trade_info['volume']} "
+                  f"Price={trade_info['price']} TP={trade_info['tp']} SL={trade_info['sl']}")
+
+            return 200, ack_result["result"]
+        return 400, {"error": "bad_path"}
+
+    if path == "/trade_outcome":
+        # EA reports trade closure: POST /trade_outcome
+        # Expected payload: { ticket: 12345, outcome: "TP" | "SL" }
+        # Uses ticket number to match the trade and update NID counters
+        from Functions import update_trade_outcome_by_ticket
+
+        ticket = data.get("ticket")
+        outcome = data.get("outcome")
+
+        if not ticket or outcome not in ["TP", "SL"]:
+            return 400, {"error": "invalid_payload", "expected": {"ticket": "int", "outcome": "TP|SL"}}
+
+        result = update_trade_outcome_by_ticket(ticket, outcome)
+
+        if result.get("ok"):
+            tid = result.get('TID')
+            nid = result.get('NID')
+            symbol = result.get('symbol')
+            print(f"Server: Trade {tid} ({symbol}, Ticket: {ticket}) closed at {outcome} (NID_{nid})")
+            return 200, result
+        return 400, result
+
+    # Default: unknown POST route
+    return 404, {"status": "not_found"}
+
+
+def route_request(method: str, path: str, data: Optional[dict] = None) -> Tuple[int, dict]:
+    """
+    Status code and JSON reply for one request.
+    Worker processes (--workers, see Broker.py) forward their requests here,
+    so all state is read and changed in this process.
+    """
+    if method == "GET":
+        return route_get(path)
+    return route_post(path, data)
+
+
 class NewsAnalyzerRequestHandler(BaseHTTPRequestHandler):
     server_version = "NewsAnalyzerHTTP/1.0"
 
@@ -238,188 +563,7 @@ class NewsAnalyzerRequestHandler(BaseHTTPRequestHandler):
         self.wfile.write(json.dumps(payload).encode("utf-8"))
 
     def do_GET(self) -> None:  # noqa: N802
-        # Simple health check
-        if self.path in ("/", "/health", "/status"):
-            self._send_json(200, {"status": "ok", "ts": now_iso()})
-            return
-
-        # Back-compat message
-        if self.path == "/message":
-            self._send_json(200, {"message": getattr(Globals, "test_message", "")})
-            return
-
-        # EA polls next command: /command/<id>
-        if self.path.startswith("/command/"):
-            parts = [p for p in self.path.split("/") if p]
-            if len(parts) == 2:
-                client_id = parts[1]
-                msg = get_next_command(client_id)
-                # Record delivery stats based on current planned state
-                int_state = 0
-                if "state" in msg:
-                    try:
-                        int_state = int(msg.get("state", 0))
-                    except Exception:
-                        int_state = 0
-                stats = record_command_delivery(client_id, int_state)
-                
-                # Dynamic Algorithm Routing: Load and execute selected mode
-                try:
-                    selected_mode = getattr(Globals, "ModeSelect", None)
-                    modes_list = getattr(Globals, "ModesList", [])
-                    
-                    if selected_mode and selected_mode in modes_list:
-                        # Dynamically import the selected algorithm module
-                        algorithm_module = importlib.import_module(selected_mode)
-                        
-                        # Call the algorithm's handler function
-                        # Convention: handle_<snake_case_name> e.g., TestingMode -> handle_testing_mode
-                        handler_name = f"handle_{camel_to_snake(selected_mode)}"
-                        if hasattr(algorithm_module, handler_name):
-                            handler_func = getattr(algorithm_module, handler_name)
-                            injected = handler_func(client_id, stats)
-                            if injected:
-                                print(f"Server: INJECTED command for Client: [{client_id}] ({selected_mode})")
-                                # Save dictionaries after algorithm execution
-                                save_news_dictionaries()
-                                # Refresh command if one was injected and current state is 0
-                                if int(msg.get("state", 0)) == 0:
-                                    msg = get_next_command(client_id)
-                        else:
-                            print(f"Warning: Algorithm '{selected_mode}' does not have '{handler_name}' function")
-                    elif selected_mode and selected_mode not in modes_list:
-                        print(f"Warning: Selected mode '{selected_mode}' not in ModesList")
-                except Exception as e:
-                    print(f"Error loading algorithm: {e}")
-                    pass
-                
-                # Build a list of MetaTrader clients and print status
-                eff_state = 0
-                try:
-                    eff_state = int(msg.get("state", 0))
-                except Exception:
-                    eff_state = 0
-                try:
-                    # Include the currently polling client even if it hasn't posted a snapshot yet
-                    all_ids = sorted(set(list_clients()) | {str(client_id)})
-                    for cid in all_ids:
-                        # Determine platform prefix
-                        mode_label = get_client_mode(cid)
-                        prefix = "Metatrader -"
-                        # Open count
-                        try:
-                            oc = len(get_client_open(cid))
-                        except Exception:
-                            oc = 0
-                        # Last action for that client
-                        try:
-                            la = int(get_client_stats(cid).get("last_action", 0))
-                        except Exception:
-                            la = 0
-                        # State logic: MetaTrader always Online
-                        state_str = "Online"
-                        # Colorize State text: green for Online
-                        color = "\x1b[32m"
-                        reset = "\x1b[0m"
-                        try:
-                            show = bool(getattr(Globals, "PRINT_STATUS_LINES", False))
-                        except Exception:
-                            show = False
-                        if show:
-                            sys.stdout.write(f"{prefix} {color}State {state_str}{reset} ID={cid} Open={oc} LastAction={la} Replies={stats['replies']}\n")
-                except Exception:
-                    pass
-                # New concise view: main MT5 account
-                try:
-                    main_id = str(getattr(Globals, "MAIN_MT5_ACCOUNT", ""))
-                except Exception:
-                    main_id = ""
-                try:
-                    if main_id:
-                        main_open = get_client_open(main_id)
-                        sys.stdout.write(f"Trades on main account : {len(main_open)}\n")
-                        for p in main_open:
-                            try:
-                                side = "BUY" if int(p.get("type", 0)) == 0 else "SELL"
-                            except Exception:
-                                side = str(p.get("type"))
-                            entry = p.get("openPrice", None)
-                            if entry is None:
-                                entry = p.get("price")
-                            vol = p.get("volume")
-                            tpv = p.get("tp")
-                            slv = p.get("sl")
-                            sys.stdout.write(f"  Type\n    {side}\n")
-                            sys.stdout.write(f"  Entry\n    {entry}\n")
-                            sys.stdout.write(f"  Volume\n    {vol}\n")
-                            if vol is not None:
-                                try:
-                                    sys.stdout.write(f"  size\n    {int(vol)}\n")
-                                except Exception:
-                                    pass
-                            sys.stdout.write(f"  TP\n    {tpv}\n")
-                            sys.stdout.write(f"  SL\n    {slv}\n")
-                except Exception:
-                    pass
-                # Optional: print each open trade's entry, TP, and SL (diagnostic)
-                try:
-                    def _truthy(v):
-                        return str(v).strip().lower() in ("1", "true", "yes", "on")
-                    dbg_env = os.environ.get("NEWS_ANALYZER_PRINT_OPEN_DETAILS", "")
-                    dbg_glob = getattr(Globals, "PRINT_OPEN_DETAILS", "")
-                    if _truthy(dbg_env) or _truthy(dbg_glob):
-                        # MT5 client open details
-                        opens = get_client_open(client_id)
-                        for pos in opens:
-                            sym = pos.get("symbol")
-                            tkt = pos.get("ticket")
-                            entry = pos.get("openPrice", None)
-                            if entry is None:
-                                entry = pos.get("price")
-                            tpv = pos.get("tp")
-                            slv = pos.get("sl")
-                            sys.stdout.write(f"[{now_iso()}] OPEN {sym} ticket={tkt} entry={entry} TP={tpv} SL={slv}\n")
-                except Exception:
-                    pass
-                # If this is an open order command, also print a single summary line
-                if eff_state in (1,2):
-                    side = "BUY" if eff_state==1 else "SELL"
-                    sym = msg.get("symbol")
-                    vol = msg.get("volume")
-                    tp = msg.get("tp") if "tp" in msg else msg.get("tpPips")
-                    sl = msg.get("sl") if "sl" in msg else msg.get("slPips")
-                    print(f"Server: Sending {side} command to Client: [{client_id}] - {sym} Vol={vol} TP={tp} SL={sl}")
-                elif eff_state == 3:
-                    print(f"Server: Sending CLOSE command to Client: [{client_id}]")
-                self._send_json(200, msg)
-            else:
-                self._send_json(400, {"error": "bad_path"})
-            return
-
-        # Client views
-        if self.path.startswith("/clients"):
-            parts = [p for p in self.path.split("/") if p]
-            if len(parts) == 1:  # /clients
-                self._send_json(200, {"clients": list_clients()})
-                return
-            if len(parts) >= 2:
-                client_id = parts[1]
-                if len(parts) == 3 and parts[2] == "open":
-                    self._send_json(200, {"id": client_id, "open": get_client_open(client_id)})
-                    return
-                if len(parts) == 3 and parts[2] == "closed_online":
-                    self._send_json(200, {"id": client_id, "closed_online": get_client_closed_online(client_id)})
-                    return
-                # default: client summary
-                self._send_json(200, {
-                    "id": client_id,
-                    "open_count": len(get_client_open(client_id)),
-                    "closed_online_count": len(get_client_closed_online(client_id)),
-                })
-                return
-
-        # Not found
-        self._send_json(404, {"status": "not_found"})
+        self._send_json(*route_get(self.path))
 
     def do_POST(self) -> None:  # noqa: N802
         length = int(self.headers.get("Content-Length", 0))
@@ -432,122 +576,34 @@ class NewsAnalyzerRequestHandler(BaseHTTPRequestHandler):
             self._send_json(400, {"status": "error", "error": "invalid_json"})
             return
 
-        # Routes: payload ingest or command enqueue/ack
-        path = self.path
-        if path == "/":
-            # Process and store per-client snapshots
-            summary, identity = ingest_payload(data)
-            self.log_message(
-                "Received payload: id=%s mode=%s open=%d",
-                identity.get("id"), identity.get("mode"), summary.get("open", 0)
-            )
-            
-            # Get symbols currently open from Globals
-            symbols_open = getattr(Globals, "symbolsCurrentlyOpen", [])
-            symbols_str = ", ".join(symbols_open) if symbols_open else "None"
-            
-            # Display idle screen in live mode, or print details in debug mode
-            if Globals.liveMode:
-                display_idle_screen(
-                    client_id=str(identity.get('id')),
-                    open_count=summary.get('open', 0),
-                    closed_count=summary.get('closed_online', 0)
-                )
-            else:
-                # Print incoming communication from MT5 (debug mode only)
-                print(f"Client: [{identity.get('id')}] - Sent snapshot with {summary.get('open')} open, {summary.get('closed_online')} closed online")
-                print(f"  Symbols Currently Open: [{symbols_str}]")
-            
-            # Save news dictionaries snapshot to file (overwrites previous)
-            save_news_dictionaries()
-            
-            self._send_json(200, {"status": "ok", "received": summary, **identity})
-            return
-
-        if path.startswith("/command/"):
-            # Enqueue a command to a client: POST /command/<id>
-            parts = [p for p in path.split("/") if p]
-            if len(parts) == 2:
-                client_id = parts[1]
-                # Expect { state: 0|1|2|3, payload?: {...} }
-                state = int(data.get("state", 0))
-                payload = data.get("payload") or {}
-                cmd = enqueue_command(client_id, state, payload)
-                self._send_json(200, {"status": "queued", "command": cmd})
-                return
-            self._send_json(400, {"error": "bad_path"})
-            return
-
-        if path.startswith("/ack/"):
-            # EA acknowledges a command: POST /ack/<id>
-            parts = [p for p in path.split("/") if p]
-            if len(parts) == 2:
-                client_id = parts[1]
-                cmd_id = data.get("cmdId")
-                success = bool(data.get("success", False))
-                details = data.get("details") or {}
-                
-                # Process ACK through Functions.py
-                ack_result = process_ack_response(client_id, cmd_id, success, details)
-                
-                # Log trade info
-                trade_info = ack_result.get("trade_info", {})
-                print(f"Client: [{trade_info['client_id']}] - ACK cmdId={cmd_id} success={trade_info['success']} "
-                      f"Symbol={trade_info['symbol']} Type={trade_info['type']} Vol={trade_info['volume']} "
-                      f"Price={trade_info['price']} TP={trade_info['tp']} SL={trade_info['sl']}")
-                
-                self._send_json(200, ack_result["result"])
-                return
-            self._send_json(400, {"error": "bad_path"})
-            return
-
-        if path == "/trade_outcome":
-            # EA reports trade closure: POST /trade_outcome
-            # Expected payload: { ticket: 12345, outcome: "TP" | "SL" }
-            # Uses ticket number to match the trade and update NID counters
-            from Functions import update_trade_outcome_by_ticket
-            
-            ticket = data.get("ticket")
-            outcome = data.get("outcome")
-            
-            if not ticket or outcome not in ["TP", "SL"]:
-                self._send_json(400, {"error": "invalid_payload", "expected": {"ticket": "int", "outcome": "TP|SL"}})
-                return
-            
-            result = update_trade_outcome_by_ticket(ticket, outcome)
-            
-            if result.get("ok"):
-                tid = result.get('TID')
-                nid = result.get('NID')
-                symbol = result.get('symbol')
-                print(f"Server: Trade {tid} ({symbol}, Ticket: {ticket}) closed at {outcome} (NID_{nid})")
-                self._send_json(200, result)
-            else:
-                self._send_json(400, result)
-            return
-
-        # Default: unknown POST route
-        self._send_json(404, {"status": "not_found"})
+        self._send_json(*route_post(self.path, data))
 
 
-def parse_args(argv=None) -> Tuple[str, int]:
+def parse_args(argv=None) -> Tuple[str, int, int]:
     """
-    Parse command-line arguments for host and port.
-    Falls back to Globals.SERVER_HOST and Globals.SERVER_PORT if not provided.
+    Parse command-line arguments for host, port and worker processes.
+    Falls back to Globals.SERVER_HOST, Globals.SERVER_PORT and Globals.SERVER_WORKERS if not provided.
     """
     parser = argparse.ArgumentParser(description="News Analyzer JSON receiver")
     parser.add_argument("--host", default=None, help=f"Bind address (default: {Globals.SERVER_HOST})")
     parser.add_argument("--port", default=None, type=int, help=f"Port to listen on (default: {Globals.SERVER_PORT})")
+    parser.add_argument("--workers", default=None, type=int,
+                        help=f"HTTP worker processes, 0 = single process (default: {Globals.SERVER_WORKERS})")
     args = parser.parse_args(argv)
     
     # Use command-line args if provided, otherwise use Globals
     host = args.host if args.host is not None else Globals.SERVER_HOST
     port = args.port if args.port is not None else Globals.SERVER_PORT
+    workers = args.workers if args.workers is not None else Globals.SERVER_WORKERS
     
-    return host, port
+    return host, port, workers
 
 
 def main() -> None:
+    # Logs, _dictionaries/ and Outputs/ live next to the scripts, wherever python was
+    # launched from (this used to happen as a side effect of the first calendar load)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    
     # Setup Outputs/ folder and archive old logs
     script_dir = os.path.dirname(__file__)
     outputs_dir = os.path.join(script_dir, 'Outputs')
@@ -648,6 +704,13 @@ def main() -> None:
         from StrategyPresets import apply_strategy_preset
         apply_strategy_preset(Globals.news_strategy)
         
+        # Restore trades, exposure, S4/S5 state and NID/TID counters from the last run;
+        # the journal replays what the store had not flushed (and requeues unacked commands)
+        if Globals.STATE_STORE_ENABLED:
+            StateStore.start()
+        if Globals.JOURNAL_ENABLED:
+            Journal.start(applied_seq=Globals._Journal_Seq_)
+        
         if selected_mode not in modes_list:
             print(f"WARNING: '{selected_mode}' is not in ModesList!")
             print(f"Available modes: {', '.join(modes_list)}")
@@ -657,8 +720,22 @@ def main() -> None:
         print(f"Log rotation: Hourly (new file each hour)")
         print("=" * 60)
         
-        host, port = parse_args()
-        server = HTTPServer((host, port), NewsAnalyzerRequestHandler)
+        host, port, workers = parse_args()
+        if workers > 0:
+            # HTTP in worker processes, state stays in this one (see Broker.py)
+            print(f"[{now_iso()}] Listening on http://{host}:{port} with {workers} worker(s) (Ctrl+C to stop)")
+            try:
+                Broker.serve(host, port, workers, route_request, prepare=Functions.prepare_request)
+            except KeyboardInterrupt:
+                print(f"\n[{now_iso()}] Shutting down...")
+            finally:
+                Journal.stop()
+                StateStore.stop()
+            return
+        
+        # One thread per request: accounts are served concurrently (see Accounts.py)
+        server = ThreadingHTTPServer((host, port), NewsAnalyzerRequestHandler)
+        server.daemon_threads = True
         print(f"[{now_iso()}] Listening on http://{host}:{port} (Ctrl+C to stop)")
         try:
             server.serve_forever()
@@ -666,6 +743,8 @@ def main() -> None:
             print(f"\n[{now_iso()}] Shutting down...")
         finally:
             server.server_close()
+            Journal.stop()
+            StateStore.stop()
     finally:
         # Restore stdout/stderr and close log file
         sys.stdout = tee.terminal
@@ -0,0 +1,337 @@
+"""
+StateStore.py
+SQLite persistence for the live trading dictionaries.
+
+The _dictionaries/*.csv files are write-only snapshots; after a restart the
+S4 weekly locks, S5 sentiment, currency exposure and the NID/TID counters were
+gone. This module keeps them in an SQLite database (WAL journal) and puts them
+back into Globals on startup:
+
+    _Trades_, _Currencies_, _CurrencyCount_, _CurrencyPositions_,
+    _PairsTraded_ThisWeek_, _CurrencySentiment_, _Trade_ID_Counter_,
+    _Accounts_, _AvailabilityStats_, _AIBudget_, _News_ID_Counter_, news_strategy
+
+_Journal_Seq_ (see Journal.py) is read before anything else on each flush, so
+after a restore only journal records newer than it need to be replayed.
+
+The strategy is stored so the preset the dictionaries belong to is applied
+before they are restored (an EA reporting the same strategy then changes
+nothing).
+
+Writes are write-behind: a background thread wakes every STATE_FLUSH_INTERVAL
+seconds, diffs the dictionaries against what it wrote last (unchanged entries
+are skipped without serializing them) and commits the changed rows in a single
+transaction. The request path never touches SQLite, so it never waits on
+fsync. WAL with synchronous=NORMAL keeps the database consistent after a
+crash; at most the last flush interval is lost, and restore() re-derives the
+NID/TID counters from the restored trades and events so an id is never reused.
+
+Usage:
+    StateStore.start()      # Server.main(), after apply_strategy_preset(): restore + writer thread
+    StateStore.flush()      # write pending changes now
+    StateStore.stop()       # final flush, stop the writer thread
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import Globals
+from Accounts import AccountContext
+from Events import EventRecord
+
+
+# Globals dictionaries (and scalar counters) kept in the database
+TRACKED = ("_Trades_", "_Currencies_", "_CurrencyCount_", "_CurrencyPositions_",
+           "_PairsTraded_ThisWeek_", "_CurrencySentiment_", "_Trade_ID_Counter_", "_Accounts_",
+           "_AvailabilityStats_", "_AIBudget_")
+SCALARS = ("_Journal_Seq_", "_News_ID_Counter_", "news_strategy")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    name  TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (name, key)
+) WITHOUT ROWID
+"""
+
+_TID_PATTERN = re.compile(r"^TID_(\d+)_(\d+)$")
+
+_LOCK = threading.Lock()
+_stop = threading.Event()
+_store = {"conn": None, "path": None, "thread": None}
+
+# What the database holds: name → {key: (fingerprint, json, encoded key)}
+_written: Dict[str, Dict[str, tuple]] = {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ENCODING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _encode(obj):
+    if isinstance(obj, datetime):
+        return {"$dt": obj.isoformat()}
+    if isinstance(obj, EventRecord):
+        return obj.to_dict(derived=False)
+    if isinstance(obj, AccountContext):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"{type(obj).__name__} is not storable")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+def dumps(value) -> str:
+    """JSON text for a stored value (datetimes, records and sets encoded)."""
+    return json.dumps(value, default=_encode, separators=(",", ":"))
+
+
+_PLAIN = json.JSONDecoder()
+_HOOKED = json.JSONDecoder(object_hook=_decode)
+
+
+def loads(text: str):
+    """Inverse of dumps()."""
+    return (_HOOKED if '"$dt"' in text else _PLAIN).decode(text)
+
+
+def _fingerprint(value, nested_check: bool = True):
+    """
+    Cheap change check: the field values of a record or flat dict (None when
+    the value holds nested containers that can change in place). Entries
+    stored with a None fingerprint are always re-serialized, so comparing
+    against a stored fingerprint can skip the nested check.
+    """
+    if isinstance(value, (EventRecord, AccountContext)):
+        return value.fingerprint()
+    if type(value) is dict:
+        items = tuple(value.items())
+        if nested_check:
+            for _, item in items:
+                if isinstance(item, (dict, list, set)):
+                    return None
+        return items
+    if isinstance(value, (list, set)):
+        return None
+    return value
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DATABASE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _connect(path: str) -> sqlite3.Connection:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_SCHEMA)
+    conn.commit()
+    return conn
+
+
+def load(path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Read the stored state without touching Globals.
+
+    Returns:
+        dict: name → {key: value} for dictionaries, name → value for scalars
+    """
+    path = path or Globals.STATE_DB_FILE
+    if not os.path.exists(path):
+        return {}
+    conn = _connect(path)
+    try:
+        rows: Dict[str, tuple] = {}
+        for name, key, value in conn.execute("SELECT name, key, value FROM state"):
+            keys, values = rows.setdefault(name, ([], []))
+            keys.append(key)
+            values.append(value)
+    finally:
+        conn.close()
+
+    # One JSON parse per dictionary instead of one per entry
+    state: Dict[str, dict] = {}
+    for name, (keys, values) in rows.items():
+        decoded = loads("[" + ",".join(values) + "]")
+        if name in SCALARS:
+            state[name] = decoded[0]
+        else:
+            state[name] = dict(zip(_PLAIN.decode("[" + ",".join(keys) + "]"), decoded))
+    return state
+
+
+def repair_counters() -> None:
+    """Never hand out an NID/TID again after a crash lost the last counter flush."""
+    nids = [event.NID for event in Globals._Currencies_.values() if isinstance(event.NID, int)]
+    for tid, trade in Globals._Trades_.items():
+        match = _TID_PATTERN.match(str(tid))
+        if not match:
+            continue
+        nid, position = int(match.group(1)), int(match.group(2))
+        nids.append(nid)
+        if Globals._Trade_ID_Counter_.get(nid, 0) < position:
+            Globals._Trade_ID_Counter_[nid] = position
+    if nids and max(nids) > Globals._News_ID_Counter_:
+        Globals._News_ID_Counter_ = max(nids)
+
+
+def restore(path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Put the stored state back into Globals (see apply()).
+
+    Returns:
+        dict: name → number of entries restored
+    """
+    return apply(load(path))
+
+
+def apply(state: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Merge a load()-style state into Globals (entries are merged into the
+    current dictionaries, so defaults such as _CurrencyCount_ keys stay).
+
+    Returns:
+        dict: name → number of entries restored
+    """
+    strategy = state.get("news_strategy")
+    if strategy is not None and strategy != Globals.news_strategy:
+        import StrategyPresets
+        StrategyPresets.apply_strategy_preset(strategy, verbose=False)
+
+    counts = {}
+    for name in TRACKED:
+        entries = state.get(name, {})
+        getattr(Globals, name).update(entries)
+        counts[name] = len(entries)
+    for name in ("_News_ID_Counter_", "_Journal_Seq_"):
+        if name in state:
+            setattr(Globals, name, state[name])
+    repair_counters()
+    return counts
+
+
+def _collect():
+    """Rows that changed since the last flush: (upserts, deletes, new written map)."""
+    upserts, deletes, written = [], [], {}
+    for name in SCALARS + TRACKED:
+        previous = _written.get(name, {})
+        current = {}
+        if name in SCALARS:
+            items = [("", getattr(Globals, name))]
+        else:
+            items = dict(getattr(Globals, name)).items()
+        for key, value in items:
+            last = previous.get(key)
+            if last is not None and last[0] is not None and last[0] == _fingerprint(value, False):
+                current[key] = last
+                continue
+            fingerprint = _fingerprint(value)
+            try:
+                text = dumps(value)
+            except RuntimeError:
+                # Mutated by a request while being serialized - picked up next flush
+                if last is not None:
+                    current[key] = last
+                continue
+            encoded_key = key if name in SCALARS else json.dumps(key)
+            current[key] = (fingerprint, text, encoded_key)
+            if last is None or last[1] != text:
+                upserts.append((name, encoded_key, text))
+        deletes.extend((name, previous[key][2]) for key in previous.keys() - current.keys())
+        written[name] = current
+    return upserts, deletes, written
+
+
+def flush() -> int:
+    """
+    Write every changed entry in one transaction (no-op when the store is not open).
+
+    Returns:
+        int: Number of rows written or deleted
+    """
+    with _LOCK:
+        conn = _store["conn"]
+        if conn is None:
+            return 0
+        upserts, deletes, written = _collect()
+        if upserts or deletes:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO state (name, key, value) VALUES (?, ?, ?)", upserts)
+                conn.executemany("DELETE FROM state WHERE name = ? AND key = ?", deletes)
+        _written.clear()
+        _written.update(written)
+        return len(upserts) + len(deletes)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WRITER THREAD
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _writer(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            flush()
+        except Exception as e:
+            print(f"[STATE] ⚠️  Flush failed: {e}")
+
+
+def start(path: Optional[str] = None, interval: Optional[float] = None) -> Dict[str, int]:
+    """
+    Restore the stored state into Globals and start the write-behind thread.
+
+    Args:
+        path: Database file (default: Globals.STATE_DB_FILE)
+        interval: Seconds between flushes (default: Globals.STATE_FLUSH_INTERVAL)
+
+    Returns:
+        dict: name → number of entries restored
+    """
+    stop()
+    path = path or Globals.STATE_DB_FILE
+    interval = interval if interval is not None else getattr(Globals, "STATE_FLUSH_INTERVAL", 0.5)
+
+    counts = restore(path)
+    with _LOCK:
+        _store["conn"] = _connect(path)
+        _store["path"] = path
+        _written.clear()
+    flush()   # baseline: what the database holds now
+
+    _stop.clear()
+    thread = threading.Thread(target=_writer, args=(interval,), name="StateStore", daemon=True)
+    _store["thread"] = thread
+    thread.start()
+
+    restored = sum(counts.values())
+    print(f"[STATE] {path}: restored {restored} entries "
+          f"(NID counter {Globals._News_ID_Counter_}), flushing every {interval}s")
+    return counts
+
+
+def stop() -> None:
+    """Final flush, then stop the writer thread and close the database."""
+    thread = _store["thread"]
+    if thread is not None:
+        _stop.set()
+        thread.join()
+        _store["thread"] = None
+    flush()
+    with _LOCK:
+        if _store["conn"] is not None:
+            _store["conn"].close()
+        _store.update(conn=None, path=None)
+        _written.clear()
@@ -0,0 +1,258 @@
+"""
+Sweep.py
+Parallel parameter sweep over the StrategyPresets knobs using the offline backtester.
+
+Each point of a grid or random search space is a strategy preset plus overrides
+for the Globals knobs the presets set (news_filter_maxTradePerCurrency,
+news_filter_confirmationThreshold, news_filter_maxScalePositions, lot_size_percentage,
+...) and an optional TP/SL pair (strategy_tp_sl). Points are evaluated with
+Backtest.run_backtest() across a process pool; every worker process owns its own
+Globals module and loads the calendar and prices once.
+
+Results are written as a columnar .npz (one array per column) and ranked:
+1%-rule compliant points first, then by return, then by lowest drawdown.
+A point is compliant when the peak open positions in any one currency times
+lot_size_percentage stays within 1% of the account.
+
+Space syntax (one argument per knob):
+    name=v1,v2,v3        explicit values (grid axis / random choice)
+    name=lo:hi           range (random search only, int if both ends are ints)
+    tp_sl=50/25,100/50   TP/SL pairs in pips
+
+Usage:
+    python Sweep.py --calendar history.csv --prices prices.csv --strategy 3,5 \\
+        news_filter_maxTradePerCurrency=1,2,4 tp_sl=50/25,100/50 lot_size_percentage=0.0025,0.003
+    python Sweep.py --calendar history.csv --prices prices.csv --strategy 5 --random 200 \\
+        news_filter_confirmationThreshold=2:4 news_filter_maxScalePositions=1:4 lot_size_percentage=0.001:0.005
+    python Sweep.py --show sweep.npz --top 20          # Re-rank a saved sweep
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+import Backtest
+
+
+# Per-currency exposure limit for prop firm compliance (1% of account)
+MAX_CURRENCY_RISK = 0.01
+
+RESULT_COLUMNS = ("trades", "win_rate", "net_profit", "return_pct", "max_drawdown_pct",
+                  "peak_currency_exposure", "max_currency_risk_pct")
+
+# Worker-process state (loaded once by _init_worker)
+_EVENTS = None
+_PRICES = None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SEARCH SPACE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _parse_scalar(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_space(specs: List[str]) -> Dict[str, object]:
+    """
+    Parse name=values arguments into a search space.
+
+    Returns:
+        dict: name → list of values, or (lo, hi) tuple for ranges
+    """
+    space = {}
+    for spec in specs:
+        if "=" not in spec:
+            raise ValueError(f"Expected name=values, got '{spec}'")
+        name, values = spec.split("=", 1)
+        name = name.strip()
+        if name == "tp_sl":
+            space[name] = [tuple(_parse_scalar(v) for v in pair.split("/")) for pair in values.split(",")]
+        elif ":" in values:
+            lo, hi = (_parse_scalar(v) for v in values.split(":", 1))
+            space[name] = (lo, hi)
+        else:
+            space[name] = [_parse_scalar(v) for v in values.split(",")]
+    return space
+
+
+def grid_points(strategies: List[int], space: Dict[str, object]) -> List[dict]:
+    """Every combination of strategy and knob values."""
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"Range '{name}' needs --random (grid axes take comma-separated values)")
+    names = list(space)
+    points = []
+    for strategy in strategies:
+        for combo in itertools.product(*(space[n] for n in names)):
+            points.append({"strategy": strategy, **dict(zip(names, combo))})
+    return points
+
+
+def random_points(strategies: List[int], space: Dict[str, object], count: int, seed: int) -> List[dict]:
+    """count random draws from the space (choices for lists, uniform for ranges)."""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        point = {"strategy": rng.choice(strategies)}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                point[name] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                point[name] = rng.choice(values)
+        points.append(point)
+    return points
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EVALUATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _init_worker(calendar_path: str, prices_path: str) -> None:
+    global _EVENTS, _PRICES
+    _EVENTS = Backtest.load_calendar(calendar_path)
+    _PRICES = Backtest.load_prices(prices_path)
+
+
+def evaluate(point: dict) -> dict:
+    """Run one sweep point in this process (Globals is reset by run_backtest)."""
+    overrides = {k: v for k, v in point.items() if k not in ("strategy", "tp_sl")}
+    result = Backtest.run_backtest(_EVENTS, _PRICES, point["strategy"], overrides=overrides,
+                                   tp_sl=point.get("tp_sl"))
+
+    row = {column: result[column] for column in RESULT_COLUMNS if column in result}
+    row["max_currency_risk_pct"] = result["peak_currency_exposure"] * result["lot_size_percentage"] * 100
+    return row
+
+
+def run_sweep(points: List[dict], calendar_path: str, prices_path: str, workers: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every point across a process pool.
+
+    Returns:
+        dict: Column name → numpy array (one entry per point, in point order)
+    """
+    # Parse once in the parent so every worker hits the .npz price cache
+    Backtest.load_prices(prices_path)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(calendar_path, prices_path)) as pool:
+        rows = list(pool.map(evaluate, points, chunksize=max(1, len(points) // (workers * 4))))
+
+    return to_columns(points, rows)
+
+
+def to_columns(points: List[dict], rows: List[dict]) -> Dict[str, np.ndarray]:
+    """Turn points and results into ranked columns."""
+    columns = {"strategy": np.array([p["strategy"] for p in points], dtype=np.int8)}
+
+    knobs = sorted({k for p in points for k in p if k != "strategy"})
+    for knob in knobs:
+        if knob == "tp_sl":
+            columns["tp"] = np.array([p.get("tp_sl", (0, 0))[0] for p in points], dtype=np.float32)
+            columns["sl"] = np.array([p.get("tp_sl", (0, 0))[1] for p in points], dtype=np.float32)
+        else:
+            columns[knob] = np.array([p.get(knob, np.nan) for p in points], dtype=np.float64)
+
+    for column in RESULT_COLUMNS:
+        dtype = np.int32 if column in ("trades", "peak_currency_exposure") else np.float64
+        columns[column] = np.array([r[column] for r in rows], dtype=dtype)
+
+    columns["compliant"] = columns["max_currency_risk_pct"] <= MAX_CURRENCY_RISK * 100 + 1e-9
+    columns["rank"] = rank(columns)
+    return columns
+
+
+def rank(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """1-based rank: compliant first, then highest return, then lowest drawdown."""
+    order = np.lexsort((columns["max_drawdown_pct"], -columns["return_pct"], ~columns["compliant"]))
+    ranks = np.empty(len(order), dtype=np.int32)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def save_columns(path: str, columns: Dict[str, np.ndarray]) -> None:
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **columns)
+
+
+def load_columns(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def print_top(columns: Dict[str, np.ndarray], top: int = 10) -> None:
+    knobs = [c for c in columns if c not in RESULT_COLUMNS and c not in ("strategy", "compliant", "rank")]
+    order = np.argsort(columns["rank"])[:top]
+
+    labels = [k.replace("news_filter_", "") for k in knobs]
+    widths = [max(len(label), 8) for label in labels]
+
+    header = f"{'Rank':>5} {'S':>2} " + " ".join(f"{label:>{w}}" for label, w in zip(labels, widths))
+    header += f" {'Trades':>7} {'Return %':>9} {'Max DD %':>9} {'Cur risk %':>10} {'1%':>3}"
+    print("=" * len(header))
+    print(f"SWEEP RESULTS (top {len(order)} of {len(columns['rank'])})")
+    print("=" * len(header))
+    print(header)
+    print("-" * len(header))
+    for i in order:
+        line = f"{columns['rank'][i]:>5} {columns['strategy'][i]:>2} "
+        line += " ".join(f"{columns[k][i]:>{w}g}" for k, w in zip(knobs, widths))
+        line += (f" {columns['trades'][i]:>7} {columns['return_pct'][i]:>9.2f} {columns['max_drawdown_pct'][i]:>9.2f}"
+                 f" {columns['max_currency_risk_pct'][i]:>10.2f} {'✓' if columns['compliant'][i] else '✗':>3}")
+        print(line)
+    print("=" * len(header))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel StrategyPresets parameter sweep")
+    parser.add_argument("space", nargs="*", help="Knobs as name=v1,v2 or name=lo:hi (tp_sl=TP/SL,...)")
+    parser.add_argument("--calendar", help="Calendar CSV with Forecast/Actual columns")
+    parser.add_argument("--prices", help="Price CSV (time,symbol,bid[,ask])")
+    parser.add_argument("--strategy", default="3", help="Comma-separated preset ids to sweep (default: 3)")
+    parser.add_argument("--random", type=int, default=0, help="Random search with N points instead of a grid")
+    parser.add_argument("--seed", type=int, default=7, help="Random search seed (default: 7)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="sweep.npz", help="Columnar results file (default: sweep.npz)")
+    parser.add_argument("--top", type=int, default=10, help="Rows to print (default: 10)")
+    parser.add_argument("--show", help="Print a saved sweep instead of running one")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        print_top(load_columns(args.show), args.top)
+        return 0
+    if not args.calendar or not args.prices:
+        parser.error("--calendar and --prices are required")
+
+    strategies = [int(s) for s in args.strategy.split(",")]
+    space = parse_space(args.space)
+    if args.random:
+        points = random_points(strategies, space, args.random, args.seed)
+    else:
+        points = grid_points(strategies, space)
+
+    started = time.perf_counter()
+    columns = run_sweep(points, args.calendar, args.prices, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Evaluated {len(points)} point(s) in {elapsed:.1f}s ({len(points) / elapsed:.1f} points/s)")
+
+    save_columns(args.out, columns)
+    print(f"Results written to {args.out}")
+    print_top(columns, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
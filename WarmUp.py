@@ -0,0 +1,204 @@
+"""
+WarmUp.py
+Pre-event warm-up: prepares the order set for each scheduled release slot.
+
+WARMUP_LEAD_SECONDS before a slot in the calendar (calendar_statement.csv, as
+loaded into Globals._Currencies_), everything that does not depend on the
+released numbers is computed once:
+
+    branches   currency → {"BULL": {pair: action}, "BEAR": {...}, "NEUTRAL": {}}
+               (News_Rules.txt STEP 3 on the signed incidence matrix)
+    orders     "PAIR:VERDICT" → symbol, state, lot (× lot_multiplier), TP, SL
+    ready      per slot, the orders of each branch that pass can_open_trade()
+    rules      News_Rules.txt / News_Research.txt read into the AI_ChatGPT cache
+
+After the release, execute_news_trades() takes lot/TP/SL/state from the
+prepared order and, with WARMUP_RULE_SIGNALS, generate_trading_decisions() picks
+the prepared branch instead of asking ChatGPT. Risk filters are still checked
+at release because counts can change in between.
+
+Usage:
+    WarmUp.tick(now)                          # every heartbeat (News.handle_news)
+    signals = WarmUp.branch("EUR", "BULL")    # {"EURUSD": "BUY", "EURJPY": "BUY", ...}
+    order = WarmUp.order_for("EURUSD", "BUY") # sized order template or None
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import Globals
+import CurrencyExposure
+from Functions import can_open_trade
+import AI_ChatGPT
+
+
+BRANCHES = ("BULL", "BEAR", "NEUTRAL")
+
+# Instruction files used by the AI calls after a release
+_INSTRUCTION_FILES = ("News_Rules.txt", "News_Research.txt")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BRANCHES AND ORDERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def rule_signals(currency: str, affect: str) -> Dict[str, str]:
+    """
+    News_Rules.txt STEP 3 for one currency and outcome.
+
+    Base currency strengthens → BUY, quote currency strengthens → SELL (and the
+    reverse when it weakens). Crypto symbols count as base, as in the matrix.
+
+    Args:
+        currency: Currency code (e.g. "EUR")
+        affect: "BULL", "BEAR" or "NEUTRAL"
+
+    Returns:
+        dict: pair → "BUY"/"SELL" over _Symbols_ ({} for NEUTRAL)
+    """
+    column = CurrencyExposure.CURRENCY_COLUMN.get(currency)
+    if affect not in ("BULL", "BEAR") or column is None:
+        return {}
+    index = CurrencyExposure.get_index()
+    strengthens = affect == "BULL"
+    signals = {}
+    for symbol, sign in zip(index.symbols, index.signed[:, column]):
+        if sign:
+            signals[symbol] = "BUY" if (sign > 0) == strengthens else "SELL"
+    return signals
+
+
+def prepare_order(pair: str, verdict: str) -> Optional[dict]:
+    """
+    Sized order template for a pair and verdict, as execute_news_trades() builds it.
+
+    Returns:
+        dict: {pair, symbol, verdict, state, lot, tp, sl, lot_multiplier}, or
+              None if the pair is missing lot/TP/SL configuration
+    """
+    config = Globals._Symbols_.get(pair)
+    if not config or verdict not in ("BUY", "SELL"):
+        return None
+    symbol = config.get("symbol")
+    lot = config.get("lot")
+    tp = config.get("TP")
+    sl = config.get("SL")
+    if lot:
+        # Default lots in _Symbols_ are for 100k accounts, scaled for the actual account
+        lot = round(lot * Globals.lot_multiplier, 2)
+    if not all([symbol, lot, tp, sl]):
+        return None
+    return {
+        "pair": pair,
+        "symbol": symbol,
+        "verdict": verdict,
+        "state": 1 if verdict == "BUY" else 2,
+        "lot": lot,
+        "tp": tp,
+        "sl": sl,
+        "lot_multiplier": Globals.lot_multiplier,
+    }
+
+
+def order_for(pair: str, verdict: str, lot_multiplier: Optional[float] = None) -> Optional[dict]:
+    """
+    Prepared order for a pair and verdict, or None if not prepared (or stale).
+    Orders are sized for Globals.lot_multiplier (the primary account); an account
+    with another lot_multiplier gets None and sizes its own order.
+    """
+    if lot_multiplier is None:
+        lot_multiplier = Globals.lot_multiplier
+    order = Globals._PreparedOrders_.get(f"{pair}:{verdict}")
+    if order is None or order["lot_multiplier"] != lot_multiplier:
+        return None
+    return order
+
+
+def branch(currency: str, affect: str) -> Optional[Dict[str, str]]:
+    """Prepared pair → action signals for a currency outcome, or None if not prepared."""
+    branches = Globals._PreparedBranches_.get(currency)
+    if branches is None:
+        return None
+    return branches.get(affect)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SLOT WARM-UP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def prepare_slot(slot_time: datetime, currencies: Iterable[str]) -> dict:
+    """
+    Prepare branches and sized orders for every currency released at a slot.
+
+    Args:
+        slot_time: Scheduled release time
+        currencies: Currencies with an event at that time
+
+    Returns:
+        dict: currency → {branch: [orders passing can_open_trade()]}
+    """
+    symbols_to_trade = getattr(Globals, "symbolsToTrade", set())
+    ready = {}
+    for currency in sorted(set(currencies)):
+        branches = {affect: rule_signals(currency, affect) for affect in BRANCHES}
+        Globals._PreparedBranches_[currency] = branches
+        ready[currency] = {}
+        for affect, signals in branches.items():
+            orders = []
+            for pair, verdict in signals.items():
+                order = order_for(pair, verdict)
+                if order is None:
+                    order = prepare_order(pair, verdict)
+                    if order is None:
+                        continue
+                    Globals._PreparedOrders_[f"{pair}:{verdict}"] = order
+                if pair in symbols_to_trade and can_open_trade(pair):
+                    orders.append(order)
+            ready[currency][affect] = orders
+
+    for filename in _INSTRUCTION_FILES:
+        try:
+            AI_ChatGPT.load_instructions(filename)
+        except OSError as e:
+            print(f"[WARM-UP] ⚠️  Could not read {filename}: {e}")
+
+    Globals._WarmSlots_[slot_time] = ready
+    summary = ", ".join(f"{c} {len(b['BULL'])}/{len(b['BEAR'])}" for c, b in ready.items())
+    print(f"[WARM-UP] {slot_time:%Y-%m-%d %H:%M} prepared (BULL/BEAR orders ready: {summary})")
+    return ready
+
+
+def upcoming_slots(now: datetime, lead_seconds: float) -> Dict[datetime, List[str]]:
+    """Unreleased slots starting within lead_seconds of now → their currencies."""
+    horizon = now + timedelta(seconds=lead_seconds)
+    slots: Dict[datetime, List[str]] = {}
+    for event in Globals._Currencies_.values():
+        event_time = event.event_time
+        if event_time is None or event.actual is not None:
+            continue
+        if now <= event_time <= horizon:
+            slots.setdefault(event_time, []).append(event.currency)
+    return slots
+
+
+def tick(now: datetime) -> int:
+    """
+    Warm up every slot that is due within WARMUP_LEAD_SECONDS and not prepared yet.
+    Slots older than the lead window are forgotten.
+
+    Returns:
+        int: Number of slots prepared by this call
+    """
+    if not getattr(Globals, "WARMUP_ENABLED", True):
+        return 0
+    lead = getattr(Globals, "WARMUP_LEAD_SECONDS", 60)
+
+    for slot_time in [t for t in Globals._WarmSlots_ if t < now - timedelta(seconds=lead)]:
+        del Globals._WarmSlots_[slot_time]
+
+    prepared = 0
+    for slot_time, currencies in sorted(upcoming_slots(now, lead).items()):
+        if slot_time not in Globals._WarmSlots_:
+            prepare_slot(slot_time, currencies)
+            prepared += 1
+    return prepared
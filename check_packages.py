@@ -42,6 +42,7 @@ def check_and_install_packages():
     required_packages = {
         'pytz': 'pytz',
         'openai': 'openai',
+        'numpy': 'numpy',
     }
     
     print("=" * 60)
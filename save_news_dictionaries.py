@@ -8,6 +8,14 @@ import Globals
 from datetime import datetime
 import csv
 import os
+import threading
+import time
+
+# Request threads of different accounts save concurrently; one writer at a time
+_LOCK = threading.Lock()
+
+# time.monotonic() of the last snapshot (Globals.DICTIONARY_SAVE_INTERVAL)
+_last_saved = 0.0
 
 
 def save_news_dictionaries():
@@ -25,8 +33,25 @@ def save_news_dictionaries():
     - _currency_positions.csv: S3 strategy currency positions
     - _pairs_traded_week.csv: S4 strategy weekly tracking
     - _currency_sentiment.csv: S5 strategy sentiment tracking
+
+    With Globals.DICTIONARY_SAVE_INTERVAL > 0, calls within that many seconds of
+    the last snapshot are skipped (the files are for monitoring only). The
+    snapshot is taken under Globals.STATE_LOCK.
     """
-    
+    global _last_saved
+
+    # STATE_LOCK first (as everywhere): the snapshot reads the dictionaries other
+    # accounts' requests change
+    with Globals.STATE_LOCK, _LOCK:
+        interval = getattr(Globals, "DICTIONARY_SAVE_INTERVAL", 0)
+        now = time.monotonic()
+        if interval and now - _last_saved < interval:
+            return
+        _last_saved = now
+        return _save_all()
+
+
+def _save_all():
     try:
         # Ensure _dictionaries folder exists
         os.makedirs("_dictionaries", exist_ok=True)
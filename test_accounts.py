@@ -0,0 +1,114 @@
+"""
+Test per-account state
+Checks that two accounts posting Packet B keep their own balance, lot multiplier
+and weekly target (the Globals mirror follows the primary account only), that
+only the primary account changes the strategy preset, that the risk filters use
+each account's own exposure, and that the account lock serializes one account
+without blocking another.
+"""
+
+import sys
+import os
+import io
+import threading
+import contextlib
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import Accounts
+import GlobalsSnapshot
+
+
+MAIN = "test_acct_main"
+OTHER = "test_acct_other"
+
+
+def _packet_b(client_id, balance, strategy):
+    return {"id": client_id, "packetType": "B", "balance": balance, "equity": balance,
+            "strategy": strategy, "open": [], "closed_online": [], "symbolsCurrentlyOpen": []}
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("MAIN_MT5_ACCOUNT", "systemBalance", "systemEquity", "systemBaseBalance",
+                                 "systemStartOfWeekBalance", "systemEquityTarget", "systemWeeklyGoalReached",
+                                 "lot_multiplier", "symbolsCurrentlyOpen", "liveMode",
+                                 "news_filter_maxTradePerCurrency", "news_filter_maxTrades",
+                                 tables=("_CurrencyCount_",), modules={Functions: ("LOG_FILE",)},
+                                 clients=(MAIN, OTHER))
+
+
+def test_accounts_keep_their_own_state():
+    """Packet B per account: own tier and targets; Globals and the preset follow the primary"""
+    saved = STATE.save()
+    strategy = Globals.news_strategy
+    Globals.MAIN_MT5_ACCOUNT = MAIN
+    Globals.liveMode = True
+    Functions.LOG_FILE = os.devnull
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            Functions.ingest_payload(_packet_b(MAIN, 52_000.0, f"S{strategy}"))
+            Functions.ingest_payload(_packet_b(OTHER, 198_000.0, "S1" if strategy != 1 else "S2"))
+            Functions.ingest_payload(dict(_packet_b(OTHER, 0, ""), packetType="A",
+                                          symbolsCurrentlyOpen=["GBPJPY"]))
+
+        main, other = Accounts.get(MAIN), Accounts.get(OTHER)
+        assert (main.base_balance, main.lot_multiplier) == (50_000, 0.5)
+        assert (other.base_balance, other.lot_multiplier) == (200_000, 2.0)
+        assert other.equity_target == 198_000.0 + 2_000.0
+        assert (Globals.systemBalance, Globals.lot_multiplier) == (52_000.0, 0.5)   # primary only
+        assert Globals.news_strategy == strategy and other.strategy != strategy
+        assert "preset stays" in out.getvalue()
+        assert other.symbols_open == ["GBPJPY"] and Globals.symbolsCurrentlyOpen == []
+        print("✅ PASS: Accounts keep their own state")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_exposure_and_locks_per_account():
+    """One account at its currency limit does not block another; account locks are independent"""
+    saved = STATE.save()
+    Globals.news_filter_maxTradePerCurrency = 1
+    Globals.news_filter_maxTrades = 0
+    Globals.liveMode = True
+    Functions.LOG_FILE = os.devnull
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Functions.update_currency_count("EURUSD", "add", client_id=MAIN)
+        assert Accounts.get(MAIN).exposure == {"EUR": 1, "USD": 1}
+        assert not Functions.can_open_trade("EURGBP", MAIN)
+        assert Functions.can_open_trade("EURGBP", OTHER)
+        assert Functions.find_available_pair_for_currency("GBP", MAIN) not in (None, "EURGBP", "GBPUSD")
+
+        # MAIN is busy: its next payload waits, OTHER's goes through
+        done = []
+
+        def ingest(client_id):
+            with contextlib.redirect_stdout(io.StringIO()):
+                Functions.ingest_payload(dict(_packet_b(client_id, 0, ""), packetType="A"))
+            done.append(client_id)
+
+        with Accounts.get(MAIN).lock:
+            waiting = threading.Thread(target=ingest, args=(MAIN,))
+            waiting.start()
+            passing = threading.Thread(target=ingest, args=(OTHER,))
+            passing.start()
+            passing.join(5)
+            assert done == [OTHER]
+        waiting.join(5)
+        assert done == [OTHER, MAIN]
+        print("✅ PASS: Exposure and locks per account")
+        return True
+    finally:
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_accounts_keep_their_own_state(),
+        test_exposure_and_locks_per_account(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,135 @@
+"""
+Test the AI call budget (AIBudget.py)
+Checks that the day's calls are reserved for the highest-impact events first,
+so lower-impact events and their retries cannot use up NFP's calls, that an
+event past its reservation falls back to the shared pool, that a finished
+event hands back what it did not use, and that the usage survives a restart
+through the state store.
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import AIBudget
+import Globals
+import News
+import StateStore
+import GlobalsSnapshot
+from Events import EventRecord
+
+
+RELEASE = datetime(2025, 12, 5, 8, 30)
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("MAX_DAILY_AI_CALLS", "AI_BUDGET_CALLS", "AI_BUDGET_POOL", "ai_calls_today",
+                                 "ai_calls_reset_date", tables=StateStore.TRACKED, modules={News: ("_clock",)})
+
+
+def _setup():
+    Globals.MAX_DAILY_AI_CALLS = 20
+    Globals.AI_BUDGET_POOL = 4
+    Globals.AI_BUDGET_CALLS = {"High": 6, "Medium": 3, "Low": 2}
+    Globals._AIBudget_.clear()
+    Globals._Currencies_.clear()
+    News._clock = lambda tz=None: RELEASE - timedelta(hours=3)
+    # Release order: the minor events come first and would have used the old shared counter up
+    for n, (name, impact) in enumerate([("(United States) Consumer Sentiment", "Low"),
+                                        ("(United States) Trade Balance", "Medium"),
+                                        ("(United States) ISM Manufacturing PMI", "High"),
+                                        ("(United States) Nonfarm Payrolls", "High"),
+                                        ("(United States) Fed Interest Rate Decision", "High")]):
+        event_time = RELEASE + timedelta(minutes=n) if "Payrolls" not in name else RELEASE + timedelta(hours=2)
+        Globals._Currencies_[f"TEST_BUDGET_{n}"] = EventRecord("USD", name, event_time, impact=impact)
+
+
+def test_high_impact_is_reserved_first():
+    """High-impact events are reserved first; minor ones live on what is left and the pool"""
+    saved = STATE.save()
+    try:
+        _setup()
+        events = AIBudget.metrics()["events"]
+        reserved = {key: entry["reserved"] for key, entry in events.items()}
+        # 16 reservable: Fed (Monetary) 6, NFP (Jobs) 6, ISM (Activity) the remaining 4, none for the rest
+        assert reserved == {"TEST_BUDGET_4": 6, "TEST_BUDGET_3": 6, "TEST_BUDGET_2": 4,
+                            "TEST_BUDGET_1": 0, "TEST_BUDGET_0": 0}, reserved
+
+        # The early Low event retries until the pool is empty: NFP's calls are untouched
+        spent = 0
+        while AIBudget.can_spend("TEST_BUDGET_0"):
+            AIBudget.charge("TEST_BUDGET_0")
+            spent += 1
+        AIBudget.deny()
+        assert spent == 4 and not AIBudget.can_spend("TEST_BUDGET_1")
+        for _ in range(6):
+            assert AIBudget.can_spend("TEST_BUDGET_3")
+            AIBudget.charge("TEST_BUDGET_3")
+        assert not AIBudget.can_spend("TEST_BUDGET_3")   # past its reservation and the pool is gone
+
+        # The Fed decision is fetched on its first call: its other 5 go back to the pool
+        token = AIBudget.set_event("TEST_BUDGET_4")
+        try:
+            AIBudget.charge()
+        finally:
+            AIBudget.reset_event(token)
+        Globals._Currencies_["TEST_BUDGET_4"].actual = 4.5
+        assert AIBudget.can_spend("TEST_BUDGET_3", calls=5) and not AIBudget.can_spend("TEST_BUDGET_3", calls=6)
+
+        metrics = AIBudget.metrics()
+        assert (metrics["used"], metrics["pool_used"], metrics["denied"], metrics["pool_free"]) == (11, 0, 1, 5)
+        assert metrics["events"]["TEST_BUDGET_0"] == {"reserved": 0, "used": 4, "pending": True}
+        assert Globals.ai_calls_today == 11
+        print("✅ PASS: High impact is reserved first")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_budget_survives_restart():
+    """The day's usage comes back from the state store; the calls are not handed out again"""
+    saved = STATE.save()
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "state.db")
+    try:
+        _setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            StateStore.start(path, interval=60)   # the test flushes explicitly
+            for _ in range(3):
+                AIBudget.charge("TEST_BUDGET_3")
+            AIBudget.charge()
+            StateStore.flush()
+            StateStore.stop()
+
+            Globals._AIBudget_.clear()
+            Globals.ai_calls_today = 0
+            StateStore.restore(path)
+
+        metrics = AIBudget.metrics()
+        assert metrics["used"] == 4 and metrics["pool_used"] == 1 and Globals.ai_calls_today == 4
+        assert metrics["events"]["TEST_BUDGET_3"]["used"] == 3
+
+        # Next day: a fresh budget
+        News._clock = lambda tz=None: RELEASE + timedelta(days=1)
+        assert AIBudget.metrics()["used"] == 0 and Globals.ai_calls_today == 0
+        print("✅ PASS: Budget survives restart")
+        return True
+    finally:
+        StateStore.stop()
+        saved.restore()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    results = [
+        test_high_impact_is_reserved_first(),
+        test_budget_survives_restart(),
+    ]
+    sys.exit(0 if all(results) else 1)
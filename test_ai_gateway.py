@@ -0,0 +1,246 @@
+"""
+Test the AI gateway (AIGateway.py)
+Checks that a slow model is hedged with its AI_HEDGE_MODELS entry after the
+latency-percentile threshold and the slow request is cancelled, that the hedge
+is charged to the AI budget and not sent once the budget is used up, that a call is
+cancelled at its deadline, that fetch_actual_value() gives up on an event
+whose trading window has passed without calling the AI, and that a raced
+fetch takes the first clean answer, counts wins per backend and keeps how long
+the cancelled losers ran.
+"""
+
+import sys
+import os
+import io
+import time
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import News
+import AIGateway
+import AI_Perplexity
+import AIBudget
+import GlobalsSnapshot
+
+
+class FakeModels:
+    """Stands in for AIGateway.request(): per-model latency, records cancellations."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.cancelled = []
+
+    async def request(self, provider, model, messages):
+        try:
+            await asyncio.sleep(self.latencies[model])
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        return f"Actual : 1.0 ({model})"
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("AI_HEDGE_MODELS", "AI_HEDGE_AFTER", "AI_HEDGE_MIN_SAMPLES", "AI_HEDGE_PERCENTILE",
+                                 "AI_CALL_TIMEOUT", "AI_EVENT_WINDOW", "AI_RACE_BACKENDS", "AI_RACE_TOLERANCE",
+                                 "TRACE_ENABLED", "MAX_DAILY_AI_CALLS", "AI_BUDGET_POOL", "ai_calls_today", "ai_calls_reset_date",
+                                 tables=("_Currencies_", "_AIBudget_"),
+                                 modules={AIGateway: ("request",), News: ("_clock", "get_news_data")},
+                                 stores=(AIGateway._latencies, AIGateway._censored, AIGateway._race_counts,
+                                         AIGateway._adapters))
+
+
+def test_slow_model_is_hedged():
+    """The hedge model starts after the primary's latency percentile and wins; the primary is cancelled"""
+    saved = STATE.save()
+    try:
+        AIGateway._latencies.clear()
+        Globals.AI_HEDGE_MODELS = {"slow": "fast"}
+        Globals.AI_HEDGE_MIN_SAMPLES = 5
+        Globals.AI_HEDGE_PERCENTILE = 90
+        Globals.AI_HEDGE_AFTER = 5.0
+        for seconds in (0.01, 0.02, 0.03, 0.04, 0.05):
+            AIGateway.record_latency("test:slow", seconds)
+        assert AIGateway.hedge_after("test:slow") == 0.05
+        assert AIGateway.hedge_after("test:unknown") == 5.0
+        Globals.MAX_DAILY_AI_CALLS, Globals.AI_BUDGET_POOL = 10, 10
+        Globals._AIBudget_.clear()
+        Globals._Currencies_.clear()
+
+        models = FakeModels({"slow": 2.0, "fast": 0.01})
+        AIGateway.request = models.request
+        started = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            text = AIGateway.complete("test", "slow", [])
+        elapsed = time.monotonic() - started
+
+        assert text == "Actual : 1.0 (fast)"
+        assert elapsed < 1.0, elapsed
+        assert models.cancelled == ["slow"]
+        assert "answered by test:fast" in out.getvalue()
+        assert len(AIGateway._latencies["test:fast"]) == 1   # cancelled calls leave no sample
+        for _ in range(50):
+            if AIGateway._censored.get("test:slow"):
+                break
+            time.sleep(0.01)
+        assert len(AIGateway._censored["test:slow"]) == 1   # ... only a censored one (ran > N s)
+        assert AIBudget.metrics()["pool_used"] == 1   # the hedge is a paid call of its own
+        print("✅ PASS: Slow model is hedged")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_no_hedge_without_budget():
+    """With the budget used up the slow model is waited for; the hedge is not sent"""
+    saved = STATE.save()
+    try:
+        AIGateway._latencies.clear()
+        Globals.AI_HEDGE_MODELS = {"slow": "fast"}
+        Globals.AI_HEDGE_MIN_SAMPLES = 5
+        Globals.AI_HEDGE_AFTER = 0.01
+        Globals.MAX_DAILY_AI_CALLS, Globals.AI_BUDGET_POOL = 1, 1
+        Globals._AIBudget_.clear()
+        Globals._Currencies_.clear()
+        AIBudget.charge()   # the call complete() is made for
+
+        models = FakeModels({"slow": 0.1, "fast": 0.01})
+        AIGateway.request = models.request
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = AIGateway.complete("test", "slow", [])
+
+        assert text == "Actual : 1.0 (slow)"
+        assert models.cancelled == [] and "test:fast" not in AIGateway._latencies
+        assert AIBudget.metrics()["used"] == 1
+        print("✅ PASS: No hedge without budget")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_deadline_cancels_call():
+    """Past the thread's deadline the caller gets DeadlineExceeded and the request is cancelled"""
+    saved = STATE.save()
+    try:
+        Globals.AI_HEDGE_MODELS = {}
+        models = FakeModels({"hung": 30.0})
+        AIGateway.request = models.request
+        token = AIGateway.set_deadline(time.time() + 0.1)
+        started = time.monotonic()
+        try:
+            AIGateway.complete("test", "hung", [])
+            raise AssertionError("expected DeadlineExceeded")
+        except AIGateway.DeadlineExceeded:
+            pass
+        finally:
+            AIGateway.reset_deadline(token)
+        assert time.monotonic() - started < 1.0
+
+        # The cancellation reaches the request on the gateway loop
+        for _ in range(50):
+            if models.cancelled:
+                break
+            time.sleep(0.01)
+        assert models.cancelled == ["hung"]
+        assert AIGateway._deadline.get() is None
+        print("✅ PASS: Deadline cancels call")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_stale_event_is_not_fetched():
+    """An event past its trading window is given up without an AI call"""
+    saved = STATE.save()
+    calls = []
+    try:
+        Globals.TRACE_ENABLED = False
+        Globals.AI_EVENT_WINDOW = 900
+        Globals.MAX_DAILY_AI_CALLS = 1_000_000
+        release = datetime(2025, 11, 18, 8, 30)
+        News._clock = lambda tz=None: release + timedelta(minutes=20)
+        News.get_news_data = lambda *args: calls.append(args) or "Actual : 1.0"
+        Globals._Currencies_["EVT_STALE"] = {
+            "currency": "USD", "date": "2025, November 18, 08:30", "event": "(USD) CPI YoY",
+            "event_time": release,
+        }
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            assert News.fetch_actual_value("EVT_STALE") is False
+
+        assert calls == []
+        assert "[STALE]" in out.getvalue()
+        event = Globals._Currencies_["EVT_STALE"]
+        assert event.get("retry_count") == 1 and event.get("retry_after") is None and event.get("actual") is None
+        print("✅ PASS: Stale event is not fetched")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_race_takes_first_clean_answer():
+    """Not-released and misread answers lose; the first clean one wins and the hung backend is cancelled"""
+    saved = STATE.save()
+    cancelled = []
+
+    async def clean(event_name, currency, date, request_type):
+        await asyncio.sleep(0.05)
+        return "Forecast : 2.0, Actual : 2.5"
+
+    async def hung(event_name, currency, date, request_type):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("hung")
+            raise
+        return "Forecast : 2.0, Actual : 2.4"
+
+    try:
+        AIGateway._race_counts.clear()
+        AIGateway._censored.clear()
+        AIGateway.register_adapter("not_released", lambda *args: "Forecast : 2.0, Actual : FALSE")
+        AIGateway.register_adapter("misread", lambda *args: "Forecast : 2.0, Actual : 250000")
+        AIGateway.register_adapter("clean", clean)
+        AIGateway.register_adapter("hung", hung)
+        Globals.AI_RACE_TOLERANCE = 10.0
+        Globals.AI_RACE_BACKENDS = ["adapter:not_released", "adapter:misread", "adapter:clean", "adapter:hung"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = AI_Perplexity.race_news_data("CPI YoY", "USD", "November 18, 2025", "both")
+            Globals.AI_RACE_BACKENDS = ["adapter:not_released", "adapter:misread"]
+            fallback = AI_Perplexity.race_news_data("CPI YoY", "USD", "November 18, 2025", "both")
+
+        assert text == "Forecast : 2.0, Actual : 2.5"
+        for _ in range(50):
+            if cancelled and AIGateway._censored.get("adapter:hung"):
+                break
+            time.sleep(0.01)
+        assert cancelled == ["hung"]
+        assert fallback == "Forecast : 2.0, Actual : FALSE"   # no winner: not released yet, retried later
+        stats = AIGateway.race_stats()
+        assert stats["adapter:clean"]["wins"] == 1 and stats["adapter:clean"]["win_rate"] == 1.0
+        assert stats["adapter:clean"]["p50"] >= 0.05
+        assert stats["adapter:not_released"]["races"] == 2 and stats["adapter:not_released"]["wins"] == 0
+        hung_stats = stats["adapter:hung"]
+        assert (hung_stats["races"], hung_stats["wins"], hung_stats["p50"], hung_stats["cancelled"]) == (1, 0, 0.0, 1)
+        assert 0.05 <= hung_stats["cancelled_p50"] < 5   # lost to "clean": ran about as long as it took
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            AIGateway.print_race_report(stats)
+        assert "adapter:hung" in out.getvalue()
+        print("✅ PASS: Race takes first clean answer")
+        return True
+    finally:
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_slow_model_is_hedged(),
+        test_no_hedge_without_budget(),
+        test_deadline_cancels_call(),
+        test_stale_event_is_not_fetched(),
+        test_race_takes_first_clean_answer(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,131 @@
+"""
+Test the offline News backtester
+Builds a two-event calendar and a tiny price series, then checks the
+vectorized TP/SL scan, S1 fills, the S3 close-and-reverse path and the
+in-place reset of Globals between runs.
+"""
+
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Backtest
+import Functions
+import Globals
+import News
+
+
+def _write_inputs(tmp):
+    """USD beats at 08:30 (USD up), then misses at 14:30 (USD down)."""
+    calendar = os.path.join(tmp, "calendar.csv")
+    with open(calendar, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Date", "Event", "Impact", "Currency", "Forecast", "Actual"])
+        writer.writerow(["2025, November 18, 08:30", "(United States) CPI YoY", "High", "USD", "2.9", "3.1%"])
+        writer.writerow(["2025, November 18, 14:30", "(United States) Retail Sales MoM", "High", "USD", "0.4", "0.1"])
+
+    # EURUSD/AUDUSD: fall 60 pips after the first release, rally 60 pips after the second
+    prices = os.path.join(tmp, "prices.csv")
+    start = datetime(2025, 11, 18, 8, 0)
+    with open(prices, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "symbol", "bid", "ask"])
+        for minute in range(0, 12 * 60, 5):
+            t = start + timedelta(minutes=minute)
+            if t < datetime(2025, 11, 18, 8, 30):
+                bid = 1.1000
+            elif t < datetime(2025, 11, 18, 14, 30):
+                bid = max(1.0940, 1.1000 - 0.0002 * ((t - datetime(2025, 11, 18, 8, 30)).seconds // 300))
+            else:
+                bid = min(1.1000, 1.0940 + 0.0003 * ((t - datetime(2025, 11, 18, 14, 30)).seconds // 300))
+            for symbol in ("EURUSD", "AUDUSD"):
+                writer.writerow([t.strftime("%Y-%m-%d %H:%M:%S"), symbol, f"{bid:.5f}", f"{bid + 0.0001:.5f}"])
+    return calendar, prices
+
+
+def test_first_hit_vectorized():
+    """TP/SL scan returns the first crossing tick and prefers SL on a gap"""
+    series = Backtest.PriceSeries("EURUSD", [0, 1, 2, 3, 4], [1.0, 1.1, 0.95, 1.3, 1.0], [1.0] * 5)
+    index, reason = series.first_hit(0, "BUY", tp_price=1.25, sl_price=0.96)
+    assert (index, reason) == (2, "SL"), (index, reason)
+    index, reason = series.first_hit(2, "BUY", tp_price=1.25, sl_price=0.90)
+    assert (index, reason) == (3, "TP"), (index, reason)
+    assert series.first_hit(3, "BUY", tp_price=2.0, sl_price=0.5) == (None, None)
+    assert series.index_at(2.5) == 2 and series.index_at(-1) == -1
+    print("✅ PASS: Vectorized first-hit scan")
+    return True
+
+
+def test_s1_and_s3_offline_run():
+    """S1 opens on the release and hits TP; S3 closes and reverses on the opposite signal"""
+    tmp = tempfile.mkdtemp()
+    try:
+        calendar, prices = _write_inputs(tmp)
+        events = Backtest.load_calendar(calendar)
+        series = Backtest.load_prices(prices)
+        assert [e["actual"] for e in events] == [3.1, 0.1]
+        assert os.path.exists(prices + ".npz"), "parsed prices should be cached"
+        cached = Backtest.load_prices(prices)
+        assert np.array_equal(cached["EURUSD"].bid, series["EURUSD"].bid)
+
+        # Only EURUSD has prices; the other S1 symbols are rejected, not filled
+        s1 = Backtest.run_backtest(events, series, 1, tp_sl=(50, 25))
+        assert s1["events"] == 2
+        assert s1["by_symbol"] == {"EURUSD": {"trades": 2, "profit": s1["net_profit"]}}, s1["by_symbol"]
+        assert s1["exit_reasons"] == {"TP": 2}, s1["exit_reasons"]
+        assert s1["rejected"] == 4   # GBPUSD and USDJPY twice
+        assert s1["net_profit"] > 0
+
+        # S3 holds one USD position, then closes and reverses it. can_open_trade()
+        # runs before the reversal check, so lift the per-currency cap.
+        s3 = Backtest.run_backtest(events, series, 3, tp_sl=(100, 100),
+                                   overrides={"symbolsToTrade": {"AUDUSD"}, "news_filter_maxTradePerCurrency": 0})
+        assert s3["exit_reasons"] == {"CLOSE": 1, "END": 1}, s3["exit_reasons"]
+        assert s3["by_symbol"]["AUDUSD"]["trades"] == 2, s3["by_symbol"]
+
+        # Simulated clock and rule signals are removed after the run
+        assert News._clock == datetime.now
+        assert News.generate_trading_signals.__module__ == "AI_ChatGPT"
+
+        print("✅ PASS: S1 fills and S3 reversal run offline")
+        return True
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_reset_keeps_shared_tables():
+    """_reset_state() restores defaults in place: same tables and lock, fresh contents"""
+    shared = {name: getattr(Globals, name) for name in ("_Accounts_", "_Currencies_", "_Symbols_", "_PendingCloses_")}
+    lock = Globals.STATE_LOCK
+    default_tp = Backtest._DEFAULTS.tables["_Symbols_"][1]["EURUSD"]["TP"]
+
+    Backtest.run_backtest([], {}, 1, tp_sl=(default_tp + 7, 5))
+    assert Globals._Symbols_["EURUSD"]["TP"] == default_tp + 7
+    Globals._PendingCloses_["stale"] = {"key": "stale"}
+
+    Backtest._reset_state(Backtest.BACKTEST_CLIENT_ID)
+    for name, table in shared.items():
+        assert getattr(Globals, name) is table, f"{name} was replaced"
+    assert Globals.STATE_LOCK is lock and News._STATE_LOCK is lock
+    assert Globals._Symbols_["EURUSD"]["TP"] == default_tp, "a run must not change the saved defaults"
+    assert not Globals._PendingCloses_ and not Globals._Accounts_
+    assert Backtest.BACKTEST_CLIENT_ID not in Functions._CLIENT_OPEN
+    print("✅ PASS: Reset keeps shared tables")
+    return True
+
+
+if __name__ == "__main__":
+    results = [
+        test_first_hit_vectorized(),
+        test_s1_and_s3_offline_run(),
+        test_reset_keeps_shared_tables(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,70 @@
+"""
+Smoke test for the EA load simulator (Benchmark.py)
+Runs a tiny benchmark against the stub server, single-process and with one
+Broker worker: three simulated EAs, one synthetic event after every EA has
+reported, and checks that no request failed and that each EA received,
+executed and ACKed exactly one open.
+"""
+
+import sys
+import os
+import io
+import shutil
+import contextlib
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Benchmark
+
+
+CLIENTS = 3
+
+
+def _run(workers, port):
+    # Event at 2 s: every EA has posted Packet A/B (timer 0.5 s) and is known to the fan-out
+    args = Benchmark.parse_args([
+        "--clients", str(CLIENTS), "--duration", "4", "--interval", "0.5", "--tick-polls", "1",
+        "--events", "1", "--event-start", "2", "--ai-latency", "0",
+        "--port", str(port), "--workers", str(workers),
+    ])
+    args.workers = workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = Benchmark.run_benchmark(args)
+    shutil.rmtree(result["workdir"], ignore_errors=True)
+    return result
+
+
+def _check(result):
+    assert result["errors"] == 0, result["endpoints"]
+    assert result["endpoints"]["A"]["count"] >= CLIENTS
+    assert result["endpoints"]["command"]["count"] > 0
+    assert result["commands"] == CLIENTS, result["commands"]
+    assert result["acks"] == CLIENTS, result["acks"]
+    assert result["opened"] == CLIENTS, result["opened"]
+
+
+def test_single_process():
+    """Stub server in one process: 0 errors, one open per EA, every command ACKed"""
+    result = _run(0, 5091)
+    _check(result)
+    assert result["workers"] == 0
+    print(f"✅ PASS: Single-process benchmark ({result['requests']} requests)")
+    return True
+
+
+def test_one_worker():
+    """Stub server with --workers 1: same counts through the Broker"""
+    result = _run(1, 5092)
+    _check(result)
+    assert result["workers"] == 1
+    print(f"✅ PASS: One-worker benchmark ({result['requests']} requests)")
+    return True
+
+
+if __name__ == "__main__":
+    results = [
+        test_single_process(),
+        test_one_worker(),
+    ]
+    sys.exit(0 if all(results) else 1)
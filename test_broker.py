@@ -0,0 +1,59 @@
+"""
+Test the multi-process broker (Broker.py)
+Checks that requests forwarded by a worker's OwnerClient run through the state
+owner's route and come back as (status, reply), that a failing route answers
+500 without dropping the connection, and that pooled connections are reused.
+"""
+
+import sys
+import os
+import io
+import threading
+import contextlib
+from multiprocessing.connection import Listener
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Broker
+
+
+def _route(calls):
+    def route(method, path, data=None):
+        calls.append((method, path, data, threading.current_thread().name))
+        if path == "/fail":
+            raise RuntimeError("boom")
+        return 200, {"status": "ok", "method": method, "echo": data}
+    return route
+
+
+def test_requests_run_in_the_owner():
+    """Forwarded requests run through route(); a route error is a 500, the connection survives"""
+    calls = []
+    authkey = os.urandom(16)
+    listener = Listener(("127.0.0.1", 0), authkey=authkey)
+    threading.Thread(target=Broker._accept, args=(listener, _route(calls)), daemon=True).start()
+    owner = Broker.OwnerClient(listener.address, authkey)
+    try:
+        assert owner.request("POST", "/", {"packetType": "A"}) == \
+            (200, {"status": "ok", "method": "POST", "echo": {"packetType": "A"}})
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert owner.request("GET", "/fail") == (500, {"status": "error", "error": "internal_error"})
+        assert owner.request("GET", "/command?id=1")[0] == 200
+
+        assert [call[:2] for call in calls] == [("POST", "/"), ("GET", "/fail"), ("GET", "/command?id=1")]
+        assert len({call[3] for call in calls}) == 1   # one pooled connection, one owner thread
+        assert len(owner._idle) == 1
+        print("✅ PASS: Requests run in the owner")
+        return True
+    finally:
+        for conn in owner._idle:
+            conn.close()
+        listener.close()
+
+
+if __name__ == "__main__":
+    results = [
+        test_requests_run_in_the_owner(),
+    ]
+    sys.exit(0 if all(results) else 1)
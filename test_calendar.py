@@ -0,0 +1,86 @@
+"""
+Test incremental calendar reloads
+Checks that an unchanged calendar_statement.csv costs only a stat(), that an
+edited file adds and removes just the changed events, and that events already
+in flight (NID assigned) survive being removed from the CSV.
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Calendar
+
+
+HEADER = "Date,Event,Impact,Currency\n"
+ROWS = [
+    '"2025, November 18, 08:30",(Canada) CPI YoY,High,CAD\n',
+    '"2025, November 18, 08:30",(Canada) CPI Trimmed-Mean YoY,High,CAD\n',
+    '"2025, November 19, 02:00",(United Kingdom) Inflation Rate YoY,High,GBP\n',
+    '"2025, November 10, 09:00",(Euro Area) Past Event,High,EUR\n',
+]
+NOW = datetime(2025, 11, 17, 12, 0)
+
+
+def _write(path, rows, stamp):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(rows))
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_incremental_reload():
+    """Only changed events are added/removed; in-flight ones are kept"""
+    saved = (Globals.liveMode, Globals.news_test_mode, Globals.news_process_past_events)
+    Globals.liveMode = True
+    Globals.news_test_mode = False
+    Globals.news_process_past_events = False
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "calendar_statement.csv")
+    Globals._Currencies_["OTHER"] = {"currency": "USD", "event_time": NOW}   # not from the calendar
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _write(path, ROWS, 1_000_000_000)
+            first = Calendar.refresh(path=path, now=NOW, force=True)
+            assert len(first["added"]) == 3 and first["skipped"] == 1    # the past EUR event is skipped
+            assert all(Globals._Currencies_[key].event_time for key in first["added"])
+            cpi = Calendar.event_key("CAD", datetime(2025, 11, 18, 8, 30), "(Canada) CPI YoY")
+            assert Globals._Currencies_[cpi]["ai_date"] == "November 18, 2025"
+
+            assert Calendar.refresh(path=path, now=NOW) is None  # unchanged file
+
+            # CPI is being processed, the UK event has not started; both leave the CSV
+            Globals._Currencies_[cpi]["NID"] = 41
+            new_row = '"2025, November 20, 13:30",(United States) Jobless Claims,High,USD\n'
+            _write(path, [ROWS[1], new_row, ROWS[3]], 2_000_000_000)
+            changes = Calendar.refresh(path=path, now=NOW)
+
+        uk = Calendar.event_key("GBP", datetime(2025, 11, 19, 2, 0), "(United Kingdom) Inflation Rate YoY")
+        usd = Calendar.event_key("USD", datetime(2025, 11, 20, 13, 30), "(United States) Jobless Claims")
+        assert changes["added"] == [usd] and changes["removed"] == [uk] and changes["kept"] == [cpi]
+        assert uk not in Globals._Currencies_
+        assert Globals._Currencies_[cpi]["NID"] == 41 and Globals._Currencies_[cpi].NID == 41
+        assert "OTHER" in Globals._Currencies_
+        assert Calendar.parse_date.cache_info().hits > 0
+        print("✅ PASS: Incremental reload")
+        return True
+    finally:
+        Globals.liveMode, Globals.news_test_mode, Globals.news_process_past_events = saved
+        for key in list(Calendar._state["keys"]) + ["OTHER"]:
+            Globals._Currencies_.pop(key, None)
+        Calendar.reset()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    results = [
+        test_incremental_reload(),
+    ]
+    sys.exit(0 if all(results) else 1)
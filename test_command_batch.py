@@ -0,0 +1,88 @@
+"""
+Test batch command delivery (state 4)
+Checks that a batch-capable poll receives every pending order at once, that
+legacy polls still get one command at a time and that batch ACKs are applied
+per order.
+"""
+
+import sys
+import os
+import io
+import contextlib
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+
+
+CLIENT = "test_batch"
+
+
+def _queue_orders():
+    Functions.enqueue_command(CLIENT, 1, {"symbol": "EURUSD", "volume": 0.5, "tpPips": 50, "slPips": 25})
+    Functions.enqueue_command(CLIENT, 2, {"symbol": "USDJPY", "volume": 0.5, "tpPips": 50, "slPips": 25})
+    Functions.enqueue_command(CLIENT, 3, {"symbol": "GBPUSD", "ticket": 77})
+
+
+def test_batch_delivery_and_acks():
+    """All pending orders in one state-4 reply, acknowledged per order"""
+    _queue_orders()
+
+    # Legacy poll: one command (the close goes first), redelivered until acked
+    single = Functions.get_next_command(CLIENT)
+    assert single["state"] == 3 and single["ticket"] == 77
+    assert Functions.get_next_command(CLIENT)["cmdId"] == single["cmdId"]
+
+    batch = Functions.get_next_command(CLIENT, batch=True)
+    assert batch["state"] == Functions.STATE_BATCH and batch["count"] == 3
+    assert [o["state"] for o in batch["orders"]] == [3, 1, 2]
+    assert batch["orders"][0] == single
+    assert batch["orders"][1]["tpPips"] == 50 and batch["orders"][2]["symbol"] == "USDJPY"
+
+    acks = [{"cmdId": o["cmdId"], "success": o["state"] != 3, "details": {"symbol": o["symbol"]}}
+            for o in batch["orders"]]
+    results = Functions.process_batch_ack(CLIENT, acks)
+    assert [r["result"]["ok"] for r in results] == [True, True, True]
+    assert [r["trade_info"]["success"] for r in results] == [False, True, True]
+    assert Functions.get_next_command(CLIENT, batch=True)["state"] == 0
+
+    # A single pending command keeps the plain message shape
+    Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 78})
+    msg = Functions.get_next_command(CLIENT, batch=True)
+    assert msg["state"] == 3 and msg["ticket"] == 78
+    Functions.ack_command(CLIENT, msg["cmdId"], True)
+    print("✅ PASS: Batch delivery and per-order ACKs")
+    return True
+
+
+def test_batch_limits_and_switch():
+    """COMMAND_BATCH_MAX caps a batch; COMMAND_BATCHING=False falls back to single"""
+    saved = (Globals.COMMAND_BATCHING, Globals.COMMAND_BATCH_MAX)
+    try:
+        _queue_orders()
+        Globals.COMMAND_BATCH_MAX = 2
+        batch = Functions.get_next_command(CLIENT, batch=True)
+        assert batch["count"] == 2
+
+        Globals.COMMAND_BATCHING = False
+        assert Functions.get_next_command(CLIENT, batch=True)["state"] == 3
+    finally:
+        Globals.COMMAND_BATCHING, Globals.COMMAND_BATCH_MAX = saved
+        with contextlib.redirect_stdout(io.StringIO()):
+            while True:
+                msg = Functions.get_next_command(CLIENT)
+                if msg["state"] == 0:
+                    break
+                Functions.ack_command(CLIENT, msg["cmdId"], True)
+    print("✅ PASS: Batch size limit and switch")
+    return True
+
+
+if __name__ == "__main__":
+    results = [
+        test_batch_delivery_and_acks(),
+        test_batch_limits_and_switch(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,192 @@
+"""
+Test the command scheduler
+Checks that closes are delivered before queued opens, that repeated closes for
+the same ticket are queued once, and that opens past their deadline expire
+without being sent (releasing the counts News.py took for them, under the
+news state lock), and that a poll returns its commands while the event
+pipeline (AI calls) runs in the background.
+"""
+
+import sys
+import os
+import io
+import time
+import threading
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+import GlobalsSnapshot
+
+
+CLIENT = "test_queue"
+
+
+def _drain(client_id):
+    """Deliver every queued command; return them in order (acked with success)."""
+    delivered = []
+    while True:
+        msg = Functions.get_next_command(client_id)
+        if msg.get("state", 0) == 0:
+            return delivered
+        delivered.append(msg)
+        Functions.ack_command(client_id, msg["cmdId"], True)
+
+
+def test_closes_before_opens():
+    """A close queued after opens is delivered first; a delivered open keeps its place"""
+    Functions.enqueue_command(CLIENT, 1, {"symbol": "EURUSD", "volume": 0.5})
+    sent = Functions.get_next_command(CLIENT)                  # in flight, not acked
+    Functions.enqueue_command(CLIENT, 2, {"symbol": "USDJPY", "volume": 0.5})
+    Functions.enqueue_command(CLIENT, 3, {"symbol": "GBPUSD", "ticket": 41})
+    Functions.enqueue_command(CLIENT, 3, {"symbol": "AUDUSD", "ticket": 42})
+
+    order = [(m["state"], m["symbol"]) for m in _drain(CLIENT)]
+    assert order[0] == (1, "EURUSD") and sent["symbol"] == "EURUSD"
+    assert order[1:] == [(3, "GBPUSD"), (3, "AUDUSD"), (2, "USDJPY")], order
+    assert Functions.get_command_queue(CLIENT) == []               # acked commands are pruned
+    Functions._CLIENT_CLOSING.pop(CLIENT, None)
+    print("✅ PASS: Closes before opens")
+    return True
+
+
+def test_close_deduplication():
+    """The same close every heartbeat is queued once until it fails or the ticket is gone"""
+    first = Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51})
+    for _ in range(5):
+        assert Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51}) is first
+    assert len(_drain(CLIENT)) == 1
+
+    # Acked but still listed by Packet A: still deduplicated
+    assert Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51}) is first
+    Functions.forget_closed_tickets(CLIENT, open_list=[{"ticket": 51}])
+    assert Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51}) is first
+    # Gone from Packet A: a new close may be queued
+    Functions.forget_closed_tickets(CLIENT, open_list=[])
+    again = Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51})
+    assert again is not first
+
+    # A failed close can be retried
+    msg = Functions.get_next_command(CLIENT)
+    Functions.ack_command(CLIENT, msg["cmdId"], False)
+    retry = Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 51})
+    assert retry is not again
+    _drain(CLIENT)
+    Functions.forget_closed_tickets(CLIENT, ticket=51)             # Packet E
+    assert not Functions._CLIENT_CLOSING[CLIENT]
+    print("✅ PASS: Close de-duplication")
+    return True
+
+
+def test_open_deadline_expiry():
+    """An undelivered open past its deadline is dropped and its counts released"""
+    saved = dict(Globals._CurrencyCount_), dict(Globals._PairCount_), Globals.TRACE_ENABLED
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    tid = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            trade = Functions.create_trade(CLIENT, "EURUSD", "BUY", 0.5, 50, 25, "test", nid=77)
+            tid = trade["TID"]
+            Functions.update_currency_count("EURUSD", "add")
+            Globals._PairCount_["EURUSD"] = Globals._PairCount_.get("EURUSD", 0) + 1
+            Globals._CurrencyPositions_["EUR"] = {"pair": "EURUSD", "action": "BUY", "ticket": 0, "TID": tid}
+
+            Functions.enqueue_command(CLIENT, 1, {"symbol": "EURUSD", "volume": 0.5, "tid": tid},
+                                      deadline=time.time() - 1)
+            Functions.enqueue_command(CLIENT, 2, {"symbol": "USDJPY", "volume": 0.5})   # default TTL
+            delivered = _drain(CLIENT)
+
+        assert [m["symbol"] for m in delivered] == ["USDJPY"], delivered
+        assert Functions.get_trade_by_tid(tid)["status"] == "expired"
+        assert Globals._CurrencyCount_["EUR"] == saved[0]["EUR"]
+        assert Globals._PairCount_.get("EURUSD", 0) == saved[1].get("EURUSD", 0)
+        assert "EUR" not in Globals._CurrencyPositions_
+        print("✅ PASS: Open deadline expiry")
+        return True
+    finally:
+        Globals._CurrencyCount_.update(saved[0])
+        Globals._PairCount_.clear()
+        Globals._PairCount_.update(saved[1])
+        Globals._CurrencyPositions_.clear()
+        Globals._Trades_.pop(tid, None)
+        Globals.TRACE_ENABLED = saved[2]
+
+
+def test_expiry_waits_for_news_orders():
+    """The rollback on a poll thread waits while another thread holds News._STATE_LOCK"""
+    saved = dict(Globals._CurrencyCount_), Globals.TRACE_ENABLED
+    Globals.TRACE_ENABLED = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Functions.update_currency_count("EURUSD", "add")
+            Functions.enqueue_command(CLIENT, 1, {"symbol": "EURUSD", "volume": 0.5, "tid": "TID_test_q"},
+                                      deadline=time.time() - 1)
+            poll = threading.Thread(target=Functions.get_next_command, args=(CLIENT,))
+            with News._STATE_LOCK:   # another account queuing news orders
+                poll.start()
+                time.sleep(0.1)
+                held = Globals._CurrencyCount_["EUR"]
+            poll.join(5)
+
+        assert held == saved[0]["EUR"] + 1       # not changed under the news thread
+        assert Globals._CurrencyCount_["EUR"] == saved[0]["EUR"] and not poll.is_alive()
+        assert Functions.get_command_queue(CLIENT) == []
+        print("✅ PASS: Expiry waits for news orders")
+        return True
+    finally:
+        Globals._CurrencyCount_.update(saved[0])
+        Globals.TRACE_ENABLED = saved[1]
+
+
+def test_poll_not_blocked_by_event_pipeline():
+    """handle_news() only kicks steps 1-6: the poll gets its close while the AI call is still running"""
+    saved = GlobalsSnapshot.Preserve("TRACE_ENABLED", "market_is_open",
+                                     modules={News: ("_clock", "_run_event_pipeline")}, clients=(CLIENT,)).save()
+    gate = threading.Event()
+    runs = []
+
+    def pipeline(client_id, stats):   # an AI fetch waiting on its deadline
+        runs.append(client_id)
+        gate.wait(5)
+
+    try:
+        Globals.TRACE_ENABLED = False
+        News._clock = lambda tz=None: datetime(2025, 11, 18, 9, 0)   # Tuesday
+        News._run_event_pipeline = pipeline
+        with contextlib.redirect_stdout(io.StringIO()):
+            Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 4242})
+            started = time.monotonic()
+            News.handle_news(CLIENT, {"replies": 1})
+            News.handle_news(CLIENT, {"replies": 2})   # a run is still going: not started again
+            close = Functions.get_next_command(CLIENT)
+            elapsed = time.monotonic() - started
+            gate.set()
+            News.wait_events(timeout=5)
+            News.handle_news(CLIENT, {"replies": 3})
+            News.wait_events(timeout=5)
+
+        assert elapsed < 1.0, elapsed
+        assert close["state"] == 3 and close["ticket"] == 4242
+        assert runs == [CLIENT, CLIENT]
+        print("✅ PASS: Poll not blocked by the event pipeline")
+        return True
+    finally:
+        gate.set()
+        News.wait_events(timeout=5)
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_closes_before_opens(),
+        test_close_deduplication(),
+        test_open_deadline_expiry(),
+        test_expiry_waits_for_news_orders(),
+        test_poll_not_blocked_by_event_pipeline(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,138 @@
+"""
+Test the symbol × currency incidence matrix
+Checks base/quote signs, exposure as a matrix-vector product and that the
+vectorized can-open mask agrees with can_open_trade() for every symbol,
+plus the spread-ordered currency → pair priority index and its rebuild
+when symbolsToTrade is edited in place.
+"""
+
+import sys
+import os
+import io
+import contextlib
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import CurrencyExposure
+
+
+def _reset_counts():
+    for currency in Globals._CurrencyCount_:
+        Globals._CurrencyCount_[currency] = 0
+
+
+def test_signed_incidence():
+    """Base is +1, quote is -1, crypto maps to BTC"""
+    index = CurrencyExposure.ExposureIndex(["EURUSD", "USDJPY", "XAUUSD", "BITCOIN"])
+    col = CurrencyExposure.CURRENCY_COLUMN
+    assert index.signed[index.row["EURUSD"], col["EUR"]] == 1
+    assert index.signed[index.row["EURUSD"], col["USD"]] == -1
+    assert index.signed[index.row["USDJPY"], col["USD"]] == 1
+    assert index.signed[index.row["XAUUSD"], col["XAU"]] == 1
+    assert index.signed[index.row["BITCOIN"]].tolist().count(0) == len(CurrencyExposure.CURRENCIES) - 1
+    assert Functions.extract_currencies("GBPJPY") == ["JPY", "GBP"]
+    assert Functions.extract_currencies("ETHEREUM") == ["BTC"]
+
+    counts = index.exposure(["EURUSD", "USDJPY", "EURUSD"])
+    assert counts[col["USD"]] == 3 and counts[col["EUR"]] == 2 and counts[col["JPY"]] == 1
+
+    net = index.net_exposure([{"symbol": "EURUSD", "type": "BUY"}, {"symbol": "USDJPY", "type": "SELL"}])
+    assert net[col["EUR"]] == 1 and net[col["USD"]] == -2 and net[col["JPY"]] == 1
+    print("✅ PASS: Signed incidence and exposure")
+    return True
+
+
+def test_mask_matches_can_open_trade():
+    """Vectorized mask and find_available_pair_for_currency agree with the per-symbol checks"""
+    saved = (Globals.news_filter_maxTradePerCurrency, Globals.news_filter_findAllPairs, Globals.symbolsToTrade)
+    try:
+        _reset_counts()
+        Globals.news_filter_maxTradePerCurrency = 2
+        Globals.news_filter_findAllPairs = True
+        Globals.symbolsToTrade = {"EURUSD", "EURGBP"}
+        for symbol in ("EURUSD", "EURJPY", "GBPUSD"):
+            Functions.update_currency_count(symbol, "add")
+
+        index = CurrencyExposure.get_index()
+        assert index.counts_vector(Globals._CurrencyCount_).tolist() == \
+            index.exposure(["EURUSD", "EURJPY", "GBPUSD"]).tolist()
+
+        mask = index.can_open_mask(Globals._CurrencyCount_, Globals.news_filter_maxTradePerCurrency)
+        for symbol, row in index.row.items():
+            assert mask[row] == Functions.can_open_trade(symbol), symbol
+
+        # EUR and USD are at the limit: no EUR pair, first GBP pair outside symbolsToTrade
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert Functions.find_available_pair_for_currency("EUR") is None
+            found = Functions.find_available_pair_for_currency("GBP")
+        expected = next(s for s in Globals._Symbols_
+                        if "GBP" in Functions.extract_currencies(s) and Functions.can_open_trade(s))
+        assert found == expected, (found, expected)
+        print("✅ PASS: Vectorized mask matches can_open_trade()")
+        return True
+    finally:
+        _reset_counts()
+        Globals.news_filter_maxTradePerCurrency, Globals.news_filter_findAllPairs, Globals.symbolsToTrade = saved
+
+
+def test_priority_index_orders_by_spread():
+    """symbolsToTrade first, tightest spread within a tier, memoized per blocked mask"""
+    index = CurrencyExposure.ExposureIndex(["EURUSD", "EURJPY", "EURGBP", "EURCHF", "GBPUSD"])
+    spreads = np.array([1.0, 2.5, 0.8, np.nan, 1.2])
+    priority = CurrencyExposure.PairPriorityIndex(index, {"EURUSD", "EURCHF", "EURGBP"}, spreads)
+
+    assert [index.symbols[r] for r in priority.primary["EUR"]] == ["EURGBP", "EURUSD", "EURCHF"]
+    assert [index.symbols[r] for r in priority.secondary["EUR"]] == ["EURJPY"]
+
+    counts = {currency: 0 for currency in CurrencyExposure.CURRENCIES}
+    assert priority.first_available("EUR", 0, False) == ("EURGBP", "symbolsToTrade")
+
+    counts["GBP"] = 2
+    counts["USD"] = 2
+    blocked = CurrencyExposure.blocked_mask(counts, 2)
+    assert priority.first_available("EUR", blocked, False) == ("EURCHF", "symbolsToTrade")
+
+    counts["CHF"] = 2
+    blocked = CurrencyExposure.blocked_mask(counts, 2)
+    assert priority.first_available("EUR", blocked, False) == (None, None)
+    assert priority.first_available("EUR", blocked, True) == ("EURJPY", "_Symbols_")
+    assert ("EUR", blocked, True) in priority._memo
+    assert CurrencyExposure.blocked_mask(counts, 0) == 0
+    print("✅ PASS: Priority index orders by spread")
+    return True
+
+
+def test_priority_index_follows_in_place_edits():
+    """Swapping a symbolsToTrade entry in place (same set, same size) rebuilds the index"""
+    saved = Globals.symbolsToTrade
+    try:
+        Globals.symbolsToTrade = {"EURUSD", "GBPUSD"}
+        first = CurrencyExposure.get_priority_index()
+        assert CurrencyExposure.get_priority_index() is first, "unchanged inputs reuse the index"
+        exposure = CurrencyExposure.get_index()
+        assert [exposure.symbols[r] for r in first.primary["GBP"]] == ["GBPUSD"]
+
+        Globals.symbolsToTrade.discard("GBPUSD")
+        Globals.symbolsToTrade.add("EURGBP")
+        rebuilt = CurrencyExposure.get_priority_index()
+        assert rebuilt is not first
+        assert [exposure.symbols[r] for r in rebuilt.primary["GBP"]] == ["EURGBP"]
+        print("✅ PASS: Priority index follows in-place edits")
+        return True
+    finally:
+        Globals.symbolsToTrade = saved
+
+
+if __name__ == "__main__":
+    results = [
+        test_signed_incidence(),
+        test_mask_matches_can_open_trade(),
+        test_priority_index_orders_by_spread(),
+        test_priority_index_follows_in_place_edits(),
+    ]
+    sys.exit(0 if all(results) else 1)
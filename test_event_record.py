@@ -0,0 +1,140 @@
+"""
+Test the compact event records in _Currencies_
+Checks dict-style compatibility (old dict entries are converted, date/ai_date
+are derived from event_time), lookups by integer event id, the memory saved
+against the old 17-key dicts, and the single-pass monitor scan.
+"""
+
+import sys
+import os
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Calendar
+import News
+from Events import EventRecord, EventTable
+
+
+RELEASE = datetime(2025, 11, 18, 8, 30)
+
+
+def _old_entry(currency, event_name, event_time):
+    """_Currencies_ entry as initialize_news_forecasts() used to build it."""
+    return {
+        'currency': currency, 'date': event_time.strftime("%Y, %B %d, %H:%M"),
+        'ai_date': event_time.strftime("%B %d, %Y"), 'event': event_name,
+        'forecast': None, 'actual': None, 'affect': None, 'retry_count': 0,
+        'retry_after': None, 'forecast_retry_attempted': False, 'event_time': event_time,
+        'NID': None, 'NID_Affect': 0, 'NID_Affect_Executed': 0, 'NID_TP': 0, 'NID_SL': 0
+    }
+
+
+def test_dict_compatibility():
+    """Old dict entries become records; reads and writes behave like the dict did"""
+    table = EventTable()
+    key = Calendar.event_key("CAD", RELEASE, "(Canada) CPI YoY")
+    old = _old_entry("CAD", "(Canada) CPI YoY", RELEASE)
+    table[key] = dict(old)
+    record = table[key]
+
+    assert isinstance(record, EventRecord) and record.key == key
+    assert record.to_dict() == dict(old, impact=None)
+    assert record["ai_date"] == "November 18, 2025" and record.date == "2025, November 18, 08:30"
+    assert record.get("retry_count", 5) == 0 and record.get("missing", "x") == "x"
+    record["NID_TP"] = record.get("NID_TP", 0) + 1
+    record.update({"forecast": 2.0, "actual": 2.5, "source": "test"})
+    assert (record.NID_TP, record.actual, record["source"]) == (1, 2.5, "test")
+    assert "source" in record and "missing" not in record
+    try:
+        record["missing"]
+        raise AssertionError("KeyError expected")
+    except KeyError:
+        pass
+
+    # Currency codes and names are interned; a non-standard date string is kept as given
+    other = EventRecord.from_dict({"currency": "".join(["C", "AD"]), "event": "x",
+                                   "event_time": RELEASE, "date": "18.11.2025 08:30"})
+    assert other.currency is record.currency
+    assert other["date"] == "18.11.2025 08:30"
+
+    # Integer event id → record (old string key stays the table key)
+    assert table.by_id(record.eid) is record
+    del table[key]
+    assert table.by_id(record.eid) is None
+    print("✅ PASS: Dict compatibility")
+    return True
+
+
+def test_memory_footprint():
+    """A month of records takes well under half the memory of the old dicts"""
+    names = [f"(Euro Area) Indicator {i}" for i in range(40)]
+    times = [RELEASE + timedelta(minutes=15 * i) for i in range(3000)]
+
+    def build(make):
+        tracemalloc.start()
+        table = {}
+        for i, event_time in enumerate(times):
+            name = names[i % len(names)]
+            table[Calendar.event_key("EUR", event_time, name)] = make(name, event_time)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    old_size = build(lambda name, t: _old_entry("EUR", name, t))
+    new_size = build(lambda name, t: EventRecord("EUR", name, t))
+    assert new_size < old_size * 0.5, (new_size, old_size)
+    print(f"✅ PASS: Memory footprint ({new_size // 1024} KB vs {old_size // 1024} KB)")
+    return True
+
+
+def test_monitor_scan():
+    """monitor_news_events() returns the ready events at the earliest time in one pass"""
+    saved = (News._clock, News._initialization_complete, Globals.TRACE_ENABLED)
+    News._clock = lambda tz=None: RELEASE + timedelta(minutes=1)
+    News._initialization_complete = True
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    keys = []
+
+    def add(currency, name, event_time, **fields):
+        key = Calendar.event_key(currency, event_time, name)
+        Globals._Currencies_[key] = EventRecord(currency, name, event_time)
+        Globals._Currencies_[key].update(fields)
+        keys.append(key)
+        return key
+
+    try:
+        done = add("USD", "Done", RELEASE - timedelta(hours=1), actual=1.0)
+        add("JPY", "Retry Later", RELEASE - timedelta(minutes=30),
+            retry_count=1, retry_after=RELEASE + timedelta(minutes=5))
+        cad = add("CAD", "(Canada) CPI YoY", RELEASE)
+        cad2 = add("CAD", "(Canada) CPI Trimmed-Mean YoY", RELEASE)
+        gave_up = add("GBP", "Gave Up", RELEASE - timedelta(minutes=10), retry_count=2)
+        future = add("EUR", "Later", RELEASE + timedelta(hours=1))
+
+        assert News.monitor_news_events() == [cad, cad2]
+        Globals._Currencies_[gave_up]["actual"] = 0.0
+        for key in (cad, cad2):
+            Globals._Currencies_[key]["actual"] = 3.0
+        nxt = News.get_next_event_info()
+        assert nxt["count"] == 1 and nxt["events"][0]["currency"] == "JPY"
+        assert nxt["time"] == RELEASE - timedelta(minutes=30)
+        assert done not in News.monitor_news_events() and future in Globals._Currencies_
+        print("✅ PASS: Monitor scan")
+        return True
+    finally:
+        News._clock, News._initialization_complete, Globals.TRACE_ENABLED = saved
+        for key in keys:
+            Globals._Currencies_.pop(key, None)
+
+
+if __name__ == "__main__":
+    results = [
+        test_dict_compatibility(),
+        test_memory_footprint(),
+        test_monitor_scan(),
+    ]
+    sys.exit(0 if all(results) else 1)
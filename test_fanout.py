@@ -0,0 +1,205 @@
+"""
+Test the verdict fan-out (STEP 7)
+Checks that one drained verdict becomes an order for every attached account,
+sized with each account's lot multiplier and filtered on each account's own
+exposure, that accounts not polling or past their weekly goal are left out,
+that the S4 weekly lock is decided once per verdict for all accounts, and that
+an S3 reversal closes every account's own position before its reversed open
+(an S5 conflict waits for the closes on every account).
+"""
+
+import sys
+import os
+import io
+import time
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+import Accounts
+import PendingCloses
+import GlobalsSnapshot
+
+
+MAIN = "test_fan_main"
+OTHER = "test_fan_other"
+STALE = "test_fan_stale"
+DONE = "test_fan_done"
+CLIENTS = (MAIN, OTHER, STALE, DONE)
+
+
+def _attach(client_id, lot_multiplier, last_seen):
+    account = Accounts.get(client_id)
+    account.lot_multiplier = lot_multiplier
+    Functions._CLIENT_LAST_SEEN[client_id] = last_seen
+    return account
+
+
+def _publish(key, verdicts):
+    Globals._Currencies_[key] = {
+        "currency": "USD", "date": "2025, November 18, 08:30", "event": "(USD) CPI YoY",
+        "NID": 951, "NID_Affect": 0, "NID_Affect_Executed": 0,
+    }
+    News.update_affected_symbols(key, verdicts)
+
+
+def _orders(client_id):
+    return [(cmd["payload"]["symbol"], cmd["payload"]["volume"]) for cmd in Functions.get_command_queue(client_id)]
+
+
+def _deliver(client_id):
+    """Deliver every queued command, acked with success; return (state, symbol) in order."""
+    delivered = []
+    while True:
+        msg = Functions.get_next_command(client_id)
+        if msg.get("state", 0) == 0:
+            return delivered
+        delivered.append((msg["state"], msg["symbol"]))
+        Functions.ack_command(client_id, msg["cmdId"], True)
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("symbolsToTrade", "news_filter_maxTradePerCurrency", "news_filter_rollingMode",
+                                 "news_filter_weeklyFirstOnly", "news_filter_findAvailablePair", "TRACE_ENABLED",
+                                 "MAIN_MT5_ACCOUNT", "news_filter_confirmationRequired", "news_filter_conflictHandling",
+                                 tables=("_Currencies_", "_PairsTraded_ThisWeek_", "_CurrencyCount_", "_PairCount_",
+                                         "_CurrencyPositions_", "_Affected_", "_Trades_", "_PendingCloses_",
+                                         "_CurrencySentiment_"),
+                                 modules={News: ("_clock", "_current_client_id")}, clients=CLIENTS)
+
+
+def _setup():
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    News._clock = lambda tz=None: datetime(2025, 11, 18, 9, 0)   # Tuesday
+    Globals.symbolsToTrade = {"EURUSD", "USDJPY", "GBPUSD"}
+    Globals.news_filter_maxTradePerCurrency = 2
+    Globals.news_filter_rollingMode = False
+    Globals.news_filter_weeklyFirstOnly = False
+    Globals.news_filter_findAvailablePair = True
+    Globals.MAIN_MT5_ACCOUNT = MAIN
+    now = time.time()
+    _attach(MAIN, 0.5, now)
+    _attach(OTHER, 2.0, now)
+    _attach(STALE, 1.0, now - 3600)
+    _attach(DONE, 1.0, now).weekly_goal_reached = True
+
+
+def test_one_verdict_many_accounts():
+    """Each attached account gets its own sized order; absent accounts get none"""
+    saved = STATE.save()
+    try:
+        _setup()
+        Accounts.get(OTHER).exposure["EUR"] = 2   # OTHER is already full on EUR: finds another USD pair
+        with contextlib.redirect_stdout(io.StringIO()):
+            _publish("EVT_FAN", {"EURUSD": "SELL", "USDJPY": "BUY"})
+            queued = News.execute_news_trades(OTHER)   # a non-primary heartbeat drains
+            assert News.execute_news_trades(MAIN) == 0
+
+        lots = {pair: Globals._Symbols_[pair]["lot"] for pair in ("EURUSD", "USDJPY", "GBPUSD")}
+        assert queued == 4
+        assert _orders(MAIN) == [("EURUSD", round(lots["EURUSD"] * 0.5, 2)), ("USDJPY", round(lots["USDJPY"] * 0.5, 2))]
+        assert _orders(OTHER) == [("GBPUSD", round(lots["GBPUSD"] * 2.0, 2)), ("USDJPY", round(lots["USDJPY"] * 2.0, 2))]
+        assert _orders(STALE) == [] and _orders(DONE) == []
+        assert Accounts.get(MAIN).exposure["USD"] == 2 and Accounts.get(OTHER).exposure["GBP"] == 1
+        assert Globals._CurrencyPositions_["USD"]["client_id"] == MAIN
+        assert Globals._Currencies_["EVT_FAN"]["NID_Affect_Executed"] == 4
+        print("✅ PASS: One verdict, many accounts")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_s4_decided_once_per_verdict():
+    """S4: the first account marks the pair, the others follow within the same pass"""
+    saved = STATE.save()
+    try:
+        _setup()
+        Globals.news_filter_weeklyFirstOnly = True
+        Globals._PairsTraded_ThisWeek_.pop("GBPUSD", None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _publish("EVT_FAN", {"GBPUSD": "BUY"})
+            first = News.execute_news_trades(MAIN)
+            _publish("EVT_FAN", {"GBPUSD": "SELL"})
+            second = News.execute_news_trades(MAIN)
+
+        assert (first, second) == (2, 0)
+        assert [symbol for symbol, _ in _orders(MAIN) + _orders(OTHER)] == ["GBPUSD", "GBPUSD"]
+        assert Globals._PairsTraded_ThisWeek_["GBPUSD"] is True
+        print("✅ PASS: S4 decided once per verdict")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_s3_reversal_closes_every_account():
+    """S3: each account closes its own position, then opens the reversed one"""
+    saved = STATE.save()
+    try:
+        _setup()
+        Globals.news_filter_rollingMode = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            _publish("EVT_FAN", {"EURUSD": "BUY"})
+            assert News.execute_news_trades(MAIN) == 2
+            assert _deliver(MAIN) == [(1, "EURUSD")] and _deliver(OTHER) == [(1, "EURUSD")]
+
+            _publish("EVT_FAN", {"EURUSD": "SELL"})
+            assert News.execute_news_trades(MAIN) == 0   # nothing opens before the closes
+            assert PendingCloses.get("S3:USD") and PendingCloses.get(f"S3:USD:{OTHER}")
+            assert Accounts.get(OTHER).positions["USD"]["action"] == "SELL"
+
+            # The first delivery acks the close; its reversed open is queued and delivered next
+            assert _deliver(OTHER) == [(3, "EURUSD"), (2, "EURUSD")]
+            assert _deliver(MAIN) == [(3, "EURUSD"), (2, "EURUSD")]
+
+        assert not Globals._PendingCloses_
+        for client_id in (MAIN, OTHER):
+            position = Accounts.get(client_id).positions["USD"]
+            assert position["action"] == "SELL" and position["TID"] and position["client_id"] == client_id
+        assert Globals._CurrencyPositions_["USD"]["client_id"] == MAIN
+        assert _deliver(STALE) == [] and _deliver(DONE) == []
+        print("✅ PASS: S3 reversal closes every account")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_s5_conflict_closes_every_account():
+    """S5: a conflict closes the currency on every account; new positions wait for all of them"""
+    saved = STATE.save()
+    try:
+        _setup()
+        Globals.news_filter_confirmationRequired = True
+        Globals.news_filter_conflictHandling = "reverse"
+        Globals._CurrencySentiment_["USD"] = {"direction": "BULL", "count": 2, "positions_opened": 1}
+        Functions._CLIENT_OPEN[MAIN] = [{"ticket": 701, "symbol": "EURUSD"}, {"ticket": 702, "symbol": "EURGBP"}]
+        Functions._CLIENT_OPEN[OTHER] = [{"ticket": 801, "symbol": "USDJPY"}]
+        News._current_client_id = MAIN
+        with contextlib.redirect_stdout(io.StringIO()):
+            _publish("EVT_FAN", {})
+            Globals._Currencies_["EVT_FAN"]["affect"] = "BEAR"
+            assert News.generate_trading_decisions("EVT_FAN") == {}
+            assert _deliver(MAIN) == [(3, "EURUSD")]
+            assert Globals._CurrencySentiment_["USD"]["positions_opened"] == 1   # OTHER still closing
+            assert _deliver(OTHER) == [(3, "USDJPY")]
+
+        assert not Globals._PendingCloses_
+        assert Globals._CurrencySentiment_["USD"] == {"direction": "BEAR", "count": 1, "positions_opened": 0}
+        print("✅ PASS: S5 conflict closes every account")
+        return True
+    finally:
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_one_verdict_many_accounts(),
+        test_s4_decided_once_per_verdict(),
+        test_s3_reversal_closes_every_account(),
+        test_s5_conflict_closes_every_account(),
+    ]
+    sys.exit(0 if all(results) else 1)
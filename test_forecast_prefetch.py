@@ -0,0 +1,163 @@
+"""
+Test the forecast pre-fetch (ForecastPrefetch.py)
+Checks that upcoming forecasts are fetched in the background, at most
+FORECAST_PREFETCH_WORKERS at once, only within FORECAST_PREFETCH_LEAD and
+never in a quiet window around a release, that a miss is retried later, and
+that the release query then asks for the Actual only, with no forecast retry
+inside the trading window unless the pre-fetch never tried the event.
+"""
+
+import sys
+import os
+import io
+import threading
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import News
+import ForecastPrefetch
+import GlobalsSnapshot
+from Events import EventRecord
+
+
+NOW = datetime(2025, 11, 18, 2, 0)
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("FORECAST_PREFETCH_ENABLED", "FORECAST_PREFETCH_LEAD", "FORECAST_PREFETCH_QUIET",
+                                 "FORECAST_PREFETCH_WORKERS", "FORECAST_PREFETCH_ATTEMPTS", "FORECAST_PREFETCH_RETRY",
+                                 "user_process_forecast_first", "MAX_DAILY_AI_CALLS", "AI_BUDGET_POOL", "ai_calls_today",
+                                 "ai_calls_reset_date", "AI_EVENT_WINDOW", "AI_REQUEST_DELAY", "AI_RACE_ENABLED",
+                                 "TRACE_ENABLED", tables=("_Currencies_", "_AIBudget_"),
+                                 modules={News: ("_clock", "get_news_data", "validate_news_data", "calculate_affect",
+                                                 "generate_trading_decisions", "update_affected_symbols")},
+                                 stores=(ForecastPrefetch._jobs,))
+
+
+def _setup():
+    Globals.FORECAST_PREFETCH_ENABLED = True
+    Globals.FORECAST_PREFETCH_LEAD = 6 * 3600
+    Globals.FORECAST_PREFETCH_QUIET = 600
+    Globals.FORECAST_PREFETCH_WORKERS = 2
+    Globals.FORECAST_PREFETCH_ATTEMPTS = 3
+    Globals.FORECAST_PREFETCH_RETRY = 1800
+    Globals.user_process_forecast_first = False
+    Globals.MAX_DAILY_AI_CALLS, Globals.AI_BUDGET_POOL = 100, 20
+    Globals.TRACE_ENABLED = False
+    Globals._Currencies_.clear()
+    Globals._AIBudget_.clear()
+    ForecastPrefetch._jobs.clear()
+    News._clock = lambda tz=None: NOW
+
+
+def _event(key, name, hours):
+    Globals._Currencies_[key] = EventRecord("USD", name, NOW + timedelta(hours=hours), impact="High")
+    return Globals._Currencies_[key]
+
+
+def test_prefetch_schedule():
+    """Two at a time, earliest first, inside the lead, outside quiet windows; misses retried later"""
+    saved = STATE.save()
+    gate = threading.Event()
+    active, peak, calls = [0], [0], []
+    lock = threading.Lock()
+    answers = {"(United States) CPI YoY": "Forecast : 2.9", "(United States) Retail Sales MoM": "Forecast : 0.4",
+               "(United States) Building Permits": "Source : MyFxBook",
+               "(United States) Nonfarm Payrolls": "Forecast : 110"}
+
+    def get_news_data(event_name, currency, date, request_type):
+        with lock:
+            calls.append((event_name, request_type))
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        gate.wait(5)
+        with lock:
+            active[0] -= 1
+        return answers[event_name]
+
+    try:
+        _setup()
+        News.get_news_data = get_news_data
+        cpi = _event("TEST_PF_CPI", "(United States) CPI YoY", 1)
+        retail = _event("TEST_PF_RETAIL", "(United States) Retail Sales MoM", 2)
+        permits = _event("TEST_PF_PERMITS", "(United States) Building Permits", 3)
+        nfp = _event("TEST_PF_NFP", "(United States) Nonfarm Payrolls", 10)   # beyond the lead
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert ForecastPrefetch.tick(NOW) == 2
+            assert ForecastPrefetch.tick(NOW) == 0   # both workers busy
+            gate.set()
+            ForecastPrefetch.wait(timeout=5)
+            assert ForecastPrefetch.tick(cpi.event_time - timedelta(minutes=5)) == 0   # quiet window
+            assert ForecastPrefetch.tick(NOW) == 1
+            ForecastPrefetch.wait(timeout=5)
+            assert ForecastPrefetch.tick(NOW) == 0   # Building Permits retried only after FORECAST_PREFETCH_RETRY
+            assert ForecastPrefetch.tick(NOW + timedelta(seconds=1800)) == 1
+            ForecastPrefetch.wait(timeout=5)
+
+            Globals.user_process_forecast_first = True   # forecast-first: every upcoming event, lead ignored
+            assert ForecastPrefetch.tick(NOW + timedelta(seconds=1800)) == 1
+            ForecastPrefetch.wait(timeout=5)
+
+        assert peak[0] == 2
+        assert [name for name, _ in calls[:2]] == ["(United States) CPI YoY", "(United States) Retail Sales MoM"]
+        assert {request_type for _, request_type in calls} == {"forecast"}
+        assert (cpi.forecast, retail.forecast, permits.forecast, nfp.forecast) == (2.9, 0.4, None, 110.0)
+        assert ForecastPrefetch.settled("TEST_PF_CPI") and not ForecastPrefetch.settled("TEST_PF_PERMITS")
+        assert ForecastPrefetch._jobs["TEST_PF_PERMITS"]["attempts"] == 2
+        assert Globals._AIBudget_["pool_used"] == 5   # charged to the shared pool, not the reservations
+        print("✅ PASS: Prefetch schedule")
+        return True
+    finally:
+        gate.set()
+        ForecastPrefetch.wait(timeout=5)
+        saved.restore()
+
+
+def test_release_asks_for_actual_only():
+    """With the forecast pre-fetched the release query is actual-only; a forecast retry only if never pre-fetched"""
+    saved = STATE.save()
+    calls = []
+    try:
+        _setup()
+        Globals.AI_EVENT_WINDOW = 900
+        Globals.AI_REQUEST_DELAY = 0
+        Globals.AI_RACE_ENABLED = False
+        News.get_news_data = lambda event_name, currency, date, request_type: (
+            calls.append(request_type) or "Actual : 3.1\nSource : MyFxBook")
+        News.validate_news_data = lambda text: text
+        News.calculate_affect = News.generate_trading_decisions = lambda event_key: {}
+        News.update_affected_symbols = lambda event_key, signals: None
+        cpi = _event("TEST_PF_CPI", "(United States) CPI YoY", 0)
+        cpi.forecast = 2.9
+        permits = _event("TEST_PF_PERMITS", "(United States) Building Permits", 0)
+        ForecastPrefetch._jobs["TEST_PF_PERMITS"] = {"attempts": 3, "next_at": NOW, "running": False, "settled": False}
+        retail = _event("TEST_PF_RETAIL", "(United States) Retail Sales MoM", 0)   # added after the pre-fetch ran
+        News._clock = lambda tz=None: cpi.event_time + timedelta(seconds=6)
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            assert News.fetch_actual_value("TEST_PF_CPI") is True
+            assert News.fetch_actual_value("TEST_PF_PERMITS") is True   # pre-fetch found nothing: asks for both
+            skipped = out.getvalue()
+            assert News.fetch_actual_value("TEST_PF_RETAIL") is True    # never pre-fetched: one forecast retry
+
+        assert calls == ["actual", "both", "both", "forecast"]
+        assert cpi.actual == 3.1 and permits.actual == 3.1 and permits.forecast is None
+        assert "[SKIP RETRY]" in skipped and "[SKIP RETRY]" not in out.getvalue()[len(skipped):]
+        assert retail.get('forecast_retry_attempted') and not permits.get('forecast_retry_attempted')
+        print("✅ PASS: Release asks for actual only")
+        return True
+    finally:
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_prefetch_schedule(),
+        test_release_asks_for_actual_only(),
+    ]
+    sys.exit(0 if all(results) else 1)
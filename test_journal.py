@@ -0,0 +1,149 @@
+"""
+Test the state journal
+Checks that trades, tickets, currency counts, NID assignments, S5 sentiment
+and unacknowledged commands are rebuilt from the journal after a restart
+(including after a torn last record), and that recovery from a snapshot only
+replays the newer records.
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+import Journal
+import StateStore
+import GlobalsSnapshot
+
+
+CLIENT = "test_journal"
+EVENT_KEY = "EUR_2025-11-18_08:30_journal"
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("_News_ID_Counter_", "_Journal_Seq_", "TRACE_ENABLED",
+                                 tables=StateStore.TRACKED, clients=(CLIENT,))
+
+
+def _crash():
+    """Lose everything in memory, as a restart would."""
+    Journal.stop()
+    for name in StateStore.TRACKED:
+        getattr(Globals, name).clear()
+    Globals._CurrencyCount_.update({"EUR": 0, "USD": 0})
+    Globals._News_ID_Counter_ = 0
+    Globals._Journal_Seq_ = 0
+    Functions._CLIENT_COMMANDS.pop(CLIENT, None)
+    Functions._CLIENT_CLOSING.pop(CLIENT, None)
+
+
+def _trade_flow():
+    """calculate_affect → create_trade → counts → ticket → S5 sentiment → commands"""
+    Globals._Currencies_[EVENT_KEY] = {"currency": "EUR", "event": "(Euro Area) CPI YoY",
+                                        "event_time": datetime(2025, 11, 18, 8, 30),
+                                        "forecast": 2.1, "actual": 2.4}
+    News.calculate_affect(EVENT_KEY)
+    nid = Globals._Currencies_[EVENT_KEY]["NID"]
+    trade = Functions.create_trade(CLIENT, "EURUSD", "BUY", 0.5, 50, 25, "test", nid=nid)
+    Functions.update_currency_count("EURUSD", "add")
+    Functions.update_trade_ticket(trade["TID"], 555)
+    Globals._CurrencySentiment_["EUR"] = {"direction": "BULL", "count": 2, "positions_opened": 1}
+    Journal.sync_sentiment()
+
+    opened = Functions.enqueue_command(CLIENT, 1, {"symbol": "EURUSD", "volume": 0.5, "tid": trade["TID"]})
+    Functions.get_next_command(CLIENT)
+    Functions.ack_command(CLIENT, opened["cmdId"], True)
+    close = Functions.enqueue_command(CLIENT, 3, {"symbol": "GBPUSD", "ticket": 77})
+    return nid, trade["TID"], close["cmdId"]
+
+
+def test_replay_after_restart():
+    """A restart with no snapshot rebuilds the state from the records alone"""
+    saved = STATE.save()
+    folder = tempfile.mkdtemp()
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _crash()
+            Journal.start(folder=folder)
+            nid, tid, close_id = _trade_flow()
+            last_seq = Globals._Journal_Seq_
+            _crash()
+
+            # Torn write at the crash: half a record at the end of the segment
+            with open(Journal.segments(folder)[-1], "ab") as f:
+                f.write(b"\x40\x00\x00\x00{\"q\":")
+            summary = Journal.start(folder=folder)
+
+        assert summary["replayed"] > 0 and summary["seq"] == last_seq
+        assert Globals._Currencies_[EVENT_KEY].NID == nid and Globals._Currencies_[EVENT_KEY].affect == "BULL"
+        assert Globals._News_ID_Counter_ == nid and Globals._Trade_ID_Counter_[nid] == 1
+        trade = Globals._Trades_[tid]
+        assert (trade["ticket"], trade["status"], trade["symbol"]) == (555, "executed", "EURUSD")
+        assert Globals._CurrencyCount_["EUR"] == 1 and Globals._CurrencyCount_["USD"] == 1
+        assert Globals._CurrencySentiment_["EUR"]["positions_opened"] == 1
+
+        # The acked open is gone; the unacked close is delivered again
+        queue = Functions.get_command_queue(CLIENT)
+        assert [cmd["cmdId"] for cmd in queue] == [close_id]
+        assert 77 in Functions._CLIENT_CLOSING[CLIENT]
+        assert Globals._Journal_Seq_ == last_seq
+        print("✅ PASS: Replay after restart")
+        return True
+    finally:
+        Journal.stop()
+        saved.restore()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_snapshot_and_tail():
+    """Snapshot + tail rebuilds everything; a store already at the tail replays nothing"""
+    saved = STATE.save()
+    folder = tempfile.mkdtemp()
+    Globals.TRACE_ENABLED = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _crash()
+            Journal.start(folder=folder)
+            nid, tid, close_id = _trade_flow()
+            snapshot_seq = Journal.snapshot()
+            Functions.update_currency_count("EURUSD", "add")       # after the snapshot
+            Functions.update_trade_ticket(tid, 556)
+            tail = list(Journal.read(folder, after=snapshot_seq))
+            _crash()
+            summary = Journal.start(folder=folder)
+            rebuilt = (dict(Globals._CurrencyCount_), Globals._Trades_[tid]["ticket"])
+
+            # State store already flushed through the last record: only commands come back
+            last_seq = Globals._Journal_Seq_
+            _crash()
+            handoff = Journal.start(applied_seq=last_seq, folder=folder)
+
+        assert len(Journal.segments(folder)) == 3 and [e["o"] for e in tail] == ["count", "ticket"]
+        assert summary["snapshot"] == snapshot_seq and summary["replayed"] == 2
+        assert rebuilt[0]["EUR"] == 2 and rebuilt[1] == 556
+        assert handoff["replayed"] == 0 and tid not in Globals._Trades_
+        assert [cmd["cmdId"] for cmd in Functions.get_command_queue(CLIENT)] == [close_id]
+        print("✅ PASS: Snapshot and tail")
+        return True
+    finally:
+        Journal.stop()
+        saved.restore()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    results = [
+        test_replay_after_restart(),
+        test_snapshot_and_tail(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,145 @@
+"""
+Test release-to-order latency tracing
+Stamps a synthetic event through every pipeline stage and checks the
+per-stage and end-to-end numbers in the summary report, and that the
+NID/TID links stay bounded.
+"""
+
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import LatencyTrace
+
+
+# Tracing settings to put back after each test
+_DEFAULTS = (Globals.TRACE_ENABLED, Globals.TRACE_LOG_FILE, Globals.TRACE_LINK_LIMIT)
+
+
+def _trace_to_temp_file():
+    """Point the trace log at a fresh temp file and reset trace links."""
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    os.close(fd)
+    Globals.TRACE_ENABLED = True
+    Globals.TRACE_LOG_FILE = path
+    LatencyTrace.reset()
+    return path
+
+
+def test_stage_and_end_to_end_latency():
+    """Marks for one event with two orders produce the expected deltas"""
+    print("=" * 80)
+    print("TEST: Per-stage and end-to-end latency")
+    print("=" * 80)
+
+    path = _trace_to_temp_file()
+    key = "CUR_2025-11-18_08:15_abc"
+    t0 = 1_700_000_000.0
+
+    LatencyTrace.mark_once("event", key, ts=t0)
+    LatencyTrace.mark_once("monitor", key, ts=t0 + 1)
+    LatencyTrace.mark_once("monitor", key, ts=t0 + 50)   # retry - ignored
+    LatencyTrace.mark("fetch", event_key=key, ts=t0 + 11)
+    LatencyTrace.mark("affect", event_key=key, nid=7, ts=t0 + 11.5)
+    LatencyTrace.mark("decide", event_key=key, nid=7, ts=t0 + 14)
+
+    # Orders only carry NID/TID - the tracer links them back to the event
+    for tid, offset in (("TID_7_1", 0.0), ("TID_7_2", 0.1)):
+        LatencyTrace.mark("execute", nid=7, tid=tid, ts=t0 + 14.2 + offset)
+        LatencyTrace.mark("enqueue", tid=tid, cmd_id="c", ts=t0 + 14.3 + offset)
+        LatencyTrace.mark("deliver", tid=tid, cmd_id="c", ts=t0 + 16.3 + offset)
+        LatencyTrace.mark("ack", tid=tid, cmd_id="c", ts=t0 + 17.3 + offset)
+
+    LatencyTrace.flush()
+    marks = LatencyTrace.load_marks(path)
+    summary = LatencyTrace.summarize(marks)
+    LatencyTrace.print_report(summary)
+    os.remove(path)
+    Globals.TRACE_ENABLED, Globals.TRACE_LOG_FILE, Globals.TRACE_LINK_LIMIT = _DEFAULTS
+
+    assert len(marks) == 13, f"expected 13 marks, got {len(marks)}"
+    assert all(m.get("k") == key for m in marks), "every mark should resolve to the event key"
+    assert summary["events"] == 1 and summary["orders"] == 2
+
+    stages = summary["stages"]
+    assert abs(stages["monitor"]["p50"] - 1.0) < 1e-6
+    assert abs(stages["fetch"]["p50"] - 10.0) < 1e-6
+    assert abs(stages["decide"]["p50"] - 2.5) < 1e-6
+    assert stages["execute"]["count"] == 2
+    assert abs(stages["deliver"]["max"] - 2.0) < 1e-6
+
+    e2e = summary["end_to_end"]
+    assert e2e["count"] == 2
+    assert abs(e2e["p50"] - 17.3) < 1e-6
+    assert abs(e2e["max"] - 17.4) < 1e-6
+
+    print("\n✅ PASS: Latency summary matches synthetic trace")
+    return True
+
+
+def test_percentile_nearest_rank():
+    """Nearest-rank percentiles on a known series"""
+    values = list(range(1, 101))
+    assert LatencyTrace.percentile(values, 50) == 50
+    assert LatencyTrace.percentile(values, 90) == 90
+    assert LatencyTrace.percentile(values, 99) == 99
+    assert LatencyTrace.percentile([], 50) == 0.0
+    print("✅ PASS: Nearest-rank percentiles")
+    return True
+
+
+def test_disabled_tracing_writes_nothing():
+    """TRACE_ENABLED=False leaves the trace log untouched"""
+    path = _trace_to_temp_file()
+    Globals.TRACE_ENABLED = False
+    LatencyTrace.mark("fetch", event_key="X", ts=1.0)
+    LatencyTrace.flush()
+    size = os.path.getsize(path)
+    os.remove(path)
+    Globals.TRACE_ENABLED, Globals.TRACE_LOG_FILE, Globals.TRACE_LINK_LIMIT = _DEFAULTS
+    assert size == 0, "no marks should be written while tracing is disabled"
+    print("✅ PASS: Disabled tracing writes nothing")
+    return True
+
+
+def test_links_are_bounded():
+    """Links and once-only marks keep the TRACE_LINK_LIMIT most recently used entries"""
+    path = _trace_to_temp_file()
+    Globals.TRACE_LINK_LIMIT = 3
+    try:
+        for n in range(1, 4):
+            LatencyTrace.mark_once("monitor", f"K{n}", ts=float(n))
+            LatencyTrace.mark("affect", event_key=f"K{n}", nid=n, ts=float(n))
+        LatencyTrace.mark("execute", nid=1, tid="T1", ts=4.0)    # NID 1 is used again
+        for n in range(4, 6):
+            LatencyTrace.mark_once("monitor", f"K{n}", ts=float(n))
+            LatencyTrace.mark("affect", event_key=f"K{n}", nid=n, ts=float(n))
+
+        assert list(LatencyTrace._NID_TO_KEY) == [1, 4, 5], list(LatencyTrace._NID_TO_KEY)
+        assert len(LatencyTrace._MARKED) == 3 and ("monitor", "K1") not in LatencyTrace._MARKED
+        LatencyTrace.mark("execute", nid=2, tid="T2", ts=6.0)   # evicted: no event key
+        LatencyTrace.flush()
+        marks = LatencyTrace.load_marks(path)
+    finally:
+        os.remove(path)
+        LatencyTrace.reset()
+        Globals.TRACE_ENABLED, Globals.TRACE_LOG_FILE, Globals.TRACE_LINK_LIMIT = _DEFAULTS
+
+    executes = {m["d"]: m.get("k") for m in marks if m["s"] == "execute"}
+    assert executes == {"T1": "K1", "T2": None}, executes
+    print("✅ PASS: Trace links are bounded")
+    return True
+
+
+if __name__ == "__main__":
+    results = [
+        test_stage_and_end_to_end_latency(),
+        test_percentile_nearest_rank(),
+        test_disabled_tracing_writes_nothing(),
+        test_links_are_bounded(),
+    ]
+    sys.exit(0 if all(results) else 1)
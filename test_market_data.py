@@ -0,0 +1,127 @@
+"""
+Test the Packet C market-data store
+Feeds Packet C samples through ingest_payload() and checks the latest
+arrays, ring-buffer history views and the _Symbols_ refresh, also for a
+payload prepared by a Broker worker.
+"""
+
+import sys
+import os
+import io
+import json
+import pickle
+import tempfile
+import contextlib
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import MarketData
+
+
+def _packet_c(step):
+    return {
+        "packetType": "C", "id": 7, "timestamp": "2025-11-18T08:00:00",
+        "symbols": [
+            {"symbol": "EURUSD", "bid": 1.1000 + step * 0.0001, "ask": 1.1001 + step * 0.0001,
+             "spread": 1.0, "atr": 10.0 + step},
+            {"symbol": "USDJPY", "bid": 150.00, "ask": 150.03, "spread": 3.0, "atr": 20.0},
+        ],
+    }
+
+
+def test_ring_buffer_views():
+    """History returns the most recent samples oldest first without copying"""
+    store = MarketData.MarketDataStore(["EURUSD", "USDJPY"], history_length=3)
+    for step in range(5):
+        store.update(_packet_c(step)["symbols"], received_at=1000.0 + step)
+
+    atr = store.history("atr")
+    assert atr.shape == (3, 2)
+    assert atr[:, store.row("EURUSD")].tolist() == [12.0, 13.0, 14.0]
+    assert store.history("atr", 1)[0, 0] == 14.0
+    assert np.shares_memory(atr, store._ring), "history should be a view into the ring"
+    assert np.shares_memory(store.latest("bid"), store._latest)
+
+    # Unknown symbols take a spare row
+    store.update([{"symbol": "XAUUSD", "bid": 2650.0, "ask": 2650.3, "spread": 30.0, "atr": 800.0}])
+    assert store.symbols[-1] == "XAUUSD" and store.size == 3
+    assert store.spread_ok(5.0).tolist() == [True, True, False]
+    tp, sl = store.atr_tp_sl(2.0, 1.0)
+    assert tp[0] == 28.0 and sl[0] == 14.0
+    print("✅ PASS: Ring buffer history views")
+    return True
+
+
+def test_packet_c_refreshes_symbols():
+    """ingest_payload() stores Packet C and updates stale _Symbols_ fields"""
+    Globals.liveMode = True
+    log_file = Functions.LOG_FILE
+    Functions.LOG_FILE = os.devnull
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Functions.ingest_payload(_packet_c(2))
+    finally:
+        Functions.LOG_FILE = log_file
+        Globals._Accounts_.pop("7", None)
+        for store in (Functions._CLIENT_OPEN, Functions._CLIENT_CLOSED_ONLINE, Functions._CLIENT_MODE,
+                      Functions._CLIENT_LAST_SEEN):
+            store.pop("7", None)
+
+    store = MarketData.get_store()
+    row = store.row("EURUSD")
+    assert abs(store.latest("bid")[row] - 1.1002) < 1e-12
+    assert Globals._Symbols_["EURUSD"]["ATR"] == 12.0
+    assert abs(Globals._Symbols_["EURUSD"]["current_price"] - 1.1002) < 1e-12
+    assert Globals._Symbols_["USDJPY"]["spread"] == 3.0
+    assert np.isnan(store.latest("atr")[store.row("GBPUSD")]), "symbols not in the packet stay unset"
+
+    lots = store.atr_lots(250.0)
+    assert abs(lots[row] - 250.0 / (12.0 * Globals._Symbols_["EURUSD"]["point_value"])) < 1e-9
+    print("✅ PASS: Packet C refreshes _Symbols_")
+    return True
+
+
+def test_worker_prepared_packet_c():
+    """A payload prepared by a Broker worker logs and stores the same data in the owner"""
+    Globals.liveMode = True
+    packet = _packet_c(5)
+    # As forwarded: prepared in the worker, pickled over the owner connection
+    data = pickle.loads(pickle.dumps(Functions.prepare_request("/", dict(packet))))
+    assert Functions.prepare_request("/command/7", {"id": 7}) == {"id": 7}, "only POST / is prepared"
+    assert data[Functions.PREPARED_KEY]["market_rows"][0] == ("EURUSD", [1.1005, 1.1006, 1.0, 15.0])
+
+    log_file = Functions.LOG_FILE
+    Functions.LOG_FILE = os.path.join(tempfile.mkdtemp(), "received_log.jsonl")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Functions.ingest_payload(data)
+        with open(Functions.LOG_FILE, encoding="utf-8") as f:
+            logged = [json.loads(line) for line in f]
+    finally:
+        Functions.LOG_FILE = log_file
+        Globals._Accounts_.pop("7", None)
+        for store in (Functions._CLIENT_OPEN, Functions._CLIENT_CLOSED_ONLINE, Functions._CLIENT_MODE,
+                      Functions._CLIENT_LAST_SEEN):
+            store.pop("7", None)
+
+    assert Functions.PREPARED_KEY not in data
+    assert len(logged) == 1 and logged[0].pop("ts") and logged[0] == packet
+    store = MarketData.get_store()
+    assert store.latest("atr")[store.row("EURUSD")] == 15.0
+    assert Globals._Symbols_["EURUSD"]["ATR"] == 15.0
+    print("✅ PASS: Worker-prepared Packet C")
+    return True
+
+
+if __name__ == "__main__":
+    results = [
+        test_ring_buffer_views(),
+        test_packet_c_refreshes_symbols(),
+        test_worker_prepared_packet_c(),
+    ]
+    sys.exit(0 if all(results) else 1)
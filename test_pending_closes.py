@@ -0,0 +1,170 @@
+"""
+Test the S3/S5 close-then-act state machines
+Checks that pending actions advance on /ack, Packet A and Packet E
+confirmations or time out, that an ACK and a Packet A racing on the same close
+run its handler exactly once, and that an S3 reversal opens the new position
+only after the close is acknowledged - without sleeping in execute_news_trades().
+"""
+
+import sys
+import os
+import io
+import time
+import threading
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+import PendingCloses
+
+
+CLIENT = "test_closes"
+
+
+def _drain(client_id):
+    """Deliver every queued command; return them in order (acked with success)."""
+    delivered = []
+    while True:
+        msg = Functions.get_next_command(client_id)
+        if msg.get("state", 0) == 0:
+            return delivered
+        delivered.append(msg)
+        Functions.ack_command(client_id, msg["cmdId"], True)
+
+
+def test_confirmation_sources():
+    """ACK, Packet A, Packet E and the timeout each resolve an action"""
+    done = []
+    PendingCloses.HANDLERS["T"] = lambda action, confirmed: done.append((action["key"], confirmed))
+    start = datetime(2025, 11, 18, 9, 0)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            PendingCloses.register("T", "T:ack", CLIENT, {"c1": 11, "c2": 12}, now=start)
+            Functions.ack_command(CLIENT, "missing", True)             # unknown command: no effect
+            PendingCloses.on_ack(CLIENT, "c1", True)
+            assert done == [] and list(PendingCloses.get("T:ack")["closes"]) == ["c2"]
+            PendingCloses.on_ack(CLIENT, "c2", False)
+            assert done == [("T:ack", False)], done                   # a failed close is unconfirmed
+
+            PendingCloses.register("T", "T:packets", CLIENT, {"c3": 21, "c4": 22, "c5": 0}, now=start)
+            PendingCloses.on_positions(CLIENT, [{"ticket": 22}])      # 21 gone, 22 still open, 0 unknown
+            PendingCloses.on_closed(CLIENT, 22)
+            assert PendingCloses.get("T:packets")["closes"] == {"c5": 0}
+            PendingCloses.on_ack("other_client", "c5", True)          # other client's ACK is ignored
+            assert PendingCloses.expire(start + timedelta(seconds=1)) == 0
+            assert PendingCloses.expire(start + timedelta(seconds=Globals.PENDING_CLOSE_TIMEOUT)) == 1
+            assert done[-1] == ("T:packets", False) and not Globals._PendingCloses_
+        print("✅ PASS: Confirmation sources")
+        return True
+    finally:
+        PendingCloses.HANDLERS.pop("T", None)
+        Globals._PendingCloses_.clear()
+
+
+def test_ack_and_packet_a_race():
+    """An ACK and a Packet A confirming the same close on two threads: one handler run, no error"""
+    done, errors = [], []
+    PendingCloses.HANDLERS["T"] = lambda action, confirmed: done.append(action["key"])
+
+    class SlowTicket(int):
+        """Another position whose ticket compares slowly: Packet A's check takes a while."""
+        def __hash__(self):
+            return int.__hash__(self + 1)
+
+        def __eq__(self, other):
+            time.sleep(0.002)
+            return False
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for n in range(200):
+                cmd = Functions.enqueue_command(CLIENT, 3, {"symbol": "EURUSD", "ticket": 7000 + n})
+                PendingCloses.register("T", f"T:{n}", CLIENT, {cmd["cmdId"]: 7000 + n})
+                start = threading.Barrier(2)
+
+                def confirm(call):
+                    start.wait()
+                    try:
+                        call()
+                    except Exception as e:
+                        errors.append(e)
+
+                threads = [threading.Thread(target=confirm, args=(lambda: Functions.ack_command(CLIENT, cmd["cmdId"], True),)),
+                           threading.Thread(target=confirm, args=(lambda: PendingCloses.on_positions(
+                               CLIENT, [{"ticket": SlowTicket(6999 + n)}]),))]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        assert not errors, (len(errors), errors[:1])
+        assert done == [f"T:{n}" for n in range(200)], len(done)
+        assert not Globals._PendingCloses_
+        print("✅ PASS: ACK and Packet A race")
+        return True
+    finally:
+        PendingCloses.HANDLERS.pop("T", None)
+        Globals._PendingCloses_.clear()
+        _drain(CLIENT)
+
+
+def test_s3_reversal_waits_for_ack():
+    """S3 queues the close, and the reversed open only after the close ACK"""
+    saved = (News._clock, Globals.symbolsToTrade, Globals.news_filter_maxTradePerCurrency,
+             Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly, Globals.TRACE_ENABLED)
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    News._clock = lambda tz=None: datetime(2025, 11, 18, 9, 0)   # Tuesday
+    Globals.symbolsToTrade = {"EURUSD"}
+    Globals.news_filter_maxTradePerCurrency = 0
+    Globals.news_filter_rollingMode = True
+    Globals.news_filter_weeklyFirstOnly = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Globals._Currencies_["EVT_S3"] = {
+                "currency": "EUR", "date": "2025, November 18, 08:30", "event": "(EUR) CPI YoY",
+                "NID": 931, "NID_Affect": 0, "NID_Affect_Executed": 0,
+            }
+            Globals._CurrencyPositions_["EUR"] = {"pair": "EURUSD", "action": "BUY", "ticket": 555,
+                                                  "TID": "TID_930_1", "NID": 930, "entry_time": ""}
+            News.update_affected_symbols("EVT_S3", {"EURUSD": "SELL"})
+            assert News.execute_news_trades(CLIENT) == 0               # nothing opened yet
+
+            close = Functions.get_next_command(CLIENT)
+            assert close["state"] == 3 and close["ticket"] == 555
+            assert PendingCloses.get("S3:EUR") is not None
+            assert Globals._CurrencyPositions_["EUR"]["action"] == "SELL"
+            assert Globals._CurrencyPositions_["EUR"]["TID"] == ""
+
+            Functions.ack_command(CLIENT, close["cmdId"], True)      # close confirmed → open queued
+            opened = _drain(CLIENT)
+            assert [(m["state"], m["symbol"]) for m in opened] == [(2, "EURUSD")], opened
+            assert PendingCloses.get("S3:EUR") is None
+            assert Globals._CurrencyPositions_["EUR"]["TID"]
+            assert Globals._Currencies_["EVT_S3"]["NID_Affect_Executed"] == 1
+        print("✅ PASS: S3 reversal waits for the close ACK")
+        return True
+    finally:
+        News._clock = saved[0]
+        (Globals.symbolsToTrade, Globals.news_filter_maxTradePerCurrency,
+         Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly, Globals.TRACE_ENABLED) = saved[1:]
+        Globals._Currencies_.pop("EVT_S3", None)
+        Globals._CurrencyPositions_.clear()
+        Globals._PendingCloses_.clear()
+        for currency in Globals._CurrencyCount_:
+            Globals._CurrencyCount_[currency] = 0
+        for pair in Globals._PairCount_:
+            Globals._PairCount_[pair] = 0
+
+
+if __name__ == "__main__":
+    results = [
+        test_confirmation_sources(),
+        test_ack_and_packet_a_race(),
+        test_s3_reversal_waits_for_ack(),
+    ]
+    sys.exit(0 if all(results) else 1)
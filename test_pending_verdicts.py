@@ -0,0 +1,91 @@
+"""
+Test the pending-verdict queue between STEP 6 and STEP 7
+Checks that update_affected_symbols() publishes verdicts, execute_news_trades()
+drains them in _Symbols_ order and idle heartbeats do nothing.
+"""
+
+import sys
+import os
+import io
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+
+
+CLIENT = "test_pending"
+
+
+def _event(key, currency, nid):
+    Globals._Currencies_[key] = {
+        "currency": currency, "date": "2025, November 18, 08:30", "event": f"({currency}) CPI YoY",
+        "NID": nid, "NID_Affect": 0, "NID_Affect_Executed": 0,
+    }
+
+
+def test_publish_and_drain():
+    """Verdicts are queued with their event and executed once"""
+    saved = (News._clock, Globals.symbolsToTrade, Globals.news_filter_maxTradePerCurrency,
+             Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly, Globals.TRACE_ENABLED)
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    News._clock = lambda tz=None: datetime(2025, 11, 18, 9, 0)   # Tuesday
+    Globals.symbolsToTrade = {"EURUSD", "USDJPY", "GBPUSD"}
+    Globals.news_filter_maxTradePerCurrency = 0
+    Globals.news_filter_rollingMode = False
+    Globals.news_filter_weeklyFirstOnly = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _event("EVT_USD", "USD", 901)
+            _event("EVT_GBP", "GBP", 902)
+            News.update_affected_symbols("EVT_USD", {"USDJPY": "BUY", "EURUSD": "SELL", "NOTASYMBOL": "BUY"})
+            News.update_affected_symbols("EVT_GBP", {"GBPUSD": "BUY"})
+
+            pending = Globals._PendingVerdicts_
+            assert set(pending) == {"USDJPY", "EURUSD", "GBPUSD"}, pending.keys()
+            assert pending["GBPUSD"]["currency"] == "GBP" and pending["GBPUSD"]["NID"] == 902
+            assert Globals._Symbols_["EURUSD"]["verdict_GPT"] == "SELL"
+
+            queued = News.execute_news_trades(CLIENT)
+            commands = []
+            while True:
+                command = Functions.get_next_command(CLIENT)
+                if command.get("state", 0) == 0:
+                    break
+                commands.append(command)
+                Functions.ack_command(CLIENT, command["cmdId"], True)
+
+            assert queued == 3
+            order = [s for s in Globals._Symbols_ if s in ("USDJPY", "EURUSD", "GBPUSD")]
+            assert [c["symbol"] for c in commands] == order
+            assert not Globals._PendingVerdicts_ and not Globals._Affected_
+            assert all(not Globals._Symbols_[s]["verdict_GPT"] for s in order)
+            assert Globals._Currencies_["EVT_USD"]["NID_Affect_Executed"] == 2
+            assert Globals._Currencies_["EVT_GBP"]["NID_Affect_Executed"] == 1
+
+            # Idle heartbeat: nothing pending, nothing queued
+            assert News.execute_news_trades(CLIENT) == 0
+        print("✅ PASS: Pending verdicts published and drained")
+        return True
+    finally:
+        News._clock = saved[0]
+        (Globals.symbolsToTrade, Globals.news_filter_maxTradePerCurrency,
+         Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly, Globals.TRACE_ENABLED) = saved[1:]
+        for key in ("EVT_USD", "EVT_GBP"):
+            Globals._Currencies_.pop(key, None)
+        for currency in Globals._CurrencyCount_:
+            Globals._CurrencyCount_[currency] = 0
+        for pair in Globals._PairCount_:
+            Globals._PairCount_[pair] = 0
+        Globals._CurrencyPositions_.clear()
+
+
+if __name__ == "__main__":
+    results = [
+        test_publish_and_drain(),
+    ]
+    sys.exit(0 if all(results) else 1)
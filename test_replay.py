@@ -0,0 +1,120 @@
+"""
+Test the received_log.jsonl replay engine
+Writes a small rotated log, replays it in-process flat out and checks
+segment ordering, pacing-free timing and the _dictionaries/ comparison.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import contextlib
+import io
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import Replay
+
+
+def _write_log(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def _packet_a(ts, client_id=7):
+    return {"ts": ts, "id": client_id, "mode": "Sender", "timestamp": ts[:19],
+            "open": [], "symbolsCurrentlyOpen": [], "closed_offline": [],
+            "closed_online": [], "strategy": "Unknown"}
+
+
+def test_segments_oldest_first():
+    """Rotated segments are replayed before the live log, highest suffix first"""
+    tmp = tempfile.mkdtemp()
+    try:
+        base = os.path.join(tmp, "received_log.jsonl")
+        _write_log(base + ".2", [_packet_a("2025-11-18T08:00:00+00:00")])
+        _write_log(base + ".1", [_packet_a("2025-11-18T08:00:05+00:00")])
+        _write_log(base, [_packet_a("2025-11-18T08:00:10+00:00")])
+        _write_log(base + ".bak", [_packet_a("2025-11-18T07:00:00+00:00")])  # not a rotation
+
+        segments = Replay.find_segments(base)
+        names = [os.path.basename(s) for s in segments]
+        assert names == ["received_log.jsonl.2", "received_log.jsonl.1", "received_log.jsonl"], names
+
+        stamps = [ts for ts, _ in Replay.iter_entries(segments)]
+        assert stamps == sorted(stamps), "entries should stream in recorded order"
+        print("✅ PASS: Segments replay oldest first")
+        return True
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_in_process_replay_and_state_check():
+    """In-process replay ingests every packet and _dictionaries/ matches a re-run"""
+    tmp = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        log = os.path.join(tmp, "received_log.jsonl")
+        entries = [
+            _packet_a("2025-11-18T08:00:00+00:00"),
+            {"ts": "2025-11-18T08:00:01+00:00", "packetType": "B", "id": 7,
+             "timestamp": "2025-11-18T08:00:01", "balance": 100000.0, "equity": 100000.0},
+            "not json",
+            _packet_a("2025-11-18T08:00:05+00:00"),
+        ]
+        with open(log, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write((entry if isinstance(entry, str) else json.dumps(entry)) + "\n")
+
+        results = []
+        for run in ("first", "second"):
+            workdir = os.path.join(tmp, run)
+            os.makedirs(workdir)
+            os.chdir(workdir)
+            sink = Replay.InProcessSink(workdir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append(Replay.replay(Replay.find_segments(log), sink, speed=0))
+            os.chdir(cwd)
+
+        first = results[0]
+        assert first["packets"] == 3, f"expected 3 packets (malformed line skipped), got {first['packets']}"
+        assert first["errors"] == 0
+        assert first["by_type"]["A"]["count"] == 2 and first["by_type"]["B"]["count"] == 1
+
+        # The replayed packets must not be appended to the log being replayed
+        with open(log, "r", encoding="utf-8") as f:
+            assert len(f.readlines()) == 4
+
+        first_dir = os.path.join(tmp, "first", "_dictionaries")
+        second_dir = os.path.join(tmp, "second", "_dictionaries")
+        assert Replay.compare_dictionaries(second_dir, first_dir) == []
+
+        # A changed row is reported
+        count_csv = os.path.join(second_dir, "_currency_count.csv")
+        with open(count_csv, "a", encoding="utf-8") as f:
+            f.write("2025-11-18 08:00:00,ZZZ,9\n")
+        assert Replay.compare_dictionaries(second_dir, first_dir), "extra row should be reported"
+
+        print("✅ PASS: In-process replay and _dictionaries/ check")
+        return True
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+        # Replayed client 7 is not a live account (keeps it out of verdict fan-outs)
+        Globals._Accounts_.pop("7", None)
+        for store in (Functions._CLIENT_OPEN, Functions._CLIENT_CLOSED_ONLINE, Functions._CLIENT_MODE,
+                      Functions._CLIENT_LAST_SEEN):
+            store.pop("7", None)
+
+
+if __name__ == "__main__":
+    results = [
+        test_segments_oldest_first(),
+        test_in_process_replay_and_state_check(),
+    ]
+    sys.exit(0 if all(results) else 1)
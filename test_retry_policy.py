@@ -0,0 +1,164 @@
+"""
+Test the fetch retry policy (RetryPolicy.py)
+Checks the fast-then-backoff schedule and its limits (attempts, trading window,
+AI calls reserved for higher-impact events), that retries aim at a category's learned
+release-to-availability points, and that a FALSE answer schedules a retry
+through retry_after without blocking the monitor.
+"""
+
+import sys
+import os
+import io
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import AIBudget
+import Globals
+import News
+import RetryPolicy
+import GlobalsSnapshot
+from Events import EventRecord
+
+
+RELEASE = datetime(2025, 11, 18, 8, 30)
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("RETRY_MAX_ATTEMPTS", "RETRY_INITIAL_DELAY", "RETRY_BACKOFF", "RETRY_MAX_DELAY",
+                                 "RETRY_TARGET_PERCENTILES", "RETRY_MIN_SAMPLES", "MAX_DAILY_AI_CALLS", "ai_calls_today",
+                                 "ai_calls_reset_date", "AI_EVENT_WINDOW", "EVENT_TRIGGER_DELAY", "AI_REQUEST_DELAY",
+                                 "AI_RACE_ENABLED", "TRACE_ENABLED", "AI_BUDGET_CALLS", "AI_BUDGET_POOL",
+                                 tables=("_AvailabilityStats_", "_AIBudget_", "_Currencies_"),
+                                 modules={News: ("_clock", "get_news_data", "validate_news_data",
+                                                 "_initialization_complete")})
+
+
+def _setup():
+    Globals.RETRY_MAX_ATTEMPTS = 5
+    Globals.RETRY_INITIAL_DELAY = 5
+    Globals.RETRY_BACKOFF = 2.0
+    Globals.RETRY_MAX_DELAY = 30
+    Globals.RETRY_TARGET_PERCENTILES = (50, 90)
+    Globals.RETRY_MIN_SAMPLES = 5
+    Globals.MAX_DAILY_AI_CALLS = 100
+    Globals.ai_calls_today = 0
+    Globals.AI_EVENT_WINDOW = 900
+    Globals._AvailabilityStats_.clear()
+    Globals._AIBudget_.clear()
+    Globals._Currencies_.clear()   # only this test's events count towards the day's budget
+    News._clock = lambda tz=None: RELEASE
+
+
+def _event(key, name="(United States) CPI YoY", event_time=RELEASE, **fields):
+    Globals._Currencies_[key] = EventRecord("USD", name, event_time)
+    Globals._Currencies_[key].update(fields)
+    return Globals._Currencies_[key]
+
+
+def test_backoff_and_limits():
+    """5s, 10s, 20s, then capped; stops at the attempt limit, the window and the AI call budget"""
+    saved = STATE.save()
+    try:
+        _setup()
+        event = _event("TEST_RETRY_A")
+        now, waits = RELEASE, []
+        for attempts in range(1, 5):
+            event.retry_count = attempts
+            retry_at, reason = RetryPolicy.next_attempt(event, now)
+            assert reason == "backoff", reason
+            waits.append((retry_at - now).total_seconds())
+            now = retry_at
+        assert waits == [5, 10, 20, 30]
+        event.retry_count = 5
+        assert RetryPolicy.next_attempt(event, now)[0] is None
+
+        event.retry_count = 1
+        assert RetryPolicy.next_attempt(event, RELEASE + timedelta(seconds=898))[0] is None   # window ends first
+
+        # 3 High events later today reserve 9 of 10 calls: this Low one only has the pool
+        event.impact = "Low"
+        for n in range(3):
+            _event(f"TEST_RETRY_UP{n}", event_time=RELEASE + timedelta(hours=n + 1), impact="High")
+        Globals.MAX_DAILY_AI_CALLS, Globals.AI_BUDGET_POOL = 10, 1
+        Globals.AI_BUDGET_CALLS = {"High": 3, "Low": 2}
+        assert RetryPolicy.next_attempt(event, RELEASE)[0] is not None
+        AIBudget.charge()   # the pool's last call
+        retry_at, reason = RetryPolicy.next_attempt(event, RELEASE)
+        assert retry_at is None and "budget" in reason
+        Globals._Currencies_["TEST_RETRY_UP0"].actual = 1.0   # fetched with no call: reservation released
+        assert RetryPolicy.next_attempt(event, RELEASE)[0] is not None
+        print("✅ PASS: Backoff and limits")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_learned_targets():
+    """With enough samples a retry waits for the category's next learned point"""
+    saved = STATE.save()
+    try:
+        _setup()
+        event = _event("TEST_RETRY_B")
+        for seconds in (20, 22, 24, 26, 60):
+            RetryPolicy.record_availability(event, RELEASE + timedelta(seconds=seconds))
+        assert Globals._AvailabilityStats_["Inflation"] == [20.0, 22.0, 24.0, 26.0, 60.0]
+        assert RetryPolicy.learned_targets("Inflation") == [24.0, 60.0]
+        assert RetryPolicy.learned_targets("Jobs") == []
+
+        event.retry_count = 1
+        retry_at, reason = RetryPolicy.next_attempt(event, RELEASE + timedelta(seconds=6))
+        assert retry_at == RELEASE + timedelta(seconds=24) and reason == "learned Inflation 24s"
+        retry_at, _ = RetryPolicy.next_attempt(event, RELEASE + timedelta(seconds=25))
+        assert retry_at == RELEASE + timedelta(seconds=25 + 30)   # next point is 35s away: capped
+        print("✅ PASS: Learned targets")
+        return True
+    finally:
+        saved.restore()
+
+
+def test_not_released_schedules_retry():
+    """A FALSE answer sets retry_after; the monitor skips the event until then"""
+    saved = STATE.save()
+    calls = []
+    try:
+        _setup()
+        Globals.TRACE_ENABLED = False
+        Globals.EVENT_TRIGGER_DELAY = 5
+        Globals.AI_REQUEST_DELAY = 0
+        Globals.AI_RACE_ENABLED = False
+        News._initialization_complete = True
+        News._clock = lambda tz=None: clock[0]
+        News.get_news_data = lambda *args: calls.append(args) or "Forecast : 2.0, Actual : FALSE"
+        News.validate_news_data = lambda text: text
+        _event("TEST_RETRY_C")
+
+        clock = [RELEASE + timedelta(seconds=3)]
+        assert "TEST_RETRY_C" not in News.monitor_news_events()   # EVENT_TRIGGER_DELAY not over yet
+        clock = [RELEASE + timedelta(seconds=6)]
+        assert News.monitor_news_events() == ["TEST_RETRY_C"]
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            assert News.fetch_actual_value("TEST_RETRY_C") is False
+
+        event = Globals._Currencies_["TEST_RETRY_C"]
+        assert len(calls) == 1 and event.retry_count == 1
+        assert event.retry_after == RELEASE + timedelta(seconds=11)
+        assert "[NON-BLOCKING]" in out.getvalue()
+        assert "TEST_RETRY_C" not in News.monitor_news_events()
+        clock = [RELEASE + timedelta(seconds=11)]
+        assert News.monitor_news_events() == ["TEST_RETRY_C"]
+        print("✅ PASS: Not released schedules retry")
+        return True
+    finally:
+        saved.restore()
+
+
+if __name__ == "__main__":
+    results = [
+        test_backoff_and_limits(),
+        test_learned_targets(),
+        test_not_released_schedules_retry(),
+    ]
+    sys.exit(0 if all(results) else 1)
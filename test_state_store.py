@@ -0,0 +1,129 @@
+"""
+Test the SQLite state store
+Checks that the trading dictionaries survive a restart (records, datetimes,
+integer keys, nested S5 sentiment), that the write-behind thread persists
+changes and removals without an explicit flush, and that the NID/TID counters
+are re-derived when the last counter flush was lost.
+"""
+
+import sys
+import os
+import io
+import time
+import shutil
+import tempfile
+import contextlib
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import StateStore
+import GlobalsSnapshot
+from Events import EventRecord
+
+
+RELEASE = datetime(2025, 11, 18, 8, 30)
+
+
+# What these tests change (put back after each test)
+STATE = GlobalsSnapshot.Preserve("_News_ID_Counter_", "news_strategy", tables=StateStore.TRACKED)
+
+
+def _clear_state():
+    for name in StateStore.TRACKED:
+        if name != "_CurrencyCount_":
+            getattr(Globals, name).clear()
+    Globals._CurrencyCount_["EUR"] = 0
+    Globals._News_ID_Counter_ = 0
+
+
+def test_restart_round_trip():
+    """Everything written before a restart is back in Globals afterwards"""
+    saved = STATE.save()
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "state.db")
+    _clear_state()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            StateStore.start(path, interval=60)   # the test flushes explicitly
+
+            record = EventRecord("EUR", "(Euro Area) CPI YoY", RELEASE, impact="High")
+            record.update({"forecast": 2.1, "actual": 2.4, "affect": "BULL", "NID": 7})
+            Globals._Currencies_["EUR_2025-11-18_08:30_x"] = record
+            Globals._Trades_["TID_7_1"] = {"TID": "TID_7_1", "symbol": "EURUSD", "NID": 7, "status": "executed"}
+            Globals._Trade_ID_Counter_[7] = 1
+            Globals._News_ID_Counter_ = 7
+            Globals._CurrencyCount_["EUR"] = 1
+            Globals._PairsTraded_ThisWeek_["EURUSD"] = True
+            Globals._CurrencySentiment_["EUR"] = {"direction": "BULL", "count": 1, "events": [7]}
+            written = StateStore.flush()
+
+            assert StateStore.flush() == 0                            # nothing changed since
+            Globals._CurrencySentiment_["EUR"]["events"].append(9)    # nested change in place
+            assert StateStore.flush() == 1
+            StateStore.stop()
+
+            _clear_state()
+            counts = StateStore.restore(path)
+
+        assert written >= 7 and counts["_Trades_"] == 1
+        restored = Globals._Currencies_["EUR_2025-11-18_08:30_x"]
+        assert isinstance(restored, EventRecord) and restored.event_time == RELEASE
+        assert (restored.actual, restored.NID, restored.impact) == (2.4, 7, "High")
+        assert Globals._Trades_["TID_7_1"]["status"] == "executed"
+        assert Globals._Trade_ID_Counter_ == {7: 1} and Globals._News_ID_Counter_ == 7
+        assert Globals._CurrencyCount_["EUR"] == 1 and Globals._PairsTraded_ThisWeek_ == {"EURUSD": True}
+        assert Globals._CurrencySentiment_["EUR"]["events"] == [7, 9]
+        print("✅ PASS: Restart round trip")
+        return True
+    finally:
+        StateStore.stop()
+        saved.restore()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_write_behind_and_counter_repair():
+    """The writer thread persists changes on its own; lost counter flushes are re-derived"""
+    saved = STATE.save()
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "state.db")
+    _clear_state()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            StateStore.start(path, interval=0.02)
+            Globals._Trades_["TID_9_3"] = {"TID": "TID_9_3", "symbol": "GBPUSD", "NID": 9}
+            Globals._Trades_["TID_8_1"] = {"TID": "TID_8_1", "symbol": "USDJPY", "NID": 8}
+            Globals._PairsTraded_ThisWeek_["GBPUSD"] = True
+            deadline = time.time() + 5
+            while len(StateStore.load(path).get("_Trades_", {})) < 2 and time.time() < deadline:
+                time.sleep(0.02)
+
+            Globals._PairsTraded_ThisWeek_.clear()      # weekly reset
+            del Globals._Trades_["TID_8_1"]
+            while "_PairsTraded_ThisWeek_" in StateStore.load(path) and time.time() < deadline:
+                time.sleep(0.02)
+            stored = StateStore.load(path)
+            StateStore.stop()
+
+            # Crash before the counters were flushed: the restored trades still carry their ids
+            _clear_state()
+            StateStore.restore(path)
+
+        assert list(stored["_Trades_"]) == ["TID_9_3"] and "_PairsTraded_ThisWeek_" not in stored
+        assert Globals._News_ID_Counter_ == 9 and Globals._Trade_ID_Counter_[9] == 3
+        print("✅ PASS: Write-behind and counter repair")
+        return True
+    finally:
+        StateStore.stop()
+        saved.restore()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    results = [
+        test_restart_round_trip(),
+        test_write_behind_and_counter_repair(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,87 @@
+"""
+Test the StrategyPresets parameter sweep
+Checks search-space expansion, 1%-rule ranking and a small pooled sweep
+over the two-event backtest fixture.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Sweep
+from test_backtest import _write_inputs
+
+
+def test_space_expansion():
+    """Grid covers every combination; random draws stay inside ranges"""
+    space = Sweep.parse_space(["news_filter_maxTradePerCurrency=1,2,4", "tp_sl=50/25,100/50"])
+    assert space["tp_sl"] == [(50, 25), (100, 50)]
+    points = Sweep.grid_points([3, 5], space)
+    assert len(points) == 2 * 3 * 2
+    assert {"strategy": 5, "news_filter_maxTradePerCurrency": 4, "tp_sl": (100, 50)} in points
+
+    ranged = Sweep.parse_space(["lot_size_percentage=0.001:0.005", "news_filter_maxScalePositions=1:3"])
+    draws = Sweep.random_points([5], ranged, 50, seed=1)
+    assert all(0.001 <= p["lot_size_percentage"] <= 0.005 for p in draws)
+    assert {p["news_filter_maxScalePositions"] for p in draws} <= {1, 2, 3}
+    try:
+        Sweep.grid_points([5], ranged)
+        assert False, "ranges should require --random"
+    except ValueError:
+        pass
+    print("✅ PASS: Search space expansion")
+    return True
+
+
+def test_ranking_prefers_compliance():
+    """A non-compliant point ranks below compliant ones regardless of return"""
+    points = [{"strategy": 3, "lot_size_percentage": v} for v in (0.0025, 0.005, 0.0025)]
+    rows = [
+        {"trades": 10, "win_rate": 0.5, "net_profit": 500.0, "return_pct": 0.5, "max_drawdown_pct": 2.0,
+         "peak_currency_exposure": 4, "max_currency_risk_pct": 1.0},
+        {"trades": 10, "win_rate": 0.6, "net_profit": 900.0, "return_pct": 0.9, "max_drawdown_pct": 1.0,
+         "peak_currency_exposure": 4, "max_currency_risk_pct": 2.0},
+        {"trades": 10, "win_rate": 0.5, "net_profit": 500.0, "return_pct": 0.5, "max_drawdown_pct": 1.5,
+         "peak_currency_exposure": 2, "max_currency_risk_pct": 0.5},
+    ]
+    columns = Sweep.to_columns(points, rows)
+    assert columns["compliant"].tolist() == [True, False, True]
+    assert columns["rank"].tolist() == [2, 3, 1], columns["rank"]   # equal return → lower drawdown first
+    print("✅ PASS: Ranking prefers 1%-rule compliance")
+    return True
+
+
+def test_pooled_sweep_writes_columns():
+    """A two-point sweep runs through the pool and round-trips through .npz"""
+    tmp = tempfile.mkdtemp()
+    try:
+        calendar, prices = _write_inputs(tmp)
+        points = Sweep.grid_points([1], Sweep.parse_space(["tp_sl=50/25,200/200"]))
+        columns = Sweep.run_sweep(points, calendar, prices, workers=1)
+
+        assert columns["trades"].tolist() == [2, 2]
+        assert columns["return_pct"][0] > columns["return_pct"][1]   # 50/25 banks both moves
+        path = os.path.join(tmp, "sweep.npz")
+        Sweep.save_columns(path, columns)
+        loaded = Sweep.load_columns(path)
+        assert set(loaded) == set(columns)
+        assert np.array_equal(loaded["rank"], columns["rank"])
+        print("✅ PASS: Pooled sweep writes ranked columns")
+        return True
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    results = [
+        test_space_expansion(),
+        test_ranking_prefers_compliance(),
+        test_pooled_sweep_writes_columns(),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,131 @@
+"""
+Test the pre-event warm-up stage
+Checks that a slot is prepared WARMUP_LEAD_SECONDS before release (branches and
+sized orders), and that after the release execute_news_trades() uses the
+prepared order and generate_trading_decisions() the prepared branch.
+"""
+
+import sys
+import os
+import io
+import contextlib
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import Globals
+import Functions
+import News
+import WarmUp
+
+
+CLIENT = "test_warmup"
+RELEASE = datetime(2025, 11, 18, 9, 0)   # Tuesday
+
+
+def _event(key, currency, event_time):
+    Globals._Currencies_[key] = {
+        "currency": currency, "date": event_time.strftime("%Y, %B %d, %H:%M"),
+        "event": f"({currency}) CPI YoY", "event_time": event_time,
+        "forecast": None, "actual": None, "affect": None, "NID": None,
+        "NID_Affect": 0, "NID_Affect_Executed": 0,
+    }
+
+
+def _cleanup(*keys):
+    for key in keys:
+        Globals._Currencies_.pop(key, None)
+    Globals._PreparedBranches_.clear()
+    Globals._PreparedOrders_.clear()
+    Globals._WarmSlots_.clear()
+
+
+def test_slot_prepared_before_release():
+    """Branches follow News_Rules.txt STEP 3; orders are sized once, ahead of time"""
+    saved_multiplier = Globals.lot_multiplier
+    _event("EVT_WARM", "EUR", RELEASE)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            early = RELEASE - timedelta(seconds=Globals.WARMUP_LEAD_SECONDS + 30)
+            assert WarmUp.tick(early) == 0                          # outside the lead window
+            assert WarmUp.tick(RELEASE - timedelta(seconds=20)) == 1
+            assert WarmUp.tick(RELEASE - timedelta(seconds=10)) == 0  # already prepared
+
+        bull, bear = WarmUp.branch("EUR", "BULL"), WarmUp.branch("EUR", "BEAR")
+        assert bull["EURUSD"] == "BUY" and bear["EURUSD"] == "SELL"
+        assert all(pair in bull for pair in Globals._Symbols_ if "EUR" in pair)
+        assert WarmUp.branch("EUR", "NEUTRAL") == {}
+        assert WarmUp.rule_signals("USD", "BULL")["EURUSD"] == "SELL"
+
+        order = WarmUp.order_for("EURUSD", "SELL")
+        config = Globals._Symbols_["EURUSD"]
+        assert order["state"] == 2 and order["tp"] == config["TP"] and order["sl"] == config["SL"]
+        assert order["lot"] == round(config["lot"] * Globals.lot_multiplier, 2)
+        assert set(Globals._WarmSlots_[RELEASE]["EUR"]) == {"BULL", "BEAR", "NEUTRAL"}
+
+        Globals.lot_multiplier = saved_multiplier * 2                 # account resized: stale
+        assert WarmUp.order_for("EURUSD", "SELL") is None
+        print("✅ PASS: Slot prepared before release")
+        return True
+    finally:
+        Globals.lot_multiplier = saved_multiplier
+        _cleanup("EVT_WARM")
+
+
+def test_release_uses_prepared_branch():
+    """After the release: branch instead of ChatGPT, prepared lot in the queued order"""
+    saved = (News._clock, News.generate_trading_signals, Globals.symbolsToTrade,
+             Globals.WARMUP_RULE_SIGNALS, Globals.TRACE_ENABLED, Globals.news_filter_confirmationRequired,
+             Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly,
+             dict(Globals._CurrencyCount_), dict(Globals._PairCount_))
+
+    def no_ai(*args):
+        raise AssertionError("ChatGPT called for a prepared slot")
+
+    News._clock = lambda tz=None: RELEASE
+    News.generate_trading_signals = no_ai
+    Globals.symbolsToTrade = {"GBPUSD"}
+    Globals.WARMUP_RULE_SIGNALS = True
+    Globals.TRACE_ENABLED = False   # keep trace_log.jsonl out of the working tree
+    Globals.news_filter_confirmationRequired = False
+    Globals.news_filter_rollingMode = False
+    Globals.news_filter_weeklyFirstOnly = False
+    _event("EVT_GBP", "GBP", RELEASE)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            WarmUp.tick(RELEASE - timedelta(seconds=5))
+            Globals._PreparedOrders_["GBPUSD:BUY"]["lot"] = 0.37   # marker: must come from the warm-up
+
+            Globals._Currencies_["EVT_GBP"].update({"forecast": 2.0, "actual": 2.5})
+            News.calculate_affect("EVT_GBP")
+            signals = News.generate_trading_decisions("EVT_GBP")
+            News.update_affected_symbols("EVT_GBP", signals)
+            queued = News.execute_news_trades(CLIENT)
+
+        assert signals == WarmUp.branch("GBP", "BULL") and signals["GBPUSD"] == "BUY"
+        assert queued == 1
+        msg = Functions.get_next_command(CLIENT)
+        assert (msg["state"], msg["symbol"], msg["volume"]) == (1, "GBPUSD", 0.37), msg
+        Functions.ack_command(CLIENT, msg["cmdId"], True)
+        print("✅ PASS: Release uses the prepared branch and order")
+        return True
+    finally:
+        (News._clock, News.generate_trading_signals, Globals.symbolsToTrade,
+         Globals.WARMUP_RULE_SIGNALS, Globals.TRACE_ENABLED, Globals.news_filter_confirmationRequired,
+         Globals.news_filter_rollingMode, Globals.news_filter_weeklyFirstOnly) = saved[:8]
+        Globals._CurrencyCount_.update(saved[8])
+        Globals._PairCount_.clear()
+        Globals._PairCount_.update(saved[9])
+        Globals._Affected_.clear()
+        for tid in [tid for tid, trade in Globals._Trades_.items() if trade.get("client_id") == CLIENT]:
+            del Globals._Trades_[tid]
+        _cleanup("EVT_GBP")
+
+
+if __name__ == "__main__":
+    results = [
+        test_slot_prepared_before_release(),
+        test_release_uses_prepared_branch(),
+    ]
+    sys.exit(0 if all(results) else 1)